@@ -0,0 +1,169 @@
+"""企業情報データソース (SQLite) の読み出し方式のベンチマーク。
+
+ロールの異なる多数の呼び出し元 (public / user / auditor / admin が混在) が同時に
+企業情報を要求する状況で、次の 3 つの方式の処理時間とクエリ数を比較します。
+
+- connect_per_call: 呼び出しごとに接続を開き、全列を読み出してから Python 側で絞り込む方式
+- pooled_projection: 接続プールを再利用し、アクセスレベルで参照できる列だけを SELECT する方式
+- pooled_cached: pooled_projection の結果をアクセスレベルごとにキャッシュする方式
+  (`get_company_info` が使用)
+
+`connect_per_call` 以外は、下位のレベルの呼び出しで上位のレベルの列を読み出しません。
+
+実行方法:
+    python benchmarks/bench_company_data.py [--callers 200] [--calls 50] [--pool-size 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from common.company_data import (  # noqa: E402
+    ACCESS_LEVELS,
+    COMPANY_COLUMNS,
+    TABLE_NAME,
+    SQLiteCompanyDataSource,
+    build_sections,
+    columns_for_level,
+)
+from common.ttl_cache import TTLCache  # noqa: E402
+
+
+class Counter:
+    """実行したクエリ数と、アクセスレベルを超えて読み出した列数。"""
+
+    queries = 0
+    restricted_columns_read = 0
+
+
+def connect_per_call(path: str, counter: Counter) -> Callable[[str], Dict[str, Any]]:
+    """従来方式: 呼び出しごとに接続し、全列を読み出して Python 側で絞り込む。"""
+
+    def load(level: str) -> Dict[str, Any]:
+        connection = sqlite3.connect(path)
+        try:
+            row = connection.execute(f"SELECT * FROM {TABLE_NAME} LIMIT 1").fetchone()
+        finally:
+            connection.close()
+        counter.queries += 1
+        allowed = columns_for_level(level)
+        counter.restricted_columns_read += len(COMPANY_COLUMNS) - len(allowed)
+        values = {
+            column.name: json.loads(value) if column.is_json else value
+            for column, value in zip(COMPANY_COLUMNS, row)
+        }
+        return build_sections(allowed, values)
+
+    return load
+
+
+async def run(
+    label: str,
+    call: Callable[[str], Awaitable[Dict[str, Any]]],
+    callers: int,
+    calls: int,
+    counter: Counter,
+) -> float:
+    rng = random.Random(0)
+    plans = [[rng.choice(ACCESS_LEVELS) for _ in range(calls)] for _ in range(callers)]
+
+    async def caller(levels: list) -> None:
+        for level in levels:
+            await call(level)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(levels) for levels in plans))
+    elapsed = time.perf_counter() - started
+
+    total = callers * calls
+    print(
+        f"  {label:<18} wall={elapsed:7.3f}s per_call={elapsed / total * 1e6:8.1f}us "
+        f"queries={counter.queries:6d} restricted_columns_read={counter.restricted_columns_read}"
+    )
+    return elapsed
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "company.db")
+        source = SQLiteCompanyDataSource(
+            path, pool_size=args.pool_size, seed_sample=True
+        )
+
+        baseline_counter = Counter()
+        baseline_load = connect_per_call(path, baseline_counter)
+
+        pooled_counter = Counter()
+
+        def pooled_load(level: str) -> Dict[str, Any]:
+            pooled_counter.queries += 1
+            return source.fetch_sections(level)
+
+        cached_counter = Counter()
+        cache: TTLCache[Dict[str, Any]] = TTLCache(ttl_seconds=60)
+
+        def cached_fetch(level: str) -> Dict[str, Any]:
+            cached_counter.queries += 1
+            return source.fetch_sections(level)
+
+        for level in ACCESS_LEVELS:
+            assert baseline_load(level) == source.fetch_sections(level)
+        baseline_counter.queries = baseline_counter.restricted_columns_read = 0
+
+        print(
+            f"callers: {args.callers} calls_per_caller: {args.calls} "
+            f"pool_size: {args.pool_size}"
+        )
+        baseline = await run(
+            "connect_per_call",
+            lambda level: asyncio.to_thread(baseline_load, level),
+            args.callers,
+            args.calls,
+            baseline_counter,
+        )
+        pooled = await run(
+            "pooled_projection",
+            lambda level: asyncio.to_thread(pooled_load, level),
+            args.callers,
+            args.calls,
+            pooled_counter,
+        )
+        cached = await run(
+            "pooled_cached",
+            lambda level: cache.get_or_load(
+                level, lambda: asyncio.to_thread(cached_fetch, level)
+            ),
+            args.callers,
+            args.calls,
+            cached_counter,
+        )
+        print(
+            f"  speedup: pooled_projection {baseline / pooled:.1f}x, "
+            f"pooled_cached {baseline / cached:.1f}x"
+        )
+        print(f"  pool connections created: {source.pool.created}")
+        print(f"  cache: {cache.stats()}")
+        source.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=4)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
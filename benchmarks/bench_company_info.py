@@ -0,0 +1,136 @@
+"""`get_company_info` の結果構築とシリアライズのベンチマーク。
+
+アクセスレベル (public / user / auditor / admin) ごとに、次の 2 つの方式の
+1 呼び出しあたりの処理時間 (CPU) とピークメモリ (tracemalloc) を比較します。
+
+- per_call_build: 呼び出しごとに入れ子の dict をリテラルから組み立て、FastMCP が
+  テキスト (JSON) と structured_content の両方にシリアライズする従来方式
+- precomputed: 事前構築したレベルごとの JSON 文字列にロールだけを差し込み、
+  テキストのみを返す方式 (`get_company_info` がキャッシュ済みのペイロードに対して行う処理)
+
+データソースからの読み出しとキャッシュは `bench_company_data.py` で計測します。
+
+実行方法:
+    python benchmarks/bench_company_info.py [--iterations 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from fastmcp.tools.tool import ToolResult  # noqa: E402
+from mcp.types import TextContent  # noqa: E402
+
+from common.company_data import ACCESS_LEVELS, StaticCompanyDataSource  # noqa: E402
+from tools.role_based_info import (  # noqa: E402
+    _build_company_payload,
+    _to_json,
+    company_access_level,
+)
+
+ROLE_SETS = {
+    "public": [],
+    "user": ["User"],
+    "auditor": ["Auditor", "User"],
+    "admin": ["Admin", "User"],
+}
+
+
+def _literal(value: Any) -> Callable[[], Any]:
+    """`value` を毎回新しいオブジェクトとして組み立てる関数を返す (dict リテラルと同じ処理)。"""
+    code = compile(repr(value), "<literal>", "eval")
+    return lambda: eval(code)
+
+
+_source = StaticCompanyDataSource()
+_COMPANY_PAYLOADS = {
+    level: _build_company_payload(level, _source.fetch_sections(level))
+    for level in ACCESS_LEVELS
+}
+_admin_sections = _source.fetch_sections("admin")
+
+_public_sections = _literal(_source.fetch_sections("public"))
+_public_info = _literal(_admin_sections["public_info"])
+_audit_info = _literal(_admin_sections["audit_info"])
+_confidential_info = _literal(_admin_sections["confidential_info"])
+
+
+def per_call_build(roles: List[str]) -> ToolResult:
+    """従来の実装: 呼び出しごとに dict を構築し、FastMCP がシリアライズする。"""
+    result: Dict[str, Any] = {"access_level": "public", "user_roles": roles}
+    result.update(_public_sections())
+    if roles:
+        result["access_level"] = "user"
+        result["public_info"] = _public_info()
+    if "Auditor" in roles or "Admin" in roles:
+        result["access_level"] = "auditor"
+        result["audit_info"] = _audit_info()
+    if "Admin" in roles:
+        result["access_level"] = "admin"
+        result["confidential_info"] = _confidential_info()
+    return ToolResult(content=result, structured_content=result)
+
+
+def precomputed(roles: List[str]) -> ToolResult:
+    """現在の実装: 事前構築した JSON 文字列にロールを差し込む。"""
+    level = company_access_level(roles)
+    payload = _COMPANY_PAYLOADS[level]
+    return ToolResult(
+        content=[
+            TextContent(
+                type="text",
+                text=payload.json_prefix + _to_json(roles) + payload.json_suffix,
+            )
+        ]
+    )
+
+
+def _measure(label: str, func: Callable[[], Any], iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    cpu = time.process_time() - started
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"  {label:<15} cpu={cpu:7.3f}s per_call={cpu / iterations * 1e6:7.1f}us "
+        f"peak_memory={peak / 1024:6.1f} KiB"
+    )
+    return cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"iterations: {args.iterations}")
+    for level, roles in ROLE_SETS.items():
+        legacy = per_call_build(roles)
+        current = precomputed(roles)
+        assert legacy.content[0].text == current.content[0].text
+        assert json.loads(current.content[0].text) == legacy.structured_content
+
+        print(f"{level}:")
+        baseline = _measure("per_call_build", lambda: per_call_build(roles), args.iterations)
+        optimized = _measure("precomputed", lambda: precomputed(roles), args.iterations)
+        print(f"  speedup: {baseline / optimized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""ComputeManagementClient の構築コストと再利用のベンチマーク。
+
+リクエストごとに `ComputeManagementClient` を構築する従来方式と、
+`use_compute_client` によるレジストリ経由の再利用 (貸し出し) を比較します。
+ネットワークアクセスは発生しません (クライアントの構築のみを計測します)。
+
+実行方法:
+    python benchmarks/bench_compute_client_reuse.py [--iterations 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from azure.core.credentials import AccessToken  # noqa: E402
+
+from tools import azure_vm  # noqa: E402
+
+
+class StaticCredential:
+    """ネットワークにアクセスしないダミーの TokenCredential。"""
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        return AccessToken("dummy", int(time.time()) + 3600)
+
+    def update_user_assertion(self, user_assertion: str) -> None:
+        pass
+
+
+def _measure(label: str, iterations: int, func: Callable[[int], Any]) -> None:
+    started = time.perf_counter()
+    for i in range(iterations):
+        func(i)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<12} total={elapsed * 1000:9.1f} ms "
+        f"per_call={elapsed / iterations * 1_000_000:9.1f} us"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    credential = StaticCredential()
+    subscription_id = "00000000-0000-0000-0000-000000000000"
+
+    def construct(_: int) -> None:
+        client = azure_vm.create_compute_client(credential, subscription_id)
+        client.close()
+
+    def reuse(i: int) -> None:
+        with azure_vm.use_compute_client(
+            f"user-token-{i}", ("tid", "oid"), subscription_id
+        ):
+            pass
+
+    with patch.object(azure_vm, "build_obo_credential", lambda *args: credential):
+        _measure("construct", args.iterations, construct)
+        _measure("registry", args.iterations, reuse)
+
+    registry = azure_vm._compute_clients
+    print(f"registry: created={registry.created} reused={registry.reused}")
+    registry.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Graph クライアントスタックの構築回数と接続再利用のベンチマーク。
+
+ローカルに Graph の代替 HTTP サーバー (`/v1.0/me` を返す) を起動し、
+次の 2 つの方式で同数のリクエストを送信します。
+
+- per_call: 呼び出しごとに `GraphServiceClient(credentials=...)` を構築する従来方式
+- shared: `get_graph_service_client()` の共有スタックに credential を差し込む方式
+
+それぞれについて、処理時間・httpx.AsyncClient の構築回数・
+サーバーが受け付けた TCP 接続数を表示します。
+
+実行方法:
+    python benchmarks/bench_graph_client_reuse.py [--requests 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx  # noqa: E402
+from azure.core.credentials import AccessToken  # noqa: E402
+from msgraph import GraphServiceClient  # noqa: E402
+
+from common.graph_client import (  # noqa: E402
+    GRAPH_SCOPE,
+    get_graph_service_client,
+    use_graph_credential,
+)
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+PROFILE = json.dumps(
+    {"id": "00000000-0000-0000-0000-000000000001", "displayName": "Bench User"}
+).encode("utf-8")
+
+
+class CountingServer(ThreadingHTTPServer):
+    """受け付けた TCP 接続数を数える HTTP サーバー。"""
+
+    daemon_threads = True
+    connections = 0
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class GraphStandInHandler(BaseHTTPRequestHandler):
+    """`/v1.0/me` に固定のプロフィールを返す Keep-Alive 対応ハンドラ。"""
+
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文を 1 回の送信にまとめ、遅延 ACK による待ちを避ける
+    wbufsize = 64 * 1024
+
+    def do_GET(self) -> None:  # noqa: N802
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PROFILE)))
+        self.end_headers()
+        self.wfile.write(PROFILE)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class StaticCredential:
+    """ネットワークにアクセスしないダミーの credential。"""
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        return AccessToken("dummy", int(time.time()) + 3600)
+
+
+def _point_to(client: GraphServiceClient, base_url: str) -> None:
+    client.request_adapter.base_url = base_url
+    client.path_parameters["base_url"] = base_url
+
+
+async def _run(
+    label: str,
+    server: CountingServer,
+    requests: int,
+    call: Callable[[], Awaitable[Any]],
+) -> None:
+    server.connections = 0
+    created = 0
+    original_init = httpx.AsyncClient.__init__
+
+    def counting_init(self: httpx.AsyncClient, *args: Any, **kwargs: Any) -> None:
+        nonlocal created
+        created += 1
+        original_init(self, *args, **kwargs)
+
+    with patch.object(httpx.AsyncClient, "__init__", counting_init):
+        started = time.perf_counter()
+        for _ in range(requests):
+            await call()
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"{label:<9} total={elapsed * 1000:8.1f} ms "
+        f"per_request={elapsed / requests * 1000:6.2f} ms "
+        f"http_clients_created={created:4d} tcp_connections={server.connections:4d}"
+    )
+
+
+async def main_async(requests: int) -> None:
+    server = CountingServer(("127.0.0.1", 0), GraphStandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1.0"
+    credential = StaticCredential()
+
+    async def per_call() -> None:
+        client = GraphServiceClient(credentials=credential, scopes=[GRAPH_SCOPE])
+        _point_to(client, base_url)
+        await client.me.get()
+
+    shared_client = get_graph_service_client()
+    _point_to(shared_client, base_url)
+
+    async def shared() -> None:
+        with use_graph_credential(credential):
+            await get_graph_service_client().me.get()
+
+    try:
+        await _run("per_call", server, requests, per_call)
+        await _run("shared", server, requests, shared)
+    finally:
+        server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Graph のユーザーオブジェクトを dict に変換する方式のベンチマーク。
+
+大きめの `/me` レスポンス (拡張属性や複数値プロパティを含む合成データ) を用いて、
+次の 2 つの方式の処理時間 (CPU) とピークメモリ (tracemalloc) を比較します。
+
+- kiota_round_trip: Kiota モデルにデシリアライズし、JsonSerializationWriter で
+  JSON バイト列へ書き出してから json.loads で dict に戻す従来方式
+- raw_passthrough: Kiota モデルを経由せず、レスポンス本文を json.loads する方式
+  (`get_graph_me` / `get_graph_me_with_select_query` が使用)
+
+実行方法:
+    python benchmarks/bench_graph_serialize.py [--iterations 500] [--extensions 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from kiota_serialization_json.json_parse_node_factory import (  # noqa: E402
+    JsonParseNodeFactory,
+)
+from kiota_serialization_json.json_serialization_writer import (  # noqa: E402
+    JsonSerializationWriter,
+)
+from msgraph.generated.models.user import User  # noqa: E402
+
+_parse_node_factory = JsonParseNodeFactory()
+
+
+def build_user_payload(extensions: int) -> bytes:
+    """拡張属性を `extensions` 個含む合成の `/me` レスポンス本文を生成する。"""
+    user: Dict[str, Any] = {
+        "@odata.context": "https://graph.microsoft.com/v1.0/$metadata#users/$entity",
+        "id": "00000000-0000-0000-0000-000000000001",
+        "displayName": "山田 太郎",
+        "givenName": "太郎",
+        "surname": "山田",
+        "mail": "taro.yamada@contoso.com",
+        "userPrincipalName": "taro.yamada@contoso.com",
+        "jobTitle": "Senior Engineer",
+        "department": "Engineering",
+        "officeLocation": "Tokyo Office",
+        "preferredLanguage": "ja-JP",
+        "accountEnabled": True,
+        "createdDateTime": "2021-04-01T09:00:00Z",
+        "businessPhones": [f"+81 3 0000 {i:04d}" for i in range(5)],
+        "otherMails": [f"alias{i}@contoso.com" for i in range(20)],
+        "proxyAddresses": [f"smtp:alias{i}@contoso.com" for i in range(50)],
+        "assignedLicenses": [
+            {"skuId": f"00000000-0000-0000-0000-{i:012d}", "disabledPlans": []}
+            for i in range(10)
+        ],
+    }
+    for i in range(extensions):
+        user[f"extension_0123456789abcdef_attribute{i}"] = f"value-{i}-" + "x" * 40
+    return json.dumps(user).encode("utf-8")
+
+
+def parse_user(payload: bytes) -> User:
+    """レスポンス本文を Kiota の User モデルにデシリアライズする (SDK と同じ処理)。"""
+    root = _parse_node_factory.get_root_parse_node("application/json", payload)
+    return root.get_object_value(User)
+
+
+def round_trip(model: Any) -> Dict[str, Any]:
+    """従来の Kiota モデルから dict への変換 (JSON バイト列を経由する往復)。"""
+    writer = JsonSerializationWriter()
+    writer.write_object_value(None, model)
+    return json.loads(writer.get_serialized_content().decode("utf-8"))
+
+
+def _measure(label: str, func: Callable[[], Any], iterations: int) -> None:
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    cpu = time.process_time() - started
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{label:<17} cpu={cpu:7.3f}s per_call={cpu / iterations * 1e6:8.1f}us "
+        f"peak_memory={peak / 1024:8.1f} KiB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--extensions", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = build_user_payload(args.extensions)
+    print(f"Payload: {len(payload) / 1024:.1f} KiB, iterations: {args.iterations}")
+
+    _measure("kiota_round_trip", lambda: round_trip(parse_user(payload)), args.iterations)
+    _measure("raw_passthrough", lambda: json.loads(payload), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""サーバーの起動時間 (待ち受け開始まで) とメモリ使用量のベンチマーク。
+
+`src/main.py` と同じ順序でツールを登録して HTTP サーバーを起動する子プロセスを
+次の方式で起動し、ポートが接続を受け付けるまでの時間 (time-to-listen) と、その時点および
+待機後の RSS を比較します。Entra ID への接続 (JWKS の取得) は行いません。
+
+- eager: すべてのツールモジュールを起動時に import する方式 (`TOOLS_LAZY_IMPORT=false`)
+- lazy: シグネチャのみで登録し、最初の呼び出しまで import しない方式
+- lazy_warmup: lazy に加えて、待ち受け中にバックグラウンドで import する方式 (既定)
+
+RSS は Linux の `/proc/<pid>/status` から取得します。
+
+実行方法:
+    python benchmarks/bench_startup.py [--runs 3] [--settle 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+CHILD = """
+import sys
+from fastmcp import FastMCP
+from tools import register_all_tools
+from common.tool_loader import start_tool_warmup
+
+mcp = FastMCP("bench-startup")
+register_all_tools(mcp, lazy={lazy})
+if {warmup}:
+    start_tool_warmup()
+mcp.run(transport="http", host="127.0.0.1", port={port}, show_banner=False,
+        log_level="warning")
+"""
+
+MODES = {
+    "eager": (False, False),
+    "lazy": (True, False),
+    "lazy_warmup": (True, True),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mib(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def run_once(mode: str, settle: float, timeout: float) -> Dict[str, Optional[float]]:
+    lazy, warmup = MODES[mode]
+    port = free_port()
+    code = CHILD.format(lazy=lazy, warmup=warmup, port=port)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=SRC,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode}: server exited with {process.returncode}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"{mode}: server did not listen within {timeout}s")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.05):
+                    break
+            except OSError:
+                time.sleep(0.005)
+        listen = time.perf_counter() - started
+        rss_listen = rss_mib(process.pid)
+        time.sleep(settle)
+        return {
+            "time_to_listen": listen,
+            "rss_listen": rss_listen,
+            "rss_settled": rss_mib(process.pid),
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--settle", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"runs: {args.runs} settle: {args.settle}s (median)")
+    results: Dict[str, List[Dict[str, Optional[float]]]] = {}
+    for mode in MODES:
+        results[mode] = [
+            run_once(mode, args.settle, args.timeout) for _ in range(args.runs)
+        ]
+
+    def median(mode: str, key: str) -> float:
+        values = [r[key] for r in results[mode] if r[key] is not None]
+        return statistics.median(values) if values else float("nan")
+
+    for mode in MODES:
+        print(
+            f"  {mode:<12} time_to_listen={median(mode, 'time_to_listen'):6.3f}s "
+            f"rss_at_listen={median(mode, 'rss_listen'):7.1f}MiB "
+            f"rss_after_settle={median(mode, 'rss_settled'):7.1f}MiB"
+        )
+    eager = median("eager", "time_to_listen")
+    lazy = median("lazy", "time_to_listen")
+    print(f"  time_to_listen saved by lazy import: {eager - lazy:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""検証済みトークン 1 万件あたりのメモリ使用量のベンチマーク。
+
+多数のセッションの検証済みトークン (`AccessToken` と `UserContext`) を保持する状況で、
+次の 2 つの方式が保持するメモリ量を tracemalloc で比較します。生のトークン文字列は
+OBO のユーザーアサーションとしてどちらの方式でも必要なため、計測の対象外です。
+
+- dict_claims: デコードしたクレーム辞書をそのまま保持する方式 (従来の `verify_token`)
+- compact_claims: `CompactClaims` で必要なクレームだけを保持し、共通する値を共有する方式
+
+あわせて、`get_user_info` が全クレームの辞書を復元する時間を表示します。
+
+実行方法:
+    python benchmarks/bench_token_memory.py [--tokens 10000] [--tenants 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastmcp.server.auth.auth import AccessToken  # noqa: E402
+
+from auth.claims_helpers import (  # noqa: E402
+    CompactClaims,
+    EntraAccessToken,
+    UserContext,
+    normalize_claim_values,
+)
+
+ROLE_SETS = [[], ["User"], ["Auditor", "User"], ["Admin", "User"]]
+SCOPE_SETS = ["access_as_user", "access_as_user user.read", "access_as_user files.read"]
+
+
+def make_tokens(count: int, tenants: int) -> List[Tuple[str, str]]:
+    """Entra ID の v2.0 アクセストークンに近いクレームを持つ (トークン, ペイロード) を生成する。"""
+    rng = random.Random(0)
+    tenant_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(tenants)]
+    client_ids = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(3)]
+    header = base64.urlsafe_b64encode(b'{"alg":"RS256","typ":"JWT"}').rstrip(b"=")
+    tokens = []
+    for index in range(count):
+        tid = rng.choice(tenant_ids)
+        oid = str(uuid.UUID(int=rng.getrandbits(128)))
+        claims: Dict[str, Any] = {
+            "aud": "api://entra-id-protected-mcp-server",
+            "iss": f"https://login.microsoftonline.com/{tid}/v2.0",
+            "iat": 1700000000 + index,
+            "nbf": 1700000000 + index,
+            "exp": 1700003600 + index,
+            "aio": base64.b64encode(rng.randbytes(96)).decode(),
+            "azp": rng.choice(client_ids),
+            "azpacr": "1",
+            "name": f"User {index}",
+            "oid": oid,
+            "preferred_username": f"user{index}@contoso.com",
+            "rh": base64.b64encode(rng.randbytes(40)).decode(),
+            "roles": rng.choice(ROLE_SETS),
+            "scp": rng.choice(SCOPE_SETS),
+            "sid": str(uuid.UUID(int=rng.getrandbits(128))),
+            "sub": base64.urlsafe_b64encode(rng.randbytes(32)).decode().rstrip("="),
+            "tid": tid,
+            "uti": base64.urlsafe_b64encode(rng.randbytes(16)).decode().rstrip("="),
+            "ver": "2.0",
+        }
+        payload = json.dumps(claims, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(payload.encode()).rstrip(b"=")
+        signature = base64.urlsafe_b64encode(rng.randbytes(256)).rstrip(b"=")
+        token = b".".join((header, encoded, signature)).decode()
+        tokens.append((token, payload))
+    return tokens
+
+
+def dict_claims(token: str, payload: str) -> AccessToken:
+    """従来方式: デコードしたクレーム辞書を `AccessToken` と `UserContext` で保持する。"""
+    claims = json.loads(payload)
+    scopes = normalize_claim_values(claims.get("scp", ""))
+    client_id = claims.get("azp") or claims.get("appid")
+    access_token = EntraAccessToken(
+        token=token, claims=claims, scopes=scopes, client_id=client_id
+    )
+    access_token._user_context = UserContext(
+        claims, token=token, client_id=client_id, scopes=scopes
+    )
+    return access_token
+
+
+def compact_claims(token: str, payload: str) -> AccessToken:
+    """`verify_token` と同じく `CompactClaims` で保持する。"""
+    claims = json.loads(payload)
+    scopes = normalize_claim_values(claims.get("scp", ""))
+    compact = CompactClaims(claims, token)
+    client_id = compact.get("azp") or compact.get("appid")
+    access_token = EntraAccessToken(
+        token=token, claims=compact, scopes=scopes, client_id=client_id
+    )
+    access_token._user_context = UserContext(
+        compact, token=token, client_id=client_id, scopes=scopes
+    )
+    return access_token
+
+
+def measure(
+    label: str,
+    build: Callable[[str, str], AccessToken],
+    tokens: List[Tuple[str, str]],
+) -> Tuple[int, List[AccessToken]]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    retained = [build(token, payload) for token, payload in tokens]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_10k = current / len(tokens) * 10_000
+    print(
+        f"  {label:<15} retained={current / 1024 / 1024:7.2f}MiB "
+        f"per_10k_tokens={per_10k / 1024 / 1024:7.2f}MiB "
+        f"per_token={current / len(tokens):7.0f}B build={elapsed:6.3f}s"
+    )
+    return current, retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=10_000)
+    parser.add_argument("--tenants", type=int, default=3)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.tokens, args.tenants)
+    print(f"tokens: {args.tokens} tenants: {args.tenants}")
+
+    baseline, baseline_tokens = measure("dict_claims", dict_claims, tokens)
+    del baseline_tokens
+    compact, compact_tokens = measure("compact_claims", compact_claims, tokens)
+    print(f"  reduction: {(1 - compact / baseline) * 100:.1f}%")
+
+    for (_, payload), access_token in zip(tokens[:100], compact_tokens):
+        assert access_token.user_context.full_claims() == json.loads(payload)
+
+    started = time.perf_counter()
+    for access_token in compact_tokens:
+        access_token.user_context.full_claims()
+    elapsed = time.perf_counter() - started
+    print(f"  full_claims() per call: {elapsed / len(compact_tokens) * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""VM インベントリのエクスポート方式のベンチマーク。
+
+100,000 台の VM を返す合成フィード (ARM の一覧 API の代替) を用いて、
+次の 2 つの方式の処理時間とピークメモリ (tracemalloc) を比較します。
+
+- tool_result: 全件をリスト化し、ツール結果として JSON シリアライズする従来方式
+- ndjson_export: `export_vm_records` でページを逐次ファイルに書き出す方式
+
+実行方法:
+    python benchmarks/bench_vm_export.py [--count 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Iterator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from tools.azure_vm import iter_vm_records  # noqa: E402
+from tools.azure_vm_export import export_vm_records  # noqa: E402
+
+
+class SyntheticVirtualMachines:
+    """`virtual_machines.list_all()` の代わりに合成 VM を遅延生成するフィード。"""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+
+    def list_all(self, **kwargs: Any) -> Iterator[SimpleNamespace]:
+        for i in range(self.count):
+            yield SimpleNamespace(
+                id=(
+                    f"/subscriptions/00000000-0000-0000-0000-{i % 500:012d}"
+                    f"/resourceGroups/rg-{i % 200}/providers/"
+                    f"Microsoft.Compute/virtualMachines/vm-{i:06d}"
+                ),
+                name=f"vm-{i:06d}",
+                location="japaneast" if i % 2 else "eastus",
+                type="Microsoft.Compute/virtualMachines",
+                tags={"env": "prod" if i % 3 else "dev", "owner": f"team-{i % 40}"},
+                instance_view=None,
+            )
+
+
+def _measure(label: str, func: Callable[[], Any]) -> None:
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<15} time={elapsed:7.2f}s peak_memory={peak / 1024 / 1024:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    client = SimpleNamespace(virtual_machines=SyntheticVirtualMachines(args.count))
+    print(f"Synthetic VMs: {args.count}")
+
+    def tool_result() -> None:
+        vms = list(iter_vm_records(client))
+        json.dumps(vms)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+
+        def ndjson_export() -> None:
+            export_vm_records(iter_vm_records(client), output_dir, "bench")
+
+        _measure("tool_result", tool_result)
+        _measure("ndjson_export", ndjson_export)
+
+
+if __name__ == "__main__":
+    main()
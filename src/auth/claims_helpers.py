@@ -2,21 +2,388 @@
 
 このモジュールは、FastMCP の依存性から取得したアクセストークンを
 解析し、ユーザー情報やロール情報を抽出する汎用ヘルパーを提供します。
+
+ツールは `get_current_user()` で `UserContext` を取得します。`UserContext` はトークンの
+検証時に 1 度だけ構築され (`EntraAccessToken`)、ロールとスコープを正規化済みの
+frozenset として保持するため、ツール呼び出しごとにクレームを解析し直しません。
+
+検証済みトークンのクレームは `CompactClaims` として保持します。ツールが使用するクレームだけを
+スロットに持ち、テナント ID・発行者・スコープ・ロールなど多くのトークンで共通する値は
+共有 (インターン) します。すべてのクレームを含む辞書は、必要になった時点でトークンの
+ペイロードから復元するため、トークンごとにデコード済みのクレーム辞書を保持しません。
 """
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+import base64
+import json
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
+from fastmcp.server.auth.auth import AccessToken
 from fastmcp.server.dependencies import get_access_token
+from pydantic import Field, PrivateAttr, SkipValidation
 
 if TYPE_CHECKING:
     from fastmcp.server.dependencies import JWTContext
 
 
+def normalize_claim_values(
+    value: str | list[str] | tuple[str, ...] | set[str] | None,
+) -> list[str]:
+    """クレーム値を小文字の文字列リストへ正規化する (順序を保ち、重複を除去)。"""
+    if not value:
+        return []
+
+    if isinstance(value, str):
+        candidates = value.replace(",", " ").split()
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        candidates = [str(item) for item in value]
+    else:
+        candidates = [str(value)]
+
+    normalized: list[str] = []
+    seen: set[str] = set()
+    for item in candidates:
+        clean = item.strip().lower()
+        if clean and clean not in seen:
+            seen.add(clean)
+            normalized.append(clean)
+    return normalized
+
+
+# 共有する値の上限 (ロールやグループの組み合わせが想定外に多い場合でも無制限に増えない)
+_INTERN_LIMIT = 4096
+_interned: Dict[Hashable, Any] = {}
+
+
+def _intern(value: Any) -> Any:
+    """多くのトークンで共通するクレーム値を共有する。
+
+    文字列は `sys.intern`、リスト・タプルはタプル、集合は frozenset に変換した上で、
+    同じ内容のものは同じオブジェクトを返します。それ以外の値はそのまま返します。
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, (list, tuple)):
+        key: Hashable = tuple(_intern(item) for item in value)
+    elif isinstance(value, (set, frozenset)):
+        key = frozenset(_intern(item) for item in value)
+    else:
+        return value
+    shared = _interned.get(key)
+    if shared is None:
+        if len(_interned) >= _INTERN_LIMIT:
+            return key
+        shared = _interned.setdefault(key, key)
+    return shared
+
+
+def _decode_payload(token: str) -> Dict[str, Any]:
+    """JWT のペイロードを辞書として返す (署名は検証済みであることが前提)。"""
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))
+
+
+class CompactClaims(Mapping[str, Any]):
+    """検証済みトークンのクレームを省メモリに保持する読み取り専用のマッピング。
+
+    ツールが使用するクレーム (`HOT_CLAIMS`) はスロットに保持し、テナント ID・発行者・
+    オーディエンス・クライアント ID・スコープ・ロール・グループは共有 (インターン) します。
+    それ以外のクレームは、最初に参照された時点でトークンのペイロードを 1 度だけ復元して
+    スロットに保持します (トークンが JWT 形式でない場合は、構築時に残りのクレームを
+    辞書として保持します)。ツールが使用するクレームだけを参照する限り、復元は行いません。
+
+    `roles` / `groups` などの配列クレームはタプルとして返します。元の形式の辞書が
+    必要な場合は `to_dict()` を使用してください。
+    """
+
+    HOT_CLAIMS = (
+        "sub",
+        "oid",
+        "tid",
+        "iss",
+        "aud",
+        "azp",
+        "appid",
+        "scp",
+        "roles",
+        "groups",
+        "name",
+        "preferred_username",
+        "upn",
+        "exp",
+        "_claim_names",
+    )
+    # 多くのトークンで同じ値になるため共有するクレーム
+    SHARED_CLAIMS = frozenset(
+        {"tid", "iss", "aud", "azp", "appid", "scp", "roles", "groups"}
+    )
+
+    __slots__ = HOT_CLAIMS + ("_token", "_rest")
+
+    def __init__(self, claims: Mapping[str, Any], token: str = "") -> None:
+        """
+        Args:
+            claims: 検証済みのクレーム
+            token: クレームの元になった生のトークン (残りのクレームの復元に使用)
+        """
+        for name in self.HOT_CLAIMS:
+            value = claims.get(name, _MISSING)
+            if value is not _MISSING and name in self.SHARED_CLAIMS:
+                value = _intern(value)
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_token", token)
+        rest = None
+        if token.count(".") != 2:
+            rest = {k: v for k, v in claims.items() if k not in self.HOT_CLAIMS}
+        object.__setattr__(self, "_rest", rest)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CompactClaims is immutable")
+
+    def _rest_claims(self) -> Dict[str, Any]:
+        """`HOT_CLAIMS` 以外のクレームを返す (初回のみペイロードを復元して保持する)。"""
+        rest = self._rest
+        if rest is None:
+            rest = {
+                k: v
+                for k, v in _decode_payload(self._token).items()
+                if k not in _HOT_CLAIM_SET
+            }
+            object.__setattr__(self, "_rest", rest)
+        return rest
+
+    def _hot_items(self) -> Iterator[Tuple[str, Any]]:
+        for name in self.HOT_CLAIMS:
+            value = getattr(self, name)
+            if value is not _MISSING:
+                yield name, value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _HOT_CLAIM_SET:
+            value = getattr(self, key)
+            if value is _MISSING:
+                raise KeyError(key)
+            return value
+        return self._rest_claims()[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in _HOT_CLAIM_SET:
+            return getattr(self, key) is not _MISSING  # type: ignore[arg-type]
+        return key in self._rest_claims()
+
+    def __iter__(self) -> Iterator[str]:
+        for name, _ in self._hot_items():
+            yield name
+        yield from self._rest_claims()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._hot_items()) + len(self._rest_claims())
+
+    def __repr__(self) -> str:
+        return f"CompactClaims(sub={getattr(self, 'sub')!r}, tid={getattr(self, 'tid')!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """すべてのクレームを含む新しい辞書を返す。"""
+        claims = dict(self._hot_items())
+        for name in ("roles", "groups", "aud"):
+            if isinstance(claims.get(name), tuple):
+                claims[name] = list(claims[name])
+        claims.update(self._rest_claims())
+        return claims
+
+
+_MISSING: Any = object()
+_HOT_CLAIM_SET = frozenset(CompactClaims.HOT_CLAIMS)
+
+
+class UserContext:
+    """検証済みのアクセストークンから 1 度だけ構築する、リクエスト単位のユーザー情報。
+
+    `roles` と `scopes` は小文字に正規化した frozenset で、`has_role` / `has_scope` は
+    定数時間で判定します (大文字小文字を区別しません)。属性は構築後に変更できません。
+
+    Attributes:
+        token: 生のアクセストークン (OBO のユーザーアサーション)
+        user_id: ユーザーの subject (sub クレーム)
+        object_id: ユーザーのオブジェクト ID (oid クレーム)
+        tenant_id: テナント ID (tid クレーム)
+        client_id: クライアント ID (`azp` / `appid`)
+        roles: 小文字に正規化したロールの集合
+        scopes: 小文字に正規化したスコープの集合
+        role_names: トークンに含まれる表記・順序のままのロール (表示用)
+        identity: OBO credential やキャッシュの主体キー (`credential_identity` と同じ)
+        claims: すべてのクレームを含むマッピング (読み取り専用として扱う)。
+            検証済みトークンでは `CompactClaims`
+    """
+
+    __slots__ = (
+        "token",
+        "user_id",
+        "object_id",
+        "tenant_id",
+        "client_id",
+        "roles",
+        "scopes",
+        "role_names",
+        "identity",
+        "claims",
+        "__weakref__",
+    )
+
+    token: str
+    user_id: str | None
+    object_id: str | None
+    tenant_id: str | None
+    client_id: str | None
+    roles: FrozenSet[str]
+    scopes: FrozenSet[str]
+    role_names: Tuple[str, ...]
+    identity: Hashable
+    claims: Mapping[str, Any]
+
+    def __init__(
+        self,
+        claims: Mapping[str, Any],
+        *,
+        token: str = "",
+        client_id: str | None = None,
+        scopes: Iterable[str] | str | None = None,
+        roles: Iterable[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            claims: 検証済みのクレーム
+            token: 生のアクセストークン
+            client_id: クライアント ID
+            scopes: スコープ (省略時は `scp` クレーム)。正規化済みでなくてもよい
+            roles: 正規化済みのロール (省略時は `roles` クレームから正規化)
+        """
+        raw_roles = claims.get("roles") or []
+        user_id = claims.get("sub")
+        values = {
+            "token": token,
+            "user_id": user_id,
+            "object_id": claims.get("oid"),
+            "tenant_id": claims.get("tid"),
+            "client_id": client_id,
+            "roles": _intern(
+                frozenset(
+                    roles if roles is not None else normalize_claim_values(raw_roles)
+                )
+            ),
+            "scopes": _intern(
+                frozenset(
+                    normalize_claim_values(
+                        scopes if scopes is not None else claims.get("scp", "")
+                    )
+                )
+            ),
+            "role_names": _intern(tuple(raw_roles)),
+            "identity": credential_identity(user_id, claims),
+            "claims": claims,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_access_token(cls, access_token: Any) -> UserContext:
+        """FastMCP の `AccessToken` (または互換オブジェクト) から構築する。"""
+        return cls(
+            access_token.claims,
+            token=access_token.token,
+            client_id=access_token.client_id,
+            scopes=access_token.scopes,
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("UserContext is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("UserContext is immutable")
+
+    def __repr__(self) -> str:
+        # 生のトークンはログに出さない
+        return (
+            f"UserContext(user_id={self.user_id!r}, tenant_id={self.tenant_id!r}, "
+            f"client_id={self.client_id!r}, roles={sorted(self.roles)!r}, "
+            f"scopes={sorted(self.scopes)!r})"
+        )
+
+    def full_claims(self) -> Dict[str, Any]:
+        """すべてのクレームを含む新しい辞書を返す。
+
+        `CompactClaims` の場合は、初回のみトークンのペイロードから残りのクレームを復元します。
+        """
+        if isinstance(self.claims, CompactClaims):
+            return self.claims.to_dict()
+        return dict(self.claims)
+
+    def has_role(self, role: str) -> bool:
+        """ロールを持っていれば True を返す (大文字小文字を区別しない)。"""
+        return role.lower() in self.roles
+
+    def has_scope(self, scope: str) -> bool:
+        """スコープを持っていれば True を返す (大文字小文字を区別しない)。"""
+        return scope.lower() in self.scopes
+
+
+class EntraAccessToken(AccessToken):
+    """トークン検証時に構築した `UserContext` を保持する `AccessToken`。
+
+    FastMCP はこのオブジェクトをリクエストの認証情報として保持するため、
+    `UserContext` はトークンごとに 1 度だけ構築されます。`claims` には `CompactClaims` を
+    そのまま保持できます (辞書へ変換しません)。
+    """
+
+    claims: SkipValidation[Mapping[str, Any]] = Field(default_factory=dict)
+
+    _user_context: Optional[UserContext] = PrivateAttr(default=None)
+
+    @property
+    def user_context(self) -> UserContext:
+        if self._user_context is None:
+            self._user_context = UserContext.from_access_token(self)
+        return self._user_context
+
+
+def get_current_user() -> UserContext:
+    """現在のリクエストのユーザー情報 (`UserContext`) を返す。
+
+    `EntraIDAuthProvider` が検証したトークンでは、検証時に構築済みのものを返します。
+    それ以外のトークンでは、その場でクレームから構築します。
+
+    Raises:
+        RuntimeError: リクエストにアクセストークンがない場合 (`unauthenticated`)
+    """
+    access_token = get_access_token()
+    if access_token is None:
+        raise RuntimeError("unauthenticated: no access token in the current request")
+    context = getattr(access_token, "user_context", None)
+    if isinstance(context, UserContext):
+        return context
+    return UserContext.from_access_token(access_token)
+
+
 def get_user_context() -> tuple[List[str], str | None, str | None, List[str], dict]:
     """現在のアクセストークンからユーザー関連情報をまとめて取得する。
 
+    新しいコードでは `get_current_user()` を使用してください。
+
     Returns:
         tuple containing:
             - roles (List[str]): ユーザーが持つロールのリスト
@@ -39,7 +406,7 @@ def get_access_token_and_context() -> tuple[
 ]:
     """アクセストークンとユーザーコンテキストを同時に取得する。
 
-    OBO フローなどで生のトークン文字列が必要な場合に使用します。
+    新しいコードでは `get_current_user()` (`token` 属性に生のトークン) を使用してください。
 
     Returns:
         tuple containing:
@@ -62,6 +429,9 @@ def get_access_token_and_context() -> tuple[
 def has_role(roles: List[str], required_role: str) -> bool:
     """ユーザーが指定されたロールを持っているか確認する。
 
+    ロールのリストを線形に探索し、大文字小文字を区別します。
+    `UserContext` がある場合は `UserContext.has_role` を使用してください。
+
     Args:
         roles: ユーザーが持つロールのリスト
         required_role: 要求されるロール
@@ -70,3 +440,32 @@ def has_role(roles: List[str], required_role: str) -> bool:
         ロールを持っている場合は True
     """
     return required_role in roles
+
+
+def has_groups_overage(claims: Dict[str, Any]) -> bool:
+    """グループのオーバーエイジ (超過) が発生しているか確認する。
+
+    所属グループが多すぎるユーザーのトークンには `groups` クレームが含まれず、
+    代わりに `_claim_names` / `_claim_sources` で Graph から取得するよう示されます。
+
+    Args:
+        claims: すべてのクレームを含む辞書
+
+    Returns:
+        `_claim_names` に `groups` が含まれる場合は True
+    """
+    claim_names = claims.get("_claim_names")
+    return isinstance(claim_names, dict) and "groups" in claim_names
+
+
+def credential_identity(user_id: str | None, claims: Dict[str, Any]) -> Hashable:
+    """OBO credential やキャッシュの主体 (テナントとユーザー) を表すキーを返す。
+
+    Args:
+        user_id: ユーザーの subject (sub クレーム)
+        claims: すべてのクレームを含む辞書
+
+    Returns:
+        (tid, oid) のタプル。oid がない場合は sub を使用
+    """
+    return (claims.get("tid"), claims.get("oid") or user_id)
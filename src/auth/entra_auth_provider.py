@@ -4,46 +4,38 @@ Microsoft Entra ID (旧 Azure AD) のトークンを検証する FastMCP 用認
 このモジュールは、受け取った Bearer トークン (JWT) を Entra ID の公開鍵
 (JWKS) を用いて検証し、必要なスコープまたはロールの満たし合わせを行った上で、
 FastMCP が扱える `AccessToken` オブジェクトとして返却します。
+
+JWKS の公開鍵は `kid` ごとに鍵オブジェクトへ 1 度だけ変換して保持し、トークンの検証では
+ヘッダーの `kid` に一致する鍵だけを使います (変換は `preload_signing_keys()` で事前に
+行うか、最初の検証時に行います)。
 """
 
 import logging
+from typing import Any, Dict, Optional
 
 import requests
 from fastmcp.server.auth import AuthProvider
-from fastmcp.server.auth.auth import AccessToken
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JOSEError
 from starlette.authentication import AuthenticationError
 
-from auth.obo_client import OboSettings, OnBehalfOfCredential
+from auth.claims_helpers import (
+    CompactClaims,
+    EntraAccessToken,
+    UserContext,
+    normalize_claim_values,
+)
+from auth.obo_client import (
+    ClientCredentialsCredential,
+    OboSettings,
+    OnBehalfOfCredential,
+)
 from common.config import Settings
 
 logger = logging.getLogger(__name__)
 
 
-def _normalize_claim_values(
-    value: str | list[str] | tuple[str, ...] | set[str] | None,
-) -> list[str]:
-    """クレーム値を小文字の文字列リストへ正規化する。"""
-    if not value:
-        return []
-
-    if isinstance(value, str):
-        candidates = value.replace(",", " ").split()
-    elif isinstance(value, (list, tuple, set)):
-        candidates = [str(item) for item in value]
-    else:
-        candidates = [str(value)]
-
-    normalized: list[str] = []
-    seen: set[str] = set()
-    for item in candidates:
-        clean = item.strip().lower()
-        if clean and clean not in seen:
-            seen.add(clean)
-            normalized.append(clean)
-    return normalized
-
-
 def build_obo_credential(user_jwt: str, scope: str) -> OnBehalfOfCredential:
     """現在のユーザー トークンを元に OBO 用の Credential を構築する。
 
@@ -69,6 +61,31 @@ def build_obo_credential(user_jwt: str, scope: str) -> OnBehalfOfCredential:
     return OnBehalfOfCredential(obo_settings, user_jwt)
 
 
+def build_app_credential(scope: str) -> ClientCredentialsCredential:
+    """このアプリ自身の資格情報でアプリ専用トークンを取得する Credential を構築する。
+
+    :param scope: 要求するスコープ (例: "https://graph.microsoft.com/.default")
+    :return: ClientCredentialsCredential インスタンス
+    """
+    settings = Settings()
+
+    if not settings.entra_tenant_id:
+        raise RuntimeError("ENTRA_TENANT_ID is not configured")
+    if not settings.entra_app_client_id or not settings.entra_app_client_secret:
+        raise RuntimeError(
+            "ENTRA_APP_CLIENT_ID / ENTRA_APP_CLIENT_SECRET are not configured"
+        )
+
+    return ClientCredentialsCredential(
+        OboSettings(
+            tenant_id=settings.entra_tenant_id,
+            client_id=settings.entra_app_client_id,
+            client_secret=settings.entra_app_client_secret,
+            scope=scope,
+        )
+    )
+
+
 class EntraIDAuthProvider(AuthProvider):
     """Entra ID ベースのトークン検証を行う認証プロバイダ。
 
@@ -93,8 +110,8 @@ class EntraIDAuthProvider(AuthProvider):
         self.tenant_id = tenant_id
         self.audience = audience
         self.required_scopes = []
-        self.custom_required_scopes = _normalize_claim_values(required_scopes or [])
-        self.custom_required_roles = _normalize_claim_values(required_roles or [])
+        self.custom_required_scopes = normalize_claim_values(required_scopes or [])
+        self.custom_required_roles = normalize_claim_values(required_roles or [])
         self.required_roles = self.custom_required_roles
         self.jwks_timeout = jwks_timeout
         self.jwks_max_retries = jwks_max_retries
@@ -123,30 +140,68 @@ class EntraIDAuthProvider(AuthProvider):
         except requests.RequestException as exc:
             logger.error("JWKS fetch failed: %s", str(exc))
             raise ValueError("jwks_fetch_failed") from exc
+        # kid → 変換済みの公開鍵 (None の場合は未変換)
+        self._signing_keys: Optional[Dict[str, Key]] = None
+
+    def preload_signing_keys(self) -> int:
+        """JWKS の公開鍵を鍵オブジェクトに変換して保持し、変換した鍵の数を返す。
 
-    async def verify_token(self, token: str) -> AccessToken:
+        変換できない鍵 (`kid` がない、未対応の形式など) は保持せず、その鍵で署名された
+        トークンは従来どおり JWKS 全体で検証します。
+        """
+        keys: Dict[str, Key] = {}
+        for key in self._jwks.get("keys", []):
+            kid = key.get("kid")
+            if not kid:
+                continue
+            try:
+                keys[kid] = jwk.construct(key, key.get("alg") or "RS256")
+            except JOSEError as exc:
+                logger.debug("Skipping JWKS key %s: %s", kid, exc)
+        self._signing_keys = keys
+        logger.debug(
+            "JWKS keys parsed: %d/%d", len(keys), len(self._jwks.get("keys", []))
+        )
+        return len(keys)
+
+    def _verification_key(self, token: str) -> Any:
+        """トークンヘッダーの `kid` に一致する変換済みの鍵 (なければ JWKS 全体) を返す。"""
+        keys = self._signing_keys
+        if keys is None:
+            self.preload_signing_keys()
+            keys = self._signing_keys or {}
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except JWTError:
+            # ヘッダーを解析できないトークンは jwt.decode にエラーを任せる
+            return self._jwks
+        return keys.get(kid, self._jwks)
+
+    async def verify_token(self, token: str) -> EntraAccessToken:
         """Bearer トークン (JWT) を検証し、`AccessToken` を返します。
 
         - 署名、`audience`、`issuer` を検証
         - `scp` または `roles` クレームの満たし合わせを実施 (必要な場合)
-        - 問題なければ FastMCP 互換の `AccessToken` を構築
+        - 問題なければ FastMCP 互換の `AccessToken` を構築し、正規化済みのロールと
+          スコープから `UserContext` を 1 度だけ構築して添付
+        - クレームは `CompactClaims` として保持 (全クレームの辞書は必要時に復元)
         """
         try:
             logger.debug(
                 "Verifying token: audience=%s issuer=%s", self.audience, self.issuer
             )
-            # JOSE で JWT を検証。Entra の JWKS を用いて署名確認します。
+            # JOSE で JWT を検証。Entra の JWKS (kid に一致する変換済みの鍵) で署名確認します。
             claims = jwt.decode(
                 token,
-                self._jwks,
+                self._verification_key(token),
                 algorithms=["RS256"],
                 audience=self.audience,
                 issuer=self.issuer,
             )
 
             # `scp` はスペース区切り文字列、`roles` は通常配列
-            scopes = _normalize_claim_values(claims.get("scp", ""))
-            roles = _normalize_claim_values(claims.get("roles", []))
+            scopes = normalize_claim_values(claims.get("scp", ""))
+            roles = normalize_claim_values(claims.get("roles", []))
 
             # 必須スコープまたは必須ロールのどちらか一方を満たせば成功
             if self.custom_required_scopes or self.custom_required_roles:
@@ -195,12 +250,20 @@ class EntraIDAuthProvider(AuthProvider):
                     )
 
             # FastMCP の `AccessToken` として返却 (クライアント ID は `azp`/`appid`)
-            return AccessToken(
+            # デコード済みのクレーム辞書は保持せず、共有値を使う省メモリの形式で保持する
+            compact = CompactClaims(claims, token)
+            client_id = compact.get("azp") or compact.get("appid")
+            access_token = EntraAccessToken(
                 token=token,
-                claims=claims,
+                claims=compact,
                 scopes=scopes,
-                client_id=claims.get("azp") or claims.get("appid"),
+                client_id=client_id,
+            )
+            # 検証で正規化したロール・スコープを再利用し、ツール側では解析し直さない
+            access_token._user_context = UserContext(
+                compact, token=token, client_id=client_id, scopes=scopes, roles=roles
             )
+            return access_token
         except JWTError as e:
             msg = str(e).lower()
             # 期限切れトークンもここに来る場合があるので、先に判定
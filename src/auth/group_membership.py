@@ -0,0 +1,87 @@
+"""グループのオーバーエイジ (超過) を解決するヘルパー。
+
+所属グループが多いユーザー (JWT で 200 件超) のトークンには `groups` クレームが含まれず、
+`_claim_names` / `_claim_sources` だけが入ります。この場合は Microsoft Graph の
+`/me/getMemberObjects` で推移的な所属グループを取得します。
+
+- 解決結果は (テナント, ユーザー) ごとに、トークンの有効期限 (`exp`) まで保持します。
+- 同じユーザーの同時リクエストは 1 回の Graph 呼び出しを共有します。
+- オーバーエイジでないトークンは `groups` クレームをそのまま使い、Graph を呼び出しません。
+
+ロールポリシーの `tool_groups` の判定 (`auth.tool_authorization`) で使用します。
+
+`getMemberObjects` は既定の `groupMembershipClaims` (SecurityGroup) と揃えるため
+セキュリティグループのみを対象とします。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from typing import FrozenSet, Hashable
+
+from auth.claims_helpers import get_current_user, has_groups_overage
+from common.config import Settings
+from common.graph_client import (
+    get_graph_credential,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+from common.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# トークンに exp クレームがない場合に結果を保持する秒数
+DEFAULT_TTL_SECONDS = 300.0
+
+
+# (テナント, ユーザー) ごとのオーバーエイジ解決結果
+_group_cache: TTLCache[FrozenSet[str]] = TTLCache(
+    ttl_seconds=DEFAULT_TTL_SECONDS,
+    max_entries=Settings().groups_overage_cache_max_entries,
+    clock=time.time,
+)
+
+
+async def fetch_member_groups(user_assertion: str, identity: Hashable) -> list[str]:
+    """Graph の `/me/getMemberObjects` で推移的な所属グループの ID を取得する。"""
+    credential = get_graph_credential(user_assertion, identity)
+    body = json.dumps({"securityEnabledOnly": True}).encode("utf-8")
+    with use_graph_credential(credential, identity):
+        response = await send_graph_request(
+            "POST", "/me/getMemberObjects", content=body
+        )
+    groups = graph_response_json(response).get("value") or []
+    logger.debug("Resolved %d groups via getMemberObjects", len(groups))
+    return groups
+
+
+async def get_user_groups() -> FrozenSet[str]:
+    """現在のユーザーの所属グループ ID を返す。
+
+    オーバーエイジの場合は Graph から取得し、トークンの有効期限までキャッシュします。
+    """
+    user = get_current_user()
+    claims = user.claims
+    if not has_groups_overage(claims):
+        return frozenset(claims.get("groups") or [])
+
+    identity = user.identity
+    exp = claims.get("exp")
+    expires_at = float(exp) if exp else time.time() + DEFAULT_TTL_SECONDS
+
+    async def fetch() -> FrozenSet[str]:
+        return frozenset(await fetch_member_groups(user.token, identity))
+
+    try:
+        return await _group_cache.get_or_load(identity, fetch, expires_at)
+    except Exception as e:
+        logger.error("Failed to resolve groups overage: %s", str(e))
+        raise RuntimeError(f"groups_overage_resolution_failed: {str(e)}") from e
+
+
+async def has_group(group_id: str) -> bool:
+    """現在のユーザーが指定したグループ (オブジェクト ID) に所属しているか確認する。"""
+    return group_id in await get_user_groups()
@@ -3,18 +3,31 @@ On-Behalf-Of (OBO) フロー実装モジュール。
 
 MSAL を用いて、クライアント資格情報 + ユーザーのアクセストークンを元に
 Azure リソース管理用のアクセストークンを取得します。
+
+MSAL アプリはユーザー (credential) ごとに構築されますが、HTTP セッションと
+HTTP キャッシュ (テナントの OpenID 構成などの検出結果) はプロセス内で共有します。
+これにより、新しいユーザーの最初のトークン取得でも login.microsoftonline.com への
+接続と検出のリクエストをやり直しません。
 """
 from __future__ import annotations
 
 import logging
+import threading
 import time
 from dataclasses import dataclass
+from typing import Any, Dict, Optional
 
 import msal
+import requests
 from azure.core.credentials import AccessToken, TokenCredential
 
 logger = logging.getLogger(__name__)
 
+# すべての MSAL アプリで共有する HTTP セッションと HTTP キャッシュ
+_http_session: Optional[requests.Session] = None
+_http_cache: Dict[Any, Any] = {}
+_http_session_lock = threading.Lock()
+
 
 @dataclass
 class OboSettings:
@@ -26,27 +39,66 @@ class OboSettings:
     scope: str  # 例: "https://management.azure.com/.default"
 
 
+def _get_http_session() -> requests.Session:
+    """MSAL アプリで共有する HTTP セッション (接続プール) を返す。"""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                # MSAL が既定で構築するセッションと同じく、最小限の再試行を有効にする
+                adapter = requests.adapters.HTTPAdapter(max_retries=1)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
+
+
+def build_msal_app(settings: OboSettings) -> msal.ConfidentialClientApplication:
+    """共有の HTTP セッションと HTTP キャッシュを使う MSAL アプリを構築する。
+
+    構築時にテナントの OpenID 構成を取得します (2 回目以降は HTTP キャッシュから読み出します)。
+    """
+    return msal.ConfidentialClientApplication(
+        client_id=settings.client_id,
+        client_credential=settings.client_secret,
+        authority=f"https://login.microsoftonline.com/{settings.tenant_id}",
+        http_client=_get_http_session(),
+        http_cache=_http_cache,
+    )
+
+
 class OnBehalfOfCredential(TokenCredential):
     """MSAL ベースの On-Behalf-Of フローを行う TokenCredential 実装。"""
 
     def __init__(self, settings: OboSettings, user_assertion: str) -> None:
         self._settings = settings
         self._user_assertion = user_assertion
+        self._app: msal.ConfidentialClientApplication | None = None
+
+    def update_user_assertion(self, user_assertion: str) -> None:
+        """OBO 交換に用いるユーザーのアクセストークンを差し替える。
+
+        キャッシュされた SDK クライアントを再構築せずに、同じユーザーの
+        新しいトークンで以降のトークン取得を行うために使用します。
+        """
+        self._user_assertion = user_assertion
+
+    def _get_app(self) -> msal.ConfidentialClientApplication:
+        """MSAL アプリを初回のみ構築し、トークンキャッシュとともに再利用する。"""
+        if self._app is None:
+            self._app = build_msal_app(self._settings)
+        return self._app
 
     def get_token(self, *scopes: str, **kwargs) -> AccessToken:  # type: ignore[override]
         """Azure SDK から要求されたスコープに関わらず、settings.scope でトークンを取得。"""
-        authority = f"https://login.microsoftonline.com/{self._settings.tenant_id}"
         logger.debug(
             "Starting OBO token acquisition: tenant_id=%s client_id=%s scope=%s",
             self._settings.tenant_id,
             self._settings.client_id,
             self._settings.scope,
         )
-        app = msal.ConfidentialClientApplication(
-            client_id=self._settings.client_id,
-            client_credential=self._settings.client_secret,
-            authority=authority,
-        )
+        app = self._get_app()
 
         result = app.acquire_token_on_behalf_of(
             user_assertion=self._user_assertion,
@@ -62,3 +114,35 @@ class OnBehalfOfCredential(TokenCredential):
         expires_on = int(time.time()) + expires_in
         logger.debug("OBO access token acquired; expires_in=%s", expires_in)
         return AccessToken(result["access_token"], expires_on)
+
+
+class ClientCredentialsCredential(TokenCredential):
+    """MSAL のクライアント資格情報フローでアプリ専用トークンを取得する TokenCredential 実装。
+
+    ユーザーに紐付かないバックグラウンド処理 (ディレクトリ同期など) で使用します。
+    MSAL アプリはトークンキャッシュとともに再利用します。
+    """
+
+    def __init__(self, settings: OboSettings) -> None:
+        self._settings = settings
+        self._app: msal.ConfidentialClientApplication | None = None
+
+    def _get_app(self) -> msal.ConfidentialClientApplication:
+        """MSAL アプリを初回のみ構築し、トークンキャッシュとともに再利用する。"""
+        if self._app is None:
+            self._app = build_msal_app(self._settings)
+        return self._app
+
+    def get_token(self, *scopes: str, **kwargs) -> AccessToken:  # type: ignore[override]
+        """要求されたスコープに関わらず、settings.scope でアプリ専用トークンを取得。"""
+        result = self._get_app().acquire_token_for_client(scopes=[self._settings.scope])
+
+        if "access_token" not in result:
+            error = result.get("error_description") or result.get("error") or "unknown_error"
+            logger.error("Failed to acquire app-only token: %s", error)
+            raise RuntimeError(f"client_credentials_token_acquisition_failed: {error}")
+
+        expires_in = int(result.get("expires_in", 3599))
+        expires_on = int(time.time()) + expires_in
+        logger.debug("App-only access token acquired; expires_in=%s", expires_in)
+        return AccessToken(result["access_token"], expires_on)
@@ -0,0 +1,282 @@
+"""宣言的なロールポリシー (ロール → アクセスレベル → リソース・ツール) の評価。
+
+RBAC ツールがそれぞれ `has_role` の分岐を持つと、ツール間で判定が食い違います。
+このモジュールはポリシーファイル (JSON) を 1 か所で定義し、起動時に
+ロールの組み合わせ → 判定結果 (`AccessDecision`) の表へコンパイルします。
+
+- アクセスレベルは `levels` の順に上位になり、上位のレベルは下位のレベルの
+  リソースとツールをすべて含みます。
+- ユーザーのレベルは、`roles` に定義されたロールのうち最も高いレベルです
+  (ロール名は `UserContext` と同じく大文字小文字を区別しません)。
+  定義されていないロールのみを持つ場合は `authenticated_level`、
+  ロールがない場合は `default_level` になります。
+- `tool_scopes` には、ツールの呼び出しに必要なスコープを定義できます (任意。小文字に正規化)。
+- `tool_groups` には、ツールの呼び出しに必要な所属グループ (オブジェクト ID のいずれか) を
+  定義できます (任意。小文字に正規化)。所属グループは `auth.group_membership` で解決します。
+- 判定はロールの集合をキーとした表の参照のみで行います。
+- `PolicyStore` はファイルの更新時刻とサイズを監視し、変更されていれば再起動せずに読み込み直します。
+  読み込みに失敗した場合は直前のポリシーを使い続けます。
+
+ポリシーファイルの例は `auth/rbac_policy.json` を参照してください。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from itertools import combinations
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from common.config import Settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(__file__), "rbac_policy.json")
+
+# 表を事前にすべて構築する、ポリシーに定義するロール数の上限 (2^n 通り)
+MAX_PRECOMPUTED_ROLES = 12
+
+
+class AccessDecision(NamedTuple):
+    """アクセスレベルごとに事前計算した判定結果。"""
+
+    level: str
+    rank: int
+    resources: Tuple[Dict[str, Any], ...]
+    tools: FrozenSet[str]
+
+
+class CompiledPolicy:
+    """ロールの集合から判定結果を引くためにコンパイルしたポリシー。
+
+    :raises ValueError: ポリシーの内容が不正な場合 (`invalid_rbac_policy`)
+    """
+
+    def __init__(self, document: Mapping[str, Any]) -> None:
+        levels = document.get("levels")
+        if not isinstance(levels, list) or not levels or len(set(levels)) != len(levels):
+            raise ValueError(
+                "invalid_rbac_policy: 'levels' must be a non-empty list of unique names"
+            )
+        self.levels: Tuple[str, ...] = tuple(str(level) for level in levels)
+        self._rank = {level: index for index, level in enumerate(self.levels)}
+
+        self.default_level = self._level(document.get("default_level", self.levels[0]))
+        self.authenticated_level = self._level(
+            document.get("authenticated_level", self.default_level)
+        )
+        self.role_levels: Dict[str, str] = {
+            str(role): self._level(level)
+            for role, level in (document.get("roles") or {}).items()
+        }
+        self.tool_levels: Dict[str, str] = {
+            str(tool): self._level(level)
+            for tool, level in (document.get("tools") or {}).items()
+        }
+
+        self.tool_scopes: Dict[str, FrozenSet[str]] = {}
+        for tool, scopes in (document.get("tool_scopes") or {}).items():
+            if not isinstance(scopes, list):
+                raise ValueError(
+                    f"invalid_rbac_policy: 'tool_scopes' of {tool!r} must be a list"
+                )
+            self.tool_scopes[str(tool)] = frozenset(str(s).lower() for s in scopes)
+
+        self.tool_groups: Dict[str, FrozenSet[str]] = {}
+        for tool, groups in (document.get("tool_groups") or {}).items():
+            if not isinstance(groups, list) or not groups:
+                raise ValueError(
+                    f"invalid_rbac_policy: 'tool_groups' of {tool!r} must be a non-empty list"
+                )
+            self.tool_groups[str(tool)] = frozenset(str(g).lower() for g in groups)
+
+        resources: List[Dict[str, Any]] = []
+        for resource in document.get("resources") or []:
+            entry = dict(resource)
+            entry["access_level"] = self._level(entry.get("access_level"))
+            entry["tools"] = list(entry.get("tools") or [])
+            resources.append(entry)
+
+        self._decisions: Dict[str, AccessDecision] = {}
+        for rank, level in enumerate(self.levels):
+            granted = tuple(
+                resource
+                for resource in resources
+                if self._rank[resource["access_level"]] <= rank
+            )
+            tools = {tool for resource in granted for tool in resource["tools"]}
+            tools.update(
+                tool
+                for tool, required in self.tool_levels.items()
+                if self._rank[required] <= rank
+            )
+            self._decisions[level] = AccessDecision(
+                level, rank, granted, frozenset(tools)
+            )
+
+        # 小文字に正規化したロール → レベル (`UserContext.roles` と同じ表記)
+        self._role_keys: Dict[str, str] = {}
+        for role, level in self.role_levels.items():
+            key = role.lower()
+            if key in self._role_keys and self._role_keys[key] != level:
+                raise ValueError(
+                    f"invalid_rbac_policy: role {role!r} is defined twice "
+                    "with different levels"
+                )
+            self._role_keys[key] = level
+        self._known_roles = frozenset(self._role_keys)
+        # (ポリシーに定義されたロールの部分集合, 他のロールを持つか) → 判定結果
+        self._table: Dict[Tuple[FrozenSet[str], bool], AccessDecision] = {}
+        if len(self._known_roles) <= MAX_PRECOMPUTED_ROLES:
+            for size in range(len(self._known_roles) + 1):
+                for subset in combinations(sorted(self._known_roles), size):
+                    for has_other in (False, True):
+                        key = (frozenset(subset), has_other)
+                        self._table[key] = self._evaluate(*key)
+
+    def _level(self, level: Any) -> str:
+        if level not in self._rank:
+            raise ValueError(f"invalid_rbac_policy: unknown access level {level!r}")
+        return str(level)
+
+    def _evaluate(self, known: FrozenSet[str], has_other: bool) -> AccessDecision:
+        if known:
+            level = max(
+                (self._role_keys[role] for role in known), key=self._rank.__getitem__
+            )
+        elif has_other:
+            level = self.authenticated_level
+        else:
+            level = self.default_level
+        return self._decisions[level]
+
+    def decide(self, roles: Iterable[str]) -> AccessDecision:
+        """ユーザーのロールに対する判定結果を返す (大文字小文字を区別しない)。"""
+        roles = frozenset(role.lower() for role in roles)
+        known = roles & self._known_roles
+        key = (known, len(known) != len(roles))
+        decision = self._table.get(key)
+        if decision is None:
+            decision = self._table.setdefault(key, self._evaluate(*key))
+        return decision
+
+    def decision_for_level(self, level: str) -> AccessDecision:
+        """アクセスレベルの判定結果を返す。"""
+        return self._decisions[self._level(level)]
+
+    def required_level(self, tool: str) -> Optional[str]:
+        """ツールに必要なアクセスレベルを返す (ポリシーで制限されていない場合は None)。"""
+        return self.tool_levels.get(tool)
+
+    def required_scopes(self, tool: str) -> FrozenSet[str]:
+        """ツールの呼び出しに必要なスコープ (小文字) を返す。"""
+        return self.tool_scopes.get(tool, frozenset())
+
+    def required_groups(self, tool: str) -> FrozenSet[str]:
+        """ツールの呼び出しに必要な所属グループ (小文字。いずれか 1 つ) を返す。"""
+        return self.tool_groups.get(tool, frozenset())
+
+    def roles_for_level(self, level: str) -> List[str]:
+        """指定したレベル以上を付与するロールを返す。"""
+        rank = self._rank[self._level(level)]
+        return sorted(
+            role
+            for role, granted in self.role_levels.items()
+            if self._rank[granted] >= rank
+        )
+
+
+def load_policy(path: str) -> CompiledPolicy:
+    """ポリシーファイルを読み込んでコンパイルする。"""
+    with open(path, encoding="utf-8") as f:
+        return CompiledPolicy(json.load(f))
+
+
+class PolicyStore:
+    """ポリシーファイルを監視し、変更時に読み込み直す。
+
+    :param path: ポリシーファイルのパス
+    :param check_interval_seconds: 更新時刻を確認する最小間隔 (秒)
+    :param clock: 現在時刻 (秒) を返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        path: str,
+        check_interval_seconds: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._signature = self._stat_signature()
+        self._policy = load_policy(path)
+        self._next_check = clock() + check_interval_seconds
+        self.reloads = 0
+
+    def get(self) -> CompiledPolicy:
+        """現在のポリシーを返す。確認間隔を過ぎていればファイルの変更を確認する。"""
+        now = self._clock()
+        if now < self._next_check:
+            return self._policy
+        with self._lock:
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval_seconds
+                self._reload_if_changed()
+        return self._policy
+
+    def _stat_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _reload_if_changed(self) -> None:
+        try:
+            signature = self._stat_signature()
+        except OSError as exc:
+            logger.error(
+                "RBAC policy file is not accessible; keeping current policy: %s", exc
+            )
+            return
+        if signature == self._signature:
+            return
+        self._signature = signature
+        try:
+            self._policy = load_policy(self.path)
+        except (OSError, ValueError) as exc:
+            logger.error("Failed to reload RBAC policy; keeping current policy: %s", exc)
+            return
+        self.reloads += 1
+        logger.info("Reloaded RBAC policy from %s", self.path)
+
+
+_store: Optional[PolicyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_policy() -> CompiledPolicy:
+    """設定されたポリシーファイルから読み込んだ、プロセス共有のポリシーを返す。"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = Settings()
+                _store = PolicyStore(
+                    settings.rbac_policy_path or DEFAULT_POLICY_PATH,
+                    settings.rbac_policy_reload_interval_seconds,
+                )
+    return _store.get()
@@ -0,0 +1,257 @@
+"""ツール呼び出しの認可判定と、その結果のキャッシュ。
+
+「このユーザーがこのツールを呼び出せるか」は、トークンのロールとスコープ、ポリシーの
+`tool_groups` で指定された所属グループ、およびロールポリシー (`auth.rbac_policy`) だけで
+決まります。`ToolAuthorizer` は判定結果を (ツール, 正規化済みのロールの集合,
+正規化済みのスコープの集合, ツールが要求する所属グループのうちユーザーが所属するもの) を
+キーとしてキャッシュし、同じ組み合わせの 2 回目以降の判定は辞書の参照のみで行います。
+
+- 所属グループは、ツールに `tool_groups` が定義されている場合のみ
+  `auth.group_membership` で解決します (オーバーエイジの場合は Graph を呼び出します)。
+
+- `ToolAuthorizationMiddleware` は、ツール本体を実行する前に判定し、拒否する場合は
+  ツールを実行せずにエラーを返します。ツールごとに許可・拒否の回数を数えます。
+- 拒否の WARNING ログは、組み合わせごとに最初の 1 回だけ出力します
+  (同じ組み合わせでの 2 回目以降の拒否は DEBUG)。
+- ポリシーが読み込み直された場合は、キャッシュした判定を破棄します。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from fastmcp.exceptions import ToolError
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools.tool import ToolResult
+from mcp import types as mt
+
+from auth.claims_helpers import UserContext, get_current_user
+from auth.rbac_policy import CompiledPolicy, get_policy
+from common.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+class ToolDecision(NamedTuple):
+    """ツール呼び出しの認可判定の結果。"""
+
+    allowed: bool
+    # 拒否する場合のエラーメッセージ (許可する場合は空文字列)
+    error: str = ""
+
+
+ALLOWED = ToolDecision(True)
+
+_NO_CLAIMS: FrozenSet[str] = frozenset()
+
+# (ツール, ロール, スコープ, 所属グループ)
+_DecisionKey = Tuple[str, FrozenSet[str], FrozenSet[str], FrozenSet[str]]
+
+
+class ToolAuthorizer:
+    """(ツール, ロール, スコープ, 所属グループ) ごとの認可判定をキャッシュする。
+
+    :param max_entries: キャッシュする判定の最大数 (超えた場合はすべて破棄)
+    :param policy_source: 現在のポリシーを返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        policy_source: Callable[[], CompiledPolicy] = get_policy,
+    ) -> None:
+        self.max_entries = max_entries
+        self._policy_source = policy_source
+        self._policy: Optional[CompiledPolicy] = None
+        self._decisions: Dict[_DecisionKey, ToolDecision] = {}
+        # ツール → [許可した回数, 拒否した回数]
+        self._counts: Dict[str, List[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _current_policy(self) -> CompiledPolicy:
+        policy = self._policy_source()
+        if policy is not self._policy:
+            self._decisions.clear()
+            self._policy = policy
+        return policy
+
+    def decide(
+        self,
+        tool: str,
+        roles: FrozenSet[str],
+        scopes: FrozenSet[str],
+        groups: FrozenSet[str] = _NO_CLAIMS,
+    ) -> ToolDecision:
+        """ツール呼び出しを許可するか判定する (回数は数えない)。
+
+        Args:
+            tool: ツール名
+            roles: 小文字に正規化したロールの集合 (`UserContext.roles`)
+            scopes: 小文字に正規化したスコープの集合 (`UserContext.scopes`)
+            groups: ツールが要求する所属グループのうちユーザーが所属するもの
+                (`member_groups` の戻り値)
+        """
+        policy = self._current_policy()
+
+        key: _DecisionKey = (tool, roles, scopes, groups)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            self.hits += 1
+            return decision
+
+        self.misses += 1
+        decision = _evaluate(policy, tool, roles, scopes, groups)
+        if len(self._decisions) >= self.max_entries:
+            self._decisions.clear()
+        self._decisions[key] = decision
+        if not decision.allowed:
+            logger.warning(
+                "Access to tool '%s' denied for roles %s and scopes %s: %s "
+                "(repeated denials for the same roles and scopes are logged at DEBUG)",
+                tool,
+                sorted(roles),
+                sorted(scopes),
+                decision.error,
+            )
+        return decision
+
+    async def member_groups(
+        self, tool: str, user: Optional[UserContext]
+    ) -> FrozenSet[str]:
+        """ツールが要求する所属グループ (`tool_groups`) のうち、現在のユーザーが所属するものを返す。
+
+        ツールに `tool_groups` がない場合やユーザーがいない場合は、所属グループを解決せずに
+        空の集合を返します。解決に失敗した場合も空の集合 (所属なし) として扱います。
+        """
+        required = self._current_policy().required_groups(tool)
+        if not required or user is None:
+            return _NO_CLAIMS
+        # Graph の SDK を含むため、所属グループが必要な場合のみ読み込む
+        from auth.group_membership import get_user_groups
+
+        try:
+            groups = await get_user_groups()
+        except RuntimeError as exc:
+            logger.warning("Group membership for tool '%s' unavailable: %s", tool, exc)
+            return _NO_CLAIMS
+        return frozenset(group.lower() for group in groups) & required
+
+    def authorize(
+        self,
+        tool: str,
+        user: Optional[UserContext],
+        groups: FrozenSet[str] = _NO_CLAIMS,
+    ) -> ToolDecision:
+        """ユーザーのツール呼び出しを判定し、ツールごとの許可・拒否の回数を数える。
+
+        `user` が None (アクセストークンがない) の場合は、ロールもスコープもないものとして
+        判定します。`groups` は `member_groups` の戻り値です。
+        """
+        if user is None:
+            decision = self.decide(tool, _NO_CLAIMS, _NO_CLAIMS)
+        else:
+            decision = self.decide(tool, user.roles, user.scopes, groups)
+        counts = self._counts.get(tool)
+        if counts is None:
+            counts = self._counts.setdefault(tool, [0, 0])
+        counts[0 if decision.allowed else 1] += 1
+        return decision
+
+    def clear(self) -> None:
+        """キャッシュした判定と回数を破棄する。"""
+        self._decisions.clear()
+        self._counts.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """キャッシュの状態とツールごとの許可・拒否の回数を返す。"""
+        return {
+            "entries": len(self._decisions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "tools": {
+                tool: {"allowed": allowed, "denied": denied}
+                for tool, (allowed, denied) in sorted(self._counts.items())
+            },
+        }
+
+
+def _evaluate(
+    policy: CompiledPolicy,
+    tool: str,
+    roles: FrozenSet[str],
+    scopes: FrozenSet[str],
+    groups: FrozenSet[str],
+) -> ToolDecision:
+    required_level = policy.required_level(tool)
+    if required_level is not None and tool not in policy.decide(roles).tools:
+        required_roles = ", ".join(policy.roles_for_level(required_level))
+        return ToolDecision(
+            False,
+            f"insufficient_role: '{required_roles}' role required, "
+            f"but user has {sorted(roles)}",
+        )
+    missing = policy.required_scopes(tool) - scopes
+    if missing:
+        return ToolDecision(
+            False, f"insufficient_scope: '{', '.join(sorted(missing))}' scope required"
+        )
+    required_groups = policy.required_groups(tool)
+    if required_groups and not groups & required_groups:
+        return ToolDecision(
+            False,
+            "insufficient_group: membership in one of "
+            f"'{', '.join(sorted(required_groups))}' required",
+        )
+    return ALLOWED
+
+
+_authorizer: Optional[ToolAuthorizer] = None
+_authorizer_lock = threading.Lock()
+
+
+def get_tool_authorizer() -> ToolAuthorizer:
+    """プロセス共有の `ToolAuthorizer` を返す。"""
+    global _authorizer
+    if _authorizer is None:
+        with _authorizer_lock:
+            if _authorizer is None:
+                _authorizer = ToolAuthorizer(
+                    Settings().authz_decision_cache_max_entries
+                )
+    return _authorizer
+
+
+class ToolAuthorizationMiddleware(Middleware):
+    """ツール本体を実行する前に認可判定を行う FastMCP ミドルウェア。
+
+    :param authorizer: 使用する `ToolAuthorizer` (省略時はプロセス共有のもの)
+    """
+
+    def __init__(self, authorizer: Optional[ToolAuthorizer] = None) -> None:
+        self.authorizer = authorizer or get_tool_authorizer()
+
+    async def on_call_tool(
+        self,
+        context: MiddlewareContext[mt.CallToolRequestParams],
+        call_next: CallNext[mt.CallToolRequestParams, ToolResult],
+    ) -> ToolResult:
+        tool = context.message.name
+        try:
+            user: Optional[UserContext] = get_current_user()
+        except RuntimeError:
+            user = None
+
+        groups = await self.authorizer.member_groups(tool, user)
+        decision = self.authorizer.authorize(tool, user, groups)
+        if not decision.allowed:
+            logger.debug(
+                "Tool call rejected before execution: tool=%s user=%s",
+                tool,
+                user.user_id if user else None,
+            )
+            raise ToolError(decision.error)
+        return await call_next(context)
@@ -0,0 +1,169 @@
+"""SDK クライアントをキー単位で再利用するためのレジストリ。
+
+Azure SDK のクライアントは構築のたびにパイプラインやポリシー、HTTP 接続を
+作り直すため、リクエストごとに生成するとオーバーヘッドが大きくなります。
+このレジストリはキー (例: サブスクリプション ID と資格情報の主体) ごとに
+クライアントを保持し、一定時間使われなかったものを閉じて破棄します。
+
+`lease()` で取得したクライアントは、使用中 (コンテキストを抜けるまで) は
+アイドルタイムアウトや上限超過があっても閉じません。
+期限と件数の管理は `common.ttl_cache.TTLCache` (参照のたびに期限を延長) で行います。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Generic, Hashable, Iterator, List, Optional, TypeVar
+
+from common.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _close_quietly(value: Any) -> None:
+    """`close()` を持つオブジェクトであれば閉じる。失敗しても例外は送出しない。"""
+    close = getattr(value, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception as exc:  # noqa: BLE001 - 破棄処理の失敗は呼び出し元に影響させない
+        logger.debug("Failed to close cached client: %s", exc)
+
+
+class _Entry(Generic[T]):
+    """レジストリが保持するクライアントと、その使用状況。"""
+
+    __slots__ = ("value", "leases", "retired")
+
+    def __init__(self, value: T) -> None:
+        self.value = value
+        # lease() で使用中の数
+        self.leases = 0
+        # レジストリから取り除かれ、使用が終わり次第閉じる
+        self.retired = False
+
+
+class ClientRegistry(Generic[T]):
+    """アイドルタイムアウト付きでクライアントを再利用するレジストリ。
+
+    :param idle_timeout_seconds: 最後に使われてから破棄されるまでの秒数
+    :param max_entries: 保持するクライアントの最大数。超えた場合は使用中でないものの
+        うち最も古いものから破棄
+    :param close: 破棄時に値を閉じる関数 (既定は `close()` メソッドを呼び出す)。
+        送出された例外はログに記録し、呼び出し元には伝えない
+    :param clock: 現在時刻 (秒) を返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        idle_timeout_seconds: float = 300.0,
+        max_entries: int = 256,
+        close: Optional[Callable[[T], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_entries = max(1, max_entries)
+        self._close_value = close or _close_quietly
+        self._entries: TTLCache[_Entry[T]] = TTLCache(
+            ttl_seconds=idle_timeout_seconds,
+            max_entries=self.max_entries,
+            sliding=True,
+            pinned=lambda entry: entry.leases > 0,
+            clock=clock,
+        )
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @property
+    def evicted(self) -> int:
+        return self._entries.evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """キーに対応するクライアントを返す。存在しなければ `factory` で生成する。
+
+        返したクライアントは使用中として扱わないため、アイドルタイムアウト後に閉じられても
+        問題ない値 (閉じる処理のない credential など) に使用してください。
+        長時間使用するクライアントは `lease()` で取得します。
+        """
+        return self._get(key, factory, lease=False).value
+
+    @contextmanager
+    def lease(self, key: Hashable, factory: Callable[[], T]) -> Iterator[T]:
+        """キーに対応するクライアントを、コンテキストを抜けるまで使用中として貸し出す。"""
+        entry = self._get(key, factory, lease=True)
+        try:
+            yield entry.value
+        finally:
+            with self._lock:
+                entry.leases -= 1
+                close = entry.retired and entry.leases == 0
+                if not close and self._entries.peek(key) is entry:
+                    self._entries.touch(key)
+            if close:
+                self._close(entry.value)
+
+    def clear(self) -> None:
+        """保持しているクライアントをすべて破棄する (使用中のものは使用後に閉じる)。"""
+        with self._lock:
+            closable = self._retire(self._entries.clear())
+        for value in closable:
+            self._close(value)
+
+    def _get(self, key: Hashable, factory: Callable[[], T], lease: bool) -> _Entry[T]:
+        with self._lock:
+            expired = self._retire(self._entries.expire())
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases += lease
+                self.reused += 1
+
+        if entry is None:
+            created = factory()
+            with self._lock:
+                # 並行して同じキーが生成された場合は先に登録された方を使う
+                entry = self._entries.peek(key)
+                if entry is not None:
+                    self._entries.touch(key)
+                    expired.append(created)
+                    self.reused += 1
+                else:
+                    entry = _Entry(created)
+                    self.created += 1
+                entry.leases += lease
+                if self._entries.peek(key) is not entry:
+                    expired.extend(self._retire(self._entries.put(key, entry)))
+                    # キャッシュが無効 (アイドルタイムアウトが 0 以下) で保持されなかった
+                    # 場合は、使用が終わり次第閉じる
+                    if self._entries.peek(key) is not entry:
+                        entry.retired = True
+
+        for stale in expired:
+            self._close(stale)
+        return entry
+
+    def _close(self, value: T) -> None:
+        try:
+            self._close_value(value)
+        except Exception as exc:  # noqa: BLE001 - 破棄処理の失敗は呼び出し元に影響させない
+            logger.debug("Failed to close cached client: %s", exc)
+
+    @staticmethod
+    def _retire(entries: List[_Entry[T]]) -> List[T]:
+        """取り除いたエントリのうち、すぐに閉じてよい値を返す (ロック取得済みで呼び出す)。"""
+        closable: List[T] = []
+        for entry in entries:
+            if entry.leases:
+                entry.retired = True
+            else:
+                closable.append(entry.value)
+        return closable
@@ -0,0 +1,397 @@
+"""RBAC ツール (`get_company_info`) が返す企業情報のデータソース。
+
+企業情報の各項目 (列) にはアクセスレベルを割り当て、レベルに応じた列の絞り込みは
+クエリ自体で行います。下位のレベルの呼び出しでは、上位のレベルの列 (機密情報など) を
+データベースから読み出しません。
+
+- 既定のデータソースは SQLite です (`SQLiteCompanyDataSource`)。`COMPANY_DB_PATH` が
+  空の場合はプロセス内のメモリ上にサンプルデータ (Contoso) を作成します。
+  `COMPANY_DB_PATH` に指定したデータベースにはサンプルデータを書き込まず、
+  `company` テーブルがない場合はエラーにします。
+- SQLite への接続は `SQLiteConnectionPool` で再利用し、読み取り専用 (`query_only`) で使用します。
+- 取得結果は呼び出し側 (`tools.role_based_info`) がアクセスレベルをキーとして
+  `common.ttl_cache.TTLCache` に TTL の間保持し、同じレベルの同時のキャッシュミスは
+  1 回のクエリにまとめます。
+- 別のストアを使う場合は `CompanyDataSource` を実装し、`set_company_data_source()` で差し替えます。
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from common.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# 下位 → 上位の順のアクセスレベル。上位のレベルは下位のレベルの列をすべて含む
+ACCESS_LEVELS: Tuple[str, ...] = ("public", "user", "auditor", "admin")
+
+TABLE_NAME = "company"
+
+
+class CompanyColumn(NamedTuple):
+    """企業情報の 1 項目 (テーブルの列)。
+
+    `section` が None の項目は最上位に、それ以外は `section` の dict の中に配置します。
+    `is_json` の項目は入れ子の値を JSON 文字列として保存します。
+    """
+
+    name: str
+    section: Optional[str]
+    level: str
+    is_json: bool = False
+
+
+COMPANY_COLUMNS: Tuple[CompanyColumn, ...] = (
+    CompanyColumn("company_name", None, "public"),
+    CompanyColumn("founded_year", None, "public"),
+    CompanyColumn("public_contact", None, "public", is_json=True),
+    CompanyColumn("headquarters", None, "public"),
+    CompanyColumn("industry", None, "public"),
+    CompanyColumn("employee_count_range", "public_info", "user"),
+    CompanyColumn("stock_symbol", "public_info", "user"),
+    CompanyColumn("description", "public_info", "user"),
+    CompanyColumn("certifications", "public_info", "user", is_json=True),
+    CompanyColumn("employee_count", "audit_info", "auditor"),
+    CompanyColumn("annual_revenue_usd", "audit_info", "auditor"),
+    CompanyColumn("fiscal_year_end", "audit_info", "auditor"),
+    CompanyColumn("audit_firm", "audit_info", "auditor"),
+    CompanyColumn("last_audit_date", "audit_info", "auditor"),
+    CompanyColumn("compliance_status", "audit_info", "auditor"),
+    CompanyColumn("audit_reports", "audit_info", "auditor", is_json=True),
+    CompanyColumn("unreleased_projects", "confidential_info", "admin", is_json=True),
+    CompanyColumn("financial_details", "confidential_info", "admin", is_json=True),
+    CompanyColumn("strategic_plans", "confidential_info", "admin", is_json=True),
+    CompanyColumn("executive_compensation", "confidential_info", "admin", is_json=True),
+)
+
+# サンプルデータ (COMPANY_DB_PATH 未指定時にメモリ上に作成)
+SAMPLE_COMPANY: Dict[str, Any] = {
+    "company_name": "Contoso Corporation",
+    "founded_year": 1995,
+    "public_contact": {
+        "email": "info@contoso.com",
+        "phone": "+1-555-0100",
+        "website": "https://www.contoso.com",
+    },
+    "headquarters": "Seattle, WA, USA",
+    "industry": "Technology",
+    "employee_count_range": "1000-5000",
+    "stock_symbol": "CTSO",
+    "description": "Leading provider of cloud-based business solutions",
+    "certifications": ["ISO 27001", "SOC 2 Type II"],
+    "employee_count": 2847,
+    "annual_revenue_usd": 450_000_000,
+    "fiscal_year_end": "2025-12-31",
+    "audit_firm": "Big Four Accounting LLP",
+    "last_audit_date": "2025-01-15",
+    "compliance_status": "Fully Compliant",
+    "audit_reports": [
+        {"year": 2024, "status": "Clean Opinion", "date": "2025-01-15"},
+        {"year": 2023, "status": "Clean Opinion", "date": "2024-01-20"},
+    ],
+    "unreleased_projects": [
+        {
+            "code_name": "Project Phoenix",
+            "description": "Next generation AI platform",
+            "expected_launch": "Q3 2026",
+            "budget_usd": 15_000_000,
+        },
+        {
+            "code_name": "Project Horizon",
+            "description": "Quantum computing initiative",
+            "expected_launch": "Q1 2027",
+            "budget_usd": 25_000_000,
+        },
+    ],
+    "financial_details": {
+        "actual_revenue_usd": 453_728_942,
+        "ebitda_usd": 89_456_231,
+        "cash_reserves_usd": 127_500_000,
+        "debt_usd": 45_000_000,
+        "quarterly_growth_rate": 0.078,
+    },
+    "strategic_plans": {
+        "market_expansion": ["Southeast Asia", "Latin America", "Middle East"],
+        "acquisition_targets": ["CloudSecure Technologies", "DataViz Analytics"],
+        "planned_headcount_increase": 450,
+    },
+    "executive_compensation": {
+        "ceo_total_compensation_usd": 2_500_000,
+        "cto_total_compensation_usd": 1_800_000,
+        "cfo_total_compensation_usd": 1_750_000,
+    },
+}
+
+
+def columns_for_level(level: str) -> Tuple[CompanyColumn, ...]:
+    """アクセスレベルで読み出せる列を返す。
+
+    :raises ValueError: 未知のアクセスレベルの場合 (`invalid_access_level`)
+    """
+    if level not in ACCESS_LEVELS:
+        raise ValueError(f"invalid_access_level: unknown access level '{level}'")
+    rank = ACCESS_LEVELS.index(level)
+    return tuple(
+        column for column in COMPANY_COLUMNS if ACCESS_LEVELS.index(column.level) <= rank
+    )
+
+
+def build_sections(
+    columns: Tuple[CompanyColumn, ...], values: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """列の値から `get_company_info` のセクション構造 (入れ子の dict) を組み立てる。"""
+    sections: Dict[str, Any] = {}
+    for column in columns:
+        value = values.get(column.name)
+        if column.section is None:
+            sections[column.name] = value
+        else:
+            sections.setdefault(column.section, {})[column.name] = value
+    return sections
+
+
+class CompanyDataSource(Protocol):
+    """企業情報のデータソース。
+
+    `fetch_sections` はブロッキング処理として `asyncio.to_thread` から呼び出されます。
+    """
+
+    def fetch_sections(self, level: str) -> Dict[str, Any]:
+        """アクセスレベルで参照できる項目だけをセクション構造で返す。"""
+        ...
+
+    def close(self) -> None:
+        """保持しているリソースを解放する。"""
+        ...
+
+
+class StaticCompanyDataSource:
+    """メモリ上の値から企業情報を返すデータソース (テスト・ベンチマーク用)。"""
+
+    def __init__(self, values: Optional[Mapping[str, Any]] = None) -> None:
+        self._values = dict(values if values is not None else SAMPLE_COMPANY)
+
+    def fetch_sections(self, level: str) -> Dict[str, Any]:
+        return build_sections(columns_for_level(level), self._values)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteConnectionPool:
+    """SQLite の接続を上限付きで再利用するプール。
+
+    接続は必要になった時点で `size` 個まで作成し、読み取り専用 (`PRAGMA query_only`) に設定します。
+    すべての接続が使用中の場合は `timeout_seconds` まで返却を待ちます。
+
+    :param database: データベースファイルのパスまたは `file:` URI
+    :param size: 作成する接続の最大数
+    :param timeout_seconds: 接続の返却を待つ最大秒数
+    """
+
+    def __init__(
+        self, database: str, size: int = 4, timeout_seconds: float = 10.0
+    ) -> None:
+        self.database = database
+        self.size = max(1, size)
+        self.timeout_seconds = timeout_seconds
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all: List[sqlite3.Connection] = []
+        self._closed = False
+        self.created = 0
+        self.waits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database,
+            uri=self.database.startswith("file:"),
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA query_only = ON")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """プールから接続を借りる。ブロックを抜けると返却する。
+
+        :raises RuntimeError: 待機時間内に接続を借りられない場合 (`company_data_pool_exhausted`)
+        """
+        if self._closed:
+            raise RuntimeError("company_data_pool_closed: connection pool is closed")
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+            with self._lock:
+                if len(self._all) < self.size:
+                    connection = self._connect()
+                    self._all.append(connection)
+                    self.created += 1
+            if connection is None:
+                self.waits += 1
+                try:
+                    connection = self._idle.get(timeout=self.timeout_seconds)
+                except queue.Empty:
+                    raise RuntimeError(
+                        "company_data_pool_exhausted: no database connection became "
+                        f"available within {self.timeout_seconds}s"
+                    ) from None
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """すべての接続を閉じる。"""
+        with self._lock:
+            self._closed = True
+            connections, self._all = self._all, []
+        for connection in connections:
+            connection.close()
+
+
+_memory_ids = itertools.count(1)
+
+
+class SQLiteCompanyDataSource:
+    """SQLite の `company` テーブルから企業情報を読み出すデータソース。
+
+    アクセスレベルごとの SELECT 文は構築時に 1 度だけ作成します。
+
+    :param path: データベースファイルのパス。空の場合はプロセス内のメモリ上に作成
+    :param pool_size: 接続プールの最大接続数
+    :param seed_sample: `company` テーブルがない場合に作成し、サンプルデータを 1 行
+        挿入するか。省略時はメモリ上のデータベース (`path` が空) の場合のみ
+    :raises RuntimeError: テーブルがなく、サンプルデータを作成しない場合
+        (`company_data_not_found`)
+    """
+
+    def __init__(
+        self, path: str = "", pool_size: int = 4, seed_sample: Optional[bool] = None
+    ) -> None:
+        self._keepalive: Optional[sqlite3.Connection] = None
+        if path:
+            database = path
+        else:
+            # 共有キャッシュのメモリ DB は最後の接続が閉じると消えるため、1 本保持しておく
+            database = f"file:company-data-{next(_memory_ids)}?mode=memory&cache=shared"
+            self._keepalive = sqlite3.connect(database, uri=True, check_same_thread=False)
+        try:
+            self._initialize(database, not path if seed_sample is None else seed_sample)
+        except BaseException:
+            if self._keepalive is not None:
+                self._keepalive.close()
+            raise
+        self.pool = SQLiteConnectionPool(database, pool_size)
+        self._statements: Dict[str, Tuple[Tuple[CompanyColumn, ...], str]] = {}
+        for level in ACCESS_LEVELS:
+            columns = columns_for_level(level)
+            names = ", ".join(column.name for column in columns)
+            self._statements[level] = (columns, f"SELECT {names} FROM {TABLE_NAME} LIMIT 1")
+
+    def _initialize(self, database: str, seed_sample: bool) -> None:
+        connection = self._keepalive or sqlite3.connect(
+            database, uri=database.startswith("file:")
+        )
+        try:
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (TABLE_NAME,),
+            ).fetchone()
+            if exists:
+                return
+            if not seed_sample:
+                raise RuntimeError(
+                    f"company_data_not_found: {database} has no {TABLE_NAME} table"
+                )
+            # JSON 以外の列は型を指定せず、挿入した値の型のまま保存する
+            definitions = ", ".join(
+                f"{column.name} TEXT" if column.is_json else column.name
+                for column in COMPANY_COLUMNS
+            )
+            names = ", ".join(column.name for column in COMPANY_COLUMNS)
+            placeholders = ", ".join("?" for _ in COMPANY_COLUMNS)
+            values = [
+                json.dumps(SAMPLE_COMPANY[column.name], ensure_ascii=False)
+                if column.is_json
+                else SAMPLE_COMPANY[column.name]
+                for column in COMPANY_COLUMNS
+            ]
+            with connection:
+                connection.execute(f"CREATE TABLE {TABLE_NAME} ({definitions})")
+                connection.execute(
+                    f"INSERT INTO {TABLE_NAME} ({names}) VALUES ({placeholders})", values
+                )
+            logger.info("Created %s table with sample data", TABLE_NAME)
+        finally:
+            if connection is not self._keepalive:
+                connection.close()
+
+    def fetch_sections(self, level: str) -> Dict[str, Any]:
+        statement = self._statements.get(level)
+        if statement is None:
+            raise ValueError(f"invalid_access_level: unknown access level '{level}'")
+        columns, sql = statement
+        with self.pool.connection() as connection:
+            row = connection.execute(sql).fetchone()
+        if row is None:
+            raise RuntimeError(f"company_data_not_found: {TABLE_NAME} table is empty")
+        values = {
+            column.name: json.loads(value) if column.is_json and value is not None else value
+            for column, value in zip(columns, row)
+        }
+        return build_sections(columns, values)
+
+    def close(self) -> None:
+        self.pool.close()
+        if self._keepalive is not None:
+            self._keepalive.close()
+            self._keepalive = None
+
+
+_data_source: Optional[CompanyDataSource] = None
+_data_source_lock = threading.Lock()
+
+
+def get_company_data_source() -> CompanyDataSource:
+    """プロセス共有のデータソースを返す。未設定の場合は設定から SQLite のデータソースを作成する。"""
+    global _data_source
+    if _data_source is None:
+        with _data_source_lock:
+            if _data_source is None:
+                settings = Settings()
+                _data_source = SQLiteCompanyDataSource(
+                    settings.company_db_path, settings.company_db_pool_size
+                )
+    return _data_source
+
+
+def set_company_data_source(source: Optional[CompanyDataSource]) -> None:
+    """プロセス共有のデータソースを差し替える (None で既定の SQLite に戻す)。
+
+    差し替え前のデータソースは閉じます。
+    """
+    global _data_source
+    with _data_source_lock:
+        previous, _data_source = _data_source, source
+    if previous is not None and previous is not source:
+        previous.close()
@@ -41,3 +41,115 @@ class Settings:
         "AZURE_OBO_SCOPE",
         "https://management.azure.com/.default",
     )
+
+    # Azure VM 一覧の電源状態付与で、個別 instance view 呼び出しを行う際の最大並列数
+    azure_vm_status_concurrency: int = int(
+        os.getenv("AZURE_VM_STATUS_CONCURRENCY", "8")
+    )
+
+    # VM インベントリ差分 (list_azure_vm_changes) で保持する (ユーザー, サブスクリプション) の最大数
+    vm_snapshot_max_entries: int = int(os.getenv("VM_SNAPSHOT_MAX_ENTRIES", "1024"))
+
+    # export_azure_vms の出力先ディレクトリ
+    export_output_dir: str = os.getenv("EXPORT_OUTPUT_DIR", "exports")
+    # export_azure_vms の出力ファイルを保持する秒数 (0 以下の場合は削除しない)
+    export_retention_seconds: int = int(
+        os.getenv("EXPORT_RETENTION_SECONDS", str(24 * 60 * 60))
+    )
+
+    # 再利用する Azure SDK クライアントのアイドルタイムアウト (秒)
+    azure_client_idle_timeout_seconds: int = int(
+        os.getenv("AZURE_CLIENT_IDLE_TIMEOUT_SECONDS", "300")
+    )
+
+    # get_graph_me* のプロフィールキャッシュの有効期間 (秒)。0 でキャッシュ無効
+    graph_profile_cache_ttl_seconds: int = int(
+        os.getenv("GRAPH_PROFILE_CACHE_TTL_SECONDS", "60")
+    )
+    # プロフィールキャッシュに保持する (ユーザー, $select) の最大数
+    graph_profile_cache_max_entries: int = int(
+        os.getenv("GRAPH_PROFILE_CACHE_MAX_ENTRIES", "1024")
+    )
+
+    # Graph リクエストのスケジューラー設定
+    # プロセス全体で同時に送信する Graph リクエストの最大数
+    graph_max_concurrency: int = int(os.getenv("GRAPH_MAX_CONCURRENCY", "16"))
+    # 1 ユーザーが同時に送信できる Graph リクエストの最大数
+    graph_per_user_concurrency: int = int(os.getenv("GRAPH_PER_USER_CONCURRENCY", "4"))
+    # スロットリングやキュー待ちで待機する時間の上限 (秒)。超える場合は graph_throttled エラー
+    graph_max_queue_wait_seconds: float = float(
+        os.getenv("GRAPH_MAX_QUEUE_WAIT_SECONDS", "30")
+    )
+
+    # RBAC ツールのロールポリシーファイル (JSON)。空の場合は同梱の auth/rbac_policy.json
+    rbac_policy_path: str = os.getenv("RBAC_POLICY_PATH", "")
+    # ポリシーファイルの変更を確認する間隔 (秒)
+    rbac_policy_reload_interval_seconds: float = float(
+        os.getenv("RBAC_POLICY_RELOAD_INTERVAL_SECONDS", "2")
+    )
+    # ツールの認可判定 (ツール, ロール, スコープ) をキャッシュする最大数
+    authz_decision_cache_max_entries: int = int(
+        os.getenv("AUTHZ_DECISION_CACHE_MAX_ENTRIES", "4096")
+    )
+
+    # get_company_info の企業情報を保存する SQLite ファイル。空の場合はメモリ上のサンプルデータ
+    company_db_path: str = os.getenv("COMPANY_DB_PATH", "")
+    # 企業情報データベースの接続プールの最大接続数
+    company_db_pool_size: int = int(os.getenv("COMPANY_DB_POOL_SIZE", "4"))
+    # アクセスレベルごとの企業情報を保持する秒数 (0 でキャッシュ無効)
+    company_data_cache_ttl_seconds: float = float(
+        os.getenv("COMPANY_DATA_CACHE_TTL_SECONDS", "60")
+    )
+    # 企業情報キャッシュに保持するアクセスレベルの最大数
+    company_data_cache_max_entries: int = int(
+        os.getenv("COMPANY_DATA_CACHE_MAX_ENTRIES", "16")
+    )
+
+    # get_graph_me_photo の写真キャッシュの保存先ディレクトリ
+    photo_cache_dir: str = os.getenv("PHOTO_CACHE_DIR", "photo_cache")
+    # 写真キャッシュ全体の最大バイト数。0 でキャッシュ無効
+    photo_cache_max_bytes: int = int(
+        os.getenv("PHOTO_CACHE_MAX_BYTES", str(50 * 1024 * 1024))
+    )
+
+    # ツールモジュールの import を最初の呼び出しまで遅らせる (起動時はシグネチャのみで登録)
+    tools_lazy_import: bool = (
+        os.getenv("TOOLS_LAZY_IMPORT", "true").strip().lower() == "true"
+    )
+    # 起動時のウォームアップでツールモジュールを import しておく
+    tools_warmup_on_start: bool = (
+        os.getenv("TOOLS_WARMUP_ON_START", "true").strip().lower() == "true"
+    )
+    # 起動時のウォームアップ (鍵の変換、モジュールの import、接続の確立など) を行う
+    warmup_enabled: bool = (
+        os.getenv("WARMUP_ENABLED", "true").strip().lower() == "true"
+    )
+    # ウォームアップの期限 (秒)。過ぎた時点で完了を待たずに準備完了 (/readyz が 200) とする
+    warmup_deadline_seconds: float = float(
+        os.getenv("WARMUP_DEADLINE_SECONDS", "30")
+    )
+
+    # STARTUP_PROFILE / STARTUP_PROFILE_PATH は、このモジュールの import も計測できるよう
+    # common.startup_profiler が直接読み込む
+
+    # グループのオーバーエイジを解決した結果を保持するユーザーの最大数
+    groups_overage_cache_max_entries: int = int(
+        os.getenv("GROUPS_OVERAGE_CACHE_MAX_ENTRIES", "1024")
+    )
+
+    # Graph の差分クエリ (users/delta) によるローカルディレクトリインデックスの設定
+    # 有効にする場合はアプリに User.Read.All (アプリケーション権限) が必要
+    directory_sync_enabled: bool = (
+        os.getenv("DIRECTORY_SYNC_ENABLED", "false").strip().lower() == "true"
+    )
+    # 差分同期の間隔 (秒)
+    directory_sync_interval_seconds: int = int(
+        os.getenv("DIRECTORY_SYNC_INTERVAL_SECONDS", "300")
+    )
+    # インデックスを保存する JSON ファイルのパス。空の場合はメモリ上のみに保持
+    directory_index_path: str = os.getenv("DIRECTORY_INDEX_PATH", "")
+    # インデックスに保持するユーザー属性 (カンマ区切り)
+    directory_sync_attributes: str = os.getenv(
+        "DIRECTORY_SYNC_ATTRIBUTES",
+        "id,displayName,userPrincipalName,mail,jobTitle,department",
+    )
@@ -0,0 +1,411 @@
+"""Graph の差分クエリ (`users/delta`) から構築するローカルのディレクトリインデックス。
+
+名前や UPN の前方一致でユーザーを探すたびに Graph を検索すると、遅い上に
+スロットリングの予算を消費します。このモジュールはディレクトリのユーザーを
+選択した属性だけに絞ってメモリ上に保持し、完全一致・前方一致の検索を
+Graph を呼び出さずに処理します。
+
+- `DirectoryIndex`: ユーザーを属性のタプルで保持し、検索キー (表示名・UPN・メール) の
+  ソート済み配列を二分探索して前方一致検索を行います。
+- `DirectorySync`: 初回は `users/delta` の全ページを読み込んで新しいインデックスを構築し、
+  以降は保存した `@odata.deltaLink` から差分だけを取得して反映します。
+  任意でインデックスと deltaLink を JSON ファイルに保存し、再起動後は差分同期から再開します。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ATTRIBUTES: Tuple[str, ...] = (
+    "id",
+    "displayName",
+    "userPrincipalName",
+    "mail",
+    "jobTitle",
+    "department",
+)
+
+# 前方一致・完全一致検索の対象とする属性
+SEARCH_ATTRIBUTES: Tuple[str, ...] = ("displayName", "userPrincipalName", "mail")
+
+# 完全一致検索で ID 以外に対象とする属性
+EXACT_ATTRIBUTES: Tuple[str, ...] = ("userPrincipalName", "mail")
+
+# 1 ページ分の delta レスポンス (dict) を返す関数
+PageFetcher = Callable[[str], Awaitable[Dict[str, Any]]]
+
+
+class DeltaResyncRequired(Exception):
+    """deltaLink が失効しており、全件の再同期が必要であることを示す例外。"""
+
+
+class DirectoryIndex:
+    """ディレクトリユーザーのコンパクトなインメモリインデックス。
+
+    :param attributes: 保持する属性 (先頭は必ず `id`)
+    """
+
+    def __init__(self, attributes: Sequence[str] = DEFAULT_ATTRIBUTES) -> None:
+        attributes = tuple(attributes)
+        if not attributes or attributes[0] != "id":
+            attributes = ("id",) + tuple(a for a in attributes if a != "id")
+        self.attributes: Tuple[str, ...] = attributes
+        self._positions = {name: index for index, name in enumerate(attributes)}
+        self._search_positions = [
+            self._positions[name] for name in SEARCH_ATTRIBUTES if name in self._positions
+        ]
+        self._exact_positions = [
+            self._positions[name] for name in EXACT_ATTRIBUTES if name in self._positions
+        ]
+        self._records: Dict[str, Tuple[Any, ...]] = {}
+        # (小文字の検索キー, ユーザー ID) のソート済み配列
+        self._keys: List[Tuple[str, str]] = []
+        # 小文字の UPN / メール → ユーザー ID
+        self._exact: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # ---- 構築・更新 ----
+
+    def _to_record(
+        self, item: Dict[str, Any], previous: Optional[Tuple[Any, ...]] = None
+    ) -> Tuple[Any, ...]:
+        """delta の項目を属性のタプルに変換する。含まれない属性は以前の値を引き継ぐ。"""
+        values = list(previous) if previous else [None] * len(self.attributes)
+        for name, position in self._positions.items():
+            if name in item:
+                value = item[name]
+                values[position] = value if value is None else str(value)
+        return tuple(values)
+
+    def _search_keys(self, record: Tuple[Any, ...]) -> List[Tuple[str, str]]:
+        keys = {
+            record[position].lower()
+            for position in self._search_positions
+            if record[position]
+        }
+        return [(key, record[0]) for key in keys]
+
+    def _exact_keys(self, record: Tuple[Any, ...]) -> List[str]:
+        return [
+            record[position].lower()
+            for position in self._exact_positions
+            if record[position]
+        ]
+
+    def _remove_locked(self, user_id: str) -> None:
+        record = self._records.pop(user_id, None)
+        if record is None:
+            return
+        for key in self._search_keys(record):
+            index = bisect.bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+        for key in self._exact_keys(record):
+            if self._exact.get(key) == user_id:
+                del self._exact[key]
+
+    def _insert_locked(self, record: Tuple[Any, ...]) -> None:
+        self._records[record[0]] = record
+        for key in self._search_keys(record):
+            bisect.insort(self._keys, key)
+        for key in self._exact_keys(record):
+            self._exact[key] = record[0]
+
+    def apply(self, items: Iterable[Dict[str, Any]]) -> Tuple[int, int]:
+        """delta の項目 (追加・更新・`@removed`) をインデックスに反映する。
+
+        :return: (更新または追加した件数, 削除した件数)
+        """
+        upserted = removed = 0
+        with self._lock:
+            for item in items:
+                user_id = item.get("id")
+                if not user_id:
+                    continue
+                if "@removed" in item:
+                    if user_id in self._records:
+                        self._remove_locked(user_id)
+                        removed += 1
+                    continue
+                previous = self._records.get(user_id)
+                if previous is not None:
+                    self._remove_locked(user_id)
+                self._insert_locked(self._to_record(item, previous))
+                upserted += 1
+        return upserted, removed
+
+    @classmethod
+    def build(
+        cls, items: Iterable[Dict[str, Any]], attributes: Sequence[str] = DEFAULT_ATTRIBUTES
+    ) -> "DirectoryIndex":
+        """全件の項目からインデックスを一括構築する (検索キーは最後に 1 度だけソート)。"""
+        index = cls(attributes)
+        records: Dict[str, Tuple[Any, ...]] = {}
+        for item in items:
+            user_id = item.get("id")
+            if not user_id:
+                continue
+            if "@removed" in item:
+                records.pop(user_id, None)
+                continue
+            records[user_id] = index._to_record(item, records.get(user_id))
+        index._records = records
+        index._keys = sorted(
+            key for record in records.values() for key in index._search_keys(record)
+        )
+        index._exact = {
+            key: record[0]
+            for record in records.values()
+            for key in index._exact_keys(record)
+        }
+        return index
+
+    # ---- 検索 ----
+
+    def _to_dict(self, record: Tuple[Any, ...]) -> Dict[str, Any]:
+        return dict(zip(self.attributes, record))
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """ID でユーザーを取得する。"""
+        record = self._records.get(user_id)
+        return self._to_dict(record) if record is not None else None
+
+    def lookup_exact(self, value: str) -> Optional[Dict[str, Any]]:
+        """ID・UPN・メールアドレスの完全一致 (大文字小文字を区別しない) でユーザーを取得する。"""
+        record = self._records.get(value)
+        if record is None:
+            with self._lock:
+                user_id = self._exact.get(value.strip().lower())
+                record = self._records.get(user_id) if user_id else None
+        return self._to_dict(record) if record is not None else None
+
+    def lookup_prefix(self, prefix: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """表示名・UPN・メールアドレスの前方一致でユーザーを検索する。
+
+        検索キーの昇順に、重複を除いて最大 `limit` 件を返します。
+        """
+        prefix = prefix.strip().lower()
+        if not prefix or limit <= 0:
+            return []
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        with self._lock:
+            index = bisect.bisect_left(self._keys, (prefix, ""))
+            while index < len(self._keys) and len(results) < limit:
+                key, user_id = self._keys[index]
+                if not key.startswith(prefix):
+                    break
+                if user_id not in seen:
+                    seen.add(user_id)
+                    results.append(self._to_dict(self._records[user_id]))
+                index += 1
+        return results
+
+    # ---- 永続化 ----
+
+    def records(self) -> List[List[Any]]:
+        """永続化用にレコードを属性の並びのリストとして返す。"""
+        with self._lock:
+            return [list(record) for record in self._records.values()]
+
+
+def save_index(path: str, index: DirectoryIndex, delta_link: Optional[str]) -> None:
+    """インデックスと deltaLink を JSON ファイルに保存する (一時ファイル経由で置き換え)。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    payload = {
+        "attributes": list(index.attributes),
+        "delta_link": delta_link,
+        "records": index.records(),
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".directory-index.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_index(
+    path: str, attributes: Sequence[str]
+) -> Optional[Tuple[DirectoryIndex, Optional[str]]]:
+    """保存したインデックスを読み込む。属性の構成が異なる場合は None を返す。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring unreadable directory index %s: %s", path, exc)
+        return None
+
+    saved_attributes = payload.get("attributes") or []
+    index = DirectoryIndex(attributes)
+    if list(index.attributes) != saved_attributes:
+        logger.info("Directory index attributes changed; starting a full sync")
+        return None
+    items = (dict(zip(saved_attributes, record)) for record in payload.get("records") or [])
+    return DirectoryIndex.build(items, attributes), payload.get("delta_link")
+
+
+class DirectorySync:
+    """`users/delta` を用いて `DirectoryIndex` を最新に保つ同期処理。
+
+    :param fetch_page: URL を受け取り 1 ページ分の delta レスポンスを返す関数。
+        deltaLink が失効している場合は `DeltaResyncRequired` を送出すること
+    :param attributes: インデックスに保持する属性
+    :param persist_path: インデックスを保存する JSON ファイルのパス (None の場合は保存しない)
+    :param interval_seconds: バックグラウンド同期の間隔 (秒)
+    """
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        attributes: Sequence[str] = DEFAULT_ATTRIBUTES,
+        persist_path: Optional[str] = None,
+        interval_seconds: float = 300.0,
+    ) -> None:
+        self._fetch_page = fetch_page
+        self.index = DirectoryIndex(attributes)
+        self.attributes = self.index.attributes
+        self.persist_path = persist_path
+        self.interval_seconds = interval_seconds
+        self.delta_link: Optional[str] = None
+        self.syncs = 0
+        self.full_syncs = 0
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self._sync_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        if persist_path:
+            loaded = load_index(persist_path, self.attributes)
+            if loaded is not None:
+                self.index, self.delta_link = loaded
+                self._ready = True
+                logger.info(
+                    "Loaded directory index from %s (%d users)", persist_path, len(self.index)
+                )
+
+    @property
+    def ready(self) -> bool:
+        """初回の同期 (または保存済みインデックスの読み込み) が完了していれば True。"""
+        return self._ready
+
+    def initial_url(self) -> str:
+        """全件同期を開始する `users/delta` の相対 URL を返す。"""
+        return "/users/delta?$select=" + ",".join(self.attributes)
+
+    async def _read_pages(self, url: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """nextLink をたどって全ページの項目を読み込み、(項目, deltaLink) を返す。"""
+        items: List[Dict[str, Any]] = []
+        next_url: Optional[str] = url
+        while next_url:
+            page = await self._fetch_page(next_url)
+            items.extend(page.get("value") or [])
+            next_url = page.get("@odata.nextLink")
+            if not next_url:
+                return items, page.get("@odata.deltaLink")
+        return items, None
+
+    async def sync_once(self) -> Dict[str, int]:
+        """1 回分の同期を行う。deltaLink があれば差分のみを取得して反映する。
+
+        :return: full / upserted / removed / users を含む辞書
+        """
+        loop = asyncio.get_running_loop()
+        if self._sync_lock is None or self._sync_lock_loop is not loop:
+            self._sync_lock = asyncio.Lock()
+            self._sync_lock_loop = loop
+        async with self._sync_lock:
+            full = self.delta_link is None
+            if not full:
+                try:
+                    items, delta_link = await self._read_pages(self.delta_link)
+                except DeltaResyncRequired:
+                    logger.info("Directory delta link expired; starting a full sync")
+                    full = True
+            if full:
+                items, delta_link = await self._read_pages(self.initial_url())
+
+            if full:
+                self.index = DirectoryIndex.build(items, self.attributes)
+                upserted, removed = len(self.index), 0
+                self.full_syncs += 1
+            else:
+                upserted, removed = self.index.apply(items)
+
+            self.delta_link = delta_link
+            self.syncs += 1
+            self._ready = True
+
+            if self.persist_path:
+                await asyncio.to_thread(
+                    save_index, self.persist_path, self.index, self.delta_link
+                )
+
+        logger.info(
+            "Directory sync completed: full=%s upserted=%d removed=%d users=%d",
+            full,
+            upserted,
+            removed,
+            len(self.index),
+        )
+        return {
+            "full": int(full),
+            "upserted": upserted,
+            "removed": removed,
+            "users": len(self.index),
+        }
+
+    async def run_forever(self) -> None:
+        """`interval_seconds` ごとに同期を繰り返す。失敗しても次の周期で再試行する。"""
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - 次の周期で再試行する
+                logger.error("Directory sync failed: %s", exc)
+            await asyncio.sleep(self.interval_seconds)
+
+    def ensure_started(self) -> None:
+        """バックグラウンド同期が動いていなければ、現在のイベントループで開始する。"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run_forever())
+
+    async def wait_ready(self, timeout: float, poll_interval: float = 0.05) -> bool:
+        """初回の同期が完了するまで最大 `timeout` 秒待つ。"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not self._ready:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(poll_interval, remaining))
+        return True
+
+    async def stop(self) -> None:
+        """バックグラウンド同期を停止する。"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,108 @@
+"""Microsoft Graph のレスポンスを短時間キャッシュするためのストア。
+
+ユーザーの `/me` プロフィールはセッション中にほとんど変化しないため、
+(ユーザー, `$select` のフィールド集合) ごとにレスポンスを保持し、
+TTL の間は OBO のトークン交換も Graph の呼び出しも行わずに返します。
+
+- TTL を過ぎたエントリは破棄せずに残し、ETag があれば `If-None-Match` による
+  条件付きリクエストで再検証できるようにします (304 なら本文を再利用)。
+- エントリ数は `max_entries` で制限し、超えた場合は最も長く使われていないものから破棄します。
+- ヒット・ミス・再検証・破棄の回数をカウンタとして保持します。
+
+期限と件数の管理は `common.ttl_cache.TTLCache` で行います。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from common.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    """キャッシュされた Graph レスポンス。"""
+
+    body: Dict[str, Any]
+    etag: Optional[str]
+    expires_at: float
+
+
+class GraphResponseCache:
+    """TTL と LRU による上限付きの Graph レスポンスキャッシュ。
+
+    :param ttl_seconds: エントリを再検証なしで返す秒数。0 以下の場合はキャッシュしない
+    :param max_entries: 保持するエントリの最大数
+    :param clock: 現在時刻 (秒) を返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        # (本文, ETag)
+        self._cache: TTLCache[Tuple[Dict[str, Any], Optional[str]]] = TTLCache(
+            ttl_seconds=ttl_seconds, max_entries=max_entries, clock=clock
+        )
+        self.revalidated = 0
+
+    @property
+    def ttl_seconds(self) -> float:
+        return self._cache.ttl_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.enabled
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def lookup(self, key: Hashable) -> Optional[CachedResponse]:
+        """キーに対応するエントリを返す。期限切れでも ETag があれば返す。
+
+        期限内のエントリはヒットとして数えます。期限切れで ETag のないエントリは破棄します。
+        """
+        entry = self._cache.lookup(key, keep_stale=lambda value: value[1] is not None)
+        if entry is None:
+            return None
+        body, etag = entry.value
+        return CachedResponse(body, etag, entry.expires_at)
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        """エントリが TTL 内であれば True を返す。"""
+        return entry.expires_at > self._clock()
+
+    def store(
+        self, key: Hashable, body: Dict[str, Any], etag: Optional[str] = None
+    ) -> None:
+        """レスポンスを保存する。"""
+        if self._cache.put(key, (body, etag)):
+            logger.debug(
+                "Evicted Graph response cache entry (total=%d)", self._cache.evicted
+            )
+
+    def refresh(self, key: Hashable, entry: CachedResponse) -> None:
+        """304 (Not Modified) で再検証されたエントリの有効期限を延長する。"""
+        self.revalidated += 1
+        self.store(key, entry.body, entry.etag)
+
+    def clear(self) -> None:
+        """すべてのエントリを破棄する。"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュのカウンタを返す (診断・ログ用)。"""
+        stats = self._cache.stats()
+        return {
+            "entries": stats["entries"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "revalidated": self.revalidated,
+            "evicted": stats["evicted"],
+        }
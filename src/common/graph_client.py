@@ -0,0 +1,243 @@
+"""プロセス全体で共有する Microsoft Graph クライアントスタック。
+
+`GraphServiceClient` を呼び出しごとに構築すると、Kiota のリクエストアダプター、
+ミドルウェア パイプライン、httpx の AsyncClient (接続プール) がすべて作り直され、
+TLS 接続も再利用されません。このモジュールはそれらを 1 度だけ構築して共有し、
+ユーザーごとの OBO credential はリクエスト単位で差し込みます。
+
+- 認証プロバイダには `RequestScopedCredential` を渡し、実際のトークン取得は
+  `use_graph_credential()` で現在のタスクに設定された credential に委譲します。
+- httpx の接続はイベントループに紐付くため、スタックはイベントループごとに 1 つ保持します。
+- OBO credential は (テナント, ユーザー) ごとにキャッシュし、MSAL のトークンキャッシュを再利用します。
+- 生の HTTP リクエスト (`send_graph_request`) は `GraphScheduler` を経由して送信し、
+  スロットリング時の待機と再送はスケジューラーが一元的に行います。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, Mapping, NamedTuple, Optional
+
+import httpx
+from kiota_abstractions.method import Method
+from kiota_abstractions.native_response_handler import NativeResponseHandler
+from kiota_abstractions.request_information import RequestInformation
+from kiota_authentication_azure.azure_identity_authentication_provider import (
+    AzureIdentityAuthenticationProvider,
+)
+from kiota_http.middleware.options import ResponseHandlerOption, RetryHandlerOption
+from msgraph import GraphRequestAdapter, GraphServiceClient
+from msgraph.graph_request_adapter import options as GRAPH_CLIENT_OPTIONS
+from msgraph_core import GraphClientFactory
+
+from auth.entra_auth_provider import build_obo_credential
+from common.client_registry import ClientRegistry
+from common.config import Settings
+from common.graph_scheduler import GraphScheduler, graph_resource
+
+logger = logging.getLogger(__name__)
+
+GRAPH_SCOPE = "https://graph.microsoft.com/.default"
+
+# 現在のリクエスト (タスク) で Graph 呼び出しに使用する credential
+_current_credential: contextvars.ContextVar[Optional[Any]] = contextvars.ContextVar(
+    "graph_request_credential", default=None
+)
+# 現在のリクエストの (テナント, ユーザー)。スケジューラーの公平性とスロットリング管理に使用
+_current_identity: contextvars.ContextVar[Optional[Hashable]] = contextvars.ContextVar(
+    "graph_request_identity", default=None
+)
+
+
+
+class _GraphStack(NamedTuple):
+    """共有の GraphServiceClient と、そのアダプターに渡した httpx の AsyncClient。"""
+
+    client: GraphServiceClient
+    # ミドルウェアと接続プールを含む。Kiota のアダプターは公開していないため参照を保持する
+    http_client: httpx.AsyncClient
+
+
+# イベントループごとの共有スタック
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _GraphStack]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+# (テナント, ユーザー) ごとの OBO credential
+_credentials: ClientRegistry[Any] = ClientRegistry(
+    idle_timeout_seconds=Settings().azure_client_idle_timeout_seconds,
+    close=lambda credential: None,
+)
+
+# プロセス内のすべての Graph リクエストを調停するスケジューラー
+scheduler = GraphScheduler(
+    max_concurrency=Settings().graph_max_concurrency,
+    per_user_concurrency=Settings().graph_per_user_concurrency,
+    max_wait_seconds=Settings().graph_max_queue_wait_seconds,
+)
+
+# 構築回数の統計 (ベンチマーク・診断用)
+stats: Dict[str, int] = {"clients_created": 0}
+
+
+class RequestScopedCredential:
+    """現在のリクエストに設定された credential にトークン取得を委譲する TokenCredential。"""
+
+    def get_token(self, *scopes: str, **kwargs: Any) -> Any:
+        credential = _current_credential.get()
+        if credential is None:
+            raise RuntimeError(
+                "graph_credential_not_set: call within use_graph_credential()"
+            )
+        # OBO credential は追加の引数 (claims / enable_cae) を受け付けないため渡さない
+        return credential.get_token(*scopes)
+
+
+@contextmanager
+def use_graph_credential(
+    credential: Any, identity: Optional[Hashable] = None
+) -> Iterator[None]:
+    """このコンテキスト内の Graph 呼び出しで使用する credential を設定する。
+
+    :param identity: 呼び出し元の (テナント, ユーザー)。スケジューラーがユーザー間の
+        公平性とテナント単位のスロットリング管理に使用します
+    """
+    token = _current_credential.set(credential)
+    identity_token = _current_identity.set(identity)
+    try:
+        yield
+    finally:
+        _current_identity.reset(identity_token)
+        _current_credential.reset(token)
+
+
+def get_graph_credential(user_assertion: str, identity: Hashable) -> Any:
+    """(テナント, ユーザー) ごとにキャッシュした Graph 用 OBO credential を返す。
+
+    キャッシュ済みの credential は、ユーザートークンを最新のものに差し替えて返します。
+    """
+    credential = _credentials.acquire(
+        identity, lambda: build_obo_credential(user_assertion, GRAPH_SCOPE)
+    )
+    credential.update_user_assertion(user_assertion)
+    return credential
+
+
+def _create_graph_stack() -> _GraphStack:
+    """共有用の GraphServiceClient (アダプター・ミドルウェア・接続プール) を構築する。
+
+    httpx の AsyncClient は `GraphRequestAdapter` の既定と同じミドルウェアで構築して渡します。
+    """
+    auth_provider = AzureIdentityAuthenticationProvider(
+        RequestScopedCredential(), scopes=[GRAPH_SCOPE]
+    )
+    http_client = GraphClientFactory.create_with_default_middleware(
+        options=GRAPH_CLIENT_OPTIONS
+    )
+    adapter = GraphRequestAdapter(auth_provider, client=http_client)
+    stats["clients_created"] += 1
+    logger.debug("Created shared Graph client stack (total=%d)", stats["clients_created"])
+    return _GraphStack(GraphServiceClient(request_adapter=adapter), http_client)
+
+
+def _get_graph_stack() -> _GraphStack:
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        stack = _clients.get(loop)
+        if stack is None:
+            stack = _create_graph_stack()
+            _clients[loop] = stack
+        return stack
+
+
+def get_graph_service_client() -> GraphServiceClient:
+    """現在のイベントループ用の共有 GraphServiceClient を返す。"""
+    return _get_graph_stack().client
+
+
+async def open_graph_connection() -> int:
+    """現在のイベントループの共有スタックを構築し、Graph への TLS 接続を確立しておく。
+
+    認証ヘッダーを付けない HEAD リクエストを送り、接続を共有の接続プールに残します。
+    レスポンスのステータス (通常は 401 などのエラー) を返しますが、結果は使用しません。
+    """
+    http_client = _get_graph_stack().http_client
+    response = await http_client.request("HEAD", str(http_client.base_url))
+    return response.status_code
+
+
+async def send_graph_request(
+    method: str,
+    url: str,
+    *,
+    content: Optional[bytes] = None,
+    content_type: str = "application/json",
+    headers: Optional[Mapping[str, str]] = None,
+) -> httpx.Response:
+    """共有スタック (認証・ミドルウェア・接続プール) 経由で Graph に生の HTTP リクエストを送る。
+
+    Kiota モデルへのデシリアライズは行わず、httpx のレスポンスをそのまま返します。
+    エラーステータスでも例外は送出しないため、呼び出し元でステータスを確認してください。
+    `use_graph_credential()` のコンテキスト内で呼び出す必要があります。
+
+    送信は `scheduler` を経由します。Kiota の再試行ミドルウェアは無効にし、
+    スロットリング時の待機と再送はスケジューラーに任せます。
+
+    :param method: HTTP メソッド (例: "GET", "POST")
+    :param url: `/me` のような相対パス、または Graph の絶対 URL
+    :param content: リクエスト本文
+    :param content_type: `content` 指定時の Content-Type
+    :param headers: 追加のリクエストヘッダー
+    """
+    adapter = get_graph_service_client().request_adapter
+
+    request_info = RequestInformation()
+    request_info.http_method = Method(method.upper())
+    request_info.url = url if "://" in url else f"{adapter.base_url}{url}"
+    request_info.headers.try_add("Accept", "application/json")
+    for name, value in (headers or {}).items():
+        request_info.headers.try_add(name, value)
+    if content is not None:
+        request_info.set_stream_content(content, content_type)
+    request_info.add_request_options(
+        [
+            ResponseHandlerOption(NativeResponseHandler()),
+            RetryHandlerOption(max_retries=0, should_retry=False),
+        ]
+    )
+
+    identity = _current_identity.get()
+    tenant = identity[0] if isinstance(identity, tuple) and identity else None
+    return await scheduler.run(
+        tenant,
+        identity,
+        graph_resource(url),
+        lambda: adapter.send_primitive_async(request_info, "bytes", None),
+    )
+
+
+def graph_response_json(response: httpx.Response) -> Dict[str, Any]:
+    """`send_graph_request()` のレスポンス本文を JSON(dict) として返す。
+
+    エラーステータスの場合は Graph のエラーコードとメッセージを含めて
+    `RuntimeError("graph_request_failed: ...")` を送出します。
+    """
+    if response.status_code >= 400:
+        code = message = ""
+        try:
+            error = response.json().get("error") or {}
+            code = error.get("code") or ""
+            message = error.get("message") or ""
+        except ValueError:
+            message = response.text
+        raise RuntimeError(
+            f"graph_request_failed: status={response.status_code} code={code} "
+            f"message={message}"
+        )
+    return response.json()
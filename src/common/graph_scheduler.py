@@ -0,0 +1,277 @@
+"""Microsoft Graph へのリクエストを調停するスケジューラー。
+
+Graph はアプリ単位・テナント単位でスロットリングを行うため、各ツール呼び出しが
+独立にリクエストを送ると、バースト時に 429 が連鎖してすべての呼び出しが失敗します。
+このモジュールはプロセス内のすべての Graph リクエストを 1 か所で調停します。
+
+- 429 / 503 / 504 の `Retry-After` を (テナント, リソース) ごとに記録し、
+  期限までは同じテナント・リソースへの後続リクエストを送らずに待機させます。
+- 同時実行数をプロセス全体とユーザーごとに制限し、空いた枠は待機中のユーザーに
+  ラウンドロビンで割り当てます (1 ユーザーのバーストが他のユーザーを塞がない)。
+- 待機時間 (キュー待ち + Retry-After 待ち) が上限を超える場合や、送信回数が上限に
+  達した場合は待たずに `RuntimeError("graph_throttled: ...")` を送出し、遅延を有限に保ちます。
+  `Retry-After: 0` が繰り返し返っても、再送の間隔は最小待機秒数を下回りません。
+- キュー待ち時間やスロットリングの回数をカウンタとして保持します。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Retry-After に従って再送するステータスコード
+RETRYABLE_STATUSES = frozenset({429, 503, 504})
+
+# Retry-After が返らなかった場合の待機秒数
+DEFAULT_RETRY_AFTER_SECONDS = 2.0
+
+# 再送までの最小待機秒数 (`Retry-After: 0` で間隔なく再送し続けないため)
+MIN_RETRY_AFTER_SECONDS = 0.5
+
+# 1 回の呼び出しで送信するリクエストの最大数 (初回を含む)
+DEFAULT_MAX_ATTEMPTS = 5
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> float:
+    """`Retry-After` ヘッダー (秒数または HTTP 日付) を待機秒数に変換する。"""
+    if not value:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+def graph_resource(url: str) -> str:
+    """リクエスト URL からスロットリングの単位とするリソース (先頭のパス要素) を取り出す。
+
+    例: `/me/messages` → `me`、`https://graph.microsoft.com/v1.0/users?$top=5` → `users`
+    """
+    path = httpx.URL(url).path if "://" in url else url.split("?", 1)[0]
+    segments = [segment for segment in path.split("/") if segment]
+    if segments and segments[0] in ("v1.0", "beta"):
+        segments = segments[1:]
+    return segments[0].lower() if segments else ""
+
+
+class GraphScheduler:
+    """Graph リクエストの同時実行数・公平性・スロットリング待機を管理する。
+
+    :param max_concurrency: プロセス全体で同時に送信するリクエストの最大数
+    :param per_user_concurrency: 1 ユーザーが同時に送信できるリクエストの最大数
+    :param max_wait_seconds: 1 回の呼び出しで待機する合計時間の上限 (秒)
+    :param max_attempts: 1 回の呼び出しで送信するリクエストの最大数 (初回を含む)
+    :param clock: 現在時刻 (秒) を返す関数。テスト用
+    :param sleep: 待機に用いるコルーチン関数。テスト用
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        per_user_concurrency: int = 4,
+        max_wait_seconds: float = 30.0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[object]] = asyncio.sleep,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_user_concurrency = max(1, per_user_concurrency)
+        self.max_wait_seconds = max_wait_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._clock = clock
+        self._sleep = sleep
+        self._active = 0
+        self._active_per_user: Dict[Hashable, int] = {}
+        # ユーザーごとの待機キュー。先頭のユーザーから順に枠を割り当てる
+        self._waiters: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        # (テナント, リソース) → この時刻まで送信しない
+        self._blocked_until: Dict[Tuple[Hashable, str], float] = {}
+        self.requests = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+
+    async def run(
+        self,
+        tenant: Hashable,
+        user: Hashable,
+        resource: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """スケジューラーの枠を取得してリクエストを送信する。
+
+        429 / 503 / 504 が返った場合は `Retry-After` (最小 `MIN_RETRY_AFTER_SECONDS`) を
+        記録し、上限時間内かつ送信回数が上限未満であれば待機してから再送します。
+
+        :param send: 1 回分のリクエストを送信するコルーチン関数
+        :raises RuntimeError: 待機時間または送信回数の上限を超える場合 (`graph_throttled`)
+        """
+        key = (tenant, resource)
+        started = self._clock()
+        deadline = started + self.max_wait_seconds
+        attempts = 0
+
+        while True:
+            wait_started = self._clock()
+            try:
+                await self._wait_for_backoff(key, deadline)
+                await self._acquire(user, deadline)
+            finally:
+                self._record_wait(self._clock() - wait_started)
+            try:
+                self.requests += 1
+                attempts += 1
+                response = await send()
+            finally:
+                self._release(user)
+
+            if response.status_code not in RETRYABLE_STATUSES:
+                return response
+
+            retry_after = max(
+                MIN_RETRY_AFTER_SECONDS,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+            self.throttled += 1
+            self._blocked_until[key] = max(
+                self._blocked_until.get(key, 0.0), self._clock() + retry_after
+            )
+            logger.warning(
+                "Graph throttled: tenant=%s resource=%s status=%d retry_after=%.1fs",
+                tenant,
+                resource,
+                response.status_code,
+                retry_after,
+            )
+            if attempts >= self.max_attempts or self._clock() >= deadline:
+                self.rejected += 1
+                raise RuntimeError(
+                    f"graph_throttled: tenant={tenant} resource={resource} "
+                    f"gave up after {attempts} attempts "
+                    f"in {self._clock() - started:.1f}s"
+                )
+
+    async def _wait_for_backoff(
+        self, key: Tuple[Hashable, str], deadline: float
+    ) -> None:
+        """(テナント, リソース) の Retry-After が明けるまで待機する。"""
+        now = self._clock()
+        blocked_until = self._blocked_until.get(key, 0.0)
+        if blocked_until <= now:
+            self._blocked_until.pop(key, None)
+            return
+        if blocked_until > deadline:
+            self.rejected += 1
+            raise RuntimeError(
+                f"graph_throttled: tenant={key[0]} resource={key[1]} "
+                f"retry_after={blocked_until - now:.1f}s"
+            )
+        await self._sleep(blocked_until - now)
+
+    async def _acquire(self, user: Hashable, deadline: float) -> None:
+        """送信枠を取得する。空きがなければ公平な順番で割り当てられるまで待つ。"""
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future = loop.create_future()
+        self._waiters.setdefault(user, deque()).append(waiter)
+        self._dispatch()
+        if waiter.done():
+            return
+
+        timeout = max(0.0, deadline - self._clock())
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._discard_waiter(user, waiter)
+            if waiter.done() and not waiter.cancelled():
+                self._release(user)
+            self.rejected += 1
+            raise RuntimeError(
+                f"graph_throttled: queue wait exceeded {self.max_wait_seconds:.1f}s"
+            ) from None
+        except BaseException:
+            self._discard_waiter(user, waiter)
+            if waiter.done() and not waiter.cancelled():
+                self._release(user)
+            raise
+
+    def _release(self, user: Hashable) -> None:
+        """送信枠を返却し、待機中のリクエストに割り当てる。"""
+        self._active -= 1
+        remaining = self._active_per_user.get(user, 1) - 1
+        if remaining > 0:
+            self._active_per_user[user] = remaining
+        else:
+            self._active_per_user.pop(user, None)
+        # 枠を使い終えたユーザーは待機中の他のユーザーの後ろに回す
+        if user in self._waiters:
+            self._waiters.move_to_end(user)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """空いている枠を、待機中のユーザーにラウンドロビンで割り当てる。"""
+        progressed = True
+        while self._active < self.max_concurrency and self._waiters and progressed:
+            progressed = False
+            for user in list(self._waiters):
+                if self._active >= self.max_concurrency:
+                    break
+                if self._active_per_user.get(user, 0) >= self.per_user_concurrency:
+                    continue
+                queue = self._waiters[user]
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self._waiters[user]
+                    continue
+                queue.popleft().set_result(None)
+                self._active += 1
+                self._active_per_user[user] = self._active_per_user.get(user, 0) + 1
+                # 割り当てたユーザーは末尾に回す
+                if queue:
+                    self._waiters.move_to_end(user)
+                else:
+                    del self._waiters[user]
+                progressed = True
+
+    def _discard_waiter(self, user: Hashable, waiter: asyncio.Future) -> None:
+        queue = self._waiters.get(user)
+        if queue is None:
+            return
+        try:
+            queue.remove(waiter)
+        except ValueError:
+            pass
+        if not queue:
+            del self._waiters[user]
+
+    def _record_wait(self, waited: float) -> None:
+        self.queue_wait_seconds_total += waited
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, waited)
+        if waited >= 1.0:
+            logger.debug("Graph request waited %.2fs in scheduler queue", waited)
+
+    def stats(self) -> Dict[str, float]:
+        """スケジューラーのカウンタを返す (診断・ログ用)。"""
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "active": self._active,
+            "queued": sum(len(queue) for queue in self._waiters.values()),
+            "queue_wait_seconds_total": round(self.queue_wait_seconds_total, 3),
+            "queue_wait_seconds_max": round(self.queue_wait_seconds_max, 3),
+        }
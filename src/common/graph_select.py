@@ -0,0 +1,78 @@
+"""Microsoft Graph の `$select` を Graph のスキーマで検証・正規化するヘルパー。
+
+存在しないフィールドを `$select` に含めると Graph は 400 を返すため、
+OBO のトークン交換と Graph への往復が無駄になります。このモジュールは
+Kiota の `User` モデルから選択可能なフィールドを導出し、リクエストを送る前に
+ローカルで検証します。
+
+- 選択可能なフィールドはプロセス内で 1 度だけ導出します
+  (`User.get_field_deserializers()` は初回に関連モデルをすべて import するため)。
+- 正規化はスキーマの表記にそろえた上で `canonicalize_select()` と同じ順序にし、
+  同じフィールド集合は同一のタプルオブジェクトを返します (キャッシュキーとして使用)。
+- 同じ文字列の解析結果はメモ化します。
+"""
+
+from __future__ import annotations
+
+import difflib
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple
+
+from msgraph.generated.models.user import User
+
+# 正規化済みのフィールドタプル → 共有するタプルオブジェクト
+_interned: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+@lru_cache(maxsize=None)
+def user_select_fields() -> Mapping[str, str]:
+    """`User` の選択可能なフィールドを、小文字 → スキーマ上の表記の対応で返す。"""
+    fields = {
+        name.lower(): sys.intern(name)
+        for name in User().get_field_deserializers()
+        if not name.startswith("@")
+    }
+    return MappingProxyType(fields)
+
+
+@lru_cache(maxsize=1024)
+def parse_user_select(raw: str) -> Tuple[str, ...]:
+    """カンマ区切りの `$select` 文字列を検証し、正規化したフィールドのタプルにする。
+
+    - 前後空白・空要素・重複 (大文字小文字を区別しない) を除去
+    - フィールド名をスキーマ上の表記 (例: `DisplayName` → `displayName`) にそろえる
+    - 大文字小文字を区別しないソート
+
+    :raises ValueError: `User` に存在しないフィールドを含む場合 (`invalid_select_fields`)
+    """
+    allowed = user_select_fields()
+    fields: Dict[str, str] = {}
+    unknown: Dict[str, str] = {}
+    for item in (raw or "").split(","):
+        field = item.strip()
+        if not field:
+            continue
+        canonical = allowed.get(field.lower())
+        if canonical is None:
+            unknown.setdefault(field.lower(), field)
+        else:
+            fields.setdefault(canonical.lower(), canonical)
+
+    if unknown:
+        details = []
+        for field in unknown.values():
+            suggestions = difflib.get_close_matches(
+                field.lower(), allowed.keys(), n=1, cutoff=0.7
+            )
+            if suggestions:
+                details.append(f"{field} (did you mean {allowed[suggestions[0]]}?)")
+            else:
+                details.append(field)
+        raise ValueError(
+            f"invalid_select_fields: unknown user fields: {', '.join(details)}"
+        )
+
+    result = tuple(fields[key] for key in sorted(fields))
+    return _interned.setdefault(result, result)
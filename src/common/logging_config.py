@@ -23,12 +23,28 @@ class LoggerConfig:
             "main",
             "tools",
             "tools.azure_vm",
+            "tools.azure_vm_export",
+            "tools.azure_resource_graph",
+            "tools.directory_lookup",
             "tools.graph_user",
+            "tools.graph_batch",
+            "tools.graph_directory",
+            "tools.graph_photo",
             "tools.role_based_info",
             "tools.userinfo",
             "common",
+            "common.client_registry",
+            "common.company_data",
             "common.config",
+            "common.directory_index",
+            "common.graph_cache",
+            "common.graph_client",
+            "common.graph_scheduler",
+            "common.photo_cache",
+            "common.startup_profiler",
+            "common.tool_loader",
             "common.utils",
+            "common.warmup",
         ],
         "auth": [
             # 認証関連（Entra ID・MSAL）
@@ -36,6 +52,9 @@ class LoggerConfig:
             "auth.entra_auth_provider",
             "auth.obo_client",
             "auth.claims_helpers",
+            "auth.group_membership",
+            "auth.rbac_policy",
+            "auth.tool_authorization",
             "msal",
         ],
         "azure": [
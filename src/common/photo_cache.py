@@ -0,0 +1,241 @@
+"""プロフィール写真などのバイナリを保持する、容量上限付きのディスクキャッシュ。
+
+写真は 1 件あたり数十 KB〜数 MB と大きく、Graph からの取得も遅いため、
+(テナント, ユーザー, サイズ, ETag) ごとにディスクへ保存して再利用します。
+
+- 書き込みは一時ファイルに行い、完了後に置き換えます
+  (途中で失敗しても壊れたファイルは残りません)。
+- 写真ごとにキーと Content-Type を記録したメタデータファイル (`<名前>.meta.json`) を保存し、
+  プロセスの再起動時はディレクトリからキャッシュの索引を復元します
+  (メタデータのない写真や書き込み途中の一時ファイルは削除します)。
+- 合計サイズが `max_bytes` を超えた場合は、最も長く使われていないファイルから削除します
+  (再起動後は更新時刻の古い順)。
+- 同じ (テナント, ユーザー, サイズ) の新しい ETag を保存すると、古い ETag のファイルは削除します。
+- ファイルの削除に失敗しても例外は送出しません (ログに記録し、索引からのみ外します)。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# キャッシュファイルの拡張子と Content-Type の対応
+_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/bmp": ".bmp",
+}
+
+# このキャッシュが作成するファイル名 (SHA-256 + 拡張子、そのメタデータ、または書き込み途中の一時ファイル)
+_CACHE_FILE_PATTERN = re.compile(
+    r"^(?:[0-9a-f]{64}\.(?:jpg|png|gif|bmp|bin)(?:\.meta\.json)?|\.photo-.*\.tmp)$"
+)
+
+_META_SUFFIX = ".meta.json"
+
+
+class _Entry(NamedTuple):
+    path: str
+    size: int
+    content_type: str
+
+
+def _file_name(key: Tuple[Hashable, ...], content_type: str) -> str:
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    return digest + _EXTENSIONS.get(content_type, ".bin")
+
+
+def _as_key(value: Any) -> Any:
+    """JSON から読み込んだキー (リスト) をタプルに戻す。"""
+    if isinstance(value, list):
+        return tuple(_as_key(item) for item in value)
+    return value
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        logger.warning("Failed to remove photo cache file %s: %s", path, exc)
+
+
+class PhotoCache:
+    """LRU のバイト数上限付きディスクキャッシュ。
+
+    キーは (テナント, ユーザー, サイズ, ETag) のタプルで、先頭 3 要素が同じエントリは
+    同じ写真の別バージョンとして扱います。
+
+    :param directory: キャッシュファイルを保存するディレクトリ
+    :param max_bytes: キャッシュ全体の最大バイト数
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 50 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.max_bytes = max(0, max_bytes)
+        self._entries: OrderedDict[Tuple[Hashable, ...], _Entry] = OrderedDict()
+        # (テナント, ユーザー, サイズ) → 最新の ETag を含むキー
+        self._latest: Dict[Tuple[Hashable, ...], Tuple[Hashable, ...]] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _load_index(self) -> None:
+        """前回のプロセスが保存した写真をメタデータから索引に登録し、不要なファイルを削除する。"""
+        if not os.path.isdir(self.directory):
+            return
+        names = [name for name in os.listdir(self.directory) if _CACHE_FILE_PATTERN.match(name)]
+        restored: List[Tuple[float, Tuple[Hashable, ...], _Entry]] = []
+        keep = set()
+        for name in names:
+            if not name.endswith(_META_SUFFIX):
+                continue
+            data_name = name[: -len(_META_SUFFIX)]
+            path = os.path.join(self.directory, data_name)
+            try:
+                with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                    meta = json.load(f)
+                key = _as_key(meta["key"])
+                content_type = str(meta["content_type"])
+                stat = os.stat(path)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if _file_name(key, content_type) != data_name or stat.st_size != meta.get("size"):
+                continue
+            restored.append((stat.st_mtime, key, _Entry(path, stat.st_size, content_type)))
+            keep.update((name, data_name))
+
+        for name in names:
+            if name not in keep:
+                _remove_quietly(os.path.join(self.directory, name))
+
+        # 更新時刻の古い順に登録し、同じ写真の古い ETag や上限を超えた分は削除する
+        with self._lock:
+            for _, key, entry in sorted(restored, key=lambda item: item[0]):
+                self._add_locked(key, entry)
+        if restored:
+            logger.info("Restored %d cached photos from %s", len(self._entries), self.directory)
+
+    def read(self, key: Tuple[Hashable, ...]) -> Optional[Tuple[bytes, str]]:
+        """キャッシュ済みのバイナリを読み込み、(データ, Content-Type) を返す。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            with open(entry.path, "rb") as f:
+                return f.read(), entry.content_type
+        except OSError as exc:
+            logger.warning("Dropping unreadable photo cache file %s: %s", entry.path, exc)
+            with self._lock:
+                if self._entries.get(key) == entry:
+                    self._discard_locked(key)
+            return None
+
+    def store(self, key: Tuple[Hashable, ...], content_type: str, data: bytes) -> bool:
+        """データを一時ファイルに書き込み、完了後にキャッシュへ登録する。
+
+        :return: 登録した場合は True。キャッシュ全体の上限を超える場合は登録しない
+        """
+        if not self.enabled:
+            return False
+        if len(data) > self.max_bytes:
+            logger.debug("Photo of %d bytes exceeds cache budget; not cached", len(data))
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, _file_name(key, content_type))
+        self._write_atomically(path, data)
+        try:
+            meta = json.dumps(
+                {"key": key, "content_type": content_type, "size": len(data)},
+                ensure_ascii=False,
+            ).encode("utf-8")
+        except (TypeError, ValueError):
+            # JSON にできないキーは再起動後に復元しない (このプロセスの間だけ保持する)
+            meta = None
+        else:
+            self._write_atomically(path + _META_SUFFIX, meta)
+
+        with self._lock:
+            # 同じキーのファイルは置き換え済みのため、索引からのみ外す
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self.total_bytes -= replaced.size
+                if replaced.path != path:
+                    self._remove_files(replaced.path)
+            self._add_locked(key, _Entry(path, len(data), content_type))
+        return True
+
+    def _write_atomically(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".photo-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+
+    def _add_locked(self, key: Tuple[Hashable, ...], entry: _Entry) -> None:
+        previous = self._latest.get(key[:-1])
+        if previous is not None and previous != key:
+            self._discard_locked(previous)
+        self._entries[key] = entry
+        self._latest[key[:-1]] = key
+        self.total_bytes += entry.size
+        while self.total_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._discard_locked(oldest)
+            self.evicted += 1
+
+    @staticmethod
+    def _remove_files(path: str) -> None:
+        _remove_quietly(path + _META_SUFFIX)
+        _remove_quietly(path)
+
+    def _discard_locked(self, key: Tuple[Hashable, ...]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry.size
+        if self._latest.get(key[:-1]) == key:
+            del self._latest[key[:-1]]
+        self._remove_files(entry.path)
+
+    def clear(self) -> None:
+        """すべてのエントリとファイルを削除する。"""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard_locked(key)
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュのカウンタを返す (診断・ログ用)。"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
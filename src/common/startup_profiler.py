@@ -0,0 +1,270 @@
+"""サーバー起動時のフェーズごとの所要時間と、モジュールごとの import 時間の計測。
+
+`STARTUP_PROFILE=true` の場合に、`src/main.py` の起動処理 (設定の読み込み、ロギング設定、
+JWKS の取得を含む認証プロバイダの初期化、FastMCP アプリの構築、ツールの登録) を
+フェーズに分けて計測し、同時に import されたモジュールごとの時間を記録します。
+
+- フェーズは `mark(name)` を呼び出した時点で、直前の `mark` (または計測開始) からの
+  経過時間として記録します。起動処理のコードを `with` で囲む必要はありません。
+- import の時間は `sys.meta_path` の先頭に追加したファインダーで計測します。
+  `python -X importtime` と同様に、モジュール自身の時間 (self) と、そのモジュールから
+  import された他のモジュールを含む時間 (cumulative) を記録します。
+- `finish()` でファインダーを取り除き、所要時間の降順に並べたレポートを
+  テキストでログに出力し、JSON をファイル (`STARTUP_PROFILE_PATH`) に書き出します。
+
+計測しない場合 (`enabled=False`) は、`mark` と `finish` は何もしません。
+このモジュールは、計測対象の import より前に読み込めるよう標準ライブラリのみに依存し、
+`STARTUP_PROFILE` / `STARTUP_PROFILE_PATH` も `common.config` を経由せずに読み込みます
+(`common.config` の import と環境変数の読み込みも計測の対象になります)。
+"""
+
+from __future__ import annotations
+
+import importlib.abc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# テキストのレポートに出力するモジュール・パッケージの件数
+DEFAULT_TOP = 20
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """元のローダーに処理を委ね、モジュールの作成と実行にかかった時間を記録する。"""
+
+    def __init__(self, loader: Any, profiler: "StartupProfiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        return self._profiler._timed(spec.name, self._loader.create_module, spec)
+
+    def exec_module(self, module: Any) -> None:
+        # import 後のモジュールからは元のローダーが見えるようにする
+        spec = getattr(module, "__spec__", None)
+        if spec is not None and spec.loader is self:
+            spec.loader = self._loader
+        module.__loader__ = self._loader
+        self._profiler._timed(module.__name__, self._loader.exec_module, module)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """他のファインダーが見つけたモジュールのローダーを `_TimedLoader` で包む。"""
+
+    def __init__(self, profiler: "StartupProfiler") -> None:
+        self._profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None) -> Any:
+        # ファインダー自身が import を行う場合に再帰しない
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self:
+                    continue
+                find_spec = getattr(finder, "find_spec", None)
+                if find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.finding = False
+
+        if spec is None or spec.loader is None:
+            return spec
+        if not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = _TimedLoader(spec.loader, self._profiler)
+        return spec
+
+
+class StartupProfiler:
+    """起動処理のフェーズと import の時間を計測する。
+
+    :param enabled: 計測するか (False の場合は何もしない)
+    :param output_path: `finish` で JSON のレポートを書き出すファイル (空の場合はログに出力)
+    :param clock: 時刻を返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        output_path: str = "",
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.enabled = enabled
+        self.output_path = output_path
+        self._clock = clock
+        self._started = clock()
+        self._started_at = datetime.now(timezone.utc)
+        self._last_mark = self._started
+        self._finished: Optional[float] = None
+        self.phases: List[Tuple[str, float]] = []
+        # モジュール名 → [self の秒数, cumulative の秒数]
+        self.imports: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._timer: Optional[_ImportTimer] = None
+
+    def start(self) -> "StartupProfiler":
+        """import の計測を開始する。"""
+        if self.enabled and self._timer is None:
+            self._timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._timer)
+        return self
+
+    def stop(self) -> None:
+        """import の計測を終了する。"""
+        if self._timer is not None:
+            try:
+                sys.meta_path.remove(self._timer)
+            except ValueError:
+                pass
+            self._timer = None
+
+    def mark(self, name: str) -> None:
+        """直前の `mark` (または計測開始) からの経過時間を、フェーズ `name` として記録する。"""
+        if not self.enabled:
+            return
+        now = self._clock()
+        self.phases.append((name, now - self._last_mark))
+        self._last_mark = now
+
+    def _timed(self, name: str, function: Callable[[Any], Any], argument: Any) -> Any:
+        stack: Optional[List[List[float]]] = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        # [このモジュールから import された他のモジュールの時間]
+        frame = [0.0]
+        stack.append(frame)
+        started = self._clock()
+        try:
+            return function(argument)
+        finally:
+            elapsed = self._clock() - started
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            with self._lock:
+                entry = self.imports.setdefault(name, [0.0, 0.0])
+                entry[0] += elapsed - frame[0]
+                entry[1] += elapsed
+
+    def report(self) -> Dict[str, Any]:
+        """所要時間の降順に並べたレポートを返す。"""
+        end = self._finished if self._finished is not None else self._clock()
+        with self._lock:
+            imports = {name: tuple(times) for name, times in self.imports.items()}
+
+        packages: Dict[str, float] = {}
+        for name, (self_seconds, _) in imports.items():
+            package = name.partition(".")[0]
+            packages[package] = packages.get(package, 0.0) + self_seconds
+
+        return {
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "total_seconds": round(end - self._started, 6),
+            "import_seconds": round(sum(s for s, _ in imports.values()), 6),
+            "phases": [
+                {"name": name, "seconds": round(seconds, 6)}
+                for name, seconds in sorted(
+                    self.phases, key=lambda phase: phase[1], reverse=True
+                )
+            ],
+            "packages": [
+                {"package": package, "self_seconds": round(seconds, 6)}
+                for package, seconds in sorted(
+                    packages.items(), key=lambda item: item[1], reverse=True
+                )
+            ],
+            "imports": [
+                {
+                    "module": name,
+                    "self_seconds": round(self_seconds, 6),
+                    "cumulative_seconds": round(cumulative, 6),
+                }
+                for name, (self_seconds, cumulative) in sorted(
+                    imports.items(), key=lambda item: item[1][0], reverse=True
+                )
+            ],
+        }
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """計測を終了し、レポートをログとファイルに出力して返す (計測しない場合は None)。"""
+        if not self.enabled:
+            return None
+        self.stop()
+        if self._finished is None:
+            self._finished = self._clock()
+        report = self.report()
+
+        logger.info("%s", format_report(report))
+        if self.output_path:
+            try:
+                with open(self.output_path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+                logger.info("Startup profile written to %s", self.output_path)
+            except OSError as exc:
+                logger.warning(
+                    "Failed to write startup profile to %s: %s", self.output_path, exc
+                )
+        else:
+            logger.info("Startup profile: %s", json.dumps(report, ensure_ascii=False))
+        return report
+
+
+def format_report(report: Dict[str, Any], top: int = DEFAULT_TOP) -> str:
+    """レポートを人が読むためのテキストに整形する。"""
+    total = report["total_seconds"] or 1.0
+    lines = [
+        f"Startup profile: total {report['total_seconds']:.3f}s "
+        f"(imports {report['import_seconds']:.3f}s)",
+        "Phases:",
+    ]
+    for phase in report["phases"]:
+        lines.append(
+            f"  {phase['name']:<24} {phase['seconds']:8.3f}s "
+            f"{phase['seconds'] / total:6.1%}"
+        )
+    lines.append("Top packages (self):")
+    for package in report["packages"][:top]:
+        lines.append(f"  {package['package']:<40} {package['self_seconds']:8.3f}s")
+    lines.append("Top modules (self / cumulative):")
+    for module in report["imports"][:top]:
+        lines.append(
+            f"  {module['module']:<40} {module['self_seconds']:8.3f}s "
+            f"{module['cumulative_seconds']:8.3f}s"
+        )
+    return "\n".join(lines)
+
+
+def start_startup_profiler(
+    enabled: Optional[bool] = None, output_path: Optional[str] = None
+) -> StartupProfiler:
+    """計測を開始したプロファイラーを返す。
+
+    :param enabled: 計測するか (省略時は環境変数 `STARTUP_PROFILE` が "true" の場合)
+    :param output_path: JSON の出力先 (省略時は環境変数 `STARTUP_PROFILE_PATH`)
+    """
+    if enabled is None:
+        enabled = os.getenv("STARTUP_PROFILE", "false").strip().lower() == "true"
+    if output_path is None:
+        output_path = os.getenv("STARTUP_PROFILE_PATH", "startup_profile.json")
+    profiler = StartupProfiler(enabled=enabled, output_path=output_path)
+    return profiler.start()
+
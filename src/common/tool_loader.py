@@ -0,0 +1,324 @@
+"""ツールモジュールの遅延読み込み。
+
+ツールモジュールは `azure.mgmt.compute` や `msgraph` などの重い SDK を import するため、
+すべてを起動時に import するとサーバーが最初のリクエストを受け付けるまでの時間が長くなります。
+
+`describe_tool_module` はモジュールを import せずにソースコードを構文解析し、
+`register_tools(mcp)` 内で `@mcp.tool()` を付けた関数の名前・シグネチャ・docstring を
+取り出します。`register_lazy_tools` はこの情報から同じ名前・引数・説明を持つ代理のツールを
+登録し、モジュール本体は最初の呼び出し時 (またはバックグラウンドのウォームアップ) に
+import します。
+
+次のいずれかに当たるモジュールは安全に記述できないため、呼び出し側で従来どおり
+起動時に import してください (`describe_tool_module` が None を返します)。
+
+- `register_tools` に `@mcp.tool()` の関数定義と補助関数以外の処理がある
+- デコレーターに引数がある、または `mcp.tool` 以外のデコレーターがある
+- 引数の既定値がリテラルでない、または可変長引数がある
+- 型注釈に `typing` / `fastmcp` / `mcp.types` 以外から import した名前を使っている
+"""
+
+from __future__ import annotations
+
+import ast
+import asyncio
+import builtins
+import importlib
+import inspect
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from fastmcp import FastMCP
+
+logger = logging.getLogger(__name__)
+
+# 型注釈の評価のために import してよいモジュール (起動時に読み込み済みの軽量なもの)
+_ANNOTATION_MODULES = ("typing", "fastmcp", "mcp.types")
+_BUILTIN_TYPES = {
+    name: getattr(builtins, name)
+    for name in ("str", "int", "float", "bool", "bytes", "list", "dict", "tuple", "set")
+}
+
+
+class ToolSpec(NamedTuple):
+    """モジュールを import せずに取り出したツールの情報。"""
+
+    name: str
+    signature: inspect.Signature
+    doc: Optional[str]
+
+
+class LazyToolModule:
+    """最初に必要になった時点で import するツールモジュール。
+
+    :param module_name: モジュール名 (例: `tools.azure_vm`)
+    :param specs: `describe_tool_module` で取り出したツールの情報
+    """
+
+    def __init__(self, module_name: str, specs: List[ToolSpec]) -> None:
+        self.module_name = module_name
+        self.specs = specs
+        self._functions: Optional[Dict[str, Callable[..., Any]]] = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._functions is not None
+
+    def load(self) -> Dict[str, Callable[..., Any]]:
+        """モジュールを import し、ツール名 → 関数を返す (2 回目以降は import しない)。"""
+        if self._functions is None:
+            with self._lock:
+                if self._functions is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self.module_name)
+                    capture = _ToolCapture()
+                    module.register_tools(capture)
+                    self.load_seconds = time.perf_counter() - started
+                    logger.info(
+                        "Loaded tool module %s in %.3fs",
+                        self.module_name,
+                        self.load_seconds,
+                    )
+                    self._functions = capture.functions
+        return self._functions
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """ツール本体を呼び出す。未読み込みの場合はイベントループを止めずに import する。"""
+        functions = self._functions
+        if functions is None:
+            functions = await asyncio.to_thread(self.load)
+        result = functions[name](**arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+class _ToolCapture:
+    """`register_tools` に `mcp` の代わりに渡し、ツール関数を受け取る。"""
+
+    def __init__(self) -> None:
+        self.functions: Dict[str, Callable[..., Any]] = {}
+
+    def tool(self, fn: Optional[Callable[..., Any]] = None, **_: Any) -> Any:
+        def decorator(function: Callable[..., Any]) -> Callable[..., Any]:
+            self.functions[function.__name__] = function
+            return function
+
+        return decorator(fn) if fn is not None else decorator
+
+
+def _annotation_namespace(tree: ast.Module) -> Dict[str, Any]:
+    namespace: Dict[str, Any] = dict(_BUILTIN_TYPES)
+    for node in tree.body:
+        if not isinstance(node, ast.ImportFrom) or not node.module or node.level:
+            continue
+        if not any(
+            node.module == allowed or node.module.startswith(allowed + ".")
+            for allowed in _ANNOTATION_MODULES
+        ):
+            continue
+        module = sys.modules.get(node.module) or importlib.import_module(node.module)
+        for alias in node.names:
+            if hasattr(module, alias.name):
+                namespace[alias.asname or alias.name] = getattr(module, alias.name)
+    return namespace
+
+
+def _is_tool_decorator(node: ast.expr, mcp_name: str) -> bool:
+    if isinstance(node, ast.Call):
+        if node.args or node.keywords:
+            return False
+        node = node.func
+    return (
+        isinstance(node, ast.Attribute)
+        and node.attr == "tool"
+        and isinstance(node.value, ast.Name)
+        and node.value.id == mcp_name
+    )
+
+
+def _signature(
+    function: ast.AsyncFunctionDef | ast.FunctionDef, namespace: Dict[str, Any]
+) -> inspect.Signature:
+    args = function.args
+    if args.vararg or args.kwarg or args.posonlyargs:
+        raise ValueError("variadic or positional-only parameters")
+
+    def annotation(node: Optional[ast.expr]) -> Any:
+        if node is None:
+            return inspect.Parameter.empty
+        # 許可したモジュールの名前と組み込み型だけを含む名前空間で評価する
+        value = eval(
+            compile(ast.Expression(node), "<annotation>", "eval"),
+            {"__builtins__": {}},
+            dict(namespace),
+        )
+        if isinstance(value, str):
+            raise ValueError(f"string annotation {value!r}")
+        return value
+
+    parameters = []
+    defaults: List[Any] = [inspect.Parameter.empty] * (
+        len(args.args) - len(args.defaults)
+    ) + [ast.literal_eval(default) for default in args.defaults]
+    for arg, default in zip(args.args, defaults):
+        parameters.append(
+            inspect.Parameter(
+                arg.arg,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=default,
+                annotation=annotation(arg.annotation),
+            )
+        )
+    for arg, kw_default in zip(args.kwonlyargs, args.kw_defaults):
+        parameters.append(
+            inspect.Parameter(
+                arg.arg,
+                inspect.Parameter.KEYWORD_ONLY,
+                default=(
+                    inspect.Parameter.empty
+                    if kw_default is None
+                    else ast.literal_eval(kw_default)
+                ),
+                annotation=annotation(arg.annotation),
+            )
+        )
+    return inspect.Signature(parameters, return_annotation=annotation(function.returns))
+
+
+def describe_tool_module(source: str) -> Optional[List[ToolSpec]]:
+    """ツールモジュールのソースから、登録するツールの情報を取り出す。
+
+    Returns:
+        ツールの情報のリスト。`register_tools` がない場合は空のリスト。
+        import せずに記述できないモジュールの場合は None
+    """
+    tree = ast.parse(source)
+    register = next(
+        (
+            node
+            for node in tree.body
+            if isinstance(node, ast.FunctionDef) and node.name == "register_tools"
+        ),
+        None,
+    )
+    if register is None:
+        return []
+    if len(register.args.args) != 1:
+        return None
+    mcp_name = register.args.args[0].arg
+
+    try:
+        namespace = _annotation_namespace(tree)
+        specs: List[ToolSpec] = []
+        for index, statement in enumerate(register.body):
+            if (
+                index == 0
+                and isinstance(statement, ast.Expr)
+                and isinstance(statement.value, ast.Constant)
+            ):
+                continue  # docstring
+            if not isinstance(statement, (ast.AsyncFunctionDef, ast.FunctionDef)):
+                return None
+            if not statement.decorator_list:
+                continue  # ツール間で共有する補助関数
+            if len(statement.decorator_list) != 1 or not _is_tool_decorator(
+                statement.decorator_list[0], mcp_name
+            ):
+                return None
+            specs.append(
+                ToolSpec(
+                    statement.name,
+                    _signature(statement, namespace),
+                    ast.get_docstring(statement),
+                )
+            )
+    except (ImportError, NameError, AttributeError, TypeError, ValueError) as exc:
+        logger.debug("Tool module cannot be described without import: %s", exc)
+        return None
+    return specs
+
+
+def _make_proxy(module: LazyToolModule, spec: ToolSpec) -> Callable[..., Any]:
+    async def proxy(**arguments: Any) -> Any:
+        return await module.call(spec.name, arguments)
+
+    proxy.__name__ = spec.name
+    proxy.__qualname__ = spec.name
+    proxy.__doc__ = spec.doc
+    proxy.__signature__ = spec.signature  # type: ignore[attr-defined]
+    annotations = {
+        parameter.name: parameter.annotation
+        for parameter in spec.signature.parameters.values()
+        if parameter.annotation is not inspect.Parameter.empty
+    }
+    if spec.signature.return_annotation is not inspect.Signature.empty:
+        annotations["return"] = spec.signature.return_annotation
+    proxy.__annotations__ = annotations
+    return proxy
+
+
+def register_lazy_tools(
+    mcp: FastMCP, module_name: str, specs: List[ToolSpec]
+) -> LazyToolModule:
+    """ツールの情報から代理のツールを登録し、遅延読み込みするモジュールを返す。"""
+    module = LazyToolModule(module_name, specs)
+    for spec in specs:
+        mcp.tool()(_make_proxy(module, spec))
+    return module
+
+
+_lazy_modules: List[LazyToolModule] = []
+
+
+def track_lazy_module(module: LazyToolModule) -> None:
+    """ウォームアップの対象に加える。"""
+    _lazy_modules.append(module)
+
+
+def pending_tool_modules() -> List[LazyToolModule]:
+    """まだ import していない遅延読み込みのツールモジュールを返す。"""
+    return [module for module in _lazy_modules if not module.loaded]
+
+
+def import_tool_module(module_name: str) -> ModuleType:
+    """ツールモジュールを import して返す。
+
+    遅延読み込みの対象であれば `LazyToolModule.load` を経由するため、そのモジュールは
+    読み込み済みとして扱われ、最初の呼び出し時やウォームアップで改めて読み込まれません。
+    """
+    for module in _lazy_modules:
+        if module.module_name == module_name:
+            module.load()
+            break
+    return importlib.import_module(module_name)
+
+
+def load_tool_modules() -> int:
+    """未読み込みのツールモジュールをすべて import し、import したモジュール数を返す。
+
+    失敗したモジュールはログに記録し、最初の呼び出し時に改めて import します。
+    """
+    loaded = 0
+    for module in pending_tool_modules():
+        try:
+            module.load()
+            loaded += 1
+        except Exception:
+            logger.exception("Failed to warm up tool module %s", module.module_name)
+    return loaded
+
+
+def start_tool_warmup() -> threading.Thread:
+    """バックグラウンドのスレッドで未読み込みのツールモジュールを import する。"""
+    thread = threading.Thread(
+        target=load_tool_modules, name="tool-module-warmup", daemon=True
+    )
+    thread.start()
+    return thread
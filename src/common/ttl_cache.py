@@ -0,0 +1,240 @@
+"""TTL と LRU による上限付きのキャッシュ。
+
+企業情報のペイロード、所属グループ、Graph のレスポンス、SDK クライアントなど、
+このサーバーのキャッシュはいずれも「期限付きで保持し、件数の上限を超えたら最も長く
+使われていないものから破棄し、ヒット・ミスの回数を数える」という同じ構造を持つため、
+その部分を `TTLCache` に集約します。
+
+- 期限はエントリごとに保持します。既定は保存時刻 + `ttl_seconds` で、保存時に
+  `expires_at` (トークンの有効期限など) を指定することもできます。
+- `sliding=True` の場合は参照のたびに期限を延長します (アイドルタイムアウト)。
+- `pinned` が True を返す値 (使用中のクライアントなど) は、期限切れや上限超過でも破棄しません。
+- `get_or_load` は、同じキーの同時のキャッシュミスを 1 回の読み込みにまとめます。
+  読み込みに失敗した結果はキャッシュしません。
+- 期限切れや上限超過で取り除いた値は呼び出し元に返すため、閉じる処理などは呼び出し元で行います。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CacheEntry(Generic[T]):
+    """キャッシュのエントリ。"""
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: T, expires_at: float) -> None:
+        self.value = value
+        self.expires_at = expires_at
+
+
+class TTLCache(Generic[T]):
+    """TTL と LRU による上限付きのキャッシュ。
+
+    :param ttl_seconds: エントリを保持する秒数。0 以下の場合は保持しない
+    :param max_entries: 保持するエントリの最大数
+    :param sliding: 参照のたびに期限を延長するか
+    :param pinned: True を返す値は期限切れや上限超過でも破棄しない
+    :param clock: 現在時刻 (秒) を返す関数。テスト用
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 1024,
+        sliding: bool = False,
+        pinned: Optional[Callable[[T], bool]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.sliding = sliding
+        self._pinned = pinned
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, CacheEntry[T]] = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _is_pinned(self, value: T) -> bool:
+        return self._pinned is not None and self._pinned(value)
+
+    def is_fresh(self, entry: CacheEntry[T]) -> bool:
+        """エントリが期限内であれば True を返す。"""
+        return entry.expires_at > self._clock()
+
+    def lookup(
+        self, key: Hashable, keep_stale: Optional[Callable[[T], bool]] = None
+    ) -> Optional[CacheEntry[T]]:
+        """キーに対応するエントリを返す。
+
+        期限内 (または `pinned`) のエントリはヒットとして数えます。期限切れのエントリは
+        ミスとして数え、`keep_stale` が True を返す場合 (ETag で再検証できる場合など) は
+        破棄せずに返し、それ以外は破棄して None を返します。
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            now = self._clock()
+            if entry.expires_at > now or self._is_pinned(entry.value):
+                self._entries.move_to_end(key)
+                if self.sliding:
+                    entry.expires_at = now + self.ttl_seconds
+                self.hits += 1
+                return entry
+            self.misses += 1
+            if keep_stale is not None and keep_stale(entry.value):
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+            return None
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """期限内の値を返す (なければ None)。"""
+        entry = self.lookup(key)
+        return entry.value if entry is not None else None
+
+    def peek(self, key: Hashable) -> Optional[T]:
+        """期限や LRU の順序、回数を変えずに値を返す (なければ None)。"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def put(
+        self, key: Hashable, value: T, expires_at: Optional[float] = None
+    ) -> List[T]:
+        """値を保存し、上限を超えたために取り除いた値を返す。
+
+        :param expires_at: 期限 (`clock` と同じ基準の秒)。省略時は現在時刻 + `ttl_seconds`
+        """
+        if not self.enabled:
+            return []
+        if expires_at is None:
+            expires_at = self._clock() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = CacheEntry(value, expires_at)
+            self._entries.move_to_end(key)
+            return self._pop_overflow_locked()
+
+    def touch(self, key: Hashable) -> None:
+        """エントリを最も新しく使われたものとし、`sliding` の場合は期限を延長する。"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._entries.move_to_end(key)
+            if self.sliding:
+                entry.expires_at = self._clock() + self.ttl_seconds
+
+    def pop(self, key: Hashable) -> Optional[T]:
+        """エントリを取り除いて値を返す (なければ None)。"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry.value if entry is not None else None
+
+    def expire(self) -> List[T]:
+        """期限切れのエントリ (`pinned` を除く) を取り除き、その値を返す。"""
+        now = self._clock()
+        with self._lock:
+            expired = [
+                key
+                for key, entry in self._entries.items()
+                if entry.expires_at <= now and not self._is_pinned(entry.value)
+            ]
+            self.evicted += len(expired)
+            return [self._entries.pop(key).value for key in expired]
+
+    def _pop_overflow_locked(self) -> List[T]:
+        evicted: List[T] = []
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return evicted
+        for key, entry in list(self._entries.items()):
+            if excess <= 0:
+                break
+            if self._is_pinned(entry.value):
+                continue
+            del self._entries[key]
+            evicted.append(entry.value)
+            excess -= 1
+        self.evicted += len(evicted)
+        return evicted
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+        expires_at: Optional[float] = None,
+    ) -> T:
+        """期限内の値を返す。なければ `load` で読み込んで保存する。
+
+        同じキーの読み込みが進行中の場合は、その結果を待って共有します。
+
+        :param expires_at: 読み込んだ値の期限 (省略時は現在時刻 + `ttl_seconds`)
+        """
+        entry = self.lookup(key)
+        if entry is not None:
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, load, expires_at))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        # 1 つの呼び出し元がキャンセルされても、共有している読み込みは継続させる
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[T]],
+        expires_at: Optional[float],
+    ) -> T:
+        try:
+            value = await load()
+            self.put(key, value, expires_at)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> List[T]:
+        """すべてのエントリを取り除き、その値を返す。"""
+        with self._lock:
+            values = [entry.value for entry in self._entries.values()]
+            self._entries.clear()
+        return values
+
+    def stats(self) -> Dict[str, int]:
+        """キャッシュのカウンタを返す (診断・ログ用)。"""
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evicted": self.evicted,
+        }
@@ -1,12 +1,7 @@
 """
 ユーティリティ関数群。
 """
-import json
-from typing import Any, Dict, List
-
-from kiota_serialization_json.json_serialization_writer import (
-    JsonSerializationWriter,
-)
+from typing import Dict, List, Tuple
 
 
 def parse_scopes(raw: str) -> List[str]:
@@ -22,9 +17,19 @@ def parse_scopes(raw: str) -> List[str]:
     return sorted(items)
 
 
-def graph_serialize_model(model: Any) -> Dict[str, Any]:
-    """Microsoft Graph の Kiota モデルを JSON(dict) に変換する。"""
-    writer = JsonSerializationWriter()
-    writer.write_object_value(None, model)
-    json_bytes = writer.get_serialized_content()
-    return json.loads(json_bytes.decode("utf-8"))
+def canonicalize_select(raw: str) -> Tuple[str, ...]:
+    """カンマ区切りの `$select` 文字列を正規化したフィールドのタプルにする。
+
+    - 前後空白除去
+    - 空要素除去
+    - 重複除去 (大文字小文字を区別しない。最初に現れた表記を残す)
+    - 大文字小文字を区別しないソート
+
+    "mail,id" と "id, mail" は同じタプルになるため、キャッシュキーとして使用できます。
+    """
+    fields: Dict[str, str] = {}
+    for item in (raw or "").split(","):
+        field = item.strip()
+        if field:
+            fields.setdefault(field.lower(), field)
+    return tuple(fields[key] for key in sorted(fields))
@@ -0,0 +1,127 @@
+"""VM インベントリのスナップショットと差分計算。
+
+(ユーザー, サブスクリプション) ごとに、直近の VM 一覧を
+「リソース ID → 内容ハッシュ」の形でコンパクトに保持し、クライアントが
+指定したスナップショットトークン以降に追加・削除・変更された VM だけを返します。
+
+スナップショットトークンは内容から決まるハッシュ値のため、
+インベントリが変化していなければ同じトークンが返されます。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+# 1 つのキーに対して保持するスナップショットの世代数
+DEFAULT_HISTORY_PER_KEY = 4
+
+
+def record_digest(record: Dict[str, Any]) -> bytes:
+    """VM レコードの内容ハッシュ (16 バイト) を計算する。"""
+    encoded = json.dumps(
+        record, sort_keys=True, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def snapshot_token(digests: Dict[str, bytes]) -> str:
+    """スナップショット全体を表すトークンを計算する。"""
+    hasher = hashlib.blake2b(digest_size=16)
+    for resource_id in sorted(digests):
+        hasher.update(resource_id.encode("utf-8"))
+        hasher.update(digests[resource_id])
+    return hasher.hexdigest()
+
+
+class VmSnapshotStore:
+    """キーごとの VM スナップショットを保持し、差分を返すストア。
+
+    :param max_keys: 保持する (ユーザー, サブスクリプション) の最大数。超えた場合は LRU で破棄
+    :param history_per_key: 1 キーあたりに保持するスナップショットの世代数
+    """
+
+    def __init__(
+        self, max_keys: int = 1024, history_per_key: int = DEFAULT_HISTORY_PER_KEY
+    ) -> None:
+        self.max_keys = max(1, max_keys)
+        self.history_per_key = max(1, history_per_key)
+        self._snapshots: OrderedDict[Hashable, OrderedDict[str, Dict[str, bytes]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._snapshots)
+
+    def diff(
+        self,
+        key: Hashable,
+        records: Iterable[Dict[str, Any]],
+        since_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """現在の VM 一覧を記録し、`since_token` のスナップショットとの差分を返す。
+
+        `since_token` が未指定または既に破棄されている場合は、
+        すべての VM を `added` として返し `full` を True にします。
+
+        :return: snapshot_token / full / added / changed / removed / unchanged_count
+        """
+        current: Dict[str, Dict[str, Any]] = {}
+        digests: Dict[str, bytes] = {}
+        for record in records:
+            resource_id = record["id"]
+            current[resource_id] = record
+            digests[resource_id] = record_digest(record)
+        token = snapshot_token(digests)
+
+        with self._lock:
+            history = self._snapshots.get(key)
+            if history is None:
+                history = OrderedDict()
+                self._snapshots[key] = history
+            self._snapshots.move_to_end(key)
+
+            previous = history.get(since_token) if since_token else None
+
+            history[token] = digests
+            history.move_to_end(token)
+            while len(history) > self.history_per_key:
+                history.popitem(last=False)
+            while len(self._snapshots) > self.max_keys:
+                self._snapshots.popitem(last=False)
+
+        if previous is None:
+            return {
+                "snapshot_token": token,
+                "full": True,
+                "added": list(current.values()),
+                "changed": [],
+                "removed": [],
+                "unchanged_count": 0,
+            }
+
+        added: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        for resource_id, digest in digests.items():
+            old_digest = previous.get(resource_id)
+            if old_digest is None:
+                added.append(current[resource_id])
+            elif old_digest != digest:
+                changed.append(current[resource_id])
+        removed = sorted(
+            resource_id for resource_id in previous if resource_id not in digests
+        )
+
+        return {
+            "snapshot_token": token,
+            "full": False,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "unchanged_count": len(digests) - len(added) - len(changed),
+        }
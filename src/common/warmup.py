@@ -0,0 +1,214 @@
+"""サーバーの起動時のウォームアップと、準備完了 (readiness) の状態。
+
+デプロイ直後のインスタンスでは、最初のリクエストが次のような準備のために遅くなります。
+
+- JWKS の公開鍵の鍵オブジェクトへの変換
+- 重い SDK を含むツールモジュールの import
+- MSAL のテナント検出と login.microsoftonline.com / graph.microsoft.com への TLS 接続
+- 企業情報のペイロードや `$select` のフィールド表などのシリアライズ用データの構築
+
+`Warmup` は、サーバーの起動時 (FastMCP の lifespan) にこれらの処理をイベントループ上で
+並行して実行し、すべて終わるか期限 (`WARMUP_DEADLINE_SECONDS`) を過ぎた時点で
+準備完了とします。準備完了の状態は `/readyz` で返します (準備中は 503)。
+
+- 同期関数はスレッドで、コルーチン関数はサーバーのイベントループで実行します
+  (httpx の接続プールはイベントループに紐付くため、接続の確立はイベントループ上で行います)。
+- 処理の失敗はログに記録するだけで、サーバーの起動は止めません
+  (その準備は最初のリクエスト時に改めて行われます)。
+- 期限を過ぎた処理は止めずに続行し、完了を待たずに準備完了とします。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from common.config import Settings
+from common.tool_loader import import_tool_module, load_tool_modules
+
+logger = logging.getLogger(__name__)
+
+# オーケストレーター (App Service の正常性チェック、Kubernetes の readinessProbe など) が参照するパス
+READINESS_PATH = "/readyz"
+
+
+class WarmupTask(NamedTuple):
+    """ウォームアップの処理。"""
+
+    name: str
+    # 同期関数 (スレッドで実行) またはコルーチン関数 (イベントループで実行)
+    function: Callable[[], Any]
+
+
+class Warmup:
+    """ウォームアップの処理を並行して実行し、準備完了の状態を保持する。
+
+    :param deadline_seconds: ウォームアップの期限 (秒)。過ぎた時点で準備完了とする
+    :param enabled: ウォームアップを行うか (False の場合は最初から準備完了)
+    """
+
+    def __init__(self, deadline_seconds: float = 30.0, enabled: bool = True) -> None:
+        self.deadline_seconds = deadline_seconds
+        self.enabled = enabled
+        self.tasks: List[WarmupTask] = []
+        # 処理名 → {"status": ..., "seconds": ...}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._ready = False
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._jobs: List["asyncio.Task[None]"] = []
+
+    @property
+    def ready(self) -> bool:
+        return self._ready or not self.enabled
+
+    def add(self, name: str, function: Callable[[], Any]) -> None:
+        """ウォームアップの処理を追加する。"""
+        self.tasks.append(WarmupTask(name, function))
+
+    async def _run_task(self, task: WarmupTask) -> None:
+        result = self.results[task.name] = {"status": "running"}
+        started = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(task.function):
+                await task.function()
+            else:
+                await asyncio.to_thread(task.function)
+        except Exception as exc:
+            result["status"] = "failed"
+            logger.warning("Warmup task '%s' failed: %s", task.name, exc)
+        else:
+            result["status"] = "ok"
+        result["seconds"] = round(time.monotonic() - started, 3)
+
+    async def run(self) -> None:
+        """すべての処理を並行して実行し、完了または期限の時点で準備完了とする。"""
+        self._started = time.monotonic()
+        self._jobs = [asyncio.create_task(self._run_task(task)) for task in self.tasks]
+        if self._jobs:
+            _, pending = await asyncio.wait(self._jobs, timeout=self.deadline_seconds)
+            if pending:
+                timed_out = [
+                    name
+                    for name, result in self.results.items()
+                    if result["status"] == "running"
+                ]
+                for name in timed_out:
+                    self.results[name]["status"] = "timed_out"
+                logger.warning(
+                    "Warmup deadline (%.1fs) exceeded; still running: %s",
+                    self.deadline_seconds,
+                    ", ".join(timed_out),
+                )
+        self._finished = time.monotonic()
+        self._ready = True
+        logger.info(
+            "Warmup finished in %.3fs: %s",
+            self._finished - self._started,
+            ", ".join(
+                f"{name}={result['status']}" for name, result in self.results.items()
+            ),
+        )
+
+    @asynccontextmanager
+    async def lifespan(self, server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
+        """FastMCP の lifespan。サーバーの起動後にバックグラウンドでウォームアップを行う。"""
+        runner: Optional["asyncio.Task[None]"] = None
+        if self.enabled:
+            runner = asyncio.create_task(self.run())
+        try:
+            yield {}
+        finally:
+            for job in [runner, *self._jobs]:
+                if job is not None and not job.done():
+                    job.cancel()
+
+    def status(self) -> Dict[str, Any]:
+        """準備完了の状態と、処理ごとの状態を返す。"""
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.monotonic()) - self._started
+        return {
+            "status": "ready" if self.ready else "starting",
+            "elapsed_seconds": round(elapsed, 3),
+            "tasks": {name: result["status"] for name, result in self.results.items()},
+        }
+
+    async def readiness(self, request: Request) -> JSONResponse:
+        """`/readyz` のハンドラー。準備完了なら 200、準備中なら 503 を返す。"""
+        return JSONResponse(self.status(), status_code=200 if self.ready else 503)
+
+    def install(self, mcp: FastMCP) -> None:
+        """準備完了の状態を返すルート (`/readyz`) を登録する。"""
+        mcp.custom_route(READINESS_PATH, methods=["GET"])(self.readiness)
+
+
+def add_default_tasks(warmup: Warmup, settings: Settings, auth_provider: Any) -> None:
+    """このサーバーの標準のウォームアップ処理を追加する。
+
+    重い SDK を含むモジュールは、サーバーの起動を遅らせないよう処理の中で import します。
+
+    Args:
+        warmup: 処理を追加する `Warmup`
+        settings: 設定
+        auth_provider: JWKS の公開鍵を変換する `EntraIDAuthProvider`
+    """
+    warmup.add("jwks_keys", auth_provider.preload_signing_keys)
+    if settings.tools_warmup_on_start:
+        warmup.add("tool_modules", load_tool_modules)
+    warmup.add("serializers", _build_serializers)
+    warmup.add("company_payloads", _load_company_payloads)
+
+    # OBO (Graph / Azure 管理 API の呼び出し) を使用する場合のみ接続を確立する
+    if settings.entra_app_client_secret:
+        warmup.add("entra_authority", lambda: _discover_entra_authority(settings))
+        warmup.add("graph_connection", _open_graph_connection)
+
+
+def _build_serializers() -> None:
+    from auth.rbac_policy import get_policy
+    from common.graph_select import user_select_fields
+
+    get_policy()
+    user_select_fields()
+
+
+async def _load_company_payloads() -> None:
+    from common.company_data import ACCESS_LEVELS
+
+    role_based_info = await asyncio.to_thread(
+        import_tool_module, "tools.role_based_info"
+    )
+    for level in ACCESS_LEVELS:
+        await role_based_info.load_company_payload(level)
+
+
+def _discover_entra_authority(settings: Settings) -> None:
+    from auth.obo_client import OboSettings, build_msal_app
+
+    # 構築時のテナント検出の結果と接続は、ユーザーごとの MSAL アプリで共有される
+    build_msal_app(
+        OboSettings(
+            tenant_id=settings.entra_tenant_id,
+            client_id=settings.entra_app_client_id,
+            client_secret=settings.entra_app_client_secret,
+            scope=settings.azure_obo_scope,
+        )
+    )
+
+
+async def _open_graph_connection() -> None:
+    graph_client = await asyncio.to_thread(
+        importlib.import_module, "common.graph_client"
+    )
+    await graph_client.open_graph_connection()
@@ -14,27 +14,45 @@
 - MCP_SERVER_LOG_LEVEL: MCP サーバーのログレベル (未指定なら APP_LOG_LEVEL と同じ)
 
 MCP ツール定義は tools パッケージ配下の各モジュールに分離されています。
+ツールモジュールは最初の呼び出しまで (またはバックグラウンドのウォームアップまで)
+import しません (`TOOLS_LAZY_IMPORT`)。
+
+起動後は、JWKS の鍵の変換・ツールモジュールの import・接続の確立などのウォームアップを
+バックグラウンドで行い、完了 (または期限切れ) までは `/readyz` が 503 を返します
+(`WARMUP_ENABLED` / `WARMUP_DEADLINE_SECONDS`)。
+
+`STARTUP_PROFILE=true` の場合は、起動処理のフェーズごとの所要時間とモジュールごとの
+import 時間を計測し、所要時間順のレポートを出力します (`common.startup_profiler`)。
 """
 
 import logging
 import warnings
 
-from fastmcp import FastMCP
+from common.startup_profiler import start_startup_profiler
+
+# 以降の import の時間も計測するため、他のモジュールより先に開始する
+profiler = start_startup_profiler()
+
+from fastmcp import FastMCP  # noqa: E402
 
-from auth.entra_auth_provider import EntraIDAuthProvider
-from common.config import Settings
-from common.logging_config import LoggerConfig
-from common.utils import parse_scopes
-from tools import register_all_tools
+from auth.entra_auth_provider import EntraIDAuthProvider  # noqa: E402
+from auth.tool_authorization import ToolAuthorizationMiddleware  # noqa: E402
+from common.config import Settings  # noqa: E402
+from common.logging_config import LoggerConfig  # noqa: E402
+from common.utils import parse_scopes  # noqa: E402
+from common.warmup import Warmup, add_default_tasks  # noqa: E402
+from tools import register_all_tools  # noqa: E402
 
 # kiota_abstractions と msgraph の DeprecationWarning を非表示
 warnings.filterwarnings(
     "ignore", category=DeprecationWarning, module="kiota_abstractions.*"
 )
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="msgraph.*")
+profiler.mark("imports")
 
 # 設定の読み込み
 settings = Settings()
+profiler.mark("settings")
 
 # ロギング設定の初期化
 logger_config = LoggerConfig(
@@ -43,6 +61,7 @@ logger_config = LoggerConfig(
     mcp_server_log_level=settings.mcp_server_log_level or None,
 )
 logger_config.configure()
+profiler.mark("logging")
 
 logger = logging.getLogger(__name__)
 
@@ -68,19 +87,36 @@ logger.info(
     ", ".join(required_roles) if required_roles else "(none)",
 )
 
-# Entra ID ベースの認証プロバイダを初期化
+# Entra ID ベースの認証プロバイダを初期化 (JWKS を取得する)
 auth_provider = EntraIDAuthProvider(
     tenant_id=tenant_id,
     audience=app_client_id,
     required_scopes=required_scopes,
     required_roles=required_roles,
 )
+profiler.mark("auth_provider")
+
+# 起動時のウォームアップ。サーバーの起動後 (lifespan) にバックグラウンドで実行する
+warmup = Warmup(settings.warmup_deadline_seconds, enabled=settings.warmup_enabled)
 
 # FastMCP サーバーを作成 (MCP ツール定義はこのインスタンスに紐付く)
-mcp = FastMCP("entra-protected-mcp-server", auth=auth_provider)
+mcp = FastMCP(
+    "entra-protected-mcp-server", auth=auth_provider, lifespan=warmup.lifespan
+)
+
+# ポリシーで制限されたツールは、ツール本体の実行前に (キャッシュした判定で) 拒否する
+mcp.add_middleware(ToolAuthorizationMiddleware())
+profiler.mark("fastmcp_app")
 
 # tools パッケージ配下のツールを一括登録
 register_all_tools(mcp)
+profiler.mark("register_tools")
+
+# ウォームアップの処理と、準備完了の状態を返す /readyz を登録
+add_default_tasks(warmup, settings, auth_provider)
+warmup.install(mcp)
+profiler.mark("warmup_setup")
+profiler.finish()
 
 if __name__ == "__main__":
     # HTTP トランスポートで起動。localhost:8000 で待機します。
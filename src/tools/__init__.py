@@ -2,25 +2,68 @@
 
 `tools` 配下の各モジュールが `register_tools(mcp)` 関数を実装している場合、
 `register_all_tools` 呼び出し時に自動的に登録されます。
+
+`TOOLS_LAZY_IMPORT=true` (既定) の場合、モジュールは起動時に import せず、ソースコードから
+取り出したツールの名前・シグネチャ・docstring で登録し、最初の呼び出し時 (または
+起動時のウォームアップ `common.warmup`) に import します。
 """
 from __future__ import annotations
 
 import importlib
 import logging
 import pkgutil
+from typing import Optional
+
 from fastmcp import FastMCP
 
+from common.config import Settings
+from common.tool_loader import (
+    describe_tool_module,
+    register_lazy_tools,
+    track_lazy_module,
+)
+
 logger = logging.getLogger(__name__)
 
 
-def register_all_tools(mcp: FastMCP) -> None:
+def _describe(module_info: pkgutil.ModuleInfo, module_name: str) -> Optional[list]:
+    """モジュールを import せずにツールの情報を取り出す (取り出せない場合は None)。"""
+    try:
+        spec = module_info.module_finder.find_spec(module_name)  # type: ignore[call-arg]
+        if spec is None or not isinstance(spec.origin, str):
+            return None
+        with open(spec.origin, encoding="utf-8") as f:
+            return describe_tool_module(f.read())
+    except Exception as exc:  # 記述できないモジュールは従来どおり import する
+        logger.debug("Importing %s eagerly: %s", module_name, exc)
+        return None
+
+
+def register_all_tools(mcp: FastMCP, lazy: Optional[bool] = None) -> None:
     """tools パッケージ配下のツールを一括登録する。
 
     新しいツールを追加したい場合は、tools/ 配下にモジュールを追加し、
     その中で `register_tools(mcp)` 関数を定義してください。
+
+    Args:
+        mcp: ツールを登録する FastMCP インスタンス
+        lazy: モジュールの import を最初の呼び出しまで遅らせるか
+            (省略時は `TOOLS_LAZY_IMPORT`)
     """
+    if lazy is None:
+        lazy = Settings().tools_lazy_import
+
     for module_info in pkgutil.iter_modules(__path__):  # type: ignore[name-defined]
         module_name = f"{__name__}.{module_info.name}"
+        specs = _describe(module_info, module_name) if lazy else None
+        if specs is not None:
+            if specs:
+                logger.debug(
+                    "Registering %d tools from %s lazily", len(specs), module_name
+                )
+                track_lazy_module(register_lazy_tools(mcp, module_name, specs))
+            continue
+
         module = importlib.import_module(module_name)
         register = getattr(module, "register_tools", None)
         if callable(register):  # type: ignore[arg-type]
@@ -0,0 +1,300 @@
+"""Azure Resource Graph (KQL) を用いたインベントリ取得用 MCP ツール。
+
+サブスクリプションごとに `virtual_machines.list_all()` をページングする方式は、
+数百サブスクリプション規模の環境ではスケールしません。このモジュールは
+On-Behalf-Of (OBO) フローで取得した管理プレーン用トークンを用いて
+Azure Resource Graph の REST API を呼び出し、複数サブスクリプションを横断した
+VM / ディスク / NIC のインベントリを 1 回のクエリで取得します。
+
+- `$skipToken` によるページング (継続トークンとしてクライアントにも返却)
+- `max_results` による取得件数の上限
+- `projection` による返却列の絞り込み
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+import requests
+from fastmcp import FastMCP
+
+from auth.claims_helpers import get_current_user
+from auth.entra_auth_provider import build_obo_credential
+
+logger = logging.getLogger(__name__)
+
+ARM_SCOPE = "https://management.azure.com/.default"
+RESOURCE_GRAPH_URL = (
+    "https://management.azure.com/providers/Microsoft.ResourceGraph/resources"
+)
+RESOURCE_GRAPH_API_VERSION = "2022-10-01"
+
+# Resource Graph の 1 ページあたりの最大件数 ($top の上限)
+MAX_PAGE_SIZE = 1000
+# 1 回のツール呼び出しで返却する最大件数
+MAX_RESULTS_LIMIT = 5000
+
+# インベントリ種別と Resource Graph 上のリソースタイプの対応
+RESOURCE_KINDS: Dict[str, str] = {
+    "vm": "microsoft.compute/virtualmachines",
+    "disk": "microsoft.compute/disks",
+    "nic": "microsoft.network/networkinterfaces",
+}
+
+DEFAULT_PROJECTION = (
+    "id",
+    "name",
+    "type",
+    "location",
+    "resourceGroup",
+    "subscriptionId",
+    "tags",
+)
+
+# projection に指定可能な列 (識別子またはドット区切りのプロパティパス)
+_PROJECTION_FIELD_PATTERN = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+
+# 接続を再利用するため、モジュール単位で Session を共有する
+_session = requests.Session()
+
+
+def build_projection(fields: Optional[List[str]]) -> str:
+    """projection 指定を KQL の `project` 句に変換する。
+
+    ネストしたプロパティ (例: `properties.hardwareProfile.vmSize`) は
+    ドットをアンダースコアに置き換えた列名で返却します。
+    `id` と `type` は継続取得や種別判定に必要なため常に含めます。
+    """
+    requested = list(fields) if fields else list(DEFAULT_PROJECTION)
+    columns: List[str] = []
+    seen: set[str] = set()
+    for raw in ["id", "type", *requested]:
+        field = raw.strip()
+        if not field:
+            continue
+        if not _PROJECTION_FIELD_PATTERN.match(field):
+            raise ValueError(f"invalid_projection_field: {field}")
+        if field in seen:
+            continue
+        seen.add(field)
+        if "." in field:
+            columns.append(f"{field.replace('.', '_')} = {field}")
+        else:
+            columns.append(field)
+    return "project " + ", ".join(columns)
+
+
+def build_inventory_query(
+    resource_kinds: Optional[List[str]] = None,
+    projection: Optional[List[str]] = None,
+) -> str:
+    """VM / ディスク / NIC のインベントリを取得する KQL を組み立てる。"""
+    kinds = resource_kinds or list(RESOURCE_KINDS)
+    types: List[str] = []
+    for kind in kinds:
+        resource_type = RESOURCE_KINDS.get(kind.strip().lower())
+        if resource_type is None:
+            raise ValueError(
+                f"invalid_resource_kind: {kind} (expected one of {sorted(RESOURCE_KINDS)})"
+            )
+        if resource_type not in types:
+            types.append(resource_type)
+
+    type_list = ", ".join(f"'{t}'" for t in types)
+    return (
+        "Resources"
+        f" | where type in~ ({type_list})"
+        f" | {build_projection(projection)}"
+        " | order by id asc"
+    )
+
+
+def query_resource_graph(
+    credential: Any,
+    query: str,
+    subscription_ids: Optional[List[str]] = None,
+    *,
+    max_results: int = 1000,
+    skip_token: Optional[str] = None,
+    session: Any = None,
+) -> Dict[str, Any]:
+    """Azure Resource Graph に KQL クエリを発行し、`$skipToken` を辿って結果を集める。
+
+    取得件数が `max_results` を超えないよう各ページの `$top` を調整するため、
+    上限で打ち切った場合も返却する `skip_token` から取りこぼしなく続きを取得できます。
+
+    :param credential: `get_token` を持つ TokenCredential (OBO credential)
+    :param query: 実行する KQL クエリ
+    :param subscription_ids: 対象サブスクリプション ID の一覧 (未指定ならアクセス可能な全体)
+    :param max_results: 返却する最大件数
+    :param skip_token: 前回呼び出しで返却された継続トークン
+    :param session: `post` メソッドを持つ HTTP セッション (既定はモジュール共有 Session)
+    :return: data / count / total_records / skip_token / truncated を含む辞書
+    """
+    if max_results <= 0:
+        raise ValueError("invalid_max_results: must be greater than 0")
+    max_results = min(max_results, MAX_RESULTS_LIMIT)
+    http = session or _session
+
+    token = credential.get_token(ARM_SCOPE).token
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+    }
+
+    data: List[Dict[str, Any]] = []
+    total_records: Optional[int] = None
+    next_token = skip_token
+    pages = 0
+
+    while True:
+        options: Dict[str, Any] = {
+            "$top": min(MAX_PAGE_SIZE, max_results - len(data)),
+            "resultFormat": "objectArray",
+        }
+        if next_token:
+            options["$skipToken"] = next_token
+
+        body: Dict[str, Any] = {"query": query, "options": options}
+        if subscription_ids:
+            body["subscriptions"] = list(subscription_ids)
+
+        response = http.post(
+            RESOURCE_GRAPH_URL,
+            params={"api-version": RESOURCE_GRAPH_API_VERSION},
+            json=body,
+            headers=headers,
+            timeout=30,
+        )
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"resource_graph_query_failed: status={response.status_code} "
+                f"{response.text}"
+            )
+
+        payload = response.json()
+        pages += 1
+        data.extend(payload.get("data", []))
+        if total_records is None:
+            total_records = payload.get("totalRecords")
+        next_token = payload.get("$skipToken")
+
+        if not next_token or len(data) >= max_results:
+            break
+
+    logger.debug(
+        "Resource Graph query completed: pages=%d rows=%d total=%s more=%s",
+        pages,
+        len(data),
+        total_records,
+        bool(next_token),
+    )
+
+    return {
+        "data": data,
+        "count": len(data),
+        "total_records": total_records,
+        "skip_token": next_token,
+        "truncated": bool(next_token),
+    }
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """Azure Resource Graph 関連ツールを FastMCP に登録する。"""
+
+    @mcp.tool()
+    async def list_azure_inventory(
+        subscription_ids: Optional[List[str]] = None,
+        resource_kinds: Optional[List[str]] = None,
+        projection: Optional[List[str]] = None,
+        max_results: int = 1000,
+        skip_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """複数サブスクリプションを横断して VM / ディスク / NIC のインベントリを取得します。
+
+        Azure Resource Graph に対して 1 回の KQL クエリを発行するため、
+        サブスクリプション数 × リソース種別ごとの API 呼び出しが不要です。
+
+        引数:
+            subscription_ids: 対象サブスクリプション ID の一覧 (未指定ならアクセス可能なすべて)。
+            resource_kinds: 取得する種別 ("vm", "disk", "nic")。未指定ならすべて。
+            projection: 返却する列 (例: ["name", "properties.hardwareProfile.vmSize"])。
+            max_results: 返却する最大件数 (上限 5000)。
+            skip_token: 前回の結果に含まれる継続トークン。
+        """
+        user = get_current_user()
+
+        logger.debug(
+            "list_azure_inventory invoked: subscriptions=%s kinds=%s user=%s "
+            "client=%s roles=%s scopes=%s",
+            subscription_ids,
+            resource_kinds,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        query = build_inventory_query(resource_kinds, projection)
+        credential = build_obo_credential(user.token, ARM_SCOPE)
+        result = query_resource_graph(
+            credential,
+            query,
+            subscription_ids,
+            max_results=max_results,
+            skip_token=skip_token,
+        )
+
+        logger.info(
+            "Fetched %d inventory rows from Resource Graph for user %s (truncated=%s)",
+            result["count"],
+            user.user_id,
+            result["truncated"],
+        )
+        return result
+
+    @mcp.tool()
+    async def query_azure_resource_graph(
+        query: str,
+        subscription_ids: Optional[List[str]] = None,
+        max_results: int = 1000,
+        skip_token: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """任意の KQL クエリを Azure Resource Graph に対して実行します。
+
+        引数:
+            query: 実行する KQL クエリ (例: "Resources | where type =~ 'microsoft.compute/virtualmachines'")。
+            subscription_ids: 対象サブスクリプション ID の一覧 (未指定ならアクセス可能なすべて)。
+            max_results: 返却する最大件数 (上限 5000)。
+            skip_token: 前回の結果に含まれる継続トークン。
+        """
+        user = get_current_user()
+
+        logger.debug(
+            "query_azure_resource_graph invoked: subscriptions=%s user=%s "
+            "client=%s roles=%s scopes=%s",
+            subscription_ids,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        credential = build_obo_credential(user.token, ARM_SCOPE)
+        result = query_resource_graph(
+            credential,
+            query,
+            subscription_ids,
+            max_results=max_results,
+            skip_token=skip_token,
+        )
+
+        logger.info(
+            "Resource Graph query returned %d rows for user %s (truncated=%s)",
+            result["count"],
+            user.user_id,
+            result["truncated"],
+        )
+        return result
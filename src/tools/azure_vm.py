@@ -2,23 +2,198 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
-from typing import Any, Dict, List
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
 
 from azure.mgmt.compute import ComputeManagementClient
 from fastmcp import FastMCP
 
-from auth.claims_helpers import get_access_token_and_context
+from auth.claims_helpers import get_current_user
 from auth.entra_auth_provider import build_obo_credential
+from common.client_registry import ClientRegistry
+from common.config import Settings
+from common.vm_snapshots import VmSnapshotStore
 
 logger = logging.getLogger(__name__)
 
+ARM_SCOPE = "https://management.azure.com/.default"
+
+# (ユーザー, サブスクリプション) ごとの VM インベントリのスナップショット
+_snapshot_store = VmSnapshotStore(max_keys=Settings().vm_snapshot_max_entries)
+
+# (サブスクリプション, 資格情報の主体) ごとに再利用する ComputeManagementClient と credential
+_compute_clients: ClientRegistry[Tuple[Any, Any]] = ClientRegistry(
+    idle_timeout_seconds=Settings().azure_client_idle_timeout_seconds,
+    close=lambda entry: entry[0].close(),
+)
+
+
+def _status_value(code: str) -> str:
+    """`PowerState/running` 形式のステータスコードから値部分を取り出す。"""
+    parts = code.split("/")
+    return parts[1] if len(parts) > 1 else ""
+
+
+def extract_vm_statuses(instance_view: Any) -> Tuple[Optional[str], Optional[str]]:
+    """VM の instance view から電源状態とプロビジョニング状態を取り出す。
+
+    :return: (power_state, provisioning_state)。該当ステータスがない場合は None
+    """
+    power_state: Optional[str] = None
+    provisioning_state: Optional[str] = None
+    for status in getattr(instance_view, "statuses", None) or []:
+        code = getattr(status, "code", None) or ""
+        if code.startswith("PowerState/"):
+            power_state = _status_value(code)
+        elif code.startswith("ProvisioningState/"):
+            provisioning_state = _status_value(code)
+    return power_state, provisioning_state
+
+
+def parse_resource_group(resource_id: str) -> Optional[str]:
+    """ARM リソース ID からリソースグループ名を取り出す。"""
+    segments = resource_id.split("/")
+    for index, segment in enumerate(segments[:-1]):
+        if segment.lower() == "resourcegroups":
+            return segments[index + 1]
+    return None
+
+
+def vm_to_record(vm: Any, include_status: bool = False) -> Dict[str, Any]:
+    """Azure SDK の VirtualMachine モデルをツールの返却形式に変換する。"""
+    record: Dict[str, Any] = {
+        "id": vm.id,
+        "name": vm.name,
+        "location": vm.location,
+        "type": vm.type,
+        "tags": vm.tags,
+    }
+    if include_status:
+        power_state, provisioning_state = extract_vm_statuses(vm.instance_view)
+        record["power_state"] = power_state
+        record["provisioning_state"] = provisioning_state
+    return record
+
+
+def iter_vm_records(
+    client: Any, include_status: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """サブスクリプション内の VM をページ単位で遅延取得し、レコードとして返す。
+
+    `include_status` が True の場合は `statusOnly=true` の一覧 API を用いるため、
+    電源状態は VM ごとの instance view 呼び出しなしで同じページングの中で取得されます。
+    """
+    if include_status:
+        pager = client.virtual_machines.list_all(status_only="true")
+    else:
+        pager = client.virtual_machines.list_all()
+    for vm in pager:
+        yield vm_to_record(vm, include_status)
+
+
+async def fill_missing_statuses(
+    client: Any, records: List[Dict[str, Any]], max_concurrency: int
+) -> int:
+    """一覧 API で電源状態が得られなかった VM のみ instance view を個別取得する。
+
+    個別呼び出しは `max_concurrency` 件までの並列数に制限して実行します。
+
+    :return: 個別取得を行った VM の件数
+    """
+    missing = [record for record in records if record.get("power_state") is None]
+    if not missing:
+        return 0
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def fill(record: Dict[str, Any]) -> None:
+        resource_group = parse_resource_group(record["id"] or "")
+        if not resource_group:
+            return
+        async with semaphore:
+            instance_view = await asyncio.to_thread(
+                client.virtual_machines.instance_view,
+                resource_group,
+                record["name"],
+            )
+        power_state, provisioning_state = extract_vm_statuses(instance_view)
+        record["power_state"] = power_state
+        record["provisioning_state"] = (
+            provisioning_state or record.get("provisioning_state")
+        )
+
+    await asyncio.gather(*(fill(record) for record in missing))
+    return len(missing)
+
+
+@functools.lru_cache(maxsize=1)
+def _compute_client_options() -> Dict[str, Any]:
+    """ComputeManagementClient の HTTP ログ設定を初回のみ決定する。"""
+    # Azure SDK ロガーが DEBUG レベルの場合のみ、HTTP ログを詳細に出す
+    azure_logger = logging.getLogger("azure")
+    if azure_logger.isEnabledFor(logging.DEBUG):
+        return {"logging_body": True, "logging_enable": True}
+    return {}
+
+
+def create_compute_client(credential: Any, subscription_id: str) -> Any:
+    """ComputeManagementClient を構築する。"""
+    return ComputeManagementClient(
+        credential, subscription_id, **_compute_client_options()
+    )
+
+
+@contextmanager
+def use_compute_client(
+    user_assertion: str, identity: Hashable, subscription_id: str
+) -> Iterator[Any]:
+    """(サブスクリプション, 主体) ごとにキャッシュした ComputeManagementClient を貸し出す。
+
+    クライアントは再構築せず、保持している OBO credential のユーザートークンを
+    最新のものに差し替えます。ARM 用トークンは credential 経由で取得されるため、
+    期限が切れれば自動的に新しいトークンに交換されます。
+    `with` ブロックの間はアイドルタイムアウトを過ぎてもクライアントを閉じません。
+    """
+
+    def create() -> Tuple[Any, Any]:
+        credential = build_obo_credential(user_assertion, ARM_SCOPE)
+        return create_compute_client(credential, subscription_id), credential
+
+    with _compute_clients.lease((subscription_id, identity), create) as (
+        client,
+        credential,
+    ):
+        credential.update_user_assertion(user_assertion)
+        yield client
+
+
+async def collect_vm_records(
+    client: Any, include_status: bool = False
+) -> List[Dict[str, Any]]:
+    """VM 一覧を取得し、必要に応じて電源状態を補完したレコード一覧を返す。"""
+    vms = list(iter_vm_records(client, include_status))
+
+    if include_status:
+        fallback_count = await fill_missing_statuses(
+            client, vms, Settings().azure_vm_status_concurrency
+        )
+        if fallback_count:
+            logger.debug(
+                "Fetched instance view individually for %d VMs", fallback_count
+            )
+    return vms
+
 
 def register_tools(mcp: FastMCP) -> None:
     """Azure VM 関連ツールを FastMCP に登録する。"""
 
     @mcp.tool()
-    async def list_azure_vms(subscription_id: str) -> List[Dict[str, Any]]:
+    async def list_azure_vms(
+        subscription_id: str, include_status: bool = False
+    ) -> List[Dict[str, Any]]:
         """指定したサブスクリプション内の Azure VM 一覧を取得します。
 
         認証済みユーザーのアクセストークンを On-Behalf-Of フローで交換し、
@@ -27,56 +202,87 @@ def register_tools(mcp: FastMCP) -> None:
 
         引数:
             subscription_id: VM を列挙する対象のサブスクリプション ID。
+            include_status: True の場合、電源状態 (power_state) と
+                プロビジョニング状態 (provisioning_state) を付与します。
         """
 
         # 現在のユーザーアクセストークンとコンテキストを取得
-        access_token, roles, user_id, client_id, scopes, _ = (
-            get_access_token_and_context()
-        )
+        user = get_current_user()
 
         logger.debug(
-            "list_azure_vms invoked: subscription=%s user=%s client=%s roles=%s scopes=%s",
+            "list_azure_vms invoked: subscription=%s include_status=%s user=%s "
+            "client=%s roles=%s scopes=%s",
             subscription_id,
-            user_id,
-            client_id,
-            roles,
-            scopes,
+            include_status,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
         )
 
-        credential = build_obo_credential(
-            access_token.token, "https://management.azure.com/.default"
-        )
-
-        # Azure SDK ロガーが DEBUG レベルの場合のみ、HTTP ログを詳細に出す
-        azure_logger = logging.getLogger("azure")
-        enable_logging = azure_logger.isEnabledFor(logging.DEBUG)
-
-        if enable_logging:
-            client = ComputeManagementClient(
-                credential,
-                subscription_id,
-                logging_body=True,
-                logging_enable=True,
-            )
-        else:
-            client = ComputeManagementClient(credential, subscription_id)
-
-        vms: List[Dict[str, Any]] = []
-        for vm in client.virtual_machines.list_all():
-            vms.append(
-                {
-                    "id": vm.id,
-                    "name": vm.name,
-                    "location": vm.location,
-                    "type": vm.type,
-                    "tags": vm.tags,
-                }
-            )
+        with use_compute_client(
+            user.token, user.identity, subscription_id
+        ) as client:
+            vms = await collect_vm_records(client, include_status)
 
         logger.info(
             "Fetched %d VMs from subscription %s for user %s",
             len(vms),
             subscription_id,
-            user_id,
+            user.user_id,
         )
         return vms
+
+    @mcp.tool()
+    async def list_azure_vm_changes(
+        subscription_id: str,
+        since_token: Optional[str] = None,
+        include_status: bool = False,
+    ) -> Dict[str, Any]:
+        """前回取得時からの Azure VM の差分 (追加・変更・削除) を取得します。
+
+        サーバーは (ユーザー, サブスクリプション) ごとに VM 一覧のスナップショットを
+        保持します。前回の結果に含まれる `snapshot_token` を `since_token` に指定すると、
+        その時点から追加・変更された VM と削除された VM の ID だけを返します。
+        `since_token` が未指定または期限切れの場合は、全件を `added` として返し
+        `full` を true にします。
+
+        引数:
+            subscription_id: VM を列挙する対象のサブスクリプション ID。
+            since_token: 前回の結果に含まれる `snapshot_token`。
+            include_status: True の場合、電源状態とプロビジョニング状態も比較対象に含めます。
+        """
+        user = get_current_user()
+
+        logger.debug(
+            "list_azure_vm_changes invoked: subscription=%s since=%s "
+            "include_status=%s user=%s client=%s roles=%s scopes=%s",
+            subscription_id,
+            since_token,
+            include_status,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        with use_compute_client(
+            user.token, user.identity, subscription_id
+        ) as client:
+            vms = await collect_vm_records(client, include_status)
+
+        delta = _snapshot_store.diff(
+            (user.user_id, subscription_id, include_status), vms, since_token
+        )
+
+        logger.info(
+            "VM changes for subscription %s user %s: full=%s added=%d changed=%d "
+            "removed=%d",
+            subscription_id,
+            user.user_id,
+            delta["full"],
+            len(delta["added"]),
+            len(delta["changed"]),
+            len(delta["removed"]),
+        )
+        return delta
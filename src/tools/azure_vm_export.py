@@ -0,0 +1,270 @@
+"""Azure VM インベントリをローカルファイルへエクスポートする MCP ツール。
+
+`list_azure_vms` と同じ ARM の一覧取得ロジック (`iter_vm_records`) を用い、
+取得したページをメモリに溜めずにそのまま NDJSON または Parquet (列指向) ファイルへ
+書き出します。ツールの返却値はファイルパス・件数・チェックサムのみのため、
+大規模なインベントリでも MCP のツール結果が肥大化しません。
+
+出力ファイルは呼び出し元の主体 (テナント, ユーザー) ごとのサブディレクトリに、
+本人のみが読み書きできる権限で書き出します。エクスポートの完了時に、
+`EXPORT_RETENTION_SECONDS` を過ぎたファイル (他のユーザーのものを含む) を削除します。
+
+Parquet 形式は任意依存の `pyarrow` がインストールされている場合のみ利用できます。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+from fastmcp import FastMCP
+
+from auth.claims_helpers import get_current_user
+from common.config import Settings
+from tools.azure_vm import iter_vm_records, use_compute_client
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+
+# Parquet の 1 行グループあたりの行数 (メモリ上に保持する最大行数)
+PARQUET_BATCH_ROWS = 5000
+
+# チェックサム計算時の読み込みチャンクサイズ
+_CHUNK_SIZE = 1024 * 1024
+
+PARQUET_COLUMNS = (
+    "id",
+    "name",
+    "location",
+    "type",
+    "tags",
+    "power_state",
+    "provisioning_state",
+)
+
+
+def _file_sha256(path: str) -> str:
+    """ファイルの SHA-256 をチャンク単位で計算する。"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def identity_export_dir(output_dir: str, identity: Hashable) -> str:
+    """主体ごとの出力先ディレクトリを返す (ディレクトリ名は主体のハッシュ)。"""
+    digest = hashlib.sha256(repr(identity).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(output_dir, digest)
+
+
+def _remove_quietly(path: str) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    except OSError as exc:
+        logger.warning("Failed to remove export file %s: %s", path, exc)
+        return False
+    return True
+
+
+def sweep_exports(
+    output_dir: str, retention_seconds: float, now: Optional[float] = None
+) -> int:
+    """保持期間を過ぎた出力ファイルを削除し、削除したファイル数を返す。
+
+    主体ごとのサブディレクトリを走査し、空になったサブディレクトリも削除します。
+    `retention_seconds` が 0 以下の場合は何もしません。
+    """
+    if retention_seconds <= 0 or not os.path.isdir(output_dir):
+        return 0
+    cutoff = (time.time() if now is None else now) - retention_seconds
+    removed = 0
+    for entry in os.scandir(output_dir):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        for file in os.scandir(entry.path):
+            try:
+                expired = file.stat(follow_symlinks=False).st_mtime < cutoff
+            except FileNotFoundError:
+                continue
+            if expired and _remove_quietly(file.path):
+                removed += 1
+        try:
+            os.rmdir(entry.path)
+        except OSError:
+            pass  # 削除されていないファイルが残っている
+    if removed:
+        logger.info("Removed %d expired export files from %s", removed, output_dir)
+    return removed
+
+
+def _write_ndjson(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """レコードを 1 行 1 JSON で書き出し、行数を返す。"""
+    row_count = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+            row_count += 1
+    return row_count
+
+
+def _write_parquet(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """レコードを `PARQUET_BATCH_ROWS` 行ごとの行グループとして Parquet に書き出す。"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError(
+            "parquet_export_unavailable: install 'pyarrow' to export Parquet files"
+        ) from exc
+
+    schema = pa.schema([(column, pa.string()) for column in PARQUET_COLUMNS])
+    row_count = 0
+    batch: Dict[str, List[Any]] = {column: [] for column in PARQUET_COLUMNS}
+
+    def flush(writer: Any) -> None:
+        writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+        for values in batch.values():
+            values.clear()
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for record in records:
+            for column in PARQUET_COLUMNS:
+                value = record.get(column)
+                if column == "tags" and value is not None:
+                    value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+                batch[column].append(value)
+            row_count += 1
+            if len(batch["id"]) >= PARQUET_BATCH_ROWS:
+                flush(writer)
+        if batch["id"] or row_count == 0:
+            flush(writer)
+    return row_count
+
+
+def export_vm_records(
+    records: Iterable[Dict[str, Any]],
+    output_dir: str,
+    file_stem: str,
+    export_format: str = "ndjson",
+) -> Dict[str, Any]:
+    """VM レコードをストリーミングでファイルに書き出す。
+
+    一時ファイルに書き込んだ後にリネームするため、途中で失敗しても
+    不完全なファイルが出力ディレクトリに残りません。
+
+    :return: path / format / row_count / sha256 / size_bytes を含む辞書
+    """
+    export_format = export_format.lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"invalid_export_format: {export_format} (expected one of {EXPORT_FORMATS})"
+        )
+
+    # 主体ごとのディレクトリを他のユーザーから読めないようにする
+    os.makedirs(output_dir, mode=0o700, exist_ok=True)
+    safe_stem = re.sub(r"[^A-Za-z0-9_.-]", "_", file_stem)
+    path = os.path.join(output_dir, f"{safe_stem}.{export_format}")
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=output_dir, prefix=f".{safe_stem}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        if export_format == "ndjson":
+            row_count = _write_ndjson(records, tmp_path)
+        else:
+            row_count = _write_parquet(records, tmp_path)
+        checksum = _file_sha256(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {
+        "path": os.path.abspath(path),
+        "format": export_format,
+        "row_count": row_count,
+        "sha256": checksum,
+        "size_bytes": os.path.getsize(path),
+    }
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """Azure VM エクスポート関連ツールを FastMCP に登録する。"""
+
+    @mcp.tool()
+    async def export_azure_vms(
+        subscription_id: str,
+        format: str = "ndjson",
+        include_status: bool = False,
+    ) -> Dict[str, Any]:
+        """サブスクリプション内の Azure VM 一覧をローカルファイルにエクスポートします。
+
+        VM 一覧はページ単位で取得しながら `EXPORT_OUTPUT_DIR` 配下の呼び出し元ごとの
+        ディレクトリのファイルへ逐次書き出すため、件数に関わらずメモリ使用量は一定です。
+        ツールの結果としては VM 一覧ではなく、出力ファイルの情報のみを返します。
+        ファイルは `EXPORT_RETENTION_SECONDS` (既定 24 時間) を過ぎると削除されます。
+
+        引数:
+            subscription_id: VM を列挙する対象のサブスクリプション ID。
+            format: 出力形式。"ndjson" または "parquet" (pyarrow が必要)。
+            include_status: True の場合、`statusOnly=true` の一覧 API で取得した
+                電源状態とプロビジョニング状態を含めます。
+        """
+        user = get_current_user()
+
+        logger.debug(
+            "export_azure_vms invoked: subscription=%s format=%s include_status=%s "
+            "user=%s client=%s roles=%s scopes=%s",
+            subscription_id,
+            format,
+            include_status,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        # 同じ秒に同じサブスクリプションをエクスポートしても上書きしないよう一意な値を付ける
+        file_stem = f"vms-{subscription_id}-{timestamp}-{uuid.uuid4().hex}"
+        settings = Settings()
+        with use_compute_client(
+            user.token, user.identity, subscription_id
+        ) as client:
+            # ページ取得とファイル書き込みはブロッキング処理のため別スレッドで実行
+            result = await asyncio.to_thread(
+                export_vm_records,
+                iter_vm_records(client, include_status),
+                identity_export_dir(settings.export_output_dir, user.identity),
+                file_stem,
+                format,
+            )
+        await asyncio.to_thread(
+            sweep_exports,
+            settings.export_output_dir,
+            settings.export_retention_seconds,
+        )
+
+        logger.info(
+            "Exported %d VMs from subscription %s for user %s to %s",
+            result["row_count"],
+            subscription_id,
+            user.user_id,
+            result["path"],
+        )
+        return result
@@ -0,0 +1,147 @@
+"""ローカルのディレクトリインデックスを検索する MCP ツール。
+
+`DIRECTORY_SYNC_ENABLED=true` の場合、Graph の差分クエリ (`users/delta`) で
+ディレクトリのユーザーをバックグラウンドで同期し (`common.directory_index`)、
+名前・UPN・メールアドレスによる検索を Graph を呼び出さずに処理します。
+
+同期はユーザーの OBO トークンではなく、このアプリ自身の資格情報
+(クライアント資格情報フロー) で行うため、アプリに `User.Read.All`
+(アプリケーション権限) と管理者の同意が必要です。アプリの権限で取得したディレクトリを
+任意のユーザーに返さないよう、ツールの呼び出しはロールポリシー (`auth.rbac_policy` の
+`tools`) で許可されたロールを持つユーザーに限ります。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+from fastmcp import FastMCP
+from starlette.authentication import AuthenticationError
+
+from auth.claims_helpers import get_current_user
+from auth.entra_auth_provider import build_app_credential
+from auth.tool_authorization import get_tool_authorizer
+from common.config import Settings
+from common.directory_index import DeltaResyncRequired, DirectorySync
+from common.graph_client import (
+    GRAPH_SCOPE,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+from common.utils import canonicalize_select
+
+logger = logging.getLogger(__name__)
+
+# 初回同期の完了を待つ時間の上限 (秒)
+READY_TIMEOUT_SECONDS = 10.0
+
+# 1 回の検索で返す件数の上限
+MAX_LOOKUP_LIMIT = 100
+
+_sync: Optional[DirectorySync] = None
+_app_credential: Optional[Any] = None
+
+
+async def fetch_delta_page(url: str) -> Dict[str, Any]:
+    """アプリ専用トークンで `users/delta` の 1 ページを取得する。
+
+    deltaLink が失効している (410 Gone) 場合は `DeltaResyncRequired` を送出します。
+    """
+    global _app_credential
+    if _app_credential is None:
+        _app_credential = build_app_credential(GRAPH_SCOPE)
+    tenant_id = Settings().entra_tenant_id
+    with use_graph_credential(_app_credential, (tenant_id, "directory-sync")):
+        response = await send_graph_request("GET", url)
+    if response.status_code == 410:
+        raise DeltaResyncRequired(url)
+    return graph_response_json(response)
+
+
+def get_directory_sync() -> DirectorySync:
+    """設定に基づくプロセス共有の `DirectorySync` を返す。"""
+    global _sync
+    if _sync is None:
+        settings = Settings()
+        _sync = DirectorySync(
+            fetch_delta_page,
+            attributes=canonicalize_select(settings.directory_sync_attributes),
+            persist_path=settings.directory_index_path or None,
+            interval_seconds=settings.directory_sync_interval_seconds,
+        )
+    return _sync
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """ディレクトリ検索ツールを FastMCP に登録する。"""
+
+    @mcp.tool()
+    async def lookup_directory_users(
+        query: str,
+        mode: str = "prefix",
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """ローカルのディレクトリインデックスからユーザーを検索します。
+
+        引数:
+            query: 検索文字列。
+            mode: "prefix" (表示名・UPN・メールの前方一致) または
+                "exact" (ID・UPN・メールの完全一致)。
+            limit: 返却する最大件数 (上限 100)。
+
+        例外:
+            AuthenticationError: ロールポリシーでこのツールが許可されていない場合
+        """
+        if not Settings().directory_sync_enabled:
+            raise RuntimeError(
+                "directory_index_disabled: set DIRECTORY_SYNC_ENABLED=true to enable"
+            )
+        if mode not in ("prefix", "exact"):
+            raise ValueError("invalid_mode: mode must be 'prefix' or 'exact'")
+        if limit <= 0:
+            raise ValueError("invalid_limit: must be greater than 0")
+        query = query.strip()
+        if not query:
+            raise ValueError("invalid_query: query is required")
+
+        user = get_current_user()
+        logger.debug(
+            "lookup_directory_users invoked: mode=%s limit=%d subject=%s client_id=%s "
+            "roles=%s scopes=%s",
+            mode,
+            limit,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        # アプリの権限で同期したディレクトリを返すため、ポリシーで許可されたユーザーに限る
+        # (通常はミドルウェアで拒否済み)
+        authorizer = get_tool_authorizer()
+        decision = authorizer.decide(
+            "lookup_directory_users",
+            user.roles,
+            user.scopes,
+            await authorizer.member_groups("lookup_directory_users", user),
+        )
+        if not decision.allowed:
+            raise AuthenticationError(decision.error)
+
+        sync = get_directory_sync()
+        sync.ensure_started()
+        if not await sync.wait_ready(READY_TIMEOUT_SECONDS):
+            raise RuntimeError(
+                "directory_index_not_ready: initial directory sync has not completed"
+            )
+
+        index = sync.index
+        if mode == "exact":
+            match = index.lookup_exact(query)
+            users = [match] if match is not None else []
+        else:
+            users = index.lookup_prefix(query, min(limit, MAX_LOOKUP_LIMIT))
+
+        return {"users": users, "count": len(users), "indexed_users": len(index)}
@@ -0,0 +1,379 @@
+"""Microsoft Graph JSON バッチ (`$batch`) を用いた複数リソース取得用 MCP ツール。
+
+`/me`、`/me/manager`、`/me/memberOf` や複数ユーザーの取得など、1 ターンで必要になる
+複数の GET リクエストを 1 回の `$batch` 呼び出しにまとめて送信します。
+
+- Graph の上限に合わせて 1 バッチあたり最大 20 件に分割します。
+- `depends_on` で結ばれたリクエストは同じバッチに入れ、`dependsOn` として送信します。
+- 個別リクエストが 429 / 503 で返った場合は `Retry-After` に従って再送します。
+
+呼び出しは共有の Graph クライアントスタック (`common.graph_client`) と
+ユーザーの OBO credential を用いて行います。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastmcp import FastMCP
+
+from auth.claims_helpers import get_current_user
+from common.graph_client import (
+    get_graph_credential,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+
+logger = logging.getLogger(__name__)
+
+# Graph の JSON バッチ 1 回あたりの最大リクエスト数
+MAX_BATCH_SIZE = 20
+
+# 個別リクエストを再送するステータスコード
+RETRYABLE_STATUSES = frozenset({429, 503})
+
+# 依存先の失敗により実行されなかったことを示すステータスコード
+FAILED_DEPENDENCY_STATUS = 424
+
+# Retry-After が返らなかった場合の待機秒数
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+# 1 回の待機の上限秒数
+MAX_RETRY_AFTER_SECONDS = 30.0
+
+DEFAULT_MAX_RETRIES = 3
+
+BatchSender = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def normalize_batch_requests(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """ツール入力を検証し、`id` / `url` / `depends_on` を揃えた形に正規化する。
+
+    `id` が省略された要素には 1 始まりの連番を割り当てます。
+    `url` は `/me/manager` のような Graph のバージョン以下の相対パスのみ受け付けます。
+    """
+    if not requests:
+        raise ValueError("invalid_batch_request: at least one request is required")
+
+    normalized: List[Dict[str, Any]] = []
+    seen = set()
+    for index, item in enumerate(requests, start=1):
+        if not isinstance(item, dict):
+            raise ValueError(f"invalid_batch_request: item {index} must be an object")
+
+        request_id = str(item.get("id") or index)
+        if request_id in seen:
+            raise ValueError(f"invalid_batch_request: duplicate id '{request_id}'")
+        seen.add(request_id)
+
+        url = str(item.get("url") or "").strip()
+        if not url or "://" in url:
+            raise ValueError(
+                f"invalid_batch_request: '{request_id}' requires a relative url "
+                "such as '/me/manager'"
+            )
+        if not url.startswith("/"):
+            url = "/" + url
+
+        depends_on = item.get("depends_on") or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+
+        normalized.append(
+            {"id": request_id, "url": url, "depends_on": [str(d) for d in depends_on]}
+        )
+
+    for item in normalized:
+        for dependency in item["depends_on"]:
+            if dependency not in seen:
+                raise ValueError(
+                    f"invalid_batch_request: '{item['id']}' depends on unknown id "
+                    f"'{dependency}'"
+                )
+            if dependency == item["id"]:
+                raise ValueError(
+                    f"invalid_batch_request: '{item['id']}' depends on itself"
+                )
+    return normalized
+
+
+def plan_batches(
+    requests: List[Dict[str, Any]], max_batch_size: int = MAX_BATCH_SIZE
+) -> List[List[Dict[str, Any]]]:
+    """リクエストを最大 `max_batch_size` 件のバッチに分割する。
+
+    Graph の `dependsOn` は同じバッチ内のリクエストしか参照できないため、
+    依存関係で連結されたリクエストのグループは分割せずに同じバッチへ入れます。
+    グループは入力順に、収まる最初のバッチへ詰めます。
+    """
+    parent = {item["id"]: item["id"] for item in requests}
+
+    def find(request_id: str) -> str:
+        while parent[request_id] != request_id:
+            parent[request_id] = parent[parent[request_id]]
+            request_id = parent[request_id]
+        return request_id
+
+    for item in requests:
+        for dependency in item["depends_on"]:
+            parent[find(item["id"])] = find(dependency)
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for item in requests:
+        groups.setdefault(find(item["id"]), []).append(item)
+
+    batches: List[List[Dict[str, Any]]] = []
+    for group in groups.values():
+        if len(group) > max_batch_size:
+            raise ValueError(
+                f"batch_dependency_group_too_large: {len(group)} requests are linked "
+                f"by depends_on (max {max_batch_size} per batch)"
+            )
+        for batch in batches:
+            if len(batch) + len(group) <= max_batch_size:
+                batch.extend(group)
+                break
+        else:
+            batches.append(list(group))
+
+    # バッチ内の順序は入力順に揃える
+    order = {item["id"]: index for index, item in enumerate(requests)}
+    for batch in batches:
+        batch.sort(key=lambda item: order[item["id"]])
+    return batches
+
+
+def build_batch_payload(
+    batch: List[Dict[str, Any]], pending_ids: Optional[set] = None
+) -> Dict[str, Any]:
+    """`$batch` エンドポイントに送る JSON 本文を構築する。
+
+    :param pending_ids: 再送時に、同じ回で送信するリクエストの ID。
+        既に成功した依存先は `dependsOn` から除外します。
+    """
+    payload_requests = []
+    for item in batch:
+        entry: Dict[str, Any] = {"id": item["id"], "method": "GET", "url": item["url"]}
+        depends_on = [
+            dependency
+            for dependency in item["depends_on"]
+            if pending_ids is None or dependency in pending_ids
+        ]
+        if depends_on:
+            entry["dependsOn"] = depends_on
+        payload_requests.append(entry)
+    return {"requests": payload_requests}
+
+
+def _retry_after_seconds(headers: Optional[Dict[str, Any]]) -> float:
+    """個別レスポンスのヘッダーから `Retry-After` (秒) を取り出す。"""
+    for name, value in (headers or {}).items():
+        if name.lower() == "retry-after":
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                break
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+def _retryable_dependents(
+    pending: List[Dict[str, Any]],
+    responses: Dict[str, Dict[str, Any]],
+    throttled_ids: set,
+) -> set:
+    """424 で返った項目のうち、依存先をたどるとスロットリングされた項目に行き着くものの ID を返す。
+
+    依存先のいずれかが 429 / 503 以外で失敗していた場合 (404 や 403 など) は、
+    再送しても同じ結果になるため対象にしません。
+    """
+    items = {item["id"]: item for item in pending}
+    memo: Dict[str, bool] = {}
+
+    def retryable(request_id: str) -> bool:
+        if request_id in throttled_ids:
+            return True
+        if request_id not in memo:
+            memo[request_id] = False  # 依存関係の循環に備えた仮の値
+            item = items.get(request_id)
+            status = responses.get(request_id, {}).get("status")
+            if item is not None and status == FAILED_DEPENDENCY_STATUS:
+                failed = [
+                    dependency
+                    for dependency in item["depends_on"]
+                    if (responses.get(dependency, {}).get("status") or 0) >= 400
+                    or dependency not in responses
+                ]
+                memo[request_id] = bool(failed) and all(map(retryable, failed))
+        return memo[request_id]
+
+    return {
+        item["id"]
+        for item in pending
+        if item["id"] not in throttled_ids and retryable(item["id"])
+    }
+
+
+async def execute_batch(
+    batch: List[Dict[str, Any]],
+    send: BatchSender,
+    *,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> Dict[str, Any]:
+    """1 バッチ分のリクエストを送信し、スロットリングされた項目を再送する。
+
+    429 / 503 の項目と、それらに (間接的に) 依存していたため 424 で返った項目を
+    `Retry-After` の最大値だけ待ってから再送します (最大 `max_retries` 回)。
+    429 / 503 以外で失敗した依存先による 424 は、そのまま結果として返します。
+
+    :return: `responses` (ID → 個別レスポンス) と `attempts` (送信回数) を含む辞書
+    """
+    responses: Dict[str, Dict[str, Any]] = {}
+    pending = list(batch)
+    attempts = 0
+
+    while pending:
+        pending_ids = {item["id"] for item in pending}
+        result = await send(build_batch_payload(pending, pending_ids))
+        attempts += 1
+
+        for response in result.get("responses") or []:
+            response_id = str(response.get("id"))
+            if response_id in pending_ids:
+                responses[response_id] = response
+
+        throttled = [
+            responses[item["id"]]
+            for item in pending
+            if responses.get(item["id"], {}).get("status") in RETRYABLE_STATUSES
+        ]
+        if not throttled or attempts > max_retries:
+            break
+
+        retry_ids = {response["id"] for response in throttled}
+        retry_ids |= _retryable_dependents(pending, responses, retry_ids)
+        pending = [item for item in pending if item["id"] in retry_ids]
+
+        delay = min(
+            MAX_RETRY_AFTER_SECONDS,
+            max(_retry_after_seconds(response.get("headers")) for response in throttled),
+        )
+        logger.debug(
+            "Retrying %d throttled batch requests after %.1fs (attempt %d)",
+            len(pending),
+            delay,
+            attempts,
+        )
+        await sleep(delay)
+
+    return {"responses": responses, "attempts": attempts}
+
+
+async def run_batch_requests(
+    requests: List[Dict[str, Any]],
+    send: BatchSender,
+    *,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> Dict[str, Any]:
+    """リクエスト一覧をバッチに分割して並行送信し、入力順に結果をまとめる。"""
+    normalized = normalize_batch_requests(requests)
+    batches = plan_batches(normalized)
+
+    results = await asyncio.gather(
+        *(
+            execute_batch(batch, send, max_retries=max_retries, sleep=sleep)
+            for batch in batches
+        )
+    )
+
+    responses: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        responses.update(result["responses"])
+
+    ordered = []
+    for item in normalized:
+        response = responses.get(item["id"])
+        if response is None:
+            ordered.append(
+                {"id": item["id"], "url": item["url"], "status": None, "body": None}
+            )
+            continue
+        ordered.append(
+            {
+                "id": item["id"],
+                "url": item["url"],
+                "status": response.get("status"),
+                "headers": response.get("headers") or {},
+                "body": response.get("body"),
+            }
+        )
+
+    return {
+        "responses": ordered,
+        "batch_count": len(batches),
+        "request_count": sum(result["attempts"] for result in results),
+    }
+
+
+async def send_graph_batch(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """共有 Graph スタック経由で `$batch` エンドポイントに 1 回分の本文を送信する。"""
+    response = await send_graph_request(
+        "POST",
+        "/$batch",
+        content=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+    )
+    return graph_response_json(response)
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """Microsoft Graph バッチ関連ツールを FastMCP に登録する。"""
+
+    @mcp.tool()
+    async def graph_batch_get(requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """複数の Microsoft Graph GET リクエストを `$batch` でまとめて実行します。
+
+        20 件を超える場合は複数のバッチに分割して並行送信します。
+        個別リクエストが 429 / 503 で返った場合は `Retry-After` に従って再送します。
+
+        引数:
+            requests: 実行するリクエストの一覧。各要素は次のキーを持つオブジェクトです。
+                - url: `/me/manager` のような v1.0 以下の相対パス (必須)
+                - id: 結果の識別子 (省略時は 1 始まりの連番)
+                - depends_on: 先に実行する必要があるリクエストの id の一覧
+        """
+        try:
+            user = get_current_user()
+
+            logger.debug(
+                "graph_batch_get invoked: requests=%d subject=%s client_id=%s "
+                "roles=%s scopes=%s",
+                len(requests),
+                user.user_id,
+                user.client_id,
+                user.role_names,
+                sorted(user.scopes),
+            )
+
+            identity = user.identity
+            credential = get_graph_credential(user.token, identity)
+            with use_graph_credential(credential, identity):
+                result = await run_batch_requests(requests, send_graph_batch)
+
+            logger.info(
+                "Completed Graph batch: requests=%d batches=%d http_requests=%d",
+                len(result["responses"]),
+                result["batch_count"],
+                result["request_count"],
+            )
+            return result
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error("Failed to execute Graph batch: %s", str(e))
+            raise RuntimeError(f"graph_api_call_failed: {str(e)}") from e
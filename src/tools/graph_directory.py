@@ -0,0 +1,277 @@
+"""Microsoft Graph のディレクトリコレクション (ユーザー・グループ・グループメンバー) 一覧用 MCP ツール。
+
+テナント全体を一度に読み込まないよう、`@odata.nextLink` は必要になった時点で
+1 ページずつ取得し、`max_items` 件に達した時点で取得を打ち切ります。
+打ち切った位置は不透明な継続カーソル (`cursor`) として返すため、
+次の呼び出しで取りこぼしなく続きを取得できます。
+
+カーソルは「読み込み中のページの URL」と「そのページで既に返した件数」を
+base64 でエンコードしたものです。ページの途中で上限に達した場合も、
+同じページを再取得して返却済みの件数を読み飛ばします。
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from fastmcp import FastMCP
+
+from auth.claims_helpers import get_current_user
+from common.graph_client import (
+    get_graph_credential,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+# カーソルで再開できるコレクション (GRAPH_BASE_URL 直下のパス要素)
+ALLOWED_COLLECTIONS = frozenset({"users", "groups"})
+
+# 1 ページあたりの件数 ($top) の上限
+MAX_PAGE_SIZE = 999
+
+# 1 回の呼び出しで返す件数の上限
+MAX_ITEMS_LIMIT = 1000
+
+
+def build_collection_url(
+    path: str,
+    top: int,
+    select: Optional[str] = None,
+    filter: Optional[str] = None,
+) -> str:
+    """コレクションの最初のページの絶対 URL を組み立てる。"""
+    params: List[Tuple[str, str]] = [("$top", str(top))]
+    if select:
+        fields = [field.strip() for field in select.split(",") if field.strip()]
+        if fields:
+            params.append(("$select", ",".join(fields)))
+    if filter:
+        params.append(("$filter", filter))
+    return f"{GRAPH_BASE_URL}{path}?{urlencode(params, quote_via=quote, safe=',$()')}"
+
+
+def encode_cursor(url: str, skip: int = 0) -> str:
+    """ページ URL と読み飛ばす件数を不透明な継続カーソルにエンコードする。"""
+    payload = json.dumps({"u": url, "s": skip}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """継続カーソルを検証してデコードする。
+
+    Graph 以外のホストや、許可されたコレクション以外を指す URL は拒否します。
+
+    :return: (ページ URL, 読み飛ばす件数)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        url = str(payload["u"])
+        skip = int(payload.get("s", 0))
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError) as exc:
+        raise ValueError("invalid_cursor: malformed continuation cursor") from exc
+
+    base = urlsplit(GRAPH_BASE_URL)
+    parts = urlsplit(url)
+    relative_path = parts.path[len(base.path):]
+    if (
+        parts.scheme != base.scheme
+        or parts.netloc.lower() != base.netloc
+        or not parts.path.startswith(base.path + "/")
+        or relative_path.split("/")[1] not in ALLOWED_COLLECTIONS
+        or skip < 0
+    ):
+        raise ValueError("invalid_cursor: cursor does not point to a Graph collection")
+    return url, skip
+
+
+async def collect_collection_page(
+    url: str, max_items: int, skip: int = 0
+) -> Dict[str, Any]:
+    """`url` から `@odata.nextLink` を遅延的にたどり、最大 `max_items` 件を取得する。
+
+    上限に達した時点で以降のページは取得しません。
+    `use_graph_credential()` のコンテキスト内で呼び出す必要があります。
+
+    :param url: 読み込みを開始するページの絶対 URL
+    :param skip: 最初のページで読み飛ばす件数 (カーソルから再開する場合)
+    :return: items / count / cursor / truncated / pages を含む辞書
+    """
+    items: List[Dict[str, Any]] = []
+    cursor: Optional[str] = None
+    pages = 0
+    next_url: Optional[str] = url
+
+    while next_url:
+        page_url = next_url
+        page = graph_response_json(await send_graph_request("GET", page_url))
+        pages += 1
+
+        values = page.get("value") or []
+        available = values[skip:]
+        remaining = max_items - len(items)
+        if len(available) > remaining:
+            items.extend(available[:remaining])
+            cursor = encode_cursor(page_url, skip + remaining)
+            break
+
+        items.extend(available)
+        skip = 0
+        next_url = page.get("@odata.nextLink")
+        if next_url and len(items) >= max_items:
+            cursor = encode_cursor(next_url)
+            break
+
+    return {
+        "items": items,
+        "count": len(items),
+        "cursor": cursor,
+        "truncated": cursor is not None,
+        "pages": pages,
+    }
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """Microsoft Graph ディレクトリ関連ツールを FastMCP に登録する。"""
+
+    async def list_collection(
+        tool_name: str,
+        path: str,
+        select: Optional[str],
+        filter: Optional[str],
+        top: int,
+        max_items: int,
+        cursor: Optional[str],
+    ) -> Dict[str, Any]:
+        if max_items <= 0:
+            raise ValueError("invalid_max_items: must be greater than 0")
+        if top <= 0:
+            raise ValueError("invalid_top: must be greater than 0")
+        max_items = min(max_items, MAX_ITEMS_LIMIT)
+
+        if cursor:
+            url, skip = decode_cursor(cursor)
+        else:
+            url = build_collection_url(
+                path, min(top, max_items, MAX_PAGE_SIZE), select, filter
+            )
+            skip = 0
+
+        user = get_current_user()
+
+        logger.debug(
+            "%s invoked: select=%s filter=%s top=%d max_items=%d cursor=%s "
+            "subject=%s client_id=%s roles=%s scopes=%s",
+            tool_name,
+            select,
+            filter,
+            top,
+            max_items,
+            bool(cursor),
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        try:
+            identity = user.identity
+            credential = get_graph_credential(user.token, identity)
+            with use_graph_credential(credential, identity):
+                result = await collect_collection_page(url, max_items, skip)
+        except Exception as e:
+            logger.error("%s failed: %s", tool_name, str(e))
+            raise RuntimeError(f"graph_api_call_failed: {str(e)}") from e
+
+        logger.info(
+            "%s returned %d items from %d pages (truncated=%s)",
+            tool_name,
+            result["count"],
+            result["pages"],
+            result["truncated"],
+        )
+        return result
+
+    @mcp.tool()
+    async def list_graph_users(
+        select: Optional[str] = "id,displayName,userPrincipalName,mail",
+        filter: Optional[str] = None,
+        top: int = 100,
+        max_items: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """ディレクトリのユーザー一覧を取得します。
+
+        引数:
+            select: カンマ区切りの取得フィールド ($select)。
+            filter: OData フィルター ($filter)。例: "startswith(displayName,'山田')"
+            top: 1 ページあたりの件数 ($top、上限 999)。
+            max_items: 返却する最大件数 (上限 1000)。
+            cursor: 前回の結果に含まれる継続カーソル。指定時は select / filter / top は無視されます。
+        """
+        return await list_collection(
+            "list_graph_users", "/users", select, filter, top, max_items, cursor
+        )
+
+    @mcp.tool()
+    async def list_graph_groups(
+        select: Optional[str] = "id,displayName,mail,groupTypes",
+        filter: Optional[str] = None,
+        top: int = 100,
+        max_items: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """ディレクトリのグループ一覧を取得します。
+
+        引数:
+            select: カンマ区切りの取得フィールド ($select)。
+            filter: OData フィルター ($filter)。例: "securityEnabled eq true"
+            top: 1 ページあたりの件数 ($top、上限 999)。
+            max_items: 返却する最大件数 (上限 1000)。
+            cursor: 前回の結果に含まれる継続カーソル。指定時は select / filter / top は無視されます。
+        """
+        return await list_collection(
+            "list_graph_groups", "/groups", select, filter, top, max_items, cursor
+        )
+
+    @mcp.tool()
+    async def list_graph_group_members(
+        group_id: str,
+        select: Optional[str] = "id,displayName,userPrincipalName,mail",
+        filter: Optional[str] = None,
+        top: int = 100,
+        max_items: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """指定したグループの直接のメンバー一覧を取得します。
+
+        引数:
+            group_id: グループのオブジェクト ID。
+            select: カンマ区切りの取得フィールド ($select)。
+            filter: OData フィルター ($filter)。
+            top: 1 ページあたりの件数 ($top、上限 999)。
+            max_items: 返却する最大件数 (上限 1000)。
+            cursor: 前回の結果に含まれる継続カーソル。指定時は他の引数は無視されます。
+        """
+        group_id = group_id.strip()
+        if not group_id and not cursor:
+            raise ValueError("invalid_group_id: group_id is required")
+        return await list_collection(
+            "list_graph_group_members",
+            f"/groups/{quote(group_id, safe='')}/members",
+            select,
+            filter,
+            top,
+            max_items,
+            cursor,
+        )
@@ -0,0 +1,137 @@
+"""Microsoft Graph からユーザーのプロフィール写真を取得する MCP ツール。
+
+写真は JSON の dict ではなく MCP の画像コンテンツとして返します。
+Graph からの写真のダウンロードは遅く、サイズも大きいため、
+(テナント, ユーザー, サイズ, ETag) ごとにディスクへキャッシュします (`common.photo_cache`)。
+
+1. 写真のメタデータ (`/me/photo` または `/me/photos/{size}`) から `@odata.mediaEtag` を取得
+2. 同じ ETag の写真がキャッシュにあれば、ダウンロードせずにキャッシュファイルから返す
+3. なければ `$value` を取得し、キャッシュファイルに書き込んでから返す
+
+Graph のレスポンスは共有スタック (Kiota のミドルウェア) で本文まで読み込まれた状態で
+返るため、写真はメモリ上のバイト列として扱います (MCP の画像コンテンツも本文全体を
+base64 で埋め込むため、ストリーミングしても最大メモリ量は変わりません)。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Hashable, Optional, Tuple
+
+from fastmcp import FastMCP
+from fastmcp.utilities.types import Image
+
+from auth.claims_helpers import get_current_user
+from common.config import Settings
+from common.graph_client import (
+    get_graph_credential,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+from common.photo_cache import PhotoCache
+
+logger = logging.getLogger(__name__)
+
+# Graph が提供する写真のサイズ
+PHOTO_SIZES = (
+    "48x48",
+    "64x64",
+    "96x96",
+    "120x120",
+    "240x240",
+    "360x360",
+    "432x432",
+    "504x504",
+    "648x648",
+)
+
+_photo_cache: Optional[PhotoCache] = None
+
+
+def get_photo_cache() -> PhotoCache:
+    """設定に基づくプロセス共有の `PhotoCache` を返す。"""
+    global _photo_cache
+    if _photo_cache is None:
+        settings = Settings()
+        _photo_cache = PhotoCache(
+            settings.photo_cache_dir, max_bytes=settings.photo_cache_max_bytes
+        )
+    return _photo_cache
+
+
+def _photo_path(size: Optional[str]) -> str:
+    """写真のメタデータのリクエストパスを返す。"""
+    return f"/me/photos/{size}" if size else "/me/photo"
+
+
+async def fetch_me_photo(
+    user_assertion: str, identity: Hashable, size: Optional[str] = None
+) -> Tuple[bytes, str]:
+    """ユーザーの写真を取得する。同じ ETag の写真がキャッシュにあればダウンロードしない。
+
+    :param user_assertion: OBO で交換するユーザーのアクセストークン
+    :param identity: キャッシュと credential のキーとなる (テナント, ユーザー)
+    :param size: 写真のサイズ (例: "96x96")。None の場合は最大サイズ
+    :return: (画像データ, Content-Type)
+    """
+    cache = get_photo_cache()
+    path = _photo_path(size)
+    credential = get_graph_credential(user_assertion, identity)
+    with use_graph_credential(credential, identity):
+        metadata = graph_response_json(await send_graph_request("GET", path))
+        etag = metadata.get("@odata.mediaEtag")
+        key = (identity, size or "", etag)
+        if etag:
+            cached = await asyncio.to_thread(cache.read, key)
+            if cached is not None:
+                logger.debug("Photo cache hit: size=%s", size)
+                return cached
+
+        response = await send_graph_request("GET", f"{path}/$value")
+
+    if response.status_code >= 400:
+        graph_response_json(response)
+    content_type = (response.headers.get("Content-Type") or "image/jpeg").split(";")[0]
+    data = response.content
+    if etag:
+        await asyncio.to_thread(cache.store, key, content_type, data)
+    return data, content_type
+
+
+def register_tools(mcp: FastMCP) -> None:
+    """Microsoft Graph のプロフィール写真ツールを FastMCP に登録する。"""
+
+    @mcp.tool()
+    async def get_graph_me_photo(size: Optional[str] = None) -> Image:
+        """認証済みユーザーのプロフィール写真を画像として取得します。
+
+        引数:
+            size: 写真のサイズ (48x48, 64x64, 96x96, 120x120, 240x240, 360x360,
+                432x432, 504x504, 648x648)。省略時は最大サイズ。
+        """
+        if size is not None and size not in PHOTO_SIZES:
+            raise ValueError(f"invalid_size: must be one of {', '.join(PHOTO_SIZES)}")
+
+        user = get_current_user()
+        logger.debug(
+            "get_graph_me_photo invoked: size=%s subject=%s client_id=%s roles=%s "
+            "scopes=%s",
+            size,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+        )
+
+        try:
+            data, content_type = await fetch_me_photo(
+                user.token, user.identity, size
+            )
+        except Exception as e:
+            logger.error("Failed to fetch profile photo from Graph API: %s", str(e))
+            raise RuntimeError(f"graph_api_call_failed: {str(e)}") from e
+
+        logger.info("Fetched profile photo: size=%s bytes=%d", size, len(data))
+        return Image(data=data, format=content_type.split("/", 1)[-1])
@@ -6,59 +6,116 @@ https://graph.microsoft.com/v1.0/me エンドポイントをコールし、
 
 On-Behalf-Of (OBO) フローを用いて、認証済みユーザーのトークンを
 Microsoft Graph API 用のトークンに交換してからアクセスします。
+GraphServiceClient と HTTP 接続プールはプロセス内で共有し
+(`common.graph_client`)、ユーザーの OBO credential はリクエストごとに差し込みます。
 
-取得した Kiota モデルは JsonSerializationWriter を用いて JSON に変換します。
+ツールは JSON をそのまま返すだけのため、レスポンスは Kiota モデルへ
+デシリアライズせず、Graph が返した JSON 本文を 1 度だけパースして返します。
+
+`$select` は Graph の `User` スキーマでローカルに検証してから送信します (`common.graph_select`)。
+プロフィールは (ユーザー, 正規化した `$select` のフィールド集合) ごとに短時間キャッシュし、
+期限切れ後は ETag があれば条件付きリクエストで再検証します (`common.graph_cache`)。
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Hashable, Tuple
+from urllib.parse import quote
 
 from fastmcp import FastMCP
-from kiota_abstractions.base_request_configuration import RequestConfiguration
-from msgraph import GraphServiceClient
-from msgraph.generated.users.item.user_item_request_builder import (
-    UserItemRequestBuilder,
-)
 
-from auth.claims_helpers import get_access_token_and_context
-from auth.entra_auth_provider import build_obo_credential
-from common.utils import graph_serialize_model
+from auth.claims_helpers import get_current_user
+from common.config import Settings
+from common.graph_cache import GraphResponseCache
+from common.graph_client import (
+    get_graph_credential,
+    graph_response_json,
+    send_graph_request,
+    use_graph_credential,
+)
+from common.graph_select import parse_user_select
 
 logger = logging.getLogger(__name__)
 
+# (ユーザー, $select のフィールド集合) ごとの /me レスポンス
+_profile_cache = GraphResponseCache(
+    ttl_seconds=Settings().graph_profile_cache_ttl_seconds,
+    max_entries=Settings().graph_profile_cache_max_entries,
+)
+
+
+def _me_path(select: Tuple[str, ...]) -> str:
+    """`/me` のリクエストパスを組み立てる。"""
+    if not select:
+        return "/me"
+    return "/me?$select=" + quote(",".join(select), safe=",")
+
+
+async def fetch_me_profile(
+    user_assertion: str,
+    identity: Hashable,
+    select: Tuple[str, ...] = (),
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """`/me` のプロフィールを取得する。キャッシュが有効期限内であれば Graph を呼び出さない。
+
+    `use_cache` が False の場合は常に Graph から取得し、キャッシュを最新の結果で更新します。
+
+    :param user_assertion: OBO で交換するユーザーのアクセストークン
+    :param identity: キャッシュと credential のキーとなる (テナント, ユーザー)
+    :param select: 正規化済みの `$select` フィールド (空の場合は全フィールド)
+    """
+    key = (identity, select)
+    entry = _profile_cache.lookup(key) if use_cache else None
+    if entry is not None and _profile_cache.is_fresh(entry):
+        logger.debug("Graph profile cache hit: select=%s", select)
+        return dict(entry.body)
+
+    headers = {"If-None-Match": entry.etag} if entry is not None else None
+    credential = get_graph_credential(user_assertion, identity)
+    with use_graph_credential(credential, identity):
+        response = await send_graph_request("GET", _me_path(select), headers=headers)
+
+    if entry is not None and response.status_code == 304:
+        logger.debug("Graph profile revalidated (304): select=%s", select)
+        _profile_cache.refresh(key, entry)
+        return dict(entry.body)
+
+    data = graph_response_json(response)
+    _profile_cache.store(key, data, response.headers.get("ETag"))
+    return dict(data)
+
 
 def register_tools(mcp: FastMCP) -> None:
     """Microsoft Graph API 関連ツールを FastMCP に登録する。"""
 
     @mcp.tool()
-    async def get_graph_me() -> Dict[str, Any]:
-        """認証済みユーザーのプロフィール情報を取得します。"""
+    async def get_graph_me(use_cache: bool = True) -> Dict[str, Any]:
+        """認証済みユーザーのプロフィール情報を取得します。
+
+        引数:
+            use_cache: False の場合、キャッシュを使わず Graph から最新の情報を取得します。
+        """
         try:
-            access_token, roles, user_id, client_id, scopes, _ = (
-                get_access_token_and_context()
-            )
+            user = get_current_user()
 
             logger.debug(
-                "get_graph_me invoked: subject=%s client_id=%s roles=%s scopes=%s",
-                user_id,
-                client_id,
-                roles,
-                scopes,
+                "get_graph_me invoked: subject=%s client_id=%s roles=%s scopes=%s "
+                "use_cache=%s",
+                user.user_id,
+                user.client_id,
+                user.role_names,
+                sorted(user.scopes),
+                use_cache,
             )
 
-            credential = build_obo_credential(
-                access_token.token, "https://graph.microsoft.com/.default"
+            data = await fetch_me_profile(
+                user.token,
+                user.identity,
+                use_cache=use_cache,
             )
 
-            scopes = ["https://graph.microsoft.com/.default"]
-            client = GraphServiceClient(credentials=credential, scopes=scopes)
-
-            response = await client.me.get()
-
-            data = graph_serialize_model(response)
-
             logger.info(
                 "Successfully fetched user profile from Graph API: id=%s",
                 data.get("id"),
@@ -73,48 +130,38 @@ def register_tools(mcp: FastMCP) -> None:
     @mcp.tool()
     async def get_graph_me_with_select_query(
         select: str = "displayName,mail,id,officeLocation,jobTitle",
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
-        """指定フィールドでユーザープロフィールを取得します。"""
+        """指定フィールドでユーザープロフィールを取得します。
+
+        引数:
+            select: カンマ区切りのフィールドリスト。順序・重複・大文字小文字は結果に影響しません。
+                User に存在しないフィールドを含む場合は Graph を呼び出さずにエラーになります。
+            use_cache: False の場合、キャッシュを使わず Graph から最新の情報を取得します。
+        """
+        # OBO や Graph の呼び出しの前に検証する (invalid_select_fields)
+        fields = parse_user_select(select)
         try:
-            access_token, roles, user_id, client_id, scopes, _ = (
-                get_access_token_and_context()
-            )
+            user = get_current_user()
 
             logger.debug(
                 "get_graph_me_with_select_query invoked: select=%s subject=%s "
-                "client_id=%s roles=%s scopes=%s",
+                "client_id=%s roles=%s scopes=%s use_cache=%s",
                 select,
-                user_id,
-                client_id,
-                roles,
-                scopes,
-            )
-
-            credential = build_obo_credential(
-                access_token.token, "https://graph.microsoft.com/.default"
+                user.user_id,
+                user.client_id,
+                user.role_names,
+                sorted(user.scopes),
+                use_cache,
             )
 
-            scopes = ["https://graph.microsoft.com/.default"]
-            client = GraphServiceClient(credentials=credential, scopes=scopes)
-
-            select_fields = [
-                field.strip() for field in select.split(",") if field.strip()
-            ]
-
-            query_params = (
-                UserItemRequestBuilder.UserItemRequestBuilderGetQueryParameters(
-                    select=select_fields,
-                )
+            data = await fetch_me_profile(
+                user.token,
+                user.identity,
+                fields,
+                use_cache=use_cache,
             )
 
-            request_configuration = RequestConfiguration(
-                query_parameters=query_params,
-            )
-
-            response = await client.me.get(request_configuration=request_configuration)
-
-            data = graph_serialize_model(response)
-
             logger.info(
                 "Successfully fetched user profile with select: id=%s fields=%s",
                 data.get("id"),
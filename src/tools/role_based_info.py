@@ -3,26 +3,133 @@
 このモジュールは、アクセストークンの roles クレームに基づいて、
 返却する情報を制御します。異なるロールに応じて、異なるレベルの
 情報へのアクセスを許可します。
+
+ロールからアクセスレベル・リソース・ツールへの対応はポリシーファイルで宣言し
+(`auth.rbac_policy`)、3 つのツールはすべて同じポリシーで判定します。ツールの呼び出しの
+可否は `auth.tool_authorization` がキャッシュした判定を使用します。
+
+`get_company_info` の企業情報はデータソース (`common.company_data`、既定は SQLite) から
+読み出し、アクセスレベルで参照できる列だけをクエリで取得します。返却内容はアクセスレベル
+(public / user / auditor / admin) だけで決まるため、レベルごとのペイロードと JSON 文字列を
+キャッシュします。結果は事前にシリアライズしたテキストのみで返し (`structuredContent` なし)、
+呼び出しごとの処理はレベルの選択と呼び出し元のロールの差し込みのみです。
+データソースを差し替えた場合、キャッシュは次の呼び出し時に破棄します。
 """
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Any, Dict
+import sqlite3
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional
 
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
 from starlette.authentication import AuthenticationError
 
-from auth.claims_helpers import get_user_context, has_role
+from auth.claims_helpers import get_current_user
+from auth.rbac_policy import get_policy
+from auth.tool_authorization import get_tool_authorizer
+from common.company_data import (
+    ACCESS_LEVELS,
+    CompanyDataSource,
+    get_company_data_source,
+)
+from common.config import Settings
+from common.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 
+class _CompanyPayload(NamedTuple):
+    """アクセスレベルごとに事前構築した `get_company_info` のペイロード。
+
+    `json_prefix` + ロールの JSON + `json_suffix` が返却する JSON 文字列になります。
+    `sections` はキャッシュを共有する呼び出し間で変更されないよう読み取り専用です。
+    """
+
+    sections: Mapping[str, Any]
+    json_prefix: str
+    json_suffix: str
+
+
+_to_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _freeze(value: Any) -> Any:
+    """dict を `MappingProxyType` に、list をタプルに再帰的に変換する。"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _build_company_payload(level: str, sections: Dict[str, Any]) -> _CompanyPayload:
+    """アクセスレベルのペイロードと、ロールを差し込む前後の JSON 文字列を構築する。"""
+    return _CompanyPayload(
+        sections=_freeze(sections),
+        json_prefix=f'{{"access_level":{_to_json(level)},"user_roles":',
+        json_suffix="," + _to_json(sections)[1:],
+    )
+
+
+# アクセスレベル → データソースから構築したペイロード
+_payload_cache: TTLCache[_CompanyPayload] = TTLCache(
+    ttl_seconds=Settings().company_data_cache_ttl_seconds,
+    max_entries=Settings().company_data_cache_max_entries,
+)
+# `_payload_cache` のペイロードを読み出したデータソース
+_payload_source: Optional[CompanyDataSource] = None
+
+
+def _fetch_company_payload(source: CompanyDataSource, level: str) -> _CompanyPayload:
+    return _build_company_payload(level, source.fetch_sections(level))
+
+
+async def load_company_payload(level: str) -> _CompanyPayload:
+    """アクセスレベルのペイロードを返す。キャッシュになければデータソースから読み出す。
+
+    データソースが差し替えられていた場合は、以前のデータソースのペイロードを破棄します。
+
+    :raises RuntimeError: データソースから読み出せない場合 (`company_data_unavailable`)
+    """
+    global _payload_source
+    try:
+        source = get_company_data_source()
+        if source is not _payload_source:
+            _payload_cache.clear()
+            _payload_source = source
+        return await _payload_cache.get_or_load(
+            (source, level),
+            lambda: asyncio.to_thread(_fetch_company_payload, source, level),
+        )
+    except (sqlite3.Error, RuntimeError) as exc:
+        logger.error("Failed to load company data for level '%s': %s", level, exc)
+        raise RuntimeError(f"company_data_unavailable: {exc}") from exc
+
+
+def company_access_level(roles: Iterable[str]) -> str:
+    """ロールポリシーから `get_company_info` のアクセスレベルを決定する。
+
+    ポリシーに企業情報のアクセスレベル (`ACCESS_LEVELS`) にないレベルが定義されている場合は
+    public を返します。
+    """
+    level = get_policy().decide(roles).level
+    if level not in ACCESS_LEVELS:
+        logger.warning("No company payload for access level '%s'; using public", level)
+        return "public"
+    return level
+
+
 def register_tools(mcp: FastMCP) -> None:
     """ロールベースアクセス制御ツールを FastMCP に登録する。"""
 
     @mcp.tool()
-    async def get_company_info() -> Dict[str, Any]:
+    async def get_company_info() -> ToolResult:
         """企業情報を取得します。ロールに応じて返される情報が変わります。
 
         - Admin ロール: 機密情報を含むすべての情報にアクセス可能
@@ -35,118 +142,40 @@ def register_tools(mcp: FastMCP) -> None:
         - 監査情報: 従業員数、年間売上、監査レポートなど
         - 機密情報: 未公開プロジェクト、財務詳細、経営戦略など
         """
-        roles, user_id, client_id, scopes, _ = get_user_context()
+        user = get_current_user()
+        user_id = user.user_id
+        roles = list(user.role_names)
 
         logger.debug(
             "get_company_info invoked: user=%s client=%s roles=%s scopes=%s",
             user_id,
-            client_id,
+            user.client_id,
             roles,
-            scopes,
+            sorted(user.scopes),
         )
 
-        # 基本的な公開情報 (すべてのユーザーに提供)
-        result: Dict[str, Any] = {
-            "access_level": "public",
-            "user_roles": roles,
-            "company_name": "Contoso Corporation",
-            "founded_year": 1995,
-            "public_contact": {
-                "email": "info@contoso.com",
-                "phone": "+1-555-0100",
-                "website": "https://www.contoso.com",
-            },
-            "headquarters": "Seattle, WA, USA",
-            "industry": "Technology",
-        }
-
-        # User ロールまたは何らかのロールがある場合は、より詳細な公開情報を追加
-        if roles:
-            result["access_level"] = "user"
-            result["public_info"] = {
-                "employee_count_range": "1000-5000",
-                "stock_symbol": "CTSO",
-                "description": "Leading provider of cloud-based business solutions",
-                "certifications": ["ISO 27001", "SOC 2 Type II"],
-            }
-
-        # Auditor ロールがある場合は、監査情報を追加
-        if has_role(roles, "Auditor") or has_role(roles, "Admin"):
-            result["access_level"] = "auditor"
-            result["audit_info"] = {
-                "employee_count": 2847,
-                "annual_revenue_usd": 450_000_000,
-                "fiscal_year_end": "2025-12-31",
-                "audit_firm": "Big Four Accounting LLP",
-                "last_audit_date": "2025-01-15",
-                "compliance_status": "Fully Compliant",
-                "audit_reports": [
-                    {
-                        "year": 2024,
-                        "status": "Clean Opinion",
-                        "date": "2025-01-15",
-                    },
-                    {
-                        "year": 2023,
-                        "status": "Clean Opinion",
-                        "date": "2024-01-20",
-                    },
-                ],
-            }
-
-        # Admin ロールがある場合は、機密情報を追加
-        if has_role(roles, "Admin"):
-            result["access_level"] = "admin"
-            result["confidential_info"] = {
-                "unreleased_projects": [
-                    {
-                        "code_name": "Project Phoenix",
-                        "description": "Next generation AI platform",
-                        "expected_launch": "Q3 2026",
-                        "budget_usd": 15_000_000,
-                    },
-                    {
-                        "code_name": "Project Horizon",
-                        "description": "Quantum computing initiative",
-                        "expected_launch": "Q1 2027",
-                        "budget_usd": 25_000_000,
-                    },
-                ],
-                "financial_details": {
-                    "actual_revenue_usd": 453_728_942,
-                    "ebitda_usd": 89_456_231,
-                    "cash_reserves_usd": 127_500_000,
-                    "debt_usd": 45_000_000,
-                    "quarterly_growth_rate": 0.078,
-                },
-                "strategic_plans": {
-                    "market_expansion": [
-                        "Southeast Asia",
-                        "Latin America",
-                        "Middle East",
-                    ],
-                    "acquisition_targets": [
-                        "CloudSecure Technologies",
-                        "DataViz Analytics",
-                    ],
-                    "planned_headcount_increase": 450,
-                },
-                "executive_compensation": {
-                    "ceo_total_compensation_usd": 2_500_000,
-                    "cto_total_compensation_usd": 1_800_000,
-                    "cfo_total_compensation_usd": 1_750_000,
-                },
-            }
+        level = company_access_level(user.roles)
+        payload = await load_company_payload(level)
+        if level == "admin":
             logger.info("Confidential information accessed by Admin user: %s", user_id)
 
         logger.info(
             "Company info returned with access level '%s' for user %s with roles %s",
-            result["access_level"],
+            level,
             user_id,
             roles,
         )
 
-        return result
+        # 呼び出しごとの処理はアクセスレベルの選択とロールの差し込みのみ。
+        # structured_content を付けると FastMCP が毎回ペイロード全体を変換するため付けない
+        return ToolResult(
+            content=[
+                TextContent(
+                    type="text",
+                    text=payload.json_prefix + _to_json(roles) + payload.json_suffix,
+                )
+            ]
+        )
 
     @mcp.tool()
     async def get_sensitive_data() -> Dict[str, Any]:
@@ -159,26 +188,33 @@ def register_tools(mcp: FastMCP) -> None:
         機密データのサンプルを返します。実際の使用では、データベースや
         外部 API から取得したデータを返すことができます。
         """
-        roles, user_id, _, scopes, _ = get_user_context()
-        required_role = "Admin"
+        user = get_current_user()
+        user_id = user.user_id
+        roles = list(user.role_names)
+        policy = get_policy()
+        required_role = ", ".join(
+            policy.roles_for_level(policy.required_level("get_sensitive_data") or "admin")
+        )
 
         logger.debug(
             "get_sensitive_data invoked: user=%s user_roles=%s scopes=%s",
             user_id,
             roles,
-            scopes,
+            sorted(user.scopes),
         )
 
-        # Admin ロールを持っているか確認
-        if not has_role(roles, required_role):
-            logger.warning(
-                "Access denied: user %s with roles %s tried to access Admin-only data",
-                user_id,
-                roles,
-            )
-            raise AuthenticationError(
-                f"insufficient_role: 'Admin' role required, but user has {roles}"
-            )
+        # ポリシーでこのツールが許可されているか確認 (通常はミドルウェアで拒否済み)。
+        # 判定はキャッシュされ、拒否の WARNING ログは組み合わせごとに 1 回のみ
+        authorizer = get_tool_authorizer()
+        decision = authorizer.decide(
+            "get_sensitive_data",
+            user.roles,
+            user.scopes,
+            await authorizer.member_groups("get_sensitive_data", user),
+        )
+        if not decision.allowed:
+            logger.debug("Access denied: user %s with roles %s", user_id, roles)
+            raise AuthenticationError(decision.error)
 
         # Admin ロールを持っている場合は、機密データを返す
         logger.info(
@@ -188,7 +224,7 @@ def register_tools(mcp: FastMCP) -> None:
 
         return {
             "status": "success",
-            "required_role": "Admin",
+            "required_role": required_role,
             "user_roles": roles,
             "data": {
                 "sensitive_documents": [
@@ -218,78 +254,29 @@ def register_tools(mcp: FastMCP) -> None:
         リソースとアクションをリストアップします。これにより、ユーザーは
         自分がアクセスできる情報を事前に把握できます。
         """
-        roles, user_id, _, scopes, claims = get_user_context()
-        user_name = claims.get("name") or claims.get("upn")
+        user = get_current_user()
+        user_id = user.user_id
+        roles = list(user.role_names)
+        user_name = user.claims.get("name") or user.claims.get("upn")
 
         logger.debug(
             "list_available_resources invoked: user=%s roles=%s scopes=%s",
             user_id,
             roles,
-            scopes,
+            sorted(user.scopes),
         )
 
-        # すべてのユーザーがアクセスできる基本リソース
+        # アクセスレベルに応じたリソースはポリシーで事前計算済み
+        decision = get_policy().decide(user.roles)
         available_resources = {
             "user_info": {
                 "name": user_name,
                 "user_id": user_id,
                 "roles": roles,
             },
-            "accessible_resources": [
-                {
-                    "resource": "公開会社情報",
-                    "description": "会社の基本的な公開情報",
-                    "access_level": "public",
-                    "tools": ["get_company_info"],
-                },
-            ],
+            "accessible_resources": [dict(resource) for resource in decision.resources],
         }
 
-        # User ロール以上の場合
-        if roles:
-            available_resources["accessible_resources"].extend(
-                [
-                    {
-                        "resource": "詳細な公開情報",
-                        "description": "従業員数範囲、認証情報など",
-                        "access_level": "user",
-                        "tools": ["get_company_info"],
-                    },
-                ]
-            )
-
-        # Auditor ロールを持つ場合
-        if has_role(roles, "Auditor"):
-            available_resources["accessible_resources"].extend(
-                [
-                    {
-                        "resource": "監査情報",
-                        "description": "財務監査、コンプライアンス情報",
-                        "access_level": "auditor",
-                        "tools": ["get_company_info"],
-                    },
-                ]
-            )
-
-        # Admin ロールを持つ場合
-        if has_role(roles, "Admin"):
-            available_resources["accessible_resources"].extend(
-                [
-                    {
-                        "resource": "機密情報",
-                        "description": "未公開プロジェクト、詳細財務情報、戦略計画",
-                        "access_level": "admin",
-                        "tools": ["get_company_info", "get_sensitive_data"],
-                    },
-                    {
-                        "resource": "役員報酬情報",
-                        "description": "経営陣の報酬情報",
-                        "access_level": "admin",
-                        "tools": ["get_company_info"],
-                    },
-                ]
-            )
-
         logger.info(
             "Listed %d accessible resources for user %s with roles %s",
             len(available_resources["accessible_resources"]),
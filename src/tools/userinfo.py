@@ -1,35 +1,187 @@
-"""ユーザー情報関連の MCP ツール群。"""
+"""ユーザー情報関連の MCP ツール群。
+
+`get_user_info` は、`fields` (クレーム名のリスト) または `profile` (名前付きのクレームの組)
+で返却するクレームを絞り込めます。絞り込んだ結果と JSON 文字列はトークンごとにキャッシュ
+するため、同じトークンでの 2 回目以降の呼び出しは (リクエストごとに `UserContext` が
+作り直されても) クレームの復元やシリアライズを行いません。
+
+キャッシュのキーは生のトークンの SHA-256 ハッシュで、トークン自体は保持しません。
+エントリはトークンの有効期限 (`exp`) まで保持し、件数は `MAX_CACHED_TOKENS` までです。
+生のトークンを持たない `UserContext` の結果はキャッシュしません。
+"""
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import time
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
 
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
+from mcp.types import TextContent
 
-from auth.claims_helpers import get_user_context
+from auth.claims_helpers import UserContext, get_current_user
+from common.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# プロファイル名 → 返却するクレーム (None はすべてのクレーム)
+CLAIM_PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    "identity": (
+        "sub",
+        "oid",
+        "tid",
+        "name",
+        "preferred_username",
+        "upn",
+        "email",
+        "idp",
+    ),
+    "authz": (
+        "tid",
+        "aud",
+        "azp",
+        "appid",
+        "roles",
+        "scp",
+        "groups",
+        "wids",
+        "hasgroups",
+        "_claim_names",
+    ),
+    "full": None,
+}
+
+# `fields` に指定できるクレーム名の最大数
+MAX_CLAIM_FIELDS = 64
+# トークンごとにキャッシュする絞り込み結果の最大数
+MAX_PROJECTIONS_PER_TOKEN = 16
+# 絞り込み結果をキャッシュするトークンの最大数
+MAX_CACHED_TOKENS = 1024
+# `exp` クレームのないトークンの絞り込み結果を保持する秒数
+DEFAULT_PROJECTION_TTL_SECONDS = 300
+
+
+class _ClaimProjection(NamedTuple):
+    """絞り込んだクレームと、それをシリアライズした JSON 文字列。"""
+
+    claims: Dict[str, Any]
+    text: str
+
+
+_to_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# トークンの SHA-256 ハッシュ → (絞り込むクレーム → 絞り込み結果)
+_projections: TTLCache[Dict[Optional[FrozenSet[str]], _ClaimProjection]] = TTLCache(
+    ttl_seconds=DEFAULT_PROJECTION_TTL_SECONDS,
+    max_entries=MAX_CACHED_TOKENS,
+    clock=time.time,
+)
+
+
+def resolve_claim_names(
+    fields: Optional[List[str]] = None, profile: Optional[str] = None
+) -> Optional[FrozenSet[str]]:
+    """`fields` と `profile` から返却するクレーム名の集合を決定する。
+
+    両方を指定した場合は和集合です。どちらも指定しない場合と `profile="full"` の場合は
+    None (すべてのクレーム) を返します。
+
+    :raises ValueError: 未知のプロファイル (`invalid_claim_profile`)、
+        または不正なクレーム名 (`invalid_claim_fields`)
+    """
+    if profile is not None and profile not in CLAIM_PROFILES:
+        raise ValueError(
+            f"invalid_claim_profile: {profile} "
+            f"(expected one of {', '.join(CLAIM_PROFILES)})"
+        )
+    names: set[str] = set()
+    if fields:
+        if len(fields) > MAX_CLAIM_FIELDS:
+            raise ValueError(
+                f"invalid_claim_fields: at most {MAX_CLAIM_FIELDS} fields are allowed"
+            )
+        for field in fields:
+            name = field.strip() if isinstance(field, str) else ""
+            if not name:
+                raise ValueError("invalid_claim_fields: field names must be non-empty")
+            names.add(name)
+
+    if profile is None:
+        return frozenset(names) if names else None
+    profile_claims = CLAIM_PROFILES[profile]
+    if profile_claims is None:
+        return None
+    return frozenset(names.union(profile_claims))
+
+
+def project_claims(
+    user: UserContext, names: Optional[FrozenSet[str]]
+) -> _ClaimProjection:
+    """ユーザーのクレームを絞り込み、JSON 文字列とあわせて返す (トークンごとにキャッシュ)。"""
+    cached: Dict[Optional[FrozenSet[str]], _ClaimProjection] = {}
+    if user.token:
+        key = hashlib.sha256(user.token.encode("utf-8")).digest()
+        found = _projections.get(key)
+        exp = user.claims.get("exp")
+        if found is not None:
+            cached = found
+        elif not isinstance(exp, (int, float)):
+            _projections.put(key, cached)
+        elif exp > time.time():
+            _projections.put(key, cached, float(exp))
+    projection = cached.get(names)
+    if projection is None:
+        claims = user.full_claims()
+        if names is not None:
+            claims = {name: value for name, value in claims.items() if name in names}
+        projection = _ClaimProjection(claims, _to_json(claims))
+        if len(cached) < MAX_PROJECTIONS_PER_TOKEN:
+            cached[names] = projection
+    return projection
+
 
 def register_tools(mcp: FastMCP) -> None:
     """ユーザー情報系ツールを FastMCP に登録する。"""
 
     @mcp.tool()
-    async def get_user_info():
+    async def get_user_info(
+        fields: Optional[List[str]] = None,
+        profile: Optional[str] = None,
+    ) -> ToolResult:
         """認証済みの Azure (Entra ID) ユーザー情報を返します。
 
         現在リクエストのコンテキストにあるアクセストークンからクレームを取得し、
         そのクレームの値を返します。
+
+        引数:
+            fields: 返却するクレーム名のリスト (例: ["sub", "roles"])。
+                トークンに含まれないクレームは返却しません。
+            profile: 名前付きのクレームの組。"identity" (ユーザーの識別情報)、
+                "authz" (ロール・スコープ・グループ) または "full" (すべてのクレーム)。
+                `fields` と同時に指定した場合は両方のクレームを返します。
+
+        どちらも指定しない場合は、すべてのクレームを返します。
         """
-        roles, user_id, client_id, scopes, claims = get_user_context()
+        names = resolve_claim_names(fields, profile)
+        user = get_current_user()
 
         logger.debug(
-            "get_user_info invoked: tenant_id=%s subject=%s client_id=%s roles=%s scopes=%s",
-            claims.get("tid"),
-            user_id,
-            client_id,
-            roles,
-            scopes,
+            "get_user_info invoked: tenant_id=%s subject=%s client_id=%s roles=%s "
+            "scopes=%s profile=%s fields=%s",
+            user.tenant_id,
+            user.user_id,
+            user.client_id,
+            user.role_names,
+            sorted(user.scopes),
+            profile,
+            fields,
         )
 
-        return claims
+        projection = project_claims(user, names)
+        return ToolResult(
+            content=[TextContent(type="text", text=projection.text)],
+            structured_content=dict(projection.claims),
+        )
@@ -1,5 +1,7 @@
 """Unit tests for auth.claims_helpers module."""
 
+import base64
+import json
 import os
 import sys
 import unittest
@@ -8,7 +10,18 @@ from unittest.mock import MagicMock, patch
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
-from auth.claims_helpers import get_access_token_and_context, get_user_context, has_role
+from auth import claims_helpers  # noqa: E402
+from auth.claims_helpers import (
+    CompactClaims,
+    EntraAccessToken,
+    UserContext,
+    credential_identity,
+    get_access_token_and_context,
+    get_current_user,
+    get_user_context,
+    has_groups_overage,
+    has_role,
+)
 
 
 class TestClaimsHelpers(unittest.TestCase):
@@ -95,6 +108,170 @@ class TestClaimsHelpers(unittest.TestCase):
         self.assertFalse(has_role(roles, "ADMIN"))
         self.assertTrue(has_role(roles, "Admin"))
 
+    def test_credential_identity(self):
+        """Test credential_identity prefers oid and falls back to sub."""
+        self.assertEqual(
+            credential_identity("sub-1", {"tid": "t", "oid": "o"}), ("t", "o")
+        )
+        self.assertEqual(credential_identity("sub-1", {"tid": "t"}), ("t", "sub-1"))
+
+    def test_has_groups_overage(self):
+        """Test overage is detected only from _claim_names.groups."""
+        self.assertTrue(
+            has_groups_overage({"_claim_names": {"groups": "src1"}, "_claim_sources": {}})
+        )
+        self.assertFalse(has_groups_overage({"groups": ["g1"]}))
+        self.assertFalse(has_groups_overage({"_claim_names": {"other": "src1"}}))
+
+
+class TestUserContext(unittest.TestCase):
+    """Tests for UserContext and get_current_user."""
+
+    CLAIMS = {
+        "roles": ["Admin", "User"],
+        "sub": "test-user-id",
+        "oid": "test-object-id",
+        "tid": "test-tenant-id",
+        "scp": "User.Read Files.Read",
+    }
+
+    def test_normalized_sets(self):
+        """Roles and scopes are lowercase frozensets; role_names keep the token form."""
+        context = UserContext(self.CLAIMS, token="jwt", client_id="client")
+
+        self.assertEqual(context.roles, frozenset({"admin", "user"}))
+        self.assertEqual(context.scopes, frozenset({"user.read", "files.read"}))
+        self.assertEqual(context.role_names, ("Admin", "User"))
+        self.assertTrue(context.has_role("ADMIN"))
+        self.assertFalse(context.has_role("Auditor"))
+        self.assertTrue(context.has_scope("user.read"))
+        self.assertEqual(context.identity, ("test-tenant-id", "test-object-id"))
+        self.assertEqual(context.user_id, "test-user-id")
+        self.assertNotIn("jwt", repr(context))
+
+    def test_immutable(self):
+        context = UserContext(self.CLAIMS)
+        with self.assertRaises(AttributeError):
+            context.roles = frozenset({"admin"})
+        with self.assertRaises(AttributeError):
+            context.extra = 1
+        self.assertFalse(hasattr(context, "__dict__"))
+
+    @patch("auth.claims_helpers.get_access_token")
+    def test_get_current_user_reuses_context_attached_to_token(self, mock_get_token):
+        """The context attached at verification is returned without re-parsing."""
+        token = EntraAccessToken(
+            token="jwt", client_id="client", scopes=["user.read"], claims=self.CLAIMS
+        )
+        attached = UserContext(self.CLAIMS, token="jwt", client_id="client")
+        token._user_context = attached
+        mock_get_token.return_value = token
+
+        self.assertIs(get_current_user(), attached)
+        self.assertIs(get_current_user(), attached)
+
+    @patch("auth.claims_helpers.get_access_token")
+    def test_get_current_user_builds_from_other_tokens(self, mock_get_token):
+        access_token = MagicMock()
+        access_token.claims = self.CLAIMS
+        access_token.token = "jwt"
+        access_token.client_id = "client"
+        access_token.scopes = ["user.read"]
+        mock_get_token.return_value = access_token
+
+        context = get_current_user()
+        self.assertEqual(context.token, "jwt")
+        self.assertEqual(context.scopes, frozenset({"user.read"}))
+
+    @patch("auth.claims_helpers.get_access_token", return_value=None)
+    def test_get_current_user_unauthenticated(self, _):
+        with self.assertRaises(RuntimeError) as ctx:
+            get_current_user()
+        self.assertIn("unauthenticated", str(ctx.exception))
+
+
+def _jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"eyJhbGciOiJSUzI1NiJ9.{payload.decode()}.c2ln"
+
+
+class TestCompactClaims(unittest.TestCase):
+    """Tests for CompactClaims."""
+
+    def _claims(self, sub):
+        return {
+            "aud": "api://mcp",
+            "iss": "https://login.microsoftonline.com/tid-1/v2.0",
+            "iat": 1700000000,
+            "exp": 1700003600,
+            "aio": f"aio-{sub}",
+            "name": f"User {sub}",
+            "oid": f"oid-{sub}",
+            "roles": ["Admin", "User"],
+            "scp": "user.read files.read",
+            "sub": sub,
+            "tid": "tid-1",
+        }
+
+    def test_mapping_matches_claims(self):
+        claims = self._claims("alice")
+        compact = CompactClaims(claims, _jwt(claims))
+
+        self.assertEqual(compact["sub"], "alice")
+        self.assertEqual(compact["roles"], ("Admin", "User"))
+        self.assertEqual(compact["aio"], "aio-alice")
+        self.assertIsNone(compact.get("groups"))
+        self.assertNotIn("groups", compact)
+        self.assertEqual(compact.to_dict(), claims)
+        self.assertEqual(set(compact), set(claims))
+
+    def test_shared_values_and_no_decoded_dict(self):
+        first = CompactClaims(self._claims("alice"), _jwt(self._claims("alice")))
+        second = CompactClaims(self._claims("bob"), _jwt(self._claims("bob")))
+
+        self.assertIs(first["roles"], second["roles"])
+        self.assertIs(first["iss"], second["iss"])
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.sub = "mallory"
+
+    def test_payload_decoded_once(self):
+        claims = self._claims("alice")
+        compact = CompactClaims(claims, _jwt(claims))
+
+        with patch(
+            "auth.claims_helpers._decode_payload", wraps=claims_helpers._decode_payload
+        ) as mock_decode:
+            self.assertEqual(compact["sub"], "alice")
+            self.assertIn("roles", compact)
+            mock_decode.assert_not_called()
+
+            self.assertIn("aio", compact)
+            self.assertEqual(compact["iat"], 1700000000)
+            self.assertEqual(len(compact), len(claims))
+            self.assertEqual(set(compact), set(claims))
+            self.assertEqual(compact.to_dict(), claims)
+
+        mock_decode.assert_called_once()
+
+    def test_keeps_rest_when_token_is_not_jwt(self):
+        claims = self._claims("alice")
+        compact = CompactClaims(claims, "opaque-token")
+
+        self.assertEqual(compact["aio"], "aio-alice")
+        self.assertEqual(compact.to_dict(), claims)
+
+    def test_user_context_full_claims(self):
+        claims = self._claims("alice")
+        context = UserContext(CompactClaims(claims, _jwt(claims)), token=_jwt(claims))
+
+        self.assertEqual(context.role_names, ("Admin", "User"))
+        self.assertEqual(context.identity, ("tid-1", "oid-alice"))
+        self.assertEqual(context.full_claims(), claims)
+        self.assertIs(
+            context.roles, UserContext(self._claims("bob")).roles
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
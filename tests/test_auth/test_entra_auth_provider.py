@@ -2,10 +2,14 @@
 
 import os
 import sys
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
 import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
 
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
@@ -141,6 +145,15 @@ class TestEntraIDAuthProvider(unittest.IsolatedAsyncioTestCase):
             "Token validation succeeded via roles: %s",
             "access_as_application",
         )
+        # 検証時に UserContext を構築して添付する
+        context = access_token.user_context
+        self.assertEqual(context.roles, frozenset({"access_as_application"}))
+        self.assertEqual(context.scopes, frozenset({"user.read"}))
+        self.assertEqual(context.token, "test-jwt-token")
+        self.assertIs(access_token.user_context, context)
+        # クレームは省メモリの CompactClaims として保持する
+        self.assertEqual(access_token.claims["roles"], ("access_as_application",))
+        self.assertIs(context.claims, access_token.claims)
 
     @patch("auth.entra_auth_provider.jwt.decode")
     @patch("auth.entra_auth_provider.requests.get")
@@ -249,6 +262,59 @@ class TestEntraIDAuthProvider(unittest.IsolatedAsyncioTestCase):
 
         self.assertIn("invalid_audience", str(context.exception))
 
+    @patch("auth.entra_auth_provider.requests.get")
+    async def test_verify_token_with_preloaded_signing_keys(self, mock_get):
+        """Test tokens are verified with the pre-parsed key matching their kid."""
+        keys, pems = [], []
+        for index in range(3):
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            pem = private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+            public = jwk.construct(pem, "RS256").public_key().to_dict()
+            keys.append({**public, "kid": f"key-{index}"})
+            pems.append(pem)
+        keys.append({"kid": "unsupported", "kty": "oct"})
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"keys": keys}
+        mock_get.return_value = mock_response
+
+        provider = EntraIDAuthProvider(
+            tenant_id=self.tenant_id, audience=self.audience
+        )
+        self.assertEqual(provider.preload_signing_keys(), 3)
+
+        token = jwt.encode(
+            {
+                "sub": "test-user-id",
+                "azp": "test-client-id",
+                "aud": self.audience,
+                "iss": provider.issuer,
+                "exp": int(time.time()) + 3600,
+            },
+            pems[2],
+            algorithm="RS256",
+            headers={"kid": "key-2"},
+        )
+        with patch("auth.entra_auth_provider.jwk.construct") as mock_construct:
+            access_token = await provider.verify_token(token)
+
+        mock_construct.assert_not_called()
+        self.assertEqual(access_token.claims["sub"], "test-user-id")
+
+        # kid が一致しない署名は拒否する
+        forged = jwt.encode(
+            {"sub": "x", "aud": self.audience, "iss": provider.issuer},
+            pems[0],
+            algorithm="RS256",
+            headers={"kid": "key-2"},
+        )
+        with self.assertRaises(AuthenticationError) as context:
+            await provider.verify_token(forged)
+        self.assertIn("invalid_access_token", str(context.exception))
+
 
 class TestBuildOboCredential(unittest.TestCase):
     """Tests for build_obo_credential function."""
@@ -0,0 +1,66 @@
+"""Unit tests for auth.group_membership module."""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from auth import group_membership  # noqa: E402
+
+OVERAGE_CLAIMS = {
+    "tid": "tenant",
+    "oid": "object",
+    "exp": int(time.time()) + 3600,
+    "_claim_names": {"groups": "src1"},
+    "_claim_sources": {"src1": {"endpoint": "https://graph.windows.net/..."}},
+}
+
+
+class TestGetUserGroups(unittest.TestCase):
+    """Tests for get_user_groups / has_group."""
+
+    def setUp(self):
+        group_membership._group_cache.clear()
+
+    def _context(self, claims):
+        return UserContext(
+            dict(claims, sub="sub"), token="user-token", client_id="client"
+        )
+
+    @patch("auth.group_membership.fetch_member_groups")
+    @patch("auth.group_membership.get_current_user")
+    def test_groups_claim_used_without_graph(self, mock_context, mock_fetch):
+        mock_context.return_value = self._context({"groups": ["g1"]})
+        self.assertTrue(asyncio.run(group_membership.has_group("g1")))
+        mock_fetch.assert_not_called()
+
+    @patch("auth.group_membership.fetch_member_groups", new_callable=AsyncMock)
+    @patch("auth.group_membership.get_current_user")
+    def test_overage_resolved_once_per_token(self, mock_context, mock_fetch):
+        mock_context.return_value = self._context(OVERAGE_CLAIMS)
+        mock_fetch.return_value = ["g1", "g2"]
+
+        self.assertTrue(asyncio.run(group_membership.has_group("g2")))
+        self.assertFalse(asyncio.run(group_membership.has_group("g3")))
+
+        mock_fetch.assert_awaited_once_with("user-token", ("tenant", "object"))
+
+    @patch("auth.group_membership.fetch_member_groups", new_callable=AsyncMock)
+    @patch("auth.group_membership.get_current_user")
+    def test_overage_failure_is_wrapped(self, mock_context, mock_fetch):
+        mock_context.return_value = self._context(OVERAGE_CLAIMS)
+        mock_fetch.side_effect = RuntimeError("graph_request_failed: status=403")
+
+        with self.assertRaises(RuntimeError) as ctx:
+            asyncio.run(group_membership.get_user_groups())
+        self.assertIn("groups_overage_resolution_failed", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,12 @@ from unittest.mock import MagicMock, patch
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
-from auth.obo_client import OboSettings, OnBehalfOfCredential
+from auth import obo_client
+from auth.obo_client import (
+    ClientCredentialsCredential,
+    OboSettings,
+    OnBehalfOfCredential,
+)
 
 
 class TestOboSettings(unittest.TestCase):
@@ -68,6 +73,8 @@ class TestOnBehalfOfCredential(unittest.TestCase):
             client_id="test-client-id",
             client_credential="test-secret",
             authority="https://login.microsoftonline.com/test-tenant-id",
+            http_client=obo_client._get_http_session(),
+            http_cache=obo_client._http_cache,
         )
         mock_app_instance.acquire_token_on_behalf_of.assert_called_once_with(
             user_assertion="test-user-token",
@@ -130,5 +137,90 @@ class TestOnBehalfOfCredential(unittest.TestCase):
         self.assertGreaterEqual(access_token.expires_on, current_time + 3500)
 
 
+    @patch("auth.obo_client.msal.ConfidentialClientApplication")
+    def test_msal_app_reused_and_assertion_updated(self, mock_msal_app):
+        """Test the MSAL app is built once and the user assertion can be swapped."""
+        mock_app_instance = MagicMock()
+        mock_app_instance.acquire_token_on_behalf_of.return_value = {
+            "access_token": "test-obo-token",
+            "expires_in": 3600,
+        }
+        mock_msal_app.return_value = mock_app_instance
+
+        credential = OnBehalfOfCredential(self.settings, self.user_assertion)
+        credential.get_token()
+        credential.update_user_assertion("refreshed-user-token")
+        credential.get_token()
+
+        mock_msal_app.assert_called_once()
+        self.assertEqual(
+            mock_app_instance.acquire_token_on_behalf_of.call_args.kwargs[
+                "user_assertion"
+            ],
+            "refreshed-user-token",
+        )
+
+    @patch("auth.obo_client.msal.ConfidentialClientApplication")
+    def test_msal_apps_share_http_session_and_cache(self, mock_msal_app):
+        """Test MSAL apps of different users share the HTTP session and cache."""
+        OnBehalfOfCredential(self.settings, "user-a")._get_app()
+        OnBehalfOfCredential(self.settings, "user-b")._get_app()
+        ClientCredentialsCredential(self.settings)._get_app()
+
+        calls = mock_msal_app.call_args_list
+        self.assertEqual(len(calls), 3)
+        for call in calls:
+            self.assertIs(call.kwargs["http_client"], calls[0].kwargs["http_client"])
+            self.assertIs(call.kwargs["http_cache"], obo_client._http_cache)
+
+
+class TestClientCredentialsCredential(unittest.TestCase):
+    """Tests for ClientCredentialsCredential class."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.settings = OboSettings(
+            tenant_id="test-tenant-id",
+            client_id="test-client-id",
+            client_secret="test-secret",
+            scope="https://graph.microsoft.com/.default",
+        )
+
+    @patch("auth.obo_client.msal.ConfidentialClientApplication")
+    def test_get_token_success_and_app_reused(self, mock_msal_app):
+        """Test app-only tokens use settings.scope and the MSAL app is reused."""
+        mock_app_instance = MagicMock()
+        mock_app_instance.acquire_token_for_client.return_value = {
+            "access_token": "test-app-token",
+            "expires_in": 3600,
+        }
+        mock_msal_app.return_value = mock_app_instance
+
+        credential = ClientCredentialsCredential(self.settings)
+        access_token = credential.get_token("ignored-scope")
+        credential.get_token()
+
+        self.assertEqual(access_token.token, "test-app-token")
+        mock_msal_app.assert_called_once()
+        mock_app_instance.acquire_token_for_client.assert_called_with(
+            scopes=["https://graph.microsoft.com/.default"]
+        )
+
+    @patch("auth.obo_client.msal.ConfidentialClientApplication")
+    def test_get_token_failure(self, mock_msal_app):
+        """Test a missing access_token raises RuntimeError."""
+        mock_app_instance = MagicMock()
+        mock_app_instance.acquire_token_for_client.return_value = {
+            "error": "unauthorized_client",
+        }
+        mock_msal_app.return_value = mock_app_instance
+
+        credential = ClientCredentialsCredential(self.settings)
+        with self.assertRaises(RuntimeError) as ctx:
+            credential.get_token()
+
+        self.assertIn("client_credentials_token_acquisition_failed", str(ctx.exception))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,139 @@
+"""Unit tests for auth.rbac_policy module."""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.rbac_policy import (  # noqa: E402
+    DEFAULT_POLICY_PATH,
+    CompiledPolicy,
+    PolicyStore,
+    load_policy,
+)
+
+SMALL_POLICY = {
+    "levels": ["public", "staff"],
+    "roles": {"Staff": "staff"},
+    "tools": {"secret_tool": "staff"},
+    "resources": [
+        {"resource": "a", "access_level": "public", "tools": ["t1"]},
+        {"resource": "b", "access_level": "staff", "tools": ["t2"]},
+    ],
+}
+
+
+class TestCompiledPolicy(unittest.TestCase):
+    """Tests for the bundled policy compiled into lookup tables."""
+
+    def setUp(self):
+        self.policy = load_policy(DEFAULT_POLICY_PATH)
+
+    def test_role_levels(self):
+        cases = [
+            ([], "public"),
+            (["User"], "user"),
+            (["SomethingElse"], "user"),
+            (["Auditor"], "auditor"),
+            (["Auditor", "User"], "auditor"),
+            (["Admin", "Auditor"], "admin"),
+            (frozenset({"admin"}), "admin"),
+            (["AUDITOR"], "auditor"),
+        ]
+        for roles, level in cases:
+            with self.subTest(roles=roles):
+                self.assertEqual(self.policy.decide(roles).level, level)
+
+    def test_higher_levels_include_lower_resources(self):
+        admin = self.policy.decide(["Admin"])
+        auditor = self.policy.decide(["Auditor"])
+        levels = {resource["access_level"] for resource in admin.resources}
+
+        self.assertEqual(levels, {"public", "user", "auditor", "admin"})
+        for resource in auditor.resources:
+            self.assertIn(resource, admin.resources)
+
+    def test_tools(self):
+        self.assertIn("get_sensitive_data", self.policy.decide(["Admin"]).tools)
+        self.assertNotIn("get_sensitive_data", self.policy.decide(["Auditor"]).tools)
+        self.assertEqual(self.policy.required_level("get_sensitive_data"), "admin")
+        self.assertIsNone(self.policy.required_level("get_company_info"))
+        self.assertEqual(self.policy.roles_for_level("admin"), ["Admin"])
+        self.assertEqual(self.policy.roles_for_level("auditor"), ["Admin", "Auditor"])
+        self.assertEqual(self.policy.required_scopes("get_sensitive_data"), frozenset())
+        self.assertEqual(self.policy.required_groups("get_sensitive_data"), frozenset())
+        grouped = CompiledPolicy({"levels": ["a"], "tool_groups": {"t": ["G-1"]}})
+        self.assertEqual(grouped.required_groups("t"), frozenset({"g-1"}))
+
+    def test_decisions_are_shared(self):
+        self.assertIs(self.policy.decide(["Admin", "X"]), self.policy.decide(["Y", "Admin"]))
+
+    def test_invalid_policy(self):
+        invalid = [
+            {"levels": []},
+            {"levels": ["a", "a"]},
+            {"levels": ["a"], "roles": {"R": "b"}},
+            {"levels": ["a"], "resources": [{"resource": "x", "access_level": "b"}]},
+            {"levels": ["a"], "tool_scopes": {"t": "files.read"}},
+            {"levels": ["a"], "tool_groups": {"t": []}},
+        ]
+        for document in invalid:
+            with self.subTest(document=document):
+                with self.assertRaises(ValueError) as ctx:
+                    CompiledPolicy(document)
+                self.assertIn("invalid_rbac_policy", str(ctx.exception))
+
+
+class TestPolicyStore(unittest.TestCase):
+    """Tests for PolicyStore hot reload."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "policy.json")
+        self._write(SMALL_POLICY)
+        self.now = 0.0
+        self.store = PolicyStore(self.path, 2.0, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, document, text=None):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text if text is not None else json.dumps(document))
+
+    def _touch_later(self):
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_reloads_after_change(self):
+        self.assertEqual(self.store.get().decide(["Staff"]).level, "staff")
+
+        changed = dict(SMALL_POLICY, roles={"Staff": "public"})
+        self._write(changed)
+        self._touch_later()
+
+        # 確認間隔内はファイルを確認しない
+        self.now = 1.0
+        self.assertEqual(self.store.get().decide(["Staff"]).level, "staff")
+
+        self.now = 2.0
+        self.assertEqual(self.store.get().decide(["Staff"]).level, "public")
+        self.assertEqual(self.store.reloads, 1)
+
+    def test_keeps_policy_on_invalid_file(self):
+        original = self.store.get()
+        self._write(None, text="{ not json")
+        self._touch_later()
+
+        self.now = 5.0
+        with self.assertLogs("auth.rbac_policy", level="ERROR"):
+            self.assertIs(self.store.get(), original)
+        self.assertEqual(self.store.reloads, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""Unit tests for auth.tool_authorization module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from auth.rbac_policy import CompiledPolicy  # noqa: E402
+from auth.tool_authorization import (  # noqa: E402
+    ToolAuthorizationMiddleware,
+    ToolAuthorizer,
+)
+
+POLICY = CompiledPolicy(
+    {
+        "levels": ["public", "admin"],
+        "roles": {"Admin": "admin"},
+        "tools": {"secret": "admin"},
+        "tool_scopes": {"scoped": ["Files.Read"]},
+        "tool_groups": {"grouped": ["GROUP-A", "group-b"]},
+    }
+)
+
+
+def _user(roles=(), scp=""):
+    return UserContext({"sub": "user", "roles": list(roles), "scp": scp})
+
+
+class TestToolAuthorizer(unittest.TestCase):
+    """Tests for ToolAuthorizer."""
+
+    def setUp(self):
+        self.policy = POLICY
+        self.authorizer = ToolAuthorizer(policy_source=lambda: self.policy)
+
+    def test_decisions(self):
+        cases = [
+            ("secret", _user(["Admin"]), True),
+            ("secret", _user(["ADMIN"]), True),
+            ("secret", _user(["User"]), False),
+            ("secret", None, False),
+            ("scoped", _user(scp="files.read"), True),
+            ("scoped", _user(["Admin"]), False),
+            ("open", None, True),
+            ("grouped", _user(["Admin"]), False),
+        ]
+        with self.assertLogs("auth.tool_authorization", level="WARNING"):
+            for tool, user, allowed in cases:
+                with self.subTest(tool=tool, user=user):
+                    decision = self.authorizer.authorize(tool, user)
+                    self.assertEqual(decision.allowed, allowed)
+
+        denied = self.authorizer.authorize("secret", _user(["User"]))
+        self.assertIn("insufficient_role: 'Admin' role required", denied.error)
+        self.assertIn("insufficient_scope", self.authorizer.authorize("scoped", None).error)
+
+    def test_member_groups_limited_to_required_groups(self):
+        user = _user()
+        with patch(
+            "auth.group_membership.get_user_groups",
+            new=AsyncMock(return_value=frozenset({"Group-A", "other"})),
+        ) as mock_groups:
+            self.assertEqual(asyncio.run(self.authorizer.member_groups("open", user)), frozenset())
+            mock_groups.assert_not_called()
+            groups = asyncio.run(self.authorizer.member_groups("grouped", user))
+
+        self.assertEqual(groups, frozenset({"group-a"}))
+        self.assertTrue(self.authorizer.authorize("grouped", user, groups).allowed)
+
+    def test_cached_and_warns_once_per_combination(self):
+        with self.assertLogs("auth.tool_authorization", level="WARNING") as logs:
+            for _ in range(100):
+                self.authorizer.authorize("secret", _user(["User"]))
+            self.authorizer.authorize("secret", _user(["Admin"]))
+
+        self.assertEqual(len(logs.records), 1)
+        stats = self.authorizer.stats()
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["hits"], 99)
+        self.assertEqual(stats["tools"]["secret"], {"allowed": 1, "denied": 100})
+
+    def test_policy_reload_discards_decisions(self):
+        user = _user(["Admin"])
+        self.assertTrue(self.authorizer.decide("secret", user.roles, user.scopes).allowed)
+
+        self.policy = CompiledPolicy(
+            {"levels": ["public", "admin"], "tools": {"secret": "admin"}}
+        )
+        with self.assertLogs("auth.tool_authorization", level="WARNING"):
+            decision = self.authorizer.decide("secret", user.roles, user.scopes)
+        self.assertFalse(decision.allowed)
+
+
+class TestToolAuthorizationMiddleware(unittest.TestCase):
+    """Tests for ToolAuthorizationMiddleware."""
+
+    def setUp(self):
+        self.calls = []
+        self.authorizer = ToolAuthorizer(policy_source=lambda: POLICY)
+        self.mcp = FastMCP("test-server")
+        self.mcp.add_middleware(ToolAuthorizationMiddleware(self.authorizer))
+
+        @self.mcp.tool()
+        def secret() -> str:
+            self.calls.append("secret")
+            return "ok"
+
+        @self.mcp.tool()
+        def grouped() -> str:
+            self.calls.append("grouped")
+            return "ok"
+
+    def _call(self, user, tool="secret"):
+        async def scenario():
+            async with Client(self.mcp) as client:
+                return await client.call_tool(tool, {})
+
+        with patch("auth.tool_authorization.get_current_user", return_value=user):
+            return asyncio.run(scenario())
+
+    def test_denied_before_tool_runs(self):
+        with self.assertLogs("auth.tool_authorization", level="WARNING"):
+            with self.assertRaises(ToolError) as ctx:
+                self._call(_user(["User"]))
+        self.assertIn("insufficient_role", str(ctx.exception))
+        self.assertEqual(self.calls, [])
+
+        self.assertEqual(self._call(_user(["Admin"])).data, "ok")
+        self.assertEqual(self.calls, ["secret"])
+        self.assertEqual(
+            self.authorizer.stats()["tools"]["secret"], {"allowed": 1, "denied": 1}
+        )
+
+    def test_group_condition(self):
+        get_groups = AsyncMock(return_value=frozenset({"other"}))
+        with patch("auth.group_membership.get_user_groups", new=get_groups):
+            with self.assertLogs("auth.tool_authorization", level="WARNING"):
+                with self.assertRaises(ToolError) as ctx:
+                    self._call(_user(["Admin"]), "grouped")
+            self.assertIn("insufficient_group", str(ctx.exception))
+            self.assertEqual(self.calls, [])
+
+            get_groups.return_value = frozenset({"group-b"})
+            self.assertEqual(self._call(_user(), "grouped").data, "ok")
+            self.assertEqual(self.calls, ["grouped"])
+
+            # グループの条件がないツールでは所属グループを解決しない
+            get_groups.reset_mock()
+            self._call(_user(["Admin"]))
+            get_groups.assert_not_called()
+
+    def test_group_resolution_failure_denies(self):
+        get_groups = AsyncMock(
+            side_effect=RuntimeError("groups_overage_resolution_failed: status=403")
+        )
+        with patch("auth.group_membership.get_user_groups", new=get_groups):
+            with self.assertLogs("auth.tool_authorization", level="WARNING"):
+                with self.assertRaises(ToolError) as ctx:
+                    self._call(_user(), "grouped")
+        self.assertIn("insufficient_group", str(ctx.exception))
+        self.assertEqual(self.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Unit tests for common.client_registry module."""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.client_registry import ClientRegistry
+
+
+class FakeClock:
+    """Controllable monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestClientRegistry(unittest.TestCase):
+    """Tests for ClientRegistry."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.registry = ClientRegistry(
+            idle_timeout_seconds=60, max_entries=2, clock=self.clock
+        )
+
+    def test_reuses_client_for_same_key(self):
+        """Test the factory runs once per key."""
+        factory = MagicMock(side_effect=lambda: MagicMock())
+
+        first = self.registry.acquire("a", factory)
+        second = self.registry.acquire("a", factory)
+
+        self.assertIs(first, second)
+        factory.assert_called_once()
+        self.assertEqual(self.registry.created, 1)
+        self.assertEqual(self.registry.reused, 1)
+
+    def test_idle_clients_are_closed_and_rebuilt(self):
+        """Test clients idle past the timeout are closed and recreated."""
+        first = self.registry.acquire("a", MagicMock)
+
+        self.clock.now = 61
+        second = self.registry.acquire("a", MagicMock)
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(self.registry.evicted, 1)
+
+    def test_recent_use_extends_lifetime(self):
+        """Test each acquire refreshes the idle timer."""
+        first = self.registry.acquire("a", MagicMock)
+        self.clock.now = 50
+        self.registry.acquire("a", MagicMock)
+        self.clock.now = 100
+        self.assertIs(self.registry.acquire("a", MagicMock), first)
+
+    def test_max_entries_evicts_least_recently_used(self):
+        """Test the registry is bounded."""
+        first = self.registry.acquire("a", MagicMock)
+        self.registry.acquire("b", MagicMock)
+        self.registry.acquire("c", MagicMock)
+
+        self.assertEqual(len(self.registry), 2)
+        first.close.assert_called_once()
+
+    def test_clear_closes_all(self):
+        """Test clear closes every cached client."""
+        first = self.registry.acquire("a", MagicMock)
+        self.registry.clear()
+        first.close.assert_called_once()
+        self.assertEqual(len(self.registry), 0)
+
+    def test_close_errors_are_swallowed(self):
+        """Test failures while closing do not propagate."""
+        client = MagicMock()
+        client.close.side_effect = RuntimeError("boom")
+        self.registry.acquire("a", lambda: client)
+        self.registry.clear()
+
+    def test_custom_close_errors_are_swallowed(self):
+        """Test failures from a custom close function do not propagate."""
+        registry = ClientRegistry(
+            idle_timeout_seconds=60,
+            close=MagicMock(side_effect=RuntimeError("boom")),
+            clock=self.clock,
+        )
+        registry.acquire("a", MagicMock)
+        self.clock.now = 61
+        registry.acquire("a", MagicMock)
+        registry.clear()
+
+    def test_leased_client_is_not_closed_while_in_use(self):
+        """Test idle timeout and LRU eviction skip clients that are leased."""
+        with self.registry.lease("a", MagicMock) as leased:
+            self.clock.now = 61
+            self.registry.acquire("b", MagicMock)
+            self.registry.acquire("c", MagicMock)
+            leased.close.assert_not_called()
+            self.assertIs(self.registry.acquire("a", MagicMock), leased)
+
+        # 使用後は再びアイドルタイムアウトの対象になる
+        self.clock.now = 200
+        self.registry.acquire("d", MagicMock)
+        leased.close.assert_called_once()
+
+    def test_clear_closes_leased_client_after_release(self):
+        """Test clear defers closing a leased client until it is released."""
+        with self.registry.lease("a", MagicMock) as leased:
+            self.registry.clear()
+            leased.close.assert_not_called()
+            self.assertEqual(len(self.registry), 0)
+        leased.close.assert_called_once()
+
+    def test_zero_idle_timeout_closes_leased_client_after_use(self):
+        """Test a disabled registry closes each leased client when the lease ends."""
+        registry = ClientRegistry(idle_timeout_seconds=0, clock=self.clock)
+        with registry.lease("a", MagicMock) as leased:
+            leased.close.assert_not_called()
+        leased.close.assert_called_once()
+        self.assertEqual(len(registry), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Unit tests for common.company_data module."""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.company_data import (  # noqa: E402
+    COMPANY_COLUMNS,
+    SQLiteCompanyDataSource,
+    SQLiteConnectionPool,
+    StaticCompanyDataSource,
+    columns_for_level,
+)
+
+
+class TestSQLiteCompanyDataSource(unittest.TestCase):
+    """Tests for SQLiteCompanyDataSource."""
+
+    def setUp(self):
+        self.source = SQLiteCompanyDataSource(pool_size=2)
+
+    def tearDown(self):
+        self.source.close()
+
+    def test_matches_static_source(self):
+        """Rows round-trip through SQLite, including JSON columns."""
+        static = StaticCompanyDataSource()
+        for level in ("public", "user", "auditor", "admin"):
+            with self.subTest(level=level):
+                self.assertEqual(
+                    self.source.fetch_sections(level), static.fetch_sections(level)
+                )
+
+    def test_projection_never_reads_restricted_columns(self):
+        """Only the columns allowed for the level are read from the table."""
+        read = []
+
+        def authorizer(action, arg1, arg2, db, source):
+            if action == sqlite3.SQLITE_READ and arg1 == "company":
+                read.append(arg2)
+            return sqlite3.SQLITE_OK
+
+        with self.source.pool.connection() as connection:
+            connection.set_authorizer(authorizer)
+
+        sections = self.source.fetch_sections("user")
+
+        allowed = {column.name for column in columns_for_level("user")}
+        self.assertEqual(set(read), allowed)
+        self.assertNotIn("audit_info", sections)
+        self.assertNotIn("confidential_info", sections)
+        self.assertEqual(sections["public_info"]["stock_symbol"], "CTSO")
+
+    def test_existing_database_is_not_reseeded(self):
+        """A database file with its own company table is used as is."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "company.db")
+            first = SQLiteCompanyDataSource(path, seed_sample=True)
+            first.close()
+            with sqlite3.connect(path) as connection:
+                connection.execute("UPDATE company SET company_name = 'Fabrikam'")
+            connection.close()
+
+            second = SQLiteCompanyDataSource(path)
+            try:
+                sections = second.fetch_sections("public")
+            finally:
+                second.close()
+        self.assertEqual(sections["company_name"], "Fabrikam")
+
+    def test_configured_database_without_table_is_not_seeded(self):
+        """A configured database lacking the table fails instead of getting sample rows."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "company.db")
+            with self.assertRaises(RuntimeError) as ctx:
+                SQLiteCompanyDataSource(path)
+            with sqlite3.connect(path) as connection:
+                tables = connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                ).fetchall()
+            connection.close()
+        self.assertIn("company_data_not_found", str(ctx.exception))
+        self.assertEqual(tables, [])
+
+    def test_connections_are_read_only(self):
+        with self.source.pool.connection() as connection:
+            with self.assertRaises(sqlite3.OperationalError):
+                connection.execute("DELETE FROM company")
+
+    def test_unknown_level(self):
+        with self.assertRaises(ValueError):
+            self.source.fetch_sections("root")
+        self.assertEqual(len(columns_for_level("admin")), len(COMPANY_COLUMNS))
+
+
+class TestSQLiteConnectionPool(unittest.TestCase):
+    """Tests for SQLiteConnectionPool."""
+
+    def test_reuses_connections_and_times_out(self):
+        pool = SQLiteConnectionPool(":memory:", size=1, timeout_seconds=0.01)
+        try:
+            with pool.connection() as first:
+                with self.assertRaises(RuntimeError) as ctx:
+                    with pool.connection():
+                        pass
+                self.assertIn("company_data_pool_exhausted", str(ctx.exception))
+            with pool.connection() as second:
+                self.assertIs(first, second)
+            self.assertEqual(pool.created, 1)
+        finally:
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Unit tests for common.directory_index module."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.directory_index import (  # noqa: E402
+    DeltaResyncRequired,
+    DirectoryIndex,
+    DirectorySync,
+)
+
+
+def make_user(i, **overrides):
+    user = {
+        "id": f"id-{i}",
+        "displayName": f"User {i:03d}",
+        "userPrincipalName": f"user{i:03d}@contoso.com",
+        "mail": f"user{i:03d}@contoso.com",
+        "jobTitle": "Engineer",
+        "department": "R&D",
+    }
+    user.update(overrides)
+    return user
+
+
+class FakeDeltaServer:
+    """Stand-in for users/delta that serves pages and hands out delta links.
+
+    Every delta link returns the changes recorded after it was issued.
+    """
+
+    def __init__(self, users, page_size=2):
+        self.users = list(users)
+        self.page_size = page_size
+        self.changes = []
+        self.expired = set()
+        self.requested = []
+
+    def record(self, item):
+        self.changes.append(item)
+
+    async def __call__(self, url):
+        self.requested.append(url)
+        if url.startswith("delta:"):
+            if url in self.expired:
+                raise DeltaResyncRequired(url)
+            items = self.changes[int(url.split(":")[1]):]
+            return {"value": items, "@odata.deltaLink": f"delta:{len(self.changes)}"}
+
+        start = int(url.split("#")[1]) if "#" in url else 0
+        end = start + self.page_size
+        page = {"value": self.users[start:end]}
+        if end < len(self.users):
+            page["@odata.nextLink"] = f"page#{end}"
+        else:
+            page["@odata.deltaLink"] = f"delta:{len(self.changes)}"
+        return page
+
+
+class TestDirectoryIndex(unittest.TestCase):
+    """Tests for DirectoryIndex lookups and updates."""
+
+    def setUp(self):
+        self.index = DirectoryIndex.build([make_user(i) for i in range(5)])
+
+    def test_id_is_always_first_attribute(self):
+        index = DirectoryIndex(["displayName", "mail"])
+        self.assertEqual(index.attributes, ("id", "displayName", "mail"))
+
+    def test_prefix_lookup_is_case_insensitive_and_deduplicated(self):
+        results = self.index.lookup_prefix("USER00", limit=10)
+        self.assertEqual([u["id"] for u in results], [f"id-{i}" for i in range(5)])
+        self.assertEqual(len(self.index.lookup_prefix("user 001")), 1)
+        self.assertEqual(len(self.index.lookup_prefix("user", limit=2)), 2)
+        self.assertEqual(self.index.lookup_prefix("nobody"), [])
+
+    def test_exact_lookup(self):
+        self.assertEqual(self.index.lookup_exact("id-3")["displayName"], "User 003")
+        self.assertEqual(
+            self.index.lookup_exact("USER002@contoso.com")["id"], "id-2"
+        )
+        self.assertIsNone(self.index.lookup_exact("user"))
+
+    def test_apply_updates_removals_and_partial_changes(self):
+        upserted, removed = self.index.apply(
+            [
+                {"id": "id-1", "displayName": "Renamed"},
+                {"id": "id-2", "@removed": {"reason": "deleted"}},
+                make_user(9),
+            ]
+        )
+        self.assertEqual((upserted, removed), (2, 1))
+        self.assertEqual(len(self.index), 5)
+
+        renamed = self.index.lookup_exact("id-1")
+        self.assertEqual(renamed["displayName"], "Renamed")
+        self.assertEqual(renamed["mail"], "user001@contoso.com")
+        self.assertEqual(self.index.lookup_prefix("user 001"), [])
+        self.assertIsNone(self.index.lookup_exact("user002@contoso.com"))
+        self.assertEqual(self.index.lookup_prefix("renamed")[0]["id"], "id-1")
+
+
+class TestDirectorySync(unittest.TestCase):
+    """Tests for DirectorySync against a stand-in delta endpoint."""
+
+    def test_full_then_incremental_sync(self):
+        server = FakeDeltaServer([make_user(i) for i in range(5)])
+        sync = DirectorySync(server, attributes=["id", "displayName", "mail"])
+
+        first = asyncio.run(sync.sync_once())
+        self.assertEqual(first, {"full": 1, "upserted": 5, "removed": 0, "users": 5})
+        self.assertTrue(sync.ready)
+        self.assertEqual(len(server.requested), 3)
+        self.assertTrue(server.requested[0].startswith("/users/delta?$select=id,"))
+
+        server.record({"id": "id-0", "@removed": {"reason": "changed"}})
+        server.record(make_user(7))
+        server.requested.clear()
+        second = asyncio.run(sync.sync_once())
+
+        self.assertEqual(second, {"full": 0, "upserted": 1, "removed": 1, "users": 5})
+        self.assertEqual(server.requested, ["delta:0"])
+        self.assertEqual(sync.delta_link, "delta:2")
+        self.assertIsNone(sync.index.lookup_exact("id-0"))
+        self.assertNotIn("jobTitle", sync.index.lookup_exact("id-7"))
+
+    def test_expired_delta_link_triggers_full_sync(self):
+        server = FakeDeltaServer([make_user(i) for i in range(3)])
+        sync = DirectorySync(server)
+        asyncio.run(sync.sync_once())
+
+        server.expired.add(sync.delta_link)
+        result = asyncio.run(sync.sync_once())
+
+        self.assertEqual(result["full"], 1)
+        self.assertEqual(sync.full_syncs, 2)
+        self.assertEqual(len(sync.index), 3)
+
+    def test_persisted_index_resumes_from_delta_link(self):
+        server = FakeDeltaServer([make_user(i) for i in range(3)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.json")
+            asyncio.run(DirectorySync(server, persist_path=path).sync_once())
+
+            server.record(make_user(4))
+            server.requested.clear()
+            restored = DirectorySync(server, persist_path=path)
+            self.assertTrue(restored.ready)
+            self.assertEqual(len(restored.index), 3)
+
+            result = asyncio.run(restored.sync_once())
+
+        self.assertEqual(result["full"], 0)
+        self.assertEqual(server.requested, ["delta:0"])
+        self.assertEqual(len(restored.index), 4)
+
+    def test_wait_ready_times_out(self):
+        async def never(url):
+            await asyncio.sleep(60)
+
+        sync = DirectorySync(never)
+
+        async def scenario():
+            sync.ensure_started()
+            try:
+                return await sync.wait_ready(0.05)
+            finally:
+                await sync.stop()
+
+        self.assertFalse(asyncio.run(scenario()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Unit tests for common.graph_cache module."""
+
+import os
+import sys
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.graph_cache import GraphResponseCache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestGraphResponseCache(unittest.TestCase):
+    """Tests for GraphResponseCache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = GraphResponseCache(ttl_seconds=60, max_entries=2, clock=self.clock)
+
+    def test_hit_within_ttl(self):
+        """Entries are returned as fresh hits until the TTL passes."""
+        self.assertIsNone(self.cache.lookup("a"))
+        self.cache.store("a", {"id": "1"})
+
+        entry = self.cache.lookup("a")
+        self.assertEqual(entry.body, {"id": "1"})
+        self.assertTrue(self.cache.is_fresh(entry))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_expired_without_etag_is_dropped(self):
+        """Expired entries without an ETag cannot be revalidated."""
+        self.cache.store("a", {"id": "1"})
+        self.clock.now += 61
+
+        self.assertIsNone(self.cache.lookup("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_expired_with_etag_can_be_revalidated(self):
+        """Expired entries with an ETag are kept for a conditional request."""
+        self.cache.store("a", {"id": "1"}, etag='W/"1"')
+        self.clock.now += 61
+
+        entry = self.cache.lookup("a")
+        self.assertFalse(self.cache.is_fresh(entry))
+        self.assertEqual(entry.etag, 'W/"1"')
+
+        self.cache.refresh("a", entry)
+        self.assertTrue(self.cache.is_fresh(self.cache.lookup("a")))
+        self.assertEqual(self.cache.stats()["revalidated"], 1)
+
+    def test_bounded_lru(self):
+        """The least recently used entry is evicted beyond max_entries."""
+        self.cache.store("a", {})
+        self.cache.store("b", {})
+        self.cache.lookup("a")
+        self.cache.store("c", {})
+
+        self.assertIsNone(self.cache.lookup("b"))
+        self.assertIsNotNone(self.cache.lookup("a"))
+        self.assertEqual(self.cache.stats()["evicted"], 1)
+
+    def test_disabled_with_zero_ttl(self):
+        """A TTL of zero disables caching."""
+        cache = GraphResponseCache(ttl_seconds=0)
+        cache.store("a", {"id": "1"})
+        self.assertIsNone(cache.lookup("a"))
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Unit tests for common.graph_client module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common import graph_client
+from common.graph_client import (
+    RequestScopedCredential,
+    get_graph_credential,
+    get_graph_service_client,
+    open_graph_connection,
+    use_graph_credential,
+)
+
+
+class TestRequestScopedCredential(unittest.TestCase):
+    """Tests for per-request credential injection."""
+
+    def test_delegates_to_current_credential(self):
+        """Test get_token is served by the credential set for the request."""
+        credential = MagicMock()
+        credential.get_token.return_value = "token"
+
+        with use_graph_credential(credential):
+            result = RequestScopedCredential().get_token(
+                "https://graph.microsoft.com/.default", enable_cae=True
+            )
+
+        self.assertEqual(result, "token")
+        credential.get_token.assert_called_once_with(
+            "https://graph.microsoft.com/.default"
+        )
+
+    def test_raises_without_credential(self):
+        """Test using the shared client outside a request fails clearly."""
+        with self.assertRaises(RuntimeError) as context:
+            RequestScopedCredential().get_token("scope")
+        self.assertIn("graph_credential_not_set", str(context.exception))
+
+    def test_credentials_are_isolated_between_tasks(self):
+        """Test concurrent tasks each see their own credential."""
+        shared = RequestScopedCredential()
+
+        async def call(name):
+            credential = MagicMock()
+            credential.get_token.return_value = name
+            with use_graph_credential(credential):
+                await asyncio.sleep(0)
+                return shared.get_token("scope")
+
+        async def run():
+            return await asyncio.gather(call("alice"), call("bob"))
+
+        self.assertEqual(asyncio.run(run()), ["alice", "bob"])
+
+
+class TestSharedGraphClient(unittest.TestCase):
+    """Tests for the shared Graph client stack."""
+
+    def test_client_built_once_per_event_loop(self):
+        """Test repeated calls reuse the adapter and HTTP client."""
+
+        async def get_twice():
+            return get_graph_service_client(), get_graph_service_client()
+
+        before = graph_client.stats["clients_created"]
+        first, second = asyncio.run(get_twice())
+
+        self.assertIs(first, second)
+        self.assertIs(first.request_adapter, second.request_adapter)
+        self.assertEqual(graph_client.stats["clients_created"], before + 1)
+
+    def test_open_graph_connection_uses_shared_http_client(self):
+        """The warm-up request goes through the HTTP client the adapter sends with."""
+
+        async def open_connection():
+            stack = graph_client._get_graph_stack()
+            with patch.object(
+                stack.http_client,
+                "request",
+                AsyncMock(return_value=MagicMock(status_code=401)),
+            ) as request:
+                status = await open_graph_connection()
+            return stack, request, status
+
+        stack, request, status = asyncio.run(open_connection())
+
+        self.assertEqual(status, 401)
+        self.assertEqual(request.call_args.args[0], "HEAD")
+        self.assertIs(stack.client.request_adapter._http_client, stack.http_client)
+
+    @patch("common.graph_client.build_obo_credential")
+    def test_graph_credential_cached_per_identity(self, mock_build_obo):
+        """Test OBO credentials are reused per identity with refreshed tokens."""
+        mock_build_obo.side_effect = lambda *args: MagicMock()
+
+        first = get_graph_credential("token-1", ("tid", "oid-cache-test"))
+        second = get_graph_credential("token-2", ("tid", "oid-cache-test"))
+
+        self.assertIs(first, second)
+        mock_build_obo.assert_called_once_with(
+            "token-1", "https://graph.microsoft.com/.default"
+        )
+        second.update_user_assertion.assert_called_with("token-2")
+
+
+class TestSendGraphRequest(unittest.TestCase):
+    """Tests for the raw request helper."""
+
+    @patch("common.graph_client.get_graph_service_client")
+    def test_builds_request_on_shared_adapter(self, mock_get_client):
+        """Relative paths are resolved against the adapter base URL."""
+        adapter = MagicMock()
+        adapter.base_url = "https://graph.microsoft.com/v1.0"
+        raw_response = httpx.Response(200)
+        adapter.send_primitive_async = AsyncMock(return_value=raw_response)
+        mock_get_client.return_value.request_adapter = adapter
+
+        result = asyncio.run(
+            graph_client.send_graph_request(
+                "post", "/$batch", content=b"{}", headers={"If-None-Match": "x"}
+            )
+        )
+
+        self.assertIs(result, raw_response)
+        request_info, response_type, _ = adapter.send_primitive_async.await_args.args
+        self.assertEqual(response_type, "bytes")
+        self.assertEqual(request_info.url, "https://graph.microsoft.com/v1.0/$batch")
+        self.assertEqual(request_info.http_method.value, "POST")
+        self.assertEqual(request_info.content, b"{}")
+        self.assertEqual(request_info.headers.get("if-none-match"), {"x"})
+        # Throttling retries are left to the scheduler, not the Kiota middleware
+        retry_option = request_info.request_options["RetryHandlerOption"]
+        self.assertFalse(retry_option.should_retry)
+
+    def test_graph_response_json_raises_graph_error(self):
+        """Error responses surface the Graph error code."""
+        response = httpx.Response(
+            404, json={"error": {"code": "Request_ResourceNotFound", "message": "x"}}
+        )
+        with self.assertRaises(RuntimeError) as ctx:
+            graph_client.graph_response_json(response)
+        self.assertIn("status=404 code=Request_ResourceNotFound", str(ctx.exception))
+
+        ok = httpx.Response(200, json={"id": "1"})
+        self.assertEqual(graph_client.graph_response_json(ok), {"id": "1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
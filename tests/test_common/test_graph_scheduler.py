@@ -0,0 +1,215 @@
+"""Unit tests for common.graph_scheduler module."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+import httpx
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.graph_scheduler import (  # noqa: E402
+    GraphScheduler,
+    graph_resource,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Virtual clock advanced by the fake sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestHelpers(unittest.TestCase):
+    """Tests for Retry-After parsing and resource extraction."""
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertEqual(parse_retry_after(None), 2.0)
+        self.assertEqual(parse_retry_after("garbage"), 2.0)
+        self.assertEqual(
+            parse_retry_after("Thu, 01 Jan 1970 00:00:10 GMT", now=4.0), 6.0
+        )
+
+    def test_graph_resource(self):
+        self.assertEqual(graph_resource("/me?$select=id"), "me")
+        self.assertEqual(graph_resource("/users/abc/memberOf"), "users")
+        self.assertEqual(
+            graph_resource("https://graph.microsoft.com/v1.0/groups?$top=5"), "groups"
+        )
+
+
+class TestGraphScheduler(unittest.TestCase):
+    """Tests for GraphScheduler."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def _scheduler(self, **kwargs):
+        return GraphScheduler(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_retries_after_retry_after(self):
+        """A 429 is retried after its Retry-After and the response returned."""
+        scheduler = self._scheduler()
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "3"}),
+            httpx.Response(200),
+        ]
+
+        async def send():
+            return responses.pop(0)
+
+        result = asyncio.run(scheduler.run("t", "u", "me", send))
+
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(self.clock.sleeps, [3.0])
+        self.assertEqual(scheduler.stats()["throttled"], 1)
+        self.assertEqual(scheduler.stats()["requests"], 2)
+
+    def test_backoff_shared_per_tenant_and_resource(self):
+        """Other users of the same tenant wait; other tenants do not."""
+        scheduler = self._scheduler()
+
+        async def throttled():
+            return httpx.Response(429, headers={"Retry-After": "5"})
+
+        async def ok():
+            return httpx.Response(200)
+
+        async def scenario():
+            scheduler.max_wait_seconds = 1.0
+            with self.assertRaises(RuntimeError):
+                await scheduler.run("t1", "u1", "me", throttled)
+            await scheduler.run("t2", "u3", "me", ok)
+            self.assertEqual(self.clock.sleeps, [])
+            scheduler.max_wait_seconds = 30.0
+            await scheduler.run("t1", "u2", "me", ok)
+
+        asyncio.run(scenario())
+        self.assertEqual(self.clock.sleeps, [5.0])
+
+    def test_rejects_beyond_max_wait(self):
+        """Waits longer than max_wait_seconds fail fast with graph_throttled."""
+        scheduler = self._scheduler(max_wait_seconds=10)
+
+        async def send():
+            return httpx.Response(429, headers={"Retry-After": "60"})
+
+        with self.assertRaises(RuntimeError) as ctx:
+            asyncio.run(scheduler.run("t", "u", "me", send))
+
+        self.assertIn("graph_throttled", str(ctx.exception))
+        self.assertEqual(self.clock.sleeps, [])
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_repeated_zero_retry_after_is_bounded(self):
+        """Retry-After: 0 is retried with a minimum delay and a bounded attempt count."""
+        scheduler = self._scheduler(max_attempts=4)
+        calls = []
+
+        async def send():
+            calls.append(self.clock.now)
+            return httpx.Response(429, headers={"Retry-After": "0"})
+
+        with self.assertRaises(RuntimeError) as ctx:
+            asyncio.run(scheduler.run("t", "u", "me", send))
+
+        self.assertIn("graph_throttled", str(ctx.exception))
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5, 0.5])
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_zero_retry_after_stops_at_deadline(self):
+        """Retries stop once max_wait_seconds has elapsed."""
+        scheduler = self._scheduler(max_wait_seconds=1, max_attempts=100)
+        calls = []
+
+        async def send():
+            calls.append(self.clock.now)
+            return httpx.Response(503, headers={"Retry-After": "0"})
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(scheduler.run("t", "u", "me", send))
+
+        self.assertEqual(calls, [0.0, 0.5, 1.0])
+
+    def test_fair_share_across_users(self):
+        """Freed slots alternate between waiting users instead of FIFO."""
+        order = []
+
+        async def scenario():
+            scheduler = GraphScheduler(max_concurrency=1, per_user_concurrency=1)
+            gate = asyncio.Event()
+
+            def make_send(label):
+                async def send():
+                    order.append(label)
+                    await gate.wait()
+                    return httpx.Response(200)
+
+                return send
+
+            tasks = [
+                asyncio.create_task(scheduler.run("t", user, "me", make_send(label)))
+                for user, label in [
+                    ("a", "a1"),
+                    ("a", "a2"),
+                    ("a", "a3"),
+                    ("b", "b1"),
+                    ("b", "b2"),
+                ]
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.stats()["queued"], 4)
+            gate.set()
+            await asyncio.gather(*tasks)
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+
+        self.assertEqual(order, ["a1", "b1", "a2", "b2", "a3"])
+        self.assertEqual(scheduler.stats()["active"], 0)
+        self.assertEqual(scheduler.stats()["queued"], 0)
+
+    def test_queue_wait_deadline(self):
+        """Requests queued longer than max_wait_seconds are rejected."""
+
+        async def scenario():
+            scheduler = GraphScheduler(max_concurrency=1, max_wait_seconds=0.05)
+            gate = asyncio.Event()
+
+            async def slow():
+                await gate.wait()
+                return httpx.Response(200)
+
+            async def fast():
+                return httpx.Response(200)
+
+            first = asyncio.create_task(scheduler.run("t", "a", "me", slow))
+            await asyncio.sleep(0)
+            with self.assertRaises(RuntimeError):
+                await scheduler.run("t", "b", "me", fast)
+            gate.set()
+            await first
+            return scheduler
+
+        scheduler = asyncio.run(scenario())
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+        self.assertEqual(scheduler.stats()["active"], 0)
+        self.assertGreater(scheduler.stats()["queue_wait_seconds_max"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
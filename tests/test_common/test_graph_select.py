@@ -0,0 +1,48 @@
+"""Unit tests for common.graph_select module."""
+
+import os
+import sys
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.graph_select import parse_user_select, user_select_fields  # noqa: E402
+
+
+class TestUserSelectFields(unittest.TestCase):
+    """Tests for the User field set derived from the kiota model."""
+
+    def test_contains_user_and_inherited_fields(self):
+        fields = user_select_fields()
+        for name in ("id", "displayName", "mail", "userPrincipalName", "officeLocation"):
+            self.assertEqual(fields[name.lower()], name)
+        self.assertNotIn("@odata.type", fields)
+        self.assertIs(user_select_fields(), fields)
+
+
+class TestParseUserSelect(unittest.TestCase):
+    """Tests for parse_user_select."""
+
+    def test_canonicalizes_spelling_order_and_duplicates(self):
+        self.assertEqual(
+            parse_user_select(" Mail , DISPLAYNAME,mail,, id"),
+            ("displayName", "id", "mail"),
+        )
+        self.assertEqual(parse_user_select(""), ())
+
+    def test_equivalent_strings_share_one_tuple(self):
+        self.assertIs(parse_user_select("mail,id"), parse_user_select("id, mail"))
+
+    def test_unknown_fields_rejected_with_suggestion(self):
+        with self.assertRaises(ValueError) as ctx:
+            parse_user_select("id,mial,favoriteColor")
+
+        message = str(ctx.exception)
+        self.assertTrue(message.startswith("invalid_select_fields:"))
+        self.assertIn("mial (did you mean mail?)", message)
+        self.assertIn("favoriteColor", message)
+
+
+if __name__ == "__main__":
+    unittest.main()
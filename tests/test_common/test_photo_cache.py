@@ -0,0 +1,116 @@
+"""Unit tests for common.photo_cache module."""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from unittest.mock import patch  # noqa: E402
+
+from common.photo_cache import PhotoCache  # noqa: E402
+
+
+class TestPhotoCache(unittest.TestCase):
+    """Tests for PhotoCache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = os.path.join(self.tmp.name, "photos")
+
+    def _files(self):
+        return sorted(os.listdir(self.dir))
+
+    def test_store_and_read_round_trip(self):
+        cache = PhotoCache(self.dir, max_bytes=100)
+        key = (("t", "u"), "96x96", "etag-1")
+
+        self.assertIsNone(cache.read(key))
+        self.assertTrue(cache.store(key, "image/jpeg", b"jpeg-bytes"))
+
+        self.assertEqual(cache.read(key), (b"jpeg-bytes", "image/jpeg"))
+        self.assertEqual(len(self._files()), 2)
+        self.assertTrue(self._files()[0].endswith(".jpg"))
+        self.assertTrue(self._files()[1].endswith(".jpg.meta.json"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["bytes"], 10)
+
+    def test_new_etag_replaces_old_version(self):
+        cache = PhotoCache(self.dir, max_bytes=100)
+        cache.store((("t", "u"), "", "v1"), "image/jpeg", b"old")
+        cache.store((("t", "u"), "", "v2"), "image/jpeg", b"newer")
+
+        self.assertIsNone(cache.read((("t", "u"), "", "v1")))
+        self.assertEqual(len(self._files()), 2)
+        self.assertEqual(cache.stats()["bytes"], 5)
+
+    def test_restoring_same_key_keeps_file(self):
+        cache = PhotoCache(self.dir, max_bytes=100)
+        key = (("t", "u"), "", "v1")
+        cache.store(key, "image/png", b"abc")
+        cache.store(key, "image/png", b"abcd")
+
+        self.assertEqual(cache.read(key), (b"abcd", "image/png"))
+        self.assertEqual(cache.stats()["bytes"], 4)
+
+    def test_lru_byte_budget(self):
+        cache = PhotoCache(self.dir, max_bytes=10)
+        cache.store((("t", "a"), "", "1"), "image/jpeg", b"aaaa")
+        cache.store((("t", "b"), "", "1"), "image/jpeg", b"bbbb")
+        cache.read((("t", "a"), "", "1"))
+        cache.store((("t", "c"), "", "1"), "image/jpeg", b"cccc")
+
+        self.assertIsNone(cache.read((("t", "b"), "", "1")))
+        self.assertIsNotNone(cache.read((("t", "a"), "", "1")))
+        self.assertEqual(cache.stats()["evicted"], 1)
+        self.assertEqual(len(self._files()), 4)
+
+    def test_oversized_photo_not_cached(self):
+        cache = PhotoCache(self.dir, max_bytes=5)
+        self.assertFalse(cache.store((("t", "u"), "", "1"), "image/jpeg", b"x" * 20))
+        self.assertFalse(os.path.exists(self.dir))
+
+    def test_index_restored_after_restart(self):
+        key = (("t", "u"), "96x96", "etag-1")
+        PhotoCache(self.dir, max_bytes=100).store(key, "image/png", b"png-bytes")
+
+        cache = PhotoCache(self.dir, max_bytes=100)
+
+        self.assertEqual(cache.read(key), (b"png-bytes", "image/png"))
+        self.assertEqual(cache.stats()["bytes"], 9)
+        # 再起動後も新しい ETag の保存で古いファイルを置き換える
+        cache.store((("t", "u"), "96x96", "etag-2"), "image/png", b"new")
+        self.assertIsNone(cache.read(key))
+        self.assertEqual(len(self._files()), 2)
+
+    def test_orphans_removed_but_other_files_kept(self):
+        os.makedirs(self.dir)
+        orphan = os.path.join(self.dir, "a" * 64 + ".jpg")
+        stale_meta = os.path.join(self.dir, "b" * 64 + ".jpg.meta.json")
+        partial = os.path.join(self.dir, ".photo-123.tmp")
+        unrelated = os.path.join(self.dir, "avatar.jpg")
+        for path in (orphan, stale_meta, partial, unrelated):
+            with open(path, "wb") as f:
+                f.write(b"x")
+
+        cache = PhotoCache(self.dir)
+
+        self.assertEqual(self._files(), ["avatar.jpg"])
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_remove_failure_does_not_raise(self):
+        cache = PhotoCache(self.dir, max_bytes=100)
+        cache.store((("t", "u"), "", "v1"), "image/jpeg", b"old")
+
+        with patch("common.photo_cache.os.remove", side_effect=PermissionError("busy")):
+            with self.assertLogs("common.photo_cache", level="WARNING"):
+                self.assertTrue(cache.store((("t", "u"), "", "v2"), "image/jpeg", b"new"))
+
+        self.assertEqual(cache.read((("t", "u"), "", "v2")), (b"new", "image/jpeg"))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
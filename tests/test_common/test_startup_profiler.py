@@ -0,0 +1,134 @@
+"""Unit tests for common.startup_profiler module."""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from itertools import count
+from unittest.mock import patch
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.startup_profiler import (  # noqa: E402
+    StartupProfiler,
+    format_report,
+    start_startup_profiler,
+)
+
+
+class TestStartupProfiler(unittest.TestCase):
+    """Tests for StartupProfiler."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        sys.path.insert(0, self.temp_dir.name)
+        self.addCleanup(sys.path.remove, self.temp_dir.name)
+        importlib.invalidate_caches()
+
+    def write_module(self, name, source):
+        with open(
+            os.path.join(self.temp_dir.name, f"{name}.py"), "w", encoding="utf-8"
+        ) as f:
+            f.write(source)
+        self.addCleanup(sys.modules.pop, name, None)
+
+    def test_phases_sorted_by_duration(self):
+        ticks = iter([0.0, 1.0, 1.5, 4.5, 5.0])
+        profiler = StartupProfiler(clock=lambda: next(ticks))
+
+        profiler.mark("settings")
+        profiler.mark("logging")
+        profiler.mark("auth_provider")
+        report = profiler.finish()
+
+        self.assertEqual(
+            [(phase["name"], phase["seconds"]) for phase in report["phases"]],
+            [("auth_provider", 3.0), ("settings", 1.0), ("logging", 0.5)],
+        )
+        self.assertEqual(report["total_seconds"], 5.0)
+        self.assertIn("auth_provider", format_report(report))
+
+    def test_records_self_and_cumulative_import_time(self):
+        self.write_module("profiled_child", "VALUE = 1\n")
+        self.write_module("profiled_parent", "import profiled_child\n")
+        clock = count()
+        profiler = StartupProfiler(clock=lambda: float(next(clock))).start()
+        try:
+            module = importlib.import_module("profiled_parent")
+        finally:
+            profiler.stop()
+
+        report = profiler.report()
+        imports = {entry["module"]: entry for entry in report["imports"]}
+        parent, child = imports["profiled_parent"], imports["profiled_child"]
+        self.assertEqual(
+            parent["cumulative_seconds"],
+            parent["self_seconds"] + child["cumulative_seconds"],
+        )
+        self.assertGreater(parent["self_seconds"], 0)
+        # import 後のモジュールからは元のローダーが見える
+        self.assertIs(module.__loader__, module.__spec__.loader)
+        self.assertNotIn("Timed", type(module.__loader__).__name__)
+        self.assertEqual(sys.modules["profiled_child"].VALUE, 1)
+
+    def test_finish_removes_finder_and_writes_json(self):
+        path = os.path.join(self.temp_dir.name, "profile.json")
+        profiler = StartupProfiler(output_path=path).start()
+        finder_count = len(sys.meta_path)
+        self.write_module("profiled_after", "VALUE = 2\n")
+
+        with self.assertLogs("common.startup_profiler", level="INFO"):
+            report = profiler.finish()
+        importlib.import_module("profiled_after")
+
+        self.assertEqual(len(sys.meta_path), finder_count - 1)
+        self.assertNotIn("profiled_after", profiler.imports)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), report)
+
+    def test_disabled_profiler_records_nothing(self):
+        finders = list(sys.meta_path)
+        with patch.dict(os.environ, {"STARTUP_PROFILE": "false"}):
+            profiler = start_startup_profiler()
+        profiler.mark("settings")
+
+        self.assertEqual(sys.meta_path, finders)
+        self.assertEqual(profiler.phases, [])
+        self.assertIsNone(profiler.finish())
+
+    def test_reads_switch_without_importing_settings(self):
+        path = os.path.join(self.temp_dir.name, "env_profile.json")
+        env = {"STARTUP_PROFILE": "true", "STARTUP_PROFILE_PATH": path}
+        with patch.dict(os.environ, env):
+            profiler = start_startup_profiler()
+        try:
+            self.assertTrue(profiler.enabled)
+            self.assertEqual(profiler.output_path, path)
+        finally:
+            profiler.stop()
+
+    def test_import_does_not_load_settings(self):
+        """Importing the profiler leaves common.config to be measured."""
+        src = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; import common.startup_profiler; "
+                "print('common.config' in sys.modules)",
+            ],
+            cwd=src,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Unit tests for common.tool_loader module."""
+
+import asyncio
+import os
+import sys
+import textwrap
+import unittest
+from unittest.mock import patch
+
+from fastmcp import FastMCP
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from common import tool_loader  # noqa: E402
+from common.tool_loader import (  # noqa: E402
+    describe_tool_module,
+    import_tool_module,
+    register_lazy_tools,
+    track_lazy_module,
+)
+
+SOURCE = '''
+from typing import List, Optional
+from fastmcp import FastMCP
+from heavy.sdk import Client
+
+def register_tools(mcp: FastMCP) -> None:
+    """Register."""
+
+    async def helper():
+        return Client()
+
+    @mcp.tool()
+    async def first(name: str, tags: Optional[List[str]] = None, limit: int = 10) -> dict:
+        """First tool."""
+
+    @mcp.tool
+    def second() -> str:
+        """Second tool."""
+'''
+
+
+class TestDescribeToolModule(unittest.TestCase):
+    """Tests for describe_tool_module."""
+
+    def test_extracts_tools_without_import(self):
+        specs = describe_tool_module(SOURCE)
+
+        self.assertEqual([spec.name for spec in specs], ["first", "second"])
+        self.assertEqual(
+            str(specs[0].signature),
+            "(name: str, tags: Optional[List[str]] = None, limit: int = 10) -> dict",
+        )
+        self.assertEqual(specs[0].doc, "First tool.")
+        self.assertNotIn("heavy", sys.modules)
+
+    def test_modules_that_need_import(self):
+        cases = {
+            "decorator_arguments": '@mcp.tool(name="x")',
+            "other_decorator": "@other",
+        }
+        for name, decorator in cases.items():
+            with self.subTest(name=name):
+                source = SOURCE.replace("@mcp.tool\n", decorator + "\n")
+                self.assertIsNone(describe_tool_module(source))
+
+        sources = {
+            "heavy_annotation": SOURCE.replace("-> str:", "-> Client:"),
+            "computed_default": SOURCE.replace("limit: int = 10", "limit: int = 5 * 2"),
+            "other_statement": SOURCE.replace(
+                '"""Register."""', '"""Register."""\n    mcp.add_middleware(None)'
+            ),
+        }
+        for name, source in sources.items():
+            with self.subTest(name=name):
+                self.assertIsNone(describe_tool_module(source))
+
+        self.assertEqual(describe_tool_module("import os\n"), [])
+
+
+class TestLazyToolRegistration(unittest.TestCase):
+    """Tests for lazily registered tool modules."""
+
+    def test_lazy_tools_match_eager_registration(self):
+        """Every tool module registers the same names, schemas and descriptions."""
+        from tools import register_all_tools
+
+        lazy_mcp, eager_mcp = FastMCP("lazy"), FastMCP("eager")
+        register_all_tools(lazy_mcp, lazy=True)
+        register_all_tools(eager_mcp, lazy=False)
+        lazy = asyncio.run(lazy_mcp.get_tools())
+        eager = asyncio.run(eager_mcp.get_tools())
+
+        self.assertEqual(sorted(lazy), sorted(eager))
+        for name, tool in eager.items():
+            with self.subTest(tool=name):
+                self.assertEqual(lazy[name].parameters, tool.parameters)
+                self.assertEqual(lazy[name].output_schema, tool.output_schema)
+                self.assertEqual(lazy[name].description, tool.description)
+
+    def test_module_imported_on_first_call(self):
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "src", "tools")
+        with open(os.path.join(path, "userinfo.py"), encoding="utf-8") as f:
+            specs = describe_tool_module(f.read())
+        mcp = FastMCP("test-server")
+        module = register_lazy_tools(mcp, "tools.userinfo", specs)
+        self.assertFalse(module.loaded)
+
+        user = UserContext({"sub": "user", "tid": "tenant"})
+        with patch("tools.userinfo.get_current_user", return_value=user):
+            result = asyncio.run(
+                mcp._tool_manager.call_tool("get_user_info", {"fields": ["sub"]})
+            )
+
+        self.assertTrue(module.loaded)
+        self.assertEqual(result.structured_content, {"sub": "user"})
+
+    def test_import_tool_module_marks_lazy_module_loaded(self):
+        """Importing a tracked module directly goes through its LazyToolModule."""
+        path = os.path.join(os.path.dirname(__file__), "..", "..", "src", "tools")
+        with open(os.path.join(path, "userinfo.py"), encoding="utf-8") as f:
+            specs = describe_tool_module(f.read())
+        module = register_lazy_tools(FastMCP("test-server"), "tools.userinfo", specs)
+        with patch.object(tool_loader, "_lazy_modules", []):
+            track_lazy_module(module)
+            imported = import_tool_module("tools.userinfo")
+            pending = tool_loader.pending_tool_modules()
+
+        self.assertTrue(module.loaded)
+        self.assertEqual(pending, [])
+        self.assertTrue(hasattr(imported, "register_tools"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Unit tests for common.ttl_cache module."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.ttl_cache import TTLCache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+    """Tests for TTLCache."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_entries_expire_after_ttl(self):
+        """Values are hits until the TTL passes, then misses."""
+        cache = TTLCache(ttl_seconds=60, clock=self.clock)
+        cache.put("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now += 61
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_explicit_expiry(self):
+        """An explicit expires_at overrides the TTL."""
+        cache = TTLCache(ttl_seconds=60, clock=self.clock)
+        cache.put("a", 1, expires_at=self.clock.now + 5)
+
+        self.clock.now += 6
+        self.assertIsNone(cache.get("a"))
+
+    def test_bounded_lru(self):
+        """The least recently used entry is evicted and returned."""
+        cache = TTLCache(ttl_seconds=60, max_entries=2, clock=self.clock)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        self.assertEqual(cache.put("c", 3), [2])
+        self.assertIsNone(cache.peek("b"))
+        self.assertEqual(cache.peek("a"), 1)
+        self.assertEqual(cache.stats()["evicted"], 1)
+
+    def test_sliding_expiry(self):
+        """With sliding=True each hit extends the expiry."""
+        cache = TTLCache(ttl_seconds=60, sliding=True, clock=self.clock)
+        cache.put("a", 1)
+
+        self.clock.now += 50
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now += 50
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now += 61
+        self.assertEqual(cache.expire(), [1])
+
+    def test_pinned_values_survive_expiry_and_overflow(self):
+        """Pinned values are neither expired nor evicted."""
+        pinned = {"a"}
+        cache = TTLCache(
+            ttl_seconds=60, max_entries=1, pinned=pinned.__contains__, clock=self.clock
+        )
+        cache.put("a", "a")
+
+        self.assertEqual(cache.put("b", "b"), ["b"])
+        self.clock.now += 61
+        self.assertEqual(cache.expire(), [])
+        self.assertEqual(cache.get("a"), "a")
+
+        pinned.clear()
+        self.clock.now += 61
+        self.assertEqual(cache.expire(), ["a"])
+
+    def test_keep_stale(self):
+        """Expired entries are returned when keep_stale allows it."""
+        cache = TTLCache(ttl_seconds=60, clock=self.clock)
+        cache.put("a", 1)
+        self.clock.now += 61
+
+        entry = cache.lookup("a", keep_stale=lambda value: True)
+        self.assertEqual(entry.value, 1)
+        self.assertFalse(cache.is_fresh(entry))
+        self.assertIsNone(cache.lookup("a"))
+
+    def test_zero_ttl_disables_cache(self):
+        """A TTL of 0 stores nothing."""
+        cache = TTLCache(ttl_seconds=0, clock=self.clock)
+        cache.put("a", 1)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestTTLCacheGetOrLoad(unittest.IsolatedAsyncioTestCase):
+    """Tests for TTLCache.get_or_load."""
+
+    async def test_concurrent_misses_share_one_load(self):
+        cache = TTLCache(ttl_seconds=60)
+        calls = []
+        release = asyncio.Event()
+
+        async def load():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        pending = [asyncio.create_task(cache.get_or_load("a", load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*pending), ["value"] * 3)
+        self.assertEqual(await cache.get_or_load("a", load), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()["coalesced"], 2)
+
+    async def test_failures_are_not_cached(self):
+        cache = TTLCache(ttl_seconds=60)
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def working():
+            return "value"
+
+        with self.assertRaises(RuntimeError):
+            await cache.get_or_load("a", failing)
+        self.assertEqual(await cache.get_or_load("a", working), "value")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,7 @@ import unittest
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
-from common.utils import parse_scopes
+from common.utils import canonicalize_select, parse_scopes
 
 
 class TestParseScopes(unittest.TestCase):
@@ -54,23 +54,25 @@ class TestParseScopes(unittest.TestCase):
         self.assertEqual(result, ["a.scope", "m.scope", "z.scope"])
 
 
-# Note: graph_serialize_model requires Microsoft Graph models which are complex to mock
-# In a real scenario, integration tests would be more appropriate for that function
-# However, we can add a basic test structure:
+class TestCanonicalizeSelect(unittest.TestCase):
+    """Tests for canonicalize_select function."""
 
+    def test_order_and_whitespace_do_not_matter(self):
+        """Equivalent select strings produce the same tuple."""
+        self.assertEqual(canonicalize_select("mail,id"), ("id", "mail"))
+        self.assertEqual(canonicalize_select(" id , mail ,"), ("id", "mail"))
 
-class TestGraphSerializeModel(unittest.TestCase):
-    """Tests for graph_serialize_model function."""
+    def test_duplicates_removed_case_insensitively(self):
+        """Duplicates are removed keeping the first spelling."""
+        self.assertEqual(
+            canonicalize_select("displayName,mail,DisplayName"),
+            ("displayName", "mail"),
+        )
 
-    def test_graph_serialize_model_placeholder(self):
-        """Placeholder test for graph_serialize_model.
-
-        This function requires Microsoft Graph SDK models, which would need
-        integration testing with actual Graph objects. Consider adding
-        integration tests separately.
-        """
-        # This test serves as a reminder to add integration tests
-        self.assertTrue(True)
+    def test_empty(self):
+        """Empty input produces an empty tuple."""
+        self.assertEqual(canonicalize_select(""), ())
+        self.assertEqual(canonicalize_select(None), ())
 
 
 if __name__ == "__main__":
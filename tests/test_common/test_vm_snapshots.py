@@ -0,0 +1,97 @@
+"""Unit tests for common.vm_snapshots module."""
+
+import os
+import sys
+import unittest
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.vm_snapshots import VmSnapshotStore, record_digest
+
+
+def _vm(name, **extra):
+    record = {"id": f"/subscriptions/s/vm/{name}", "name": name, "tags": {}}
+    record.update(extra)
+    return record
+
+
+class TestVmSnapshotStore(unittest.TestCase):
+    """Tests for VmSnapshotStore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.store = VmSnapshotStore(max_keys=2)
+        self.key = ("user-1", "sub-1")
+
+    def test_first_call_returns_full_snapshot(self):
+        """Test the first call without a token returns every VM as added."""
+        result = self.store.diff(self.key, [_vm("a"), _vm("b")])
+
+        self.assertTrue(result["full"])
+        self.assertEqual(len(result["added"]), 2)
+        self.assertEqual(result["removed"], [])
+        self.assertTrue(result["snapshot_token"])
+
+    def test_diff_reports_added_changed_removed(self):
+        """Test deltas against a previous snapshot token."""
+        first = self.store.diff(self.key, [_vm("a"), _vm("b"), _vm("c")])
+
+        second = self.store.diff(
+            self.key,
+            [_vm("a"), _vm("b", tags={"env": "prod"}), _vm("d")],
+            first["snapshot_token"],
+        )
+
+        self.assertFalse(second["full"])
+        self.assertEqual([r["name"] for r in second["added"]], ["d"])
+        self.assertEqual([r["name"] for r in second["changed"]], ["b"])
+        self.assertEqual(second["removed"], ["/subscriptions/s/vm/c"])
+        self.assertEqual(second["unchanged_count"], 1)
+
+    def test_unchanged_inventory_keeps_token(self):
+        """Test steady-state polling yields an empty delta and a stable token."""
+        first = self.store.diff(self.key, [_vm("a"), _vm("b")])
+        second = self.store.diff(
+            self.key, [_vm("b"), _vm("a")], first["snapshot_token"]
+        )
+
+        self.assertEqual(second["snapshot_token"], first["snapshot_token"])
+        self.assertEqual(second["added"], [])
+        self.assertEqual(second["changed"], [])
+        self.assertEqual(second["removed"], [])
+
+    def test_unknown_token_falls_back_to_full(self):
+        """Test an unknown token yields a full snapshot."""
+        self.store.diff(self.key, [_vm("a")])
+        result = self.store.diff(self.key, [_vm("a")], "unknown-token")
+        self.assertTrue(result["full"])
+
+    def test_tokens_are_scoped_per_key(self):
+        """Test a token from another user/subscription is not honoured."""
+        first = self.store.diff(("user-1", "sub-1"), [_vm("a")])
+        result = self.store.diff(
+            ("user-2", "sub-1"), [_vm("a")], first["snapshot_token"]
+        )
+        self.assertTrue(result["full"])
+
+    def test_lru_eviction_of_keys(self):
+        """Test the store is bounded by max_keys."""
+        token = self.store.diff(("u", "1"), [_vm("a")])["snapshot_token"]
+        self.store.diff(("u", "2"), [_vm("a")])
+        self.store.diff(("u", "3"), [_vm("a")])
+
+        self.assertEqual(len(self.store), 2)
+        self.assertTrue(self.store.diff(("u", "1"), [_vm("a")], token)["full"])
+
+    def test_record_digest_is_order_independent(self):
+        """Test digests ignore dict key order."""
+        self.assertEqual(
+            record_digest({"a": 1, "b": {"x": 1, "y": 2}}),
+            record_digest({"b": {"y": 2, "x": 1}, "a": 1}),
+        )
+        self.assertEqual(len(record_digest({"a": 1})), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Unit tests for common.warmup module."""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from fastmcp import Client, FastMCP
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from common.config import Settings  # noqa: E402
+from common.warmup import Warmup, add_default_tasks  # noqa: E402
+
+
+class TestWarmup(unittest.IsolatedAsyncioTestCase):
+    """Tests for Warmup."""
+
+    async def test_runs_tasks_concurrently_and_becomes_ready(self):
+        warmup = Warmup(deadline_seconds=5)
+        threads = []
+        loop_event = asyncio.Event()
+
+        def blocking():
+            threads.append(threading.current_thread())
+
+        async def on_loop():
+            loop_event.set()
+
+        def failing():
+            raise RuntimeError("boom")
+
+        warmup.add("blocking", blocking)
+        warmup.add("on_loop", on_loop)
+        warmup.add("failing", failing)
+        self.assertFalse(warmup.ready)
+
+        with self.assertLogs("common.warmup", level="WARNING"):
+            await warmup.run()
+
+        self.assertTrue(warmup.ready)
+        self.assertIsNot(threads[0], threading.main_thread())
+        self.assertTrue(loop_event.is_set())
+        self.assertEqual(
+            warmup.status()["tasks"],
+            {"blocking": "ok", "on_loop": "ok", "failing": "failed"},
+        )
+
+    async def test_ready_after_deadline(self):
+        warmup = Warmup(deadline_seconds=0.05)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+
+        warmup.add("slow", slow)
+        with self.assertLogs("common.warmup", level="WARNING"):
+            await warmup.run()
+
+        self.assertTrue(warmup.ready)
+        self.assertEqual(warmup.status()["tasks"], {"slow": "timed_out"})
+
+        # 期限後に完了した処理は結果が更新される
+        release.set()
+        await asyncio.gather(*warmup._jobs)
+        self.assertEqual(warmup.status()["tasks"], {"slow": "ok"})
+
+    async def test_readiness_endpoint(self):
+        warmup = Warmup()
+        warmup.add("noop", lambda: None)
+
+        response = await warmup.readiness(MagicMock())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(json.loads(response.body)["status"], "starting")
+
+        await warmup.run()
+        response = await warmup.readiness(MagicMock())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body)["tasks"], {"noop": "ok"})
+
+    async def test_disabled_warmup_is_ready_without_running(self):
+        warmup = Warmup(enabled=False)
+        task = MagicMock()
+        warmup.add("never", task)
+
+        async with warmup.lifespan(FastMCP("test-server")):
+            pass
+
+        self.assertTrue(warmup.ready)
+        task.assert_not_called()
+
+    async def test_lifespan_runs_warmup_when_server_starts(self):
+        warmup = Warmup()
+        started = asyncio.Event()
+
+        async def mark_started():
+            started.set()
+
+        warmup.add("mark", mark_started)
+        mcp = FastMCP("test-server", lifespan=warmup.lifespan)
+
+        async with Client(mcp):
+            await asyncio.wait_for(started.wait(), timeout=5)
+
+        self.assertTrue(started.is_set())
+
+    def test_default_tasks(self):
+        provider = MagicMock()
+        cases = {
+            "without_secret": (
+                Settings(entra_app_client_secret="", tools_warmup_on_start=True),
+                ["jwks_keys", "tool_modules", "serializers", "company_payloads"],
+            ),
+            "with_secret": (
+                Settings(entra_app_client_secret="secret", tools_warmup_on_start=False),
+                [
+                    "jwks_keys",
+                    "serializers",
+                    "company_payloads",
+                    "entra_authority",
+                    "graph_connection",
+                ],
+            ),
+        }
+        for name, (settings, expected) in cases.items():
+            with self.subTest(name=name):
+                warmup = Warmup()
+                add_default_tasks(warmup, settings, provider)
+                self.assertEqual([task.name for task in warmup.tasks], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Unit tests for tools.azure_resource_graph module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastmcp import FastMCP
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from tools.azure_resource_graph import (
+    build_inventory_query,
+    build_projection,
+    query_resource_graph,
+)
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+class FakeResourceGraphSession:
+    """Local stand-in that serves canned Resource Graph pages by $skipToken."""
+
+    def __init__(self, rows, page_size=3, status_code=200):
+        self.rows = rows
+        self.page_size = page_size
+        self.status_code = status_code
+        self.requests = []
+
+    def post(self, url, params=None, json=None, headers=None, timeout=None):
+        self.requests.append(json)
+        if self.status_code != 200:
+            return FakeResponse({"error": {"code": "BadRequest"}}, self.status_code)
+
+        options = json["options"]
+        start = int(options.get("$skipToken") or 0)
+        top = min(options["$top"], self.page_size)
+        page = self.rows[start : start + top]
+        payload = {
+            "totalRecords": len(self.rows),
+            "count": len(page),
+            "data": page,
+            "resultTruncated": "false",
+        }
+        if start + top < len(self.rows):
+            payload["$skipToken"] = str(start + top)
+        return FakeResponse(payload)
+
+
+class TestResourceGraphQuery(unittest.TestCase):
+    """Tests for query_resource_graph paging behaviour."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.credential = MagicMock()
+        self.credential.get_token.return_value.token = "test-arm-token"
+        self.rows = [{"id": f"/subscriptions/s/vm{i}", "type": "vm"} for i in range(8)]
+
+    def test_follows_skip_token_until_exhausted(self):
+        """Test all pages are collected when under the result cap."""
+        session = FakeResourceGraphSession(self.rows, page_size=3)
+
+        result = query_resource_graph(
+            self.credential, "Resources", ["sub-a", "sub-b"], session=session
+        )
+
+        self.assertEqual(result["count"], 8)
+        self.assertEqual(result["total_records"], 8)
+        self.assertIsNone(result["skip_token"])
+        self.assertFalse(result["truncated"])
+        self.assertEqual(len(session.requests), 3)
+        self.assertEqual(session.requests[0]["subscriptions"], ["sub-a", "sub-b"])
+        self.assertEqual(session.requests[1]["options"]["$skipToken"], "3")
+
+    def test_max_results_caps_rows_and_returns_continuation(self):
+        """Test the result cap limits $top and yields a resumable skip token."""
+        session = FakeResourceGraphSession(self.rows, page_size=3)
+
+        first = query_resource_graph(
+            self.credential, "Resources", max_results=4, session=session
+        )
+        self.assertEqual(first["count"], 4)
+        self.assertTrue(first["truncated"])
+        self.assertEqual(session.requests[-1]["options"]["$top"], 1)
+
+        rest = query_resource_graph(
+            self.credential,
+            "Resources",
+            skip_token=first["skip_token"],
+            session=session,
+        )
+        ids = [row["id"] for row in first["data"] + rest["data"]]
+        self.assertEqual(ids, [row["id"] for row in self.rows])
+
+    def test_error_response_raises_runtime_error(self):
+        """Test non-200 responses are surfaced as RuntimeError."""
+        session = FakeResourceGraphSession(self.rows, status_code=403)
+
+        with self.assertRaises(RuntimeError) as context:
+            query_resource_graph(self.credential, "Resources", session=session)
+
+        self.assertIn("resource_graph_query_failed", str(context.exception))
+
+    def test_invalid_max_results(self):
+        """Test max_results must be positive."""
+        with self.assertRaises(ValueError):
+            query_resource_graph(
+                self.credential, "Resources", max_results=0, session=MagicMock()
+            )
+
+
+class TestInventoryQueryBuilder(unittest.TestCase):
+    """Tests for KQL inventory query construction."""
+
+    def test_default_query_covers_vm_disk_nic(self):
+        """Test default inventory query targets VMs, disks and NICs."""
+        query = build_inventory_query()
+        self.assertIn("microsoft.compute/virtualmachines", query)
+        self.assertIn("microsoft.compute/disks", query)
+        self.assertIn("microsoft.network/networkinterfaces", query)
+        self.assertIn("order by id asc", query)
+
+    def test_invalid_kind_rejected(self):
+        """Test unknown resource kinds are rejected."""
+        with self.assertRaises(ValueError):
+            build_inventory_query(["storage"])
+
+    def test_projection_aliases_nested_fields(self):
+        """Test nested projection fields are aliased and id/type are kept."""
+        projection = build_projection(["name", "properties.hardwareProfile.vmSize"])
+        self.assertEqual(
+            projection,
+            "project id, type, name, "
+            "properties_hardwareProfile_vmSize = properties.hardwareProfile.vmSize",
+        )
+
+    def test_projection_rejects_kql_injection(self):
+        """Test projection fields cannot inject KQL operators."""
+        with self.assertRaises(ValueError):
+            build_projection(["name | take 1"])
+
+
+class TestAzureResourceGraphTools(unittest.TestCase):
+    """Tests for azure_resource_graph tool registration."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.mcp = FastMCP("test-server")
+
+        from tools import azure_resource_graph
+
+        azure_resource_graph.register_tools(self.mcp)
+
+    def test_tools_registered(self):
+        """Test Resource Graph tools are registered."""
+        tool_names = [
+            tool if isinstance(tool, str) else tool.name
+            for tool in asyncio.run(self.mcp.get_tools())
+        ]
+        self.assertIn("list_azure_inventory", tool_names)
+        self.assertIn("query_azure_resource_graph", tool_names)
+
+    @patch("tools.azure_resource_graph.query_resource_graph")
+    @patch("tools.azure_resource_graph.build_obo_credential")
+    @patch("tools.azure_resource_graph.get_current_user")
+    def test_list_azure_inventory_call(
+        self, mock_get_token, mock_build_obo, mock_query
+    ):
+        """Test list_azure_inventory exchanges the token and runs the query."""
+        mock_get_token.return_value = UserContext(
+            {"sub": "test-user-id"},
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+        mock_query.return_value = {
+            "data": [],
+            "count": 0,
+            "total_records": 0,
+            "skip_token": None,
+            "truncated": False,
+        }
+
+        result = asyncio.run(
+            self.mcp._tool_manager.call_tool(
+                "list_azure_inventory", {"subscription_ids": ["sub-a"]}
+            )
+        )
+
+        mock_build_obo.assert_called_once_with(
+            "test-user-token", "https://management.azure.com/.default"
+        )
+        self.assertEqual(mock_query.call_args.args[2], ["sub-a"])
+        self.assertEqual(result.structured_content["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
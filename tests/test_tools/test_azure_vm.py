@@ -3,6 +3,8 @@
 import asyncio
 import os
 import sys
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -11,6 +13,8 @@ from fastmcp import FastMCP
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
+from auth.claims_helpers import UserContext  # noqa: E402
+
 
 class TestAzureVMTools(unittest.TestCase):
     """Tests for azure_vm tools."""
@@ -32,7 +36,7 @@ class TestAzureVMTools(unittest.TestCase):
         ]
         self.assertIn("list_azure_vms", tool_names)
 
-    @patch("tools.azure_vm.get_access_token_and_context")
+    @patch("tools.azure_vm.get_current_user")
     @patch("tools.azure_vm.build_obo_credential")
     @patch("tools.azure_vm.ComputeManagementClient")
     def test_list_azure_vms_integration(
@@ -43,15 +47,11 @@ class TestAzureVMTools(unittest.TestCase):
     ):
         """Test list_azure_vms integration (mocked)."""
         # Mock access token context
-        mock_access_token = MagicMock()
-        mock_access_token.token = "test-user-token"
-        mock_get_token.return_value = (
-            mock_access_token,
-            ["User"],
-            "test-user-id",
-            "test-client-id",
-            ["user.read"],
-            {},
+        mock_get_token.return_value = UserContext(
+            {"sub": "test-user-id", "roles": ["User"]},
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
         )
 
         # Mock OBO credential
@@ -87,6 +87,80 @@ class TestAzureVMTools(unittest.TestCase):
         ]
         self.assertIn("list_azure_vms", tool_names)
 
+    def test_list_azure_vm_changes_registered(self):
+        """Test list_azure_vm_changes tool is registered."""
+        tool_names = [
+            tool if isinstance(tool, str) else tool.name
+            for tool in asyncio.run(self.mcp.get_tools())
+        ]
+        self.assertIn("list_azure_vm_changes", tool_names)
+
+    @patch("tools.azure_vm.get_current_user")
+    @patch("tools.azure_vm.build_obo_credential")
+    @patch("tools.azure_vm.ComputeManagementClient")
+    def test_list_azure_vm_changes_returns_delta(
+        self, mock_compute_client, mock_build_obo, mock_get_token
+    ):
+        """Test list_azure_vm_changes returns only changes since the token."""
+        mock_get_token.return_value = UserContext(
+            {"sub": "delta-user-id"},
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+        client = mock_compute_client.return_value
+        client.virtual_machines.list_all.return_value = [_vm("vm1"), _vm("vm2")]
+
+        first = asyncio.run(
+            self.mcp._tool_manager.call_tool(
+                "list_azure_vm_changes", {"subscription_id": "sub-delta"}
+            )
+        ).structured_content
+        self.assertTrue(first["full"])
+        self.assertEqual(len(first["added"]), 2)
+
+        client.virtual_machines.list_all.return_value = [_vm("vm1")]
+        second = asyncio.run(
+            self.mcp._tool_manager.call_tool(
+                "list_azure_vm_changes",
+                {
+                    "subscription_id": "sub-delta",
+                    "since_token": first["snapshot_token"],
+                },
+            )
+        ).structured_content
+        self.assertFalse(second["full"])
+        self.assertEqual(second["added"], [])
+        self.assertEqual(len(second["removed"]), 1)
+
+    @patch("tools.azure_vm.build_obo_credential")
+    @patch("tools.azure_vm.ComputeManagementClient")
+    def test_use_compute_client_reuses_client_per_identity(
+        self, mock_compute_client, mock_build_obo
+    ):
+        """Test clients are cached per (subscription, identity) and tokens refreshed."""
+        from tools.azure_vm import _compute_clients, use_compute_client
+
+        _compute_clients.clear()
+        mock_compute_client.side_effect = lambda *args, **kwargs: MagicMock()
+        mock_build_obo.side_effect = lambda *args: MagicMock()
+
+        with use_compute_client("token-1", ("tid", "oid-1"), "sub-reuse") as first:
+            pass
+        with use_compute_client("token-2", ("tid", "oid-1"), "sub-reuse") as second:
+            pass
+        with use_compute_client("token-3", ("tid", "oid-2"), "sub-reuse") as other_user:
+            pass
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other_user)
+        self.assertEqual(mock_compute_client.call_count, 2)
+        self.assertEqual(mock_build_obo.call_count, 2)
+        credential = mock_compute_client.call_args_list[0].args[0]
+        credential.update_user_assertion.assert_called_with("token-2")
+        _compute_clients.clear()
+        first.close.assert_called_once()
+
     @patch("tools.azure_vm.logging.getLogger")
     def test_azure_logger_debug_enabled(self, mock_get_logger):
         """Test that Azure SDK logging is controlled by logger level."""
@@ -102,5 +176,118 @@ class TestAzureVMTools(unittest.TestCase):
         self.assertIn("list_azure_vms", tool_names)
 
 
+def _status(code):
+    status = MagicMock()
+    status.code = code
+    return status
+
+
+def _vm(name, statuses=None):
+    vm = MagicMock()
+    vm.id = (
+        "/subscriptions/test/resourceGroups/rg1/providers/"
+        f"Microsoft.Compute/virtualMachines/{name}"
+    )
+    vm.name = name
+    vm.location = "eastus"
+    vm.type = "Microsoft.Compute/virtualMachines"
+    vm.tags = {}
+    if statuses is None:
+        vm.instance_view = None
+    else:
+        vm.instance_view.statuses = [_status(code) for code in statuses]
+    return vm
+
+
+class TestVmStatusEnrichment(unittest.TestCase):
+    """Tests for power/provisioning state enrichment helpers."""
+
+    def test_extract_vm_statuses(self):
+        """Test power and provisioning states are parsed from status codes."""
+        from tools.azure_vm import extract_vm_statuses
+
+        instance_view = MagicMock()
+        instance_view.statuses = [
+            _status("ProvisioningState/failed/InternalError"),
+            _status("PowerState/running"),
+        ]
+        self.assertEqual(extract_vm_statuses(instance_view), ("running", "failed"))
+        self.assertEqual(extract_vm_statuses(None), (None, None))
+
+    def test_parse_resource_group(self):
+        """Test resource group extraction from ARM resource IDs."""
+        from tools.azure_vm import parse_resource_group
+
+        self.assertEqual(
+            parse_resource_group(
+                "/subscriptions/s/resourceGroups/My-RG/providers/x/virtualMachines/vm"
+            ),
+            "My-RG",
+        )
+        self.assertIsNone(parse_resource_group("/subscriptions/s"))
+
+    def test_iter_vm_records_uses_status_only_listing(self):
+        """Test include_status uses the bulk statusOnly list in a single pass."""
+        from tools.azure_vm import iter_vm_records
+
+        client = MagicMock()
+        client.virtual_machines.list_all.return_value = [
+            _vm("vm1", ["ProvisioningState/succeeded", "PowerState/deallocated"])
+        ]
+
+        records = list(iter_vm_records(client, include_status=True))
+
+        client.virtual_machines.list_all.assert_called_once_with(status_only="true")
+        client.virtual_machines.instance_view.assert_not_called()
+        self.assertEqual(records[0]["power_state"], "deallocated")
+        self.assertEqual(records[0]["provisioning_state"], "succeeded")
+
+    def test_iter_vm_records_without_status(self):
+        """Test the default listing does not add status fields."""
+        from tools.azure_vm import iter_vm_records
+
+        client = MagicMock()
+        client.virtual_machines.list_all.return_value = [_vm("vm1")]
+
+        records = list(iter_vm_records(client))
+
+        client.virtual_machines.list_all.assert_called_once_with()
+        self.assertNotIn("power_state", records[0])
+
+    def test_fill_missing_statuses_bounded_concurrency(self):
+        """Test per-VM instance view fallback respects the concurrency limit."""
+        from tools.azure_vm import fill_missing_statuses
+
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def instance_view(resource_group, name):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.01)
+            with lock:
+                state["active"] -= 1
+            view = MagicMock()
+            view.statuses = [_status("PowerState/running")]
+            return view
+
+        client = MagicMock()
+        client.virtual_machines.instance_view.side_effect = instance_view
+        records = [
+            {"id": _vm(f"vm{i}").id, "name": f"vm{i}", "power_state": None}
+            for i in range(10)
+        ]
+        records.append({"id": _vm("ok").id, "name": "ok", "power_state": "stopped"})
+
+        count = asyncio.run(fill_missing_statuses(client, records, 3))
+
+        self.assertEqual(count, 10)
+        self.assertLessEqual(state["peak"], 3)
+        self.assertEqual(client.virtual_machines.instance_view.call_count, 10)
+        self.assertTrue(all(r["power_state"] for r in records))
+        self.assertEqual(records[-1]["power_state"], "stopped")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,249 @@
+"""Unit tests for tools.azure_vm_export module."""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from fastmcp import FastMCP
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from tools.azure_vm_export import (  # noqa: E402
+    export_vm_records,
+    identity_export_dir,
+    sweep_exports,
+)
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _records(count):
+    for i in range(count):
+        yield {
+            "id": f"/subscriptions/s/resourceGroups/rg/virtualMachines/vm{i}",
+            "name": f"vm{i}",
+            "location": "japaneast",
+            "type": "Microsoft.Compute/virtualMachines",
+            "tags": {"index": str(i)},
+        }
+
+
+class TestExportVmRecords(unittest.TestCase):
+    """Tests for export_vm_records."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmp.name, "exports")
+
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp.cleanup()
+
+    def test_ndjson_export(self):
+        """Test NDJSON export writes one row per VM and reports a checksum."""
+        result = export_vm_records(_records(25), self.output_dir, "vms-test")
+
+        self.assertEqual(result["row_count"], 25)
+        self.assertEqual(result["format"], "ndjson")
+        with open(result["path"], "rb") as f:
+            content = f.read()
+        self.assertEqual(result["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(result["size_bytes"], len(content))
+        lines = content.decode("utf-8").splitlines()
+        self.assertEqual(json.loads(lines[3])["name"], "vm3")
+        self.assertEqual(os.listdir(self.output_dir), ["vms-test.ndjson"])
+
+    def test_file_stem_is_sanitized(self):
+        """Test file names cannot escape the output directory."""
+        result = export_vm_records(_records(1), self.output_dir, "../../evil/name")
+        self.assertEqual(os.path.dirname(result["path"]), os.path.abspath(self.output_dir))
+
+    def test_invalid_format(self):
+        """Test unknown export formats are rejected."""
+        with self.assertRaises(ValueError):
+            export_vm_records(_records(1), self.output_dir, "vms", "xlsx")
+
+    def test_failed_export_leaves_no_partial_file(self):
+        """Test a failing feed does not leave temporary or partial files."""
+
+        def broken_feed():
+            yield from _records(2)
+            raise RuntimeError("page fetch failed")
+
+        with self.assertRaises(RuntimeError):
+            export_vm_records(broken_feed(), self.output_dir, "vms")
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet_export(self):
+        """Test Parquet export writes all rows."""
+        import pyarrow.parquet as pq
+
+        result = export_vm_records(
+            _records(12), self.output_dir, "vms-test", "parquet"
+        )
+
+        table = pq.read_table(result["path"])
+        self.assertEqual(table.num_rows, 12)
+        self.assertEqual(result["row_count"], 12)
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow is installed")
+    def test_parquet_export_without_pyarrow(self):
+        """Test Parquet export reports a clear error without pyarrow."""
+        with self.assertRaises(RuntimeError) as context:
+            export_vm_records(_records(1), self.output_dir, "vms", "parquet")
+        self.assertIn("parquet_export_unavailable", str(context.exception))
+
+
+class TestAzureVMExportTools(unittest.TestCase):
+    """Tests for azure_vm_export tool registration."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.mcp = FastMCP("test-server")
+
+        from tools import azure_vm_export
+
+        azure_vm_export.register_tools(self.mcp)
+
+    def test_export_azure_vms_registered(self):
+        """Test export_azure_vms tool is registered."""
+        tool_names = [
+            tool if isinstance(tool, str) else tool.name
+            for tool in asyncio.run(self.mcp.get_tools())
+        ]
+        self.assertIn("export_azure_vms", tool_names)
+
+    @patch("tools.azure_vm_export.use_compute_client")
+    @patch("tools.azure_vm_export.get_current_user")
+    def test_export_azure_vms_call(self, mock_get_token, mock_get_client):
+        """Test export_azure_vms writes into EXPORT_OUTPUT_DIR."""
+        mock_get_token.return_value = UserContext(
+            {"sub": "test-user-id"},
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+        vm = MagicMock()
+        vm.id = "/subscriptions/s/resourceGroups/rg/virtualMachines/vm1"
+        vm.name = "vm1"
+        vm.location = "eastus"
+        vm.type = "Microsoft.Compute/virtualMachines"
+        vm.tags = None
+        mock_get_client.return_value.__enter__.return_value.virtual_machines.list_all.return_value = [vm]
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch("tools.azure_vm_export.Settings") as mock_settings:
+                mock_settings.return_value.export_output_dir = output_dir
+                mock_settings.return_value.export_retention_seconds = 3600
+                result = asyncio.run(
+                    self.mcp._tool_manager.call_tool(
+                        "export_azure_vms", {"subscription_id": "sub-1"}
+                    )
+                ).structured_content
+
+            self.assertEqual(result["row_count"], 1)
+            user_dir = identity_export_dir(
+                output_dir, mock_get_token.return_value.identity
+            )
+            self.assertEqual(os.path.dirname(result["path"]), os.path.abspath(user_dir))
+            if os.name == "posix":
+                self.assertEqual(os.stat(user_dir).st_mode & 0o777, 0o700)
+
+    @patch("tools.azure_vm_export.use_compute_client")
+    @patch("tools.azure_vm_export.get_current_user")
+    def test_exports_in_same_second_do_not_overwrite(
+        self, mock_get_token, mock_get_client
+    ):
+        """Test two exports of one subscription in the same second keep both files."""
+        mock_get_token.return_value = UserContext(
+            {"sub": "test-user-id"}, token="test-user-token"
+        )
+        mock_get_client.return_value.__enter__.return_value.virtual_machines.list_all.return_value = []
+        frozen = time.gmtime(0)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch("tools.azure_vm_export.Settings") as mock_settings, patch(
+                "tools.azure_vm_export.time.gmtime", return_value=frozen
+            ):
+                mock_settings.return_value.export_output_dir = output_dir
+                mock_settings.return_value.export_retention_seconds = 3600
+                paths = [
+                    asyncio.run(
+                        self.mcp._tool_manager.call_tool(
+                            "export_azure_vms", {"subscription_id": "sub-1"}
+                        )
+                    ).structured_content["path"]
+                    for _ in range(2)
+                ]
+
+            self.assertNotEqual(paths[0], paths[1])
+            self.assertEqual(len(os.listdir(os.path.dirname(paths[0]))), 2)
+
+    @patch("tools.azure_vm_export.use_compute_client")
+    @patch("tools.azure_vm_export.get_current_user")
+    def test_users_get_separate_directories_and_old_files_are_swept(
+        self, mock_get_token, mock_get_client
+    ):
+        """Test each caller exports into its own directory and expired files go away."""
+        mock_get_client.return_value.__enter__.return_value.virtual_machines.list_all.return_value = []
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            with patch("tools.azure_vm_export.Settings") as mock_settings:
+                mock_settings.return_value.export_output_dir = output_dir
+                mock_settings.return_value.export_retention_seconds = 3600
+                paths = []
+                for subject in ("alice", "bob"):
+                    mock_get_token.return_value = UserContext(
+                        {"sub": subject, "tid": "tenant"}, token=f"{subject}-token"
+                    )
+                    paths.append(
+                        asyncio.run(
+                            self.mcp._tool_manager.call_tool(
+                                "export_azure_vms", {"subscription_id": "sub-1"}
+                            )
+                        ).structured_content["path"]
+                    )
+                    if subject == "alice":
+                        # alice のファイルを保持期間より古くする
+                        os.utime(paths[0], (0, 0))
+
+            self.assertNotEqual(os.path.dirname(paths[0]), os.path.dirname(paths[1]))
+            self.assertFalse(os.path.exists(paths[0]))
+            self.assertFalse(os.path.exists(os.path.dirname(paths[0])))
+            self.assertTrue(os.path.exists(paths[1]))
+
+
+class TestSweepExports(unittest.TestCase):
+    """Tests for sweep_exports."""
+
+    def test_removes_only_expired_files(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            user_dir = identity_export_dir(output_dir, ("tenant", "user"))
+            os.makedirs(user_dir)
+            old, new = (os.path.join(user_dir, name) for name in ("old", "new"))
+            for path in (old, new):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("{}\n")
+            os.utime(old, (1000, 1000))
+            os.utime(new, (5000, 5000))
+
+            self.assertEqual(sweep_exports(output_dir, 3600, now=5000), 1)
+            self.assertEqual(os.listdir(user_dir), ["new"])
+            # 保持期間が 0 以下の場合は削除しない
+            self.assertEqual(sweep_exports(output_dir, 0, now=10**9), 0)
+            self.assertTrue(os.path.exists(new))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Unit tests for tools.directory_lookup module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from auth.tool_authorization import (  # noqa: E402
+    ToolAuthorizationMiddleware,
+    ToolAuthorizer,
+)
+from common.directory_index import (  # noqa: E402
+    DeltaResyncRequired,
+    DirectoryIndex,
+    DirectorySync,
+)
+from tools import directory_lookup  # noqa: E402
+
+USERS = [
+    {"id": "id-1", "displayName": "Yamada Taro", "userPrincipalName": "taro@contoso.com"},
+    {"id": "id-2", "displayName": "Yamada Hanako", "userPrincipalName": "hanako@contoso.com"},
+    {"id": "id-3", "displayName": "Suzuki Ichiro", "userPrincipalName": "ichiro@contoso.com"},
+]
+
+
+class TestFetchDeltaPage(unittest.TestCase):
+    """Tests for the app-only delta page fetcher."""
+
+    def setUp(self):
+        directory_lookup._app_credential = MagicMock()
+
+    def tearDown(self):
+        directory_lookup._app_credential = None
+
+    @patch("tools.directory_lookup.send_graph_request")
+    def test_returns_page_json(self, mock_send):
+        mock_send.return_value = httpx.Response(200, json={"value": USERS})
+        page = asyncio.run(directory_lookup.fetch_delta_page("/users/delta"))
+        self.assertEqual(page["value"], USERS)
+
+    @patch("tools.directory_lookup.send_graph_request")
+    def test_gone_requires_resync(self, mock_send):
+        mock_send.return_value = httpx.Response(410, json={"error": {"code": "resyncRequired"}})
+        with self.assertRaises(DeltaResyncRequired):
+            asyncio.run(directory_lookup.fetch_delta_page("https://graph/delta"))
+
+
+class TestLookupDirectoryUsers(unittest.TestCase):
+    """Tests for the lookup_directory_users tool."""
+
+    def setUp(self):
+        self.mcp = FastMCP("test-server")
+        directory_lookup.register_tools(self.mcp)
+        self.sync = MagicMock(spec=DirectorySync)
+        self.sync.index = DirectoryIndex.build(USERS)
+        self.sync.wait_ready.return_value = True
+        patcher = patch("tools.directory_lookup.get_directory_sync", return_value=self.sync)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _call(self, args):
+        return asyncio.run(
+            self.mcp._tool_manager.call_tool("lookup_directory_users", args)
+        ).structured_content
+
+    def _settings(self, enabled=True):
+        settings = MagicMock()
+        settings.directory_sync_enabled = enabled
+        return settings
+
+    @patch("tools.directory_lookup.get_current_user")
+    @patch("tools.directory_lookup.Settings")
+    def test_prefix_and_exact_lookup(self, mock_settings, mock_get_token):
+        mock_settings.return_value = self._settings()
+        mock_get_token.return_value = UserContext(
+            {"sub": "user", "roles": ["Auditor"]}, client_id="client"
+        )
+
+        result = self._call({"query": "yamada"})
+        self.assertEqual(result["count"], 2)
+        self.assertEqual(result["indexed_users"], 3)
+        self.sync.ensure_started.assert_called()
+
+        result = self._call({"query": "ICHIRO@contoso.com", "mode": "exact"})
+        self.assertEqual(result["users"][0]["id"], "id-3")
+
+    @patch("tools.directory_lookup.get_current_user")
+    @patch("tools.directory_lookup.Settings")
+    def test_denied_without_policy_role(self, mock_settings, mock_get_token):
+        mock_settings.return_value = self._settings()
+        mock_get_token.return_value = UserContext(
+            {"sub": "user", "roles": ["Reader"]}, client_id="client"
+        )
+
+        with self.assertRaises(ToolError) as ctx:
+            self._call({"query": "yamada"})
+        self.assertIn("insufficient_role", str(ctx.exception))
+        self.sync.ensure_started.assert_not_called()
+
+    @patch("tools.directory_lookup.get_current_user")
+    def test_middleware_denies_before_execution(self, mock_get_token):
+        mock_get_token.return_value = UserContext({"sub": "user"}, client_id="client")
+        mcp = FastMCP("test-server")
+        mcp.add_middleware(ToolAuthorizationMiddleware(ToolAuthorizer()))
+        directory_lookup.register_tools(mcp)
+
+        async def call():
+            async with Client(mcp) as client:
+                await client.call_tool("lookup_directory_users", {"query": "yamada"})
+
+        with patch("auth.tool_authorization.get_current_user", mock_get_token):
+            with self.assertRaises(ToolError) as ctx:
+                asyncio.run(call())
+        self.assertIn("insufficient_role", str(ctx.exception))
+        self.sync.ensure_started.assert_not_called()
+
+    @patch("tools.directory_lookup.Settings")
+    def test_disabled(self, mock_settings):
+        mock_settings.return_value = self._settings(enabled=False)
+        with self.assertRaises(ToolError) as ctx:
+            self._call({"query": "yamada"})
+        self.assertIn("directory_index_disabled", str(ctx.exception))
+
+    @patch("tools.directory_lookup.get_current_user")
+    @patch("tools.directory_lookup.Settings")
+    def test_not_ready(self, mock_settings, mock_get_token):
+        mock_settings.return_value = self._settings()
+        mock_get_token.return_value = UserContext(
+            {"sub": "user", "roles": ["Admin"]}, client_id="client"
+        )
+        self.sync.wait_ready.return_value = False
+
+        with self.assertRaises(ToolError) as ctx:
+            self._call({"query": "yamada"})
+        self.assertIn("directory_index_not_ready", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+"""Unit tests for tools.graph_batch module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from fastmcp import FastMCP
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from tools import graph_batch  # noqa: E402
+
+
+class FakeBatchEndpoint:
+    """Stand-in for the Graph $batch endpoint.
+
+    `throttle` maps request id -> number of times it answers 429 before succeeding.
+    `not_found` lists request ids that always answer 404.
+    Requests whose dependency is not 2xx in the same call get 424.
+    """
+
+    def __init__(self, throttle=None, retry_after="2", not_found=()):
+        self.throttle = dict(throttle or {})
+        self.not_found = set(not_found)
+        self.retry_after = retry_after
+        self.payloads = []
+
+    async def __call__(self, payload):
+        self.payloads.append(payload)
+        statuses = {}
+        responses = []
+        for item in payload["requests"]:
+            request_id = item["id"]
+            if any(statuses.get(dep, 200) >= 400 for dep in item.get("dependsOn", [])):
+                status = 424
+                headers = {}
+                body = {"error": {"code": "FailedDependency"}}
+            elif request_id in self.not_found:
+                status = 404
+                headers = {}
+                body = {"error": {"code": "Request_ResourceNotFound"}}
+            elif self.throttle.get(request_id, 0) > 0:
+                self.throttle[request_id] -= 1
+                status = 429
+                headers = {"Retry-After": self.retry_after}
+                body = {"error": {"code": "TooManyRequests"}}
+            else:
+                status = 200
+                headers = {"Content-Type": "application/json"}
+                body = {"url": item["url"]}
+            statuses[request_id] = status
+            responses.append(
+                {"id": request_id, "status": status, "headers": headers, "body": body}
+            )
+        # Graph does not guarantee response order
+        return {"responses": list(reversed(responses))}
+
+
+class TestPlanBatches(unittest.TestCase):
+    """Tests for request normalization and batch planning."""
+
+    def test_assigns_ids_and_normalizes_urls(self):
+        """Missing ids get sequence numbers and urls get a leading slash."""
+        items = graph_batch.normalize_batch_requests(
+            [{"url": "me"}, {"id": "mgr", "url": "/me/manager", "depends_on": "1"}]
+        )
+        self.assertEqual(items[0], {"id": "1", "url": "/me", "depends_on": []})
+        self.assertEqual(items[1]["depends_on"], ["1"])
+
+    def test_rejects_absolute_url_and_unknown_dependency(self):
+        """Absolute urls and unknown dependencies are rejected."""
+        with self.assertRaises(ValueError):
+            graph_batch.normalize_batch_requests(
+                [{"url": "https://example.com/steal"}]
+            )
+        with self.assertRaises(ValueError):
+            graph_batch.normalize_batch_requests([{"url": "/me", "depends_on": ["x"]}])
+        with self.assertRaises(ValueError):
+            graph_batch.normalize_batch_requests([{"id": "a", "url": "/me"}] * 2)
+
+    def test_chunks_at_twenty(self):
+        """More than 20 requests are split into several batches."""
+        items = graph_batch.normalize_batch_requests(
+            [{"url": f"/users/{i}"} for i in range(45)]
+        )
+        batches = graph_batch.plan_batches(items)
+        self.assertEqual([len(batch) for batch in batches], [20, 20, 5])
+
+    def test_dependency_groups_stay_together(self):
+        """Requests linked by depends_on are never split across batches."""
+        requests = [{"id": f"u{i}", "url": f"/users/{i}"} for i in range(19)]
+        requests.append({"id": "me", "url": "/me"})
+        requests.append({"id": "mgr", "url": "/me/manager", "depends_on": ["me"]})
+        batches = graph_batch.plan_batches(
+            graph_batch.normalize_batch_requests(requests)
+        )
+
+        for batch in batches:
+            ids = {item["id"] for item in batch}
+            self.assertEqual("me" in ids, "mgr" in ids)
+            self.assertLessEqual(len(batch), graph_batch.MAX_BATCH_SIZE)
+
+    def test_dependency_group_too_large(self):
+        """A dependency chain longer than one batch is rejected."""
+        requests = [{"id": "0", "url": "/me"}]
+        requests += [
+            {"id": str(i), "url": "/me", "depends_on": [str(i - 1)]}
+            for i in range(1, 21)
+        ]
+        with self.assertRaises(ValueError):
+            graph_batch.plan_batches(graph_batch.normalize_batch_requests(requests))
+
+
+class TestRunBatchRequests(unittest.TestCase):
+    """Tests for batch execution with throttling retries."""
+
+    def setUp(self):
+        self.delays = []
+
+        async def fake_sleep(seconds):
+            self.delays.append(seconds)
+
+        self.sleep = fake_sleep
+
+    def test_results_in_input_order(self):
+        """Responses are returned per request in input order."""
+        endpoint = FakeBatchEndpoint()
+        result = asyncio.run(
+            graph_batch.run_batch_requests(
+                [{"id": "me", "url": "/me"}, {"id": "mgr", "url": "/me/manager"}],
+                endpoint,
+                sleep=self.sleep,
+            )
+        )
+
+        self.assertEqual([r["id"] for r in result["responses"]], ["me", "mgr"])
+        self.assertEqual(result["responses"][1]["body"], {"url": "/me/manager"})
+        self.assertEqual(result["batch_count"], 1)
+        self.assertEqual(result["request_count"], 1)
+        self.assertEqual(
+            endpoint.payloads[0]["requests"][0],
+            {"id": "me", "method": "GET", "url": "/me"},
+        )
+
+    def test_retries_only_throttled_items(self):
+        """Throttled items and their dependents are resent after Retry-After."""
+        endpoint = FakeBatchEndpoint(throttle={"me": 1}, retry_after="3")
+        result = asyncio.run(
+            graph_batch.run_batch_requests(
+                [
+                    {"id": "me", "url": "/me"},
+                    {"id": "mgr", "url": "/me/manager", "depends_on": ["me"]},
+                    {"id": "groups", "url": "/me/memberOf"},
+                ],
+                endpoint,
+                sleep=self.sleep,
+            )
+        )
+
+        self.assertEqual([r["status"] for r in result["responses"]], [200, 200, 200])
+        self.assertEqual(self.delays, [3.0])
+        self.assertEqual(len(endpoint.payloads), 2)
+        resent = endpoint.payloads[1]["requests"]
+        self.assertEqual([item["id"] for item in resent], ["me", "mgr"])
+        self.assertEqual(resent[1]["dependsOn"], ["me"])
+
+    def test_failed_dependency_not_retried_for_non_retryable_status(self):
+        """A 424 caused by a 404 dependency is returned instead of resent alone."""
+        endpoint = FakeBatchEndpoint(
+            throttle={"groups": 1}, retry_after="1", not_found={"user"}
+        )
+        result = asyncio.run(
+            graph_batch.run_batch_requests(
+                [
+                    {"id": "user", "url": "/users/missing"},
+                    {"id": "mgr", "url": "/users/x/manager", "depends_on": ["user"]},
+                    {"id": "reports", "url": "/me/people", "depends_on": ["mgr"]},
+                    {"id": "groups", "url": "/me/memberOf"},
+                ],
+                endpoint,
+                sleep=self.sleep,
+            )
+        )
+
+        self.assertEqual(
+            [r["status"] for r in result["responses"]], [404, 424, 424, 200]
+        )
+        self.assertEqual(len(endpoint.payloads), 2)
+        self.assertEqual(
+            [item["id"] for item in endpoint.payloads[1]["requests"]], ["groups"]
+        )
+
+    def test_gives_up_after_max_retries(self):
+        """Persistent throttling returns the last 429 after the retry budget."""
+        endpoint = FakeBatchEndpoint(throttle={"me": 10}, retry_after="120")
+        result = asyncio.run(
+            graph_batch.run_batch_requests(
+                [{"id": "me", "url": "/me"}],
+                endpoint,
+                max_retries=2,
+                sleep=self.sleep,
+            )
+        )
+
+        self.assertEqual(result["responses"][0]["status"], 429)
+        self.assertEqual(len(endpoint.payloads), 3)
+        self.assertEqual(self.delays, [graph_batch.MAX_RETRY_AFTER_SECONDS] * 2)
+
+
+class TestGraphBatchTool(unittest.TestCase):
+    """Tests for the graph_batch_get tool."""
+
+    def setUp(self):
+        self.mcp = FastMCP("test-server")
+        graph_batch.register_tools(self.mcp)
+
+    def test_tool_registered(self):
+        """Test that graph_batch_get is registered."""
+        tool_names = [
+            tool if isinstance(tool, str) else tool.name
+            for tool in asyncio.run(self.mcp.get_tools())
+        ]
+        self.assertIn("graph_batch_get", tool_names)
+
+    @patch("tools.graph_batch.send_graph_batch", new_callable=FakeBatchEndpoint)
+    @patch("tools.graph_batch.get_graph_credential")
+    @patch("tools.graph_batch.get_current_user")
+    def test_graph_batch_get(self, mock_get_token, mock_get_credential, endpoint):
+        """The tool uses the caller's OBO credential and returns per-request results."""
+        mock_get_token.return_value = UserContext(
+            {
+                "sub": "test-user-id",
+                "roles": ["User"],
+                "tid": "tenant",
+                "oid": "object",
+            },
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+
+        result = asyncio.run(
+            self.mcp._tool_manager.call_tool(
+                "graph_batch_get",
+                {"requests": [{"url": "/me"}, {"url": "/me/manager"}]},
+            )
+        ).structured_content
+
+        mock_get_credential.assert_called_once_with(
+            "test-user-token", ("tenant", "object")
+        )
+        self.assertEqual([r["status"] for r in result["responses"]], [200, 200])
+        self.assertEqual(result["batch_count"], 1)
+        self.assertEqual(len(endpoint.payloads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Unit tests for tools.graph_directory module."""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import httpx
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from tools import graph_directory  # noqa: E402
+
+BASE = graph_directory.GRAPH_BASE_URL
+
+
+class FakeGraphCollection:
+    """Serves `total` users in pages of `page_size`, linked by @odata.nextLink."""
+
+    def __init__(self, total, page_size):
+        self.total = total
+        self.page_size = page_size
+        self.requested = []
+
+    async def __call__(self, method, url, **kwargs):
+        self.requested.append(url)
+        start = int(url.split("$skiptoken=")[1]) if "$skiptoken=" in url else 0
+        end = min(start + self.page_size, self.total)
+        body = {"value": [{"id": f"user-{i}"} for i in range(start, end)]}
+        if end < self.total:
+            body["@odata.nextLink"] = f"{BASE}/users?$top={self.page_size}&$skiptoken={end}"
+        return httpx.Response(200, json=body)
+
+
+class TestCursor(unittest.TestCase):
+    """Tests for cursor encoding and validation."""
+
+    def test_round_trip(self):
+        url = f"{BASE}/groups/abc/members?$top=5"
+        self.assertEqual(
+            graph_directory.decode_cursor(graph_directory.encode_cursor(url, 3)),
+            (url, 3),
+        )
+
+    def test_rejects_foreign_hosts_and_paths(self):
+        for url in (
+            "https://evil.example.com/v1.0/users",
+            "http://graph.microsoft.com/v1.0/users",
+            f"{BASE}/me/messages",
+            "https://graph.microsoft.com/beta/users",
+        ):
+            with self.assertRaises(ValueError):
+                graph_directory.decode_cursor(graph_directory.encode_cursor(url))
+        with self.assertRaises(ValueError):
+            graph_directory.decode_cursor("not-a-cursor!")
+
+    def test_build_collection_url(self):
+        url = graph_directory.build_collection_url(
+            "/users", 10, "id, mail", "startswith(displayName,'a b')"
+        )
+        self.assertEqual(
+            url,
+            f"{BASE}/users?$top=10&$select=id,mail"
+            "&$filter=startswith(displayName,%27a%20b%27)",
+        )
+
+
+class TestCollectCollectionPage(unittest.TestCase):
+    """Tests for lazy nextLink following with caps."""
+
+    def _collect(self, fake, url, max_items, skip=0):
+        with patch("tools.graph_directory.send_graph_request", fake):
+            return asyncio.run(
+                graph_directory.collect_collection_page(url, max_items, skip)
+            )
+
+    def test_stops_fetching_at_cap(self):
+        """Pages beyond the cap are never requested."""
+        fake = FakeGraphCollection(total=1000, page_size=10)
+        result = self._collect(fake, f"{BASE}/users?$top=10", max_items=25)
+
+        self.assertEqual(result["count"], 25)
+        self.assertEqual(len(fake.requested), 3)
+        self.assertTrue(result["truncated"])
+
+    def test_cursor_resumes_mid_page_without_gaps(self):
+        """A cursor taken mid-page resumes exactly after the last returned item."""
+        fake = FakeGraphCollection(total=30, page_size=10)
+        first = self._collect(fake, f"{BASE}/users?$top=10", max_items=15)
+        url, skip = graph_directory.decode_cursor(first["cursor"])
+        second = self._collect(fake, url, max_items=100, skip=skip)
+
+        ids = [item["id"] for item in first["items"] + second["items"]]
+        self.assertEqual(ids, [f"user-{i}" for i in range(30)])
+        self.assertIsNone(second["cursor"])
+        self.assertFalse(second["truncated"])
+
+    def test_cursor_at_page_boundary_points_to_next_link(self):
+        """A cap on a page boundary yields the nextLink as cursor."""
+        fake = FakeGraphCollection(total=30, page_size=10)
+        result = self._collect(fake, f"{BASE}/users?$top=10", max_items=20)
+
+        self.assertEqual(len(fake.requested), 2)
+        self.assertEqual(
+            graph_directory.decode_cursor(result["cursor"]),
+            (f"{BASE}/users?$top=10&$skiptoken=20", 0),
+        )
+
+
+class TestGraphDirectoryTools(unittest.TestCase):
+    """Tests for the directory tools."""
+
+    def setUp(self):
+        self.mcp = FastMCP("test-server")
+        graph_directory.register_tools(self.mcp)
+
+    def _mock_context(self, mock_get_token):
+        mock_get_token.return_value = UserContext(
+            {
+                "sub": "test-user-id",
+                "roles": ["User"],
+                "tid": "tenant",
+                "oid": "object",
+            },
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+
+    def test_tools_registered(self):
+        tool_names = [
+            tool if isinstance(tool, str) else tool.name
+            for tool in asyncio.run(self.mcp.get_tools())
+        ]
+        for name in ("list_graph_users", "list_graph_groups", "list_graph_group_members"):
+            self.assertIn(name, tool_names)
+
+    @patch("tools.graph_directory.get_graph_credential")
+    @patch("tools.graph_directory.get_current_user")
+    def test_list_graph_group_members(self, mock_get_token, mock_get_credential):
+        """Members are requested with the page size capped by max_items."""
+        self._mock_context(mock_get_token)
+        fake = FakeGraphCollection(total=3, page_size=10)
+
+        with patch("tools.graph_directory.send_graph_request", fake):
+            result = asyncio.run(
+                self.mcp._tool_manager.call_tool(
+                    "list_graph_group_members",
+                    {"group_id": "g1", "select": "id", "max_items": 5},
+                )
+            ).structured_content
+
+        self.assertEqual(fake.requested, [f"{BASE}/groups/g1/members?$top=5&$select=id"])
+        self.assertEqual(result["count"], 3)
+        self.assertIsNone(result["cursor"])
+        mock_get_credential.assert_called_once_with(
+            "test-user-token", ("tenant", "object")
+        )
+
+    @patch("tools.graph_directory.get_current_user")
+    def test_invalid_cursor_rejected(self, mock_get_token):
+        """A forged cursor is rejected before any Graph call."""
+        self._mock_context(mock_get_token)
+        cursor = graph_directory.encode_cursor("https://evil.example.com/v1.0/users")
+
+        with self.assertRaises(ToolError) as ctx:
+            asyncio.run(
+                self.mcp._tool_manager.call_tool("list_graph_users", {"cursor": cursor})
+            )
+        self.assertIn("invalid_cursor", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Unit tests for tools.graph_photo module."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
+
+# Add src to path to allow imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from auth.claims_helpers import UserContext  # noqa: E402
+from common.photo_cache import PhotoCache  # noqa: E402
+from tools import graph_photo  # noqa: E402
+
+PHOTO = b"\xff\xd8\xff" + b"\x00" * 200_000
+
+
+class FakePhotoEndpoint:
+    """Serves photo metadata with a media ETag and the photo bytes."""
+
+    def __init__(self, etag="W/\"etag-1\""):
+        self.etag = etag
+        self.requested = []
+
+    async def __call__(self, method, url, **kwargs):
+        self.requested.append(url)
+        if url.endswith("/$value"):
+            return httpx.Response(
+                200, content=PHOTO, headers={"Content-Type": "image/jpeg"}
+            )
+        return httpx.Response(200, json={"@odata.mediaEtag": self.etag, "width": 96})
+
+
+class TestGetGraphMePhoto(unittest.TestCase):
+    """Tests for the get_graph_me_photo tool."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        graph_photo._photo_cache = PhotoCache(tmp.name, max_bytes=1024 * 1024)
+        self.addCleanup(setattr, graph_photo, "_photo_cache", None)
+
+        self.mcp = FastMCP("test-server")
+        graph_photo.register_tools(self.mcp)
+
+        for target, value in (
+            (
+                "tools.graph_photo.get_current_user",
+                UserContext(
+                    {"sub": "sub", "tid": "t", "oid": "o"},
+                    token="test-user-token",
+                    client_id="client",
+                ),
+            ),
+            ("tools.graph_photo.get_graph_credential", MagicMock()),
+        ):
+            patcher = patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _call(self, args):
+        return asyncio.run(self.mcp._tool_manager.call_tool("get_graph_me_photo", args))
+
+    @patch("tools.graph_photo.send_graph_request", new_callable=FakePhotoEndpoint)
+    def test_downloads_once_then_serves_from_cache(self, fake):
+        first = self._call({"size": "96x96"})
+        second = self._call({"size": "96x96"})
+
+        self.assertEqual(first.content[0].type, "image")
+        self.assertEqual(first.content[0].mimeType, "image/jpeg")
+        self.assertEqual(second.content[0].data, first.content[0].data)
+        self.assertEqual(
+            fake.requested,
+            ["/me/photos/96x96", "/me/photos/96x96/$value", "/me/photos/96x96"],
+        )
+
+    @patch("tools.graph_photo.send_graph_request", new_callable=FakePhotoEndpoint)
+    def test_changed_etag_downloads_again(self, fake):
+        self._call({})
+        fake.etag = "W/\"etag-2\""
+        self._call({})
+
+        self.assertEqual(fake.requested.count("/me/photo/$value"), 2)
+        self.assertEqual(graph_photo.get_photo_cache().stats()["entries"], 1)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ToolError) as ctx:
+            self._call({"size": "1x1"})
+        self.assertIn("invalid_size", str(ctx.exception))
+
+    @patch("tools.graph_photo.send_graph_request")
+    def test_missing_photo_is_wrapped(self, mock_send):
+        mock_send.return_value = httpx.Response(
+            404, json={"error": {"code": "ImageNotFound", "message": "not found"}}
+        )
+        with self.assertRaises(ToolError) as ctx:
+            self._call({})
+        self.assertIn("graph_api_call_failed", str(ctx.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,11 +6,16 @@ import sys
 import unittest
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 from fastmcp import FastMCP
+from fastmcp.exceptions import ToolError
 
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
+from auth.claims_helpers import UserContext  # noqa: E402
+from common.graph_cache import GraphResponseCache  # noqa: E402
+
 
 class TestGraphUserTools(unittest.TestCase):
     """Tests for graph_user tools."""
@@ -23,6 +28,8 @@ class TestGraphUserTools(unittest.TestCase):
         from tools import graph_user
 
         graph_user.register_tools(self.mcp)
+        graph_user._profile_cache.clear()
+        self.graph_user = graph_user
 
     def test_tools_registered(self):
         """Test that Graph tools are registered."""
@@ -50,42 +57,174 @@ class TestGraphUserTools(unittest.TestCase):
         ]
         self.assertIn("get_graph_me_with_select_query", tool_names)
 
-    @patch("tools.graph_user.get_access_token_and_context")
-    @patch("tools.graph_user.build_obo_credential")
-    @patch("tools.graph_user.GraphServiceClient")
+    def _mock_context(self, mock_get_token):
+        mock_get_token.return_value = UserContext(
+            {
+                "sub": "test-user-id",
+                "roles": ["User"],
+                "tid": "test-tenant-id",
+                "oid": "test-object-id",
+            },
+            token="test-user-token",
+            client_id="test-client-id",
+            scopes=["user.read"],
+        )
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
     def test_get_graph_me_integration(
-        self, mock_graph_client, mock_build_obo, mock_get_token
+        self,
+        mock_get_credential,
+        mock_get_token,
+        mock_send,
     ):
-        """Test get_graph_me integration (mocked)."""
-        # Mock access token context
-        mock_access_token = MagicMock()
-        mock_access_token.token = "test-user-token"
-        mock_get_token.return_value = (
-            mock_access_token,
-            ["User"],
-            "test-user-id",
-            "test-client-id",
-            ["user.read"],
-            {},
+        """Test get_graph_me returns Graph JSON using the caller's credential."""
+        self._mock_context(mock_get_token)
+        mock_get_credential.return_value = MagicMock()
+        mock_send.return_value = httpx.Response(
+            200, json={"id": "test-object-id", "displayName": "Test"}
         )
 
-        # Mock OBO credential
-        mock_credential = MagicMock()
-        mock_build_obo.return_value = mock_credential
+        result = asyncio.run(self.mcp._tool_manager.call_tool("get_graph_me", {}))
 
-        # Mock Graph client response
-        mock_client_instance = MagicMock()
-        mock_me = MagicMock()
-        mock_me.get = AsyncMock(return_value=MagicMock())
-        mock_client_instance.me = mock_me
-        mock_graph_client.return_value = mock_client_instance
+        mock_get_credential.assert_called_once_with(
+            "test-user-token", ("test-tenant-id", "test-object-id")
+        )
+        mock_send.assert_awaited_once_with("GET", "/me", headers=None)
+        self.assertEqual(
+            result.structured_content,
+            {"id": "test-object-id", "displayName": "Test"},
+        )
 
-        # Verify tool is registered
-        tool_names = [
-            tool if isinstance(tool, str) else tool.name
-            for tool in asyncio.run(self.mcp.get_tools())
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_get_graph_me_with_select_query(
+        self,
+        mock_get_credential,
+        mock_get_token,
+        mock_send,
+    ):
+        """Test select fields are sent as $select."""
+        self._mock_context(mock_get_token)
+        mock_send.return_value = httpx.Response(200, json={"displayName": "Test"})
+
+        result = asyncio.run(
+            self.mcp._tool_manager.call_tool(
+                "get_graph_me_with_select_query", {"select": " displayName , mail "}
+            )
+        )
+
+        mock_send.assert_awaited_once_with(
+            "GET", "/me?$select=displayName,mail", headers=None
+        )
+        self.assertEqual(result.structured_content, {"displayName": "Test"})
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_invalid_select_rejected_before_obo(
+        self, mock_get_credential, mock_get_token, mock_send
+    ):
+        """Unknown select fields fail locally without OBO or Graph calls."""
+        self._mock_context(mock_get_token)
+
+        with self.assertRaises(ToolError) as ctx:
+            asyncio.run(
+                self.mcp._tool_manager.call_tool(
+                    "get_graph_me_with_select_query", {"select": "id,notAField"}
+                )
+            )
+
+        self.assertIn("invalid_select_fields", str(ctx.exception))
+        mock_get_credential.assert_not_called()
+        mock_send.assert_not_awaited()
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_get_graph_me_error(self, mock_get_credential, mock_get_token, mock_send):
+        """Test Graph error responses are reported as graph_api_call_failed."""
+        self._mock_context(mock_get_token)
+        mock_send.return_value = httpx.Response(
+            403,
+            json={"error": {"code": "Authorization_RequestDenied", "message": "no"}},
+        )
+
+        with self.assertRaises(ToolError) as ctx:
+            asyncio.run(self.mcp._tool_manager.call_tool("get_graph_me", {}))
+
+        self.assertIn("graph_api_call_failed", str(ctx.exception))
+        self.assertIn("Authorization_RequestDenied", str(ctx.exception))
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_profile_cached_per_canonical_select(
+        self, mock_get_credential, mock_get_token, mock_send
+    ):
+        """Equivalent select sets share a cache entry and skip OBO and Graph."""
+        self._mock_context(mock_get_token)
+        mock_send.return_value = httpx.Response(200, json={"id": "1", "mail": "m"})
+
+        for select in ("mail,id", "id, mail", "mail,id,mail"):
+            result = asyncio.run(
+                self.mcp._tool_manager.call_tool(
+                    "get_graph_me_with_select_query", {"select": select}
+                )
+            )
+            self.assertEqual(result.structured_content, {"id": "1", "mail": "m"})
+
+        mock_send.assert_awaited_once_with("GET", "/me?$select=id,mail", headers=None)
+        mock_get_credential.assert_called_once()
+        self.assertEqual(self.graph_user._profile_cache.stats()["hits"], 2)
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_use_cache_false_bypasses_cache(
+        self, mock_get_credential, mock_get_token, mock_send
+    ):
+        """use_cache=False always calls Graph."""
+        self._mock_context(mock_get_token)
+        mock_send.return_value = httpx.Response(200, json={"id": "1"})
+
+        asyncio.run(self.mcp._tool_manager.call_tool("get_graph_me", {}))
+        asyncio.run(
+            self.mcp._tool_manager.call_tool("get_graph_me", {"use_cache": False})
+        )
+
+        self.assertEqual(mock_send.await_count, 2)
+
+    @patch("tools.graph_user.send_graph_request", new_callable=AsyncMock)
+    @patch("tools.graph_user.get_current_user")
+    @patch("tools.graph_user.get_graph_credential")
+    def test_expired_entry_revalidated_with_etag(
+        self, mock_get_credential, mock_get_token, mock_send
+    ):
+        """An expired entry with an ETag is revalidated with If-None-Match."""
+        self._mock_context(mock_get_token)
+        now = [0.0]
+        cache = GraphResponseCache(ttl_seconds=60, clock=lambda: now[0])
+        mock_send.side_effect = [
+            httpx.Response(200, json={"id": "1"}, headers={"ETag": 'W/"v1"'}),
+            httpx.Response(304),
         ]
-        self.assertIn("get_graph_me", tool_names)
+
+        with patch("tools.graph_user._profile_cache", cache):
+            asyncio.run(self.mcp._tool_manager.call_tool("get_graph_me", {}))
+            now[0] += 120
+            result = asyncio.run(
+                self.mcp._tool_manager.call_tool("get_graph_me", {})
+            )
+
+        self.assertEqual(result.structured_content, {"id": "1"})
+        self.assertEqual(
+            mock_send.await_args_list[1].kwargs["headers"],
+            {"If-None-Match": 'W/"v1"'},
+        )
+        self.assertEqual(cache.stats()["revalidated"], 1)
 
 
 if __name__ == "__main__":
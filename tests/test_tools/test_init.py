@@ -47,7 +47,7 @@ class TestToolsPackage(unittest.TestCase):
 
         # Test registration
         mcp = FastMCP("test-server")
-        register_all_tools(mcp)
+        register_all_tools(mcp, lazy=False)
 
         # Verify register_tools was called
         mock_userinfo_module.register_tools.assert_called_once_with(mcp)
@@ -73,7 +73,7 @@ class TestToolsPackage(unittest.TestCase):
 
         # Test registration (should not raise)
         mcp = FastMCP("test-server")
-        register_all_tools(mcp)  # Should complete without error
+        register_all_tools(mcp, lazy=False)  # Should complete without error
 
 
 if __name__ == "__main__":
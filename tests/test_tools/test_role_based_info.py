@@ -1,6 +1,7 @@
 """Unit tests for tools.role_based_info module."""
 
 import asyncio
+import json
 import os
 import sys
 import unittest
@@ -11,6 +12,8 @@ from fastmcp import FastMCP
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
+from auth.claims_helpers import UserContext  # noqa: E402
+
 
 class TestRoleBasedInfoTools(unittest.TestCase):
     """Tests for role_based_info tools."""
@@ -35,15 +38,11 @@ class TestRoleBasedInfoTools(unittest.TestCase):
         self.assertIn("get_sensitive_data", tool_names)
         self.assertIn("list_available_resources", tool_names)
 
-    @patch("tools.role_based_info.get_user_context")
+    @patch("tools.role_based_info.get_current_user")
     def test_get_company_info_public_access(self, mock_get_user_context):
         """Test get_company_info with no roles (public access)."""
-        mock_get_user_context.return_value = (
-            [],  # roles
-            "test-user-id",  # user_id
-            "test-client-id",  # client_id
-            ["user.read"],  # scopes
-            {},  # claims
+        mock_get_user_context.return_value = UserContext(
+            {"sub": "test-user-id"}, client_id="test-client-id", scopes=["user.read"]
         )
 
         # Verify tool is registered
@@ -53,19 +52,15 @@ class TestRoleBasedInfoTools(unittest.TestCase):
         ]
         self.assertIn("get_company_info", tool_names)
 
-    @patch("tools.role_based_info.get_user_context")
-    @patch("tools.role_based_info.has_role")
-    def test_get_company_info_with_roles(self, mock_has_role, mock_get_user_context):
+    @patch("tools.role_based_info.get_current_user")
+    def test_get_company_info_with_roles(self, mock_get_user_context):
         """Test get_company_info with various roles."""
         # Mock user with User role
-        mock_get_user_context.return_value = (
-            ["User"],  # roles
-            "test-user-id",  # user_id
-            "test-client-id",  # client_id
-            ["user.read"],  # scopes
-            {},  # claims
+        mock_get_user_context.return_value = UserContext(
+            {"sub": "test-user-id", "roles": ["User"]},
+            client_id="test-client-id",
+            scopes=["user.read"],
         )
-        mock_has_role.return_value = False
 
         # Verify tool is registered
         tool_names = [
@@ -90,6 +85,123 @@ class TestRoleBasedInfoTools(unittest.TestCase):
         ]
         self.assertIn("list_available_resources", tool_names)
 
+    def _call_company_info(self, roles):
+        with patch("tools.role_based_info.get_current_user") as mock_context:
+            mock_context.return_value = UserContext(
+                {"sub": "test-user-id", "roles": roles}, client_id="client"
+            )
+            return asyncio.run(
+                self.mcp._tool_manager.call_tool("get_company_info", {})
+            )
+
+    def _company_info(self, roles):
+        return json.loads(self._call_company_info(roles).content[0].text)
+
+    def test_get_company_info_levels(self):
+        """Each role set maps to its access level and sections."""
+        cases = [
+            ([], "public", set()),
+            (["User"], "user", {"public_info"}),
+            (["Auditor"], "auditor", {"public_info", "audit_info"}),
+            (["Admin"], "admin", {"public_info", "audit_info", "confidential_info"}),
+        ]
+        optional = {"public_info", "audit_info", "confidential_info"}
+        for roles, level, sections in cases:
+            with self.subTest(roles=roles):
+                result = self._company_info(roles)
+                self.assertEqual(result["access_level"], level)
+                self.assertEqual(result["user_roles"], roles)
+                self.assertEqual(result["company_name"], "Contoso Corporation")
+                self.assertEqual(optional & set(result), sections)
+
+    def test_get_company_info_returns_text_only(self):
+        """Only the pre-serialized text is returned, with the caller's roles spliced in."""
+        result = self._call_company_info(["Admin", "User"])
+        text = json.loads(result.content[0].text)
+
+        self.assertIsNone(result.structured_content)
+        self.assertEqual(list(text)[:2], ["access_level", "user_roles"])
+        self.assertEqual(text["user_roles"], ["Admin", "User"])
+
+    def test_get_company_info_payload_is_read_only(self):
+        """The cached payload sections cannot be modified by callers."""
+        from tools import role_based_info
+
+        payload = asyncio.run(role_based_info.load_company_payload("admin"))
+        with self.assertRaises(TypeError):
+            payload.sections["audit_info"]["employee_count"] = 0
+        with self.assertRaises(TypeError):
+            payload.sections["company_name"] = "Other"
+        self.assertEqual(
+            self._company_info(["Admin"])["audit_info"]["employee_count"], 2847
+        )
+
+    def _call(self, name, roles):
+        with patch("tools.role_based_info.get_current_user") as mock_context:
+            mock_context.return_value = UserContext(
+                {"sub": "test-user-id", "roles": roles}, client_id="client"
+            )
+            return asyncio.run(self.mcp._tool_manager.call_tool(name, {}))
+
+    def test_list_available_resources_matches_company_info_level(self):
+        """Resources listed for each role set follow the same policy as get_company_info."""
+        cases = [
+            ([], {"public"}),
+            (["User"], {"public", "user"}),
+            (["Auditor"], {"public", "user", "auditor"}),
+            (["Admin"], {"public", "user", "auditor", "admin"}),
+        ]
+        for roles, levels in cases:
+            with self.subTest(roles=roles):
+                result = self._call("list_available_resources", roles).structured_content
+                listed = {r["access_level"] for r in result["accessible_resources"]}
+                self.assertEqual(listed, levels)
+                self.assertEqual(result["user_info"]["roles"], roles)
+
+    def test_get_sensitive_data_requires_admin(self):
+        """get_sensitive_data is denied unless the policy grants the tool."""
+        from fastmcp.exceptions import ToolError
+
+        with self.assertRaises(ToolError):
+            self._call("get_sensitive_data", ["Auditor"])
+
+        result = self._call("get_sensitive_data", ["Admin"]).structured_content
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["required_role"], "Admin")
+
+    def test_get_company_info_reads_pluggable_data_source(self):
+        """A replaced data source is used and is only asked for the caller's level."""
+        from common.company_data import (
+            SAMPLE_COMPANY,
+            StaticCompanyDataSource,
+            set_company_data_source,
+        )
+        from tools import role_based_info
+
+        levels = []
+
+        class RecordingSource(StaticCompanyDataSource):
+            def fetch_sections(self, level):
+                levels.append(level)
+                return super().fetch_sections(level)
+
+        # 差し替え前のデータソースのペイロードをキャッシュしておく
+        before = self._company_info(["User"])
+        self.assertEqual(before["company_name"], "Contoso Corporation")
+        set_company_data_source(
+            RecordingSource(dict(SAMPLE_COMPANY, company_name="Fabrikam"))
+        )
+        try:
+            first = self._company_info(["User"])
+            self._call_company_info(["Other"])
+        finally:
+            set_company_data_source(None)
+            role_based_info._payload_cache.clear()
+
+        self.assertEqual(first["company_name"], "Fabrikam")
+        self.assertNotIn("audit_info", first)
+        self.assertEqual(levels, ["user"])
+
 
 if __name__ == "__main__":
     unittest.main()
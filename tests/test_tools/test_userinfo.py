@@ -1,8 +1,10 @@
 """Unit tests for tools.userinfo module."""
 
 import asyncio
+import json
 import os
 import sys
+import time
 import unittest
 from unittest.mock import patch
 
@@ -11,6 +13,8 @@ from fastmcp import FastMCP
 # Add src to path to allow imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
 
+from auth.claims_helpers import UserContext  # noqa: E402
+
 
 class TestUserInfoTools(unittest.TestCase):
     """Tests for userinfo tools."""
@@ -23,8 +27,9 @@ class TestUserInfoTools(unittest.TestCase):
         from tools import userinfo
 
         userinfo.register_tools(self.mcp)
+        userinfo._projections.clear()
 
-    @patch("tools.userinfo.get_user_context")
+    @patch("tools.userinfo.get_current_user")
     def test_get_user_info_success(self, mock_get_user_context):
         """Test get_user_info returns raw access-token claims only."""
         mock_claims = {
@@ -36,12 +41,8 @@ class TestUserInfoTools(unittest.TestCase):
             "amr": ["pwd", "mfa"],
             "xms_ftd": "test-ftd-claim",
         }
-        mock_get_user_context.return_value = (
-            ["Admin", "User"],
-            "test-user-id",
-            "test-client-id",
-            ["user.read", "files.read"],
-            mock_claims,
+        mock_get_user_context.return_value = UserContext(
+            mock_claims, client_id="test-client-id", scopes=["user.read", "files.read"]
         )
 
         tool_names = [
@@ -58,6 +59,87 @@ class TestUserInfoTools(unittest.TestCase):
         self.assertNotIn("subject", payload)
         self.assertNotIn("all_claims", payload)
 
+    def _call(self, user, **args):
+        with patch("tools.userinfo.get_current_user", return_value=user):
+            return asyncio.run(self.mcp._tool_manager.call_tool("get_user_info", args))
+
+    def _user(self, token="token-a", exp=None):
+        claims = {
+            "sub": "test-user-id",
+            "tid": "test-tenant-id",
+            "name": "Test User",
+            "roles": ["Admin"],
+            "scp": "user.read",
+            "uti": "nonce",
+            "xms_ftd": "test-ftd-claim",
+        }
+        if exp is not None:
+            claims["exp"] = exp
+        return UserContext(claims, token=token, client_id="test-client-id")
+
+    def _count_full_claims(self):
+        return patch.object(
+            UserContext,
+            "full_claims",
+            autospec=True,
+            side_effect=lambda context: dict(context.claims),
+        )
+
+    def test_get_user_info_projections(self):
+        """fields and profile select claims; the text matches structured content."""
+        user = self._user()
+        cases = [
+            ({"profile": "identity"}, {"sub", "tid", "name"}),
+            ({"profile": "authz"}, {"tid", "roles", "scp"}),
+            ({"fields": ["uti", "missing"]}, {"uti"}),
+            ({"fields": ["uti"], "profile": "identity"}, {"sub", "tid", "name", "uti"}),
+            ({"profile": "full"}, set(user.claims)),
+        ]
+        for args, names in cases:
+            with self.subTest(args=args):
+                result = self._call(user, **args)
+                self.assertEqual(set(result.structured_content), names)
+                self.assertEqual(
+                    json.loads(result.content[0].text), result.structured_content
+                )
+
+    def test_get_user_info_projection_cached_per_token(self):
+        """Repeated calls with the same token reuse the serialized projection."""
+        from tools.userinfo import CLAIM_PROFILES
+
+        with self._count_full_claims() as full_claims:
+            first = self._call(self._user(), profile="authz")
+            # リクエストごとに作り直した UserContext でも、同じトークンなら再利用する。
+            # 同じクレームの組は、指定の方法や順序が違っても同じ結果を再利用する
+            second = self._call(self._user(), fields=sorted(CLAIM_PROFILES["authz"]))
+            self._call(self._user(token="token-b"), profile="authz")
+
+        self.assertIs(first.content[0].text, second.content[0].text)
+        self.assertEqual(full_claims.call_count, 2)
+
+    def test_get_user_info_projection_expires_with_token(self):
+        """Projections are dropped at the token's exp; token-less contexts are not cached."""
+        from tools import userinfo
+
+        with self._count_full_claims() as full_claims:
+            self._call(self._user(exp=time.time() - 1), profile="authz")
+            self._call(self._user(exp=time.time() - 1), profile="authz")
+            self._call(self._user(token=""), profile="authz")
+            self._call(self._user(token=""), profile="authz")
+
+        self.assertEqual(full_claims.call_count, 4)
+        self.assertEqual(len(userinfo._projections), 0)
+
+    def test_get_user_info_invalid_arguments(self):
+        """Unknown profiles and empty field names are rejected."""
+        from fastmcp.exceptions import ToolError
+
+        for args in ({"profile": "everything"}, {"fields": [" "]}):
+            with self.subTest(args=args):
+                with self.assertRaises(ToolError) as ctx:
+                    self._call(self._user(), **args)
+                self.assertIn("invalid_claim_", str(ctx.exception))
+
     def test_tool_registered(self):
         """Test that get_user_info tool is registered."""
         tool_names = [